@@ -1,3 +1,5 @@
+import logging
+
 from shopkeeperPython.game import GameManager, Character
 
 def main():
@@ -56,4 +58,6 @@ def main():
             print(f"\nGame Info:\n{result_message}")
 
 if __name__ == "__main__":
+    # Show the game's player messages and warnings on the console (see game/game_log.py).
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     main()
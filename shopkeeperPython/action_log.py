@@ -0,0 +1,232 @@
+"""
+Per-character action logs: event-sourced character saves for the web app.
+
+Instead of writing a character's whole save after every action, the app can append
+the action to the character's log (an entry as recorded by game/recording.py: kind,
+name, details, random stream counter, result type, plus the wall-clock time "at" and
+the save "version" it was committed with) and only write a full snapshot of the save
+every `snapshot_every` entries. The state after any entry is the latest snapshot at or
+before it with the entries since replayed through replay_recording(), which is how a
+character is restored after a crash and how it can be rolled back to an earlier point.
+
+Layout of one character's log (<directory>/<user>/<character name>/):
+
+    snapshot-0000000000.json   save data before the first entry
+    events-0000000000.jsonl    entries 1 to 50, one JSON object per line
+    snapshot-0000000050.json   save data after entry 50
+    events-0000000050.jsonl    entries 51, 52, ...
+
+Everything is append-only: entries are never rewritten and old snapshots are kept,
+so the log doubles as an audit trail.
+"""
+import json
+import os
+import threading
+import time
+
+from shopkeeperPython.game.recording import RECORDING_VERSION, make_entry, replay_recording
+from shopkeeperPython.storage import fsync_directory, atomic_write_json, path_component
+
+SNAPSHOT_PREFIX = 'snapshot-'
+EVENTS_PREFIX = 'events-'
+
+
+class ActionLogRecorder:
+    """
+    Recorder for GameManager.action_log. Entries are only collected here; the app
+    commits them to the CharacterActionLog together with the save they belong to,
+    so a request whose save is refused leaves nothing in the log.
+    """
+
+    def __init__(self):
+        self.pending = []
+
+    def record(self, kind: str, name: str, details: dict | None, rng_counter: int, result, haggling_session: dict = None) -> dict:
+        entry = make_entry(kind, name, details, rng_counter, result, haggling_session)
+        entry["at"] = time.time()
+        self.pending.append(entry)
+        return entry
+
+    def take(self) -> list[dict]:
+        """Returns the collected entries and starts over."""
+        entries, self.pending = self.pending, []
+        return entries
+
+
+class CharacterActionLog:
+    """
+    The snapshots and entries of one character.
+
+    Args:
+        directory (str): The character's log directory. Created on the first write.
+        fsync (bool, optional): fsync every append. Defaults to True.
+    """
+
+    def __init__(self, directory: str, fsync: bool = True):
+        self.directory = directory
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self) -> None:
+        """Reads the latest snapshot and entry numbers from disk, e.g. after another process appended."""
+        seqs = self.snapshot_seqs()
+        self.snapshot_seq = seqs[-1] if seqs else None
+        self.seq = self.snapshot_seq + len(self._read_events(self.snapshot_seq, repair=True)) if seqs else 0
+
+    def _path(self, prefix: str, seq: int, suffix: str) -> str:
+        return os.path.join(self.directory, f"{prefix}{seq:010d}{suffix}")
+
+    def snapshot_seqs(self) -> list[int]:
+        """Entry numbers the snapshots were taken at, in order."""
+        try:
+            filenames = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(int(filename[len(SNAPSHOT_PREFIX):-len('.json')]) for filename in filenames
+                      if filename.startswith(SNAPSHOT_PREFIX) and filename.endswith('.json'))
+
+    def _read_events(self, snapshot_seq: int, repair: bool = False) -> list[dict]:
+        """
+        The entries after a snapshot. A crash mid-append can leave a torn last line;
+        everything before it is intact, and with repair=True the torn tail is cut off
+        so later appends don't end up behind it.
+        """
+        path = self._path(EVENTS_PREFIX, snapshot_seq, '.jsonl')
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except FileNotFoundError:
+            return []
+        entries = []
+        valid_length = 0
+        for line in data.split(b'\n')[:-1]: # Only newline-terminated lines are complete
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+            valid_length += len(line) + 1
+        if repair and valid_length < len(data):
+            with open(path, 'r+b') as f:
+                f.truncate(valid_length)
+        return entries
+
+    @property
+    def entries_since_snapshot(self) -> int:
+        return self.seq - self.snapshot_seq if self.snapshot_seq is not None else self.seq
+
+    def write_snapshot(self, save_data: dict) -> None:
+        """Writes the save data as of the current entry and starts a new events file."""
+        with self._lock:
+            os.makedirs(self.directory, exist_ok=True)
+            atomic_write_json(self._path(SNAPSHOT_PREFIX, self.seq, '.json'), save_data, indent=None)
+            self.snapshot_seq = self.seq
+
+    def append(self, entries: list[dict]) -> int:
+        """Appends entries after the current one and returns the new entry number."""
+        if not entries:
+            return self.seq
+        if self.snapshot_seq is None:
+            raise ValueError("An action log needs a snapshot before its first entry.")
+        with self._lock:
+            path = self._path(EVENTS_PREFIX, self.snapshot_seq, '.jsonl')
+            new_file = not os.path.exists(path)
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write(''.join(json.dumps(entry, separators=(',', ':')) + '\n' for entry in entries))
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            if new_file and self.fsync:
+                fsync_directory(self.directory)
+            self.seq += len(entries)
+            return self.seq
+
+    def read(self, seq: int = None) -> dict:
+        """
+        A recording (see recording.py) that ends at entry `seq` (default: the last one):
+        the latest snapshot at or before it and the entries after that snapshot.
+        """
+        seq = self.seq if seq is None else seq
+        base = max((snapshot_seq for snapshot_seq in self.snapshot_seqs() if snapshot_seq <= seq), default=None)
+        if base is None:
+            raise ValueError(f"No snapshot at or before entry {seq} in '{self.directory}'.")
+        with open(self._path(SNAPSHOT_PREFIX, base, '.json'), encoding='utf-8') as f:
+            snapshot = json.load(f)
+        entries = self._read_events(base)[:seq - base] # Later snapshots are past seq, so base's file has them all
+        return {"version": RECORDING_VERSION, "snapshot": snapshot, "entries": entries, "seq": base + len(entries)}
+
+    def restore(self, seq: int = None) -> dict:
+        """Save data of the character after entry `seq` (default: the last one), rebuilt by replaying."""
+        recording = self.read(seq)
+        if not recording["entries"]:
+            return dict(recording["snapshot"], action_seq=recording["seq"])
+        game_manager, divergences = replay_recording(recording)
+        if divergences:
+            print(f"Warning: Replaying '{self.directory}' diverged at entries {[index for index, _, _ in divergences]}.")
+        last_entry = recording["entries"][-1]
+        save_data = game_manager.character_snapshot(saved_at=last_entry.get("at"))
+        save_data["action_seq"] = recording["seq"]
+        save_data["version"] = last_entry.get("version", save_data.get("version", 0)) # The save's, not the snapshot's
+        return save_data
+
+
+class ActionLogStore:
+    """
+    Opens and caches the action logs of every character under one directory.
+
+    Args:
+        directory (str): Root directory of the logs.
+        snapshot_every (int, optional): Entries between full snapshots.
+        fsync (bool, optional): Passed to each CharacterActionLog.
+        shared (bool, optional): Other processes append to the same logs (under the
+            caller's cross-process lock), so every commit first re-reads the log's position.
+    """
+
+    def __init__(self, directory: str, snapshot_every: int = 50, fsync: bool = True, shared: bool = False):
+        self.directory = directory
+        self.snapshot_every = max(1, snapshot_every)
+        self.fsync = fsync
+        self.shared = shared
+        self._logs = {}
+        self._lock = threading.Lock()
+
+    def open(self, username: str, character_name: str) -> CharacterActionLog:
+        key = (username, character_name)
+        with self._lock:
+            log = self._logs.get(key)
+            if log is None:
+                directory = os.path.join(self.directory, path_component(username), path_component(character_name))
+                log = self._logs[key] = CharacterActionLog(directory, fsync=self.fsync)
+            return log
+
+    def forget_user(self, username: str) -> None:
+        """Drops the user's cached logs, e.g. after another process appended to them; they are reopened from disk."""
+        with self._lock:
+            for key in [key for key in self._logs if key[0] == username]:
+                del self._logs[key]
+
+    def commit(self, username: str, previous_save: dict, new_save: dict, entries: list[dict]) -> bool:
+        """
+        Logs the entries that turned previous_save into new_save and sets new_save's
+        "action_seq". Each entry carries new_save's "version", so a restored save
+        continues from the version it was logged at. The first commit (or one after the log and the save went out of
+        step, e.g. a save restored from a backup) snapshots previous_save first.
+
+        Returns:
+            bool: True if new_save was written as a snapshot, i.e. is due to be saved in full.
+        """
+        log = self.open(username, new_save["name"])
+        if self.shared:
+            log.reload()
+        if log.snapshot_seq is None or previous_save.get("action_seq", 0) != log.seq:
+            if log.snapshot_seq is not None:
+                print(f"Warning: Action log of '{new_save['name']}' is at entry {log.seq} but the save is at "
+                      f"{previous_save.get('action_seq', 0)}. Starting from a new snapshot.")
+            log.write_snapshot(previous_save)
+        for entry in entries:
+            entry["version"] = new_save.get("version", 0)
+        new_save["action_seq"] = log.append(entries)
+        if log.entries_since_snapshot >= self.snapshot_every:
+            log.write_snapshot(new_save)
+            return True
+        return False
@@ -1,37 +1,85 @@
-print("DEBUG: Top of app.py", flush=True)
-from flask import Flask, render_template, request, redirect, url_for, session, flash, get_flashed_messages
+from flask import Flask, render_template, request, redirect, url_for, session, flash, get_flashed_messages, jsonify
+import contextlib
+import gc
 import io
 import json
+import re
+import atexit
+import threading
+import time
 import os # Added for environment variables
-import datetime
-import shutil
 
 from shopkeeperPython.game.game_manager import GameManager
 from shopkeeperPython.game.character import Character
 from shopkeeperPython.game.shop import Shop # Ensure Shop is imported
+from shopkeeperPython.game.rng import GameRandom
+from shopkeeperPython.game.offline_progress import OFFLINE_GAME_HOURS_PER_REAL_HOUR
 # Item is implicitly used by Character.to_dict/from_dict if inventory has items.
 # Pylint might not see this if no direct instantiation of Item happens in app.py.
 # For now, let's trust Pylint's static analysis; if runtime errors occur, it can be re-added.
 # from shopkeeperPython.game.item import Item
 from shopkeeperPython.game.game_manager import HEMLOCK_HERBS, BORIN_ITEMS # Added import
-from shopkeeperPython.game.g_event import GAME_EVENTS
+from shopkeeperPython.game.g_event import GAME_EVENT_INDEX
+from shopkeeperPython.game import game_log
+from shopkeeperPython.game_sessions import GameSession, GameSessionCache
+from shopkeeperPython.server_sessions import MemorySessionStore, SQLiteSessionStore, ServerSideSessionInterface
+from shopkeeperPython.ui_delta import snapshot_ui_state, diff_ui_state, stack_keys
+from shopkeeperPython.action_log import ActionLogRecorder, ActionLogStore
+from shopkeeperPython.storage import CharacterNameIndex, UserLookupIndex, JournalArchive, JsonStorage, SQLiteStorage, WriteBehindStorage, StorageCoordinator, copy_storage, character_delta
 
 from flask_dance.contrib.google import make_google_blueprint # Removed google
 from flask_dance.consumer import oauth_authorized, oauth_error # Added for signals
 from werkzeug.security import generate_password_hash, check_password_hash
 
 
+# Routes are registered on this app at import; create_app() does the rest of the setup.
 app = Flask(__name__)
 
 # Attempt to load secret key from environment variable
 SECRET_KEY = os.environ.get('FLASK_SECRET_KEY')
-if SECRET_KEY:
-    app.secret_key = SECRET_KEY
-    print("INFO: Flask secret key loaded from FLASK_SECRET_KEY environment variable.")
-else:
-    app.secret_key = 'dev_secret_key_!@#$%' # Default for development
-    print("WARNING: FLASK_SECRET_KEY environment variable not set. Using default development secret key.")
-    print("WARNING: For production, set a strong, random FLASK_SECRET_KEY environment variable.")
+
+def configure_secret_key():
+    if SECRET_KEY:
+        app.secret_key = SECRET_KEY
+        print("INFO: Flask secret key loaded from FLASK_SECRET_KEY environment variable.")
+    else:
+        app.secret_key = 'dev_secret_key_!@#$%' # Default for development
+        print("WARNING: FLASK_SECRET_KEY environment variable not set. Using default development secret key.")
+        print("WARNING: For production, set a strong, random FLASK_SECRET_KEY environment variable.")
+
+# --- Multiple Worker Processes ---
+# Set SHOPKEEPER_MULTI_PROCESS=1 when running several worker processes (e.g. gunicorn --workers N).
+# Workers then coordinate every save through lock and stamp files (see StorageCoordinator in
+# storage.py) and reload whatever another worker saved; saves are written inside the request.
+MULTI_PROCESS = os.environ.get('SHOPKEEPER_MULTI_PROCESS', '0').lower() in ('1', 'true', 'yes')
+LOCK_DIR = os.environ.get('SHOPKEEPER_LOCK_DIR', 'locks.d') # Lock and stamp files shared by the workers
+
+# --- Session Storage ---
+# Session data (action results, pending haggle/event state...) is kept on the server and the
+# cookie only carries an opaque id. 'memory' suits a single process, 'sqlite' is shared by
+# several worker processes, 'cookie' keeps Flask's default signed-cookie sessions.
+SESSION_BACKEND = os.environ.get('SHOPKEEPER_SESSION_BACKEND', 'memory').lower()
+SESSION_TTL = int(os.environ.get('SHOPKEEPER_SESSION_TTL', 86400)) # Seconds of inactivity before a session expires
+SESSION_DB_FILE = os.environ.get('SHOPKEEPER_SESSION_DB_PATH', 'sessions.db')
+
+if SESSION_BACKEND == 'memory' and MULTI_PROCESS:
+    print("WARNING: Memory sessions are not shared between worker processes. Using 'sqlite' sessions instead.")
+    SESSION_BACKEND = 'sqlite'
+
+def init_session_interface():
+    """Opens this process's session store (an SQLite connection can't be shared with forked workers)."""
+    if SESSION_BACKEND == 'memory':
+        app.session_interface = ServerSideSessionInterface(MemorySessionStore(), ttl=SESSION_TTL)
+    elif SESSION_BACKEND == 'sqlite':
+        app.session_interface = ServerSideSessionInterface(SQLiteSessionStore(SESSION_DB_FILE), ttl=SESSION_TTL)
+    elif SESSION_BACKEND != 'cookie':
+        print(f"WARNING: Unknown session backend '{SESSION_BACKEND}'. Using Flask's cookie sessions.")
+
+def regenerate_session():
+    """Gives the session a new id on login and logout. Flask's cookie sessions carry no id, so there is nothing to do."""
+    regenerate = getattr(app.session_interface, 'regenerate', None)
+    if regenerate is not None:
+        regenerate(session)
 
 # --- Google OAuth Configuration ---
 # IMPORTANT: Set these environment variables in your shell before running the app.
@@ -52,251 +100,554 @@ GOOGLE_OAUTH_CLIENT_SECRET = os.environ.get("GOOGLE_OAUTH_CLIENT_SECRET")
 # print(f"DEBUG: GOOGLE_OAUTH_CLIENT_SECRET: {'SET' if GOOGLE_OAUTH_CLIENT_SECRET else 'NOT SET'}")
 # For OAuth debugging, consider using app.logger.debug(...) or app.logger.info(...)
 
-if not GOOGLE_OAUTH_CLIENT_ID or not GOOGLE_OAUTH_CLIENT_SECRET:
-    print("WARNING: Google OAuth Client ID or Secret is not set in environment variables.")
-    print("Google Login will not work. Please set GOOGLE_OAUTH_CLIENT_ID and GOOGLE_OAUTH_CLIENT_SECRET.")
-    # google_bp will not be registered if creds are missing.
-else:
-    google_bp = make_google_blueprint(
-        client_id=GOOGLE_OAUTH_CLIENT_ID,
-        client_secret=GOOGLE_OAUTH_CLIENT_SECRET,
-        scope=[
-            "openid",
-            "https://www.googleapis.com/auth/userinfo.email",
-            "https://www.googleapis.com/auth/userinfo.profile"
-        ],
-        # redirect_url="/login/google/authorized" # This is the default if not specified with this url_prefix
-        # The redirect URI in Google Cloud Console must be: http://localhost:5001/login/google/authorized
-        # (or https if using https)
-    )
-    app.register_blueprint(google_bp, url_prefix="/login")
-
-    # --- OAuth Signal Handlers (defined only if google_bp is created) ---
-    @oauth_authorized.connect_via(google_bp)
-    def google_logged_in(blueprint, token):
-        if not token:
-            flash("Failed to log in with Google.", "error")
+def init_google_login():
+    """Registers the Google login blueprint and its signal handlers, if OAuth credentials are set."""
+    if not GOOGLE_OAUTH_CLIENT_ID or not GOOGLE_OAUTH_CLIENT_SECRET:
+        print("WARNING: Google OAuth Client ID or Secret is not set in environment variables.")
+        print("Google Login will not work. Please set GOOGLE_OAUTH_CLIENT_ID and GOOGLE_OAUTH_CLIENT_SECRET.")
+        # google_bp will not be registered if creds are missing.
+    else:
+        google_bp = make_google_blueprint(
+            client_id=GOOGLE_OAUTH_CLIENT_ID,
+            client_secret=GOOGLE_OAUTH_CLIENT_SECRET,
+            scope=[
+                "openid",
+                "https://www.googleapis.com/auth/userinfo.email",
+                "https://www.googleapis.com/auth/userinfo.profile"
+            ],
+            # redirect_url="/login/google/authorized" # This is the default if not specified with this url_prefix
+            # The redirect URI in Google Cloud Console must be: http://localhost:5001/login/google/authorized
+            # (or https if using https)
+        )
+        app.register_blueprint(google_bp, url_prefix="/login")
+
+        # --- OAuth Signal Handlers (defined only if google_bp is created) ---
+        @oauth_authorized.connect_via(google_bp)
+        def google_logged_in(blueprint, token):
+            if not token:
+                flash("Failed to log in with Google.", "error")
+                return redirect(url_for("display_game_output"))
+
+            resp = blueprint.session.get("/oauth2/v2/userinfo")
+            if not resp.ok:
+                msg = "Failed to fetch user info from Google."
+                flash(msg, "error")
+                return redirect(url_for("display_game_output"))
+
+            google_user_info = resp.json()
+            google_id = str(google_user_info.get("id"))
+            email = google_user_info.get("email")
+            name = google_user_info.get("name")
+            # picture = google_user_info.get("picture") # Optional, not used currently
+
+            # 1. Check if user exists by google_id
+            # print(f"DEBUG_GOOGLE_LOGIN: Before calling find_user_by_google_id. Full users dict: {users}") # Consider app.logger.debug()
+            username = find_user_by_google_id(google_id)
+
+            if username: # Existing Google-linked user
+                regenerate_session()
+                session['username'] = username
+                session.pop('selected_character_slot', None)
+                display_name = users[username].get('display_name_google') or users[username].get('email_google') or name
+                flash(f"Welcome back, {display_name}!", "success")
+                return redirect(url_for("display_game_output"))
+
+            # 2. Optional: Check if user exists by email (for linking or conflict warning)
+            # For this implementation, we'll prioritize google_id. If a user with this email
+            # exists but their google_id doesn't match, we'll create a new distinct user for this Google account.
+            # More complex linking logic could be added here if desired.
+            # existing_user_by_email = find_user_by_email(email)
+            # if existing_user_by_email and users[existing_user_by_email].get('google_id') != google_id:
+            #     flash(f"An account with email {email} already exists. Please log in using your original method or contact support if you wish to link accounts.", "warning")
+            #     return redirect(url_for("display_game_output"))
+
+
+            # 3. Create new game user if no existing link found
+            internal_username_base = email.lower().split('@')[0] if email else "googleuser"
+            internal_username = internal_username_base
+            counter = 1
+            while internal_username in users: # Ensure username is unique
+                internal_username = f"{internal_username_base}{counter}"
+                counter += 1
+
+            users[internal_username] = {
+                'password': None, # No password for Google-only users
+                'google_id': google_id,
+                'email_google': email,
+                'display_name_google': name
+            }
+            save_users(internal_username)
+
+            user_characters.setdefault(internal_username, [])
+            graveyard.setdefault(internal_username, [])
+            save_user_characters(internal_username)
+            save_graveyard(internal_username)
+
+            regenerate_session()
+            session['username'] = internal_username
+            session.pop('selected_character_slot', None)
+            flash(f"Logged in successfully with Google as {name}! Your game username is {internal_username}.", "success")
             return redirect(url_for("display_game_output"))
 
-        resp = blueprint.session.get("/oauth2/v2/userinfo")
-        if not resp.ok:
-            msg = "Failed to fetch user info from Google."
+        @oauth_error.connect_via(google_bp)
+        def google_error(blueprint, error, error_description=None, error_uri=None):
+            msg = (
+                "OAuth error from {name}! "
+                "error={error} description={description} uri={uri}"
+            ).format(
+                name=blueprint.name,
+                error=error,
+                description=error_description,
+                uri=error_uri,
+            )
             flash(msg, "error")
             return redirect(url_for("display_game_output"))
 
-        google_user_info = resp.json()
-        google_id = str(google_user_info.get("id"))
-        email = google_user_info.get("email")
-        name = google_user_info.get("name")
-        # picture = google_user_info.get("picture") # Optional, not used currently
-
-        # 1. Check if user exists by google_id
-        # print(f"DEBUG_GOOGLE_LOGIN: Before calling find_user_by_google_id. Full users dict: {users}") # Consider app.logger.debug()
-        username = find_user_by_google_id(google_id)
-
-        if username: # Existing Google-linked user
-            session['username'] = username
-            session.pop('selected_character_slot', None)
-            display_name = users[username].get('display_name_google') or users[username].get('email_google') or name
-            flash(f"Welcome back, {display_name}!", "success")
-            return redirect(url_for("display_game_output"))
-
-        # 2. Optional: Check if user exists by email (for linking or conflict warning)
-        # For this implementation, we'll prioritize google_id. If a user with this email
-        # exists but their google_id doesn't match, we'll create a new distinct user for this Google account.
-        # More complex linking logic could be added here if desired.
-        # existing_user_by_email = find_user_by_email(email)
-        # if existing_user_by_email and users[existing_user_by_email].get('google_id') != google_id:
-        #     flash(f"An account with email {email} already exists. Please log in using your original method or contact support if you wish to link accounts.", "warning")
-        #     return redirect(url_for("display_game_output"))
-
-
-        # 3. Create new game user if no existing link found
-        internal_username_base = email.lower().split('@')[0] if email else "googleuser"
-        internal_username = internal_username_base
-        counter = 1
-        while internal_username in users: # Ensure username is unique
-            internal_username = f"{internal_username_base}{counter}"
-            counter += 1
-
-        users[internal_username] = {
-            'password': None, # No password for Google-only users
-            'google_id': google_id,
-            'email_google': email,
-            'display_name_google': name
-        }
-        save_users()
-
-        user_characters.setdefault(internal_username, [])
-        graveyard.setdefault(internal_username, [])
-        save_user_characters()
-        save_graveyard()
-
-        session['username'] = internal_username
-        session.pop('selected_character_slot', None)
-        flash(f"Logged in successfully with Google as {name}! Your game username is {internal_username}.", "success")
-        return redirect(url_for("display_game_output"))
-
-    @oauth_error.connect_via(google_bp)
-    def google_error(blueprint, error, error_description=None, error_uri=None):
-        msg = (
-            "OAuth error from {name}! "
-            "error={error} description={description} uri={uri}"
-        ).format(
-            name=blueprint.name,
-            error=error,
-            description=error_description,
-            uri=error_uri,
-        )
-        flash(msg, "error")
-        return redirect(url_for("display_game_output"))
-
 
 # --- Constants ---
 MAX_CHARS_PER_USER = 2
 USERS_FILE = 'users.json'
 CHARACTERS_FILE = 'user_characters.json'
 GRAVEYARD_FILE = 'graveyard.json' # New file path for graveyard
+CHARACTERS_DIR = 'user_characters.d' # One JSON shard per user, replaces CHARACTERS_FILE
+GRAVEYARD_DIR = 'graveyard.d' # One JSON shard per user, replaces GRAVEYARD_FILE
+STORAGE_BACKEND = os.environ.get('SHOPKEEPER_STORAGE_BACKEND', 'json') # 'json' or 'sqlite'
+CHARACTERS_WAL_FILE = 'user_characters.wal' # Append-only log of character saves (JSON backend)
+CHARACTER_NAMES_FILE = 'character_names.idx' # Persisted name index, so startup skips the full scan (JSON backend)
+WAL_CHECKPOINT_EVERY = int(os.environ.get('SHOPKEEPER_WAL_CHECKPOINT_EVERY', 100)) # Saves between shard rewrites
+WAL_FSYNC_BATCH = int(os.environ.get('SHOPKEEPER_WAL_FSYNC_BATCH', 1)) # Saves per fsync; 1 = every save is durable
+WRITE_BEHIND_MS = int(os.environ.get('SHOPKEEPER_WRITE_BEHIND_MS', 200)) # Max age of an unflushed save; 0 = save inside the request
+WRITE_BEHIND_MAX_PENDING = int(os.environ.get('SHOPKEEPER_WRITE_BEHIND_MAX_PENDING', 64)) # Dirty users that force an early flush
+SQLITE_DB_FILE = os.environ.get('SHOPKEEPER_DB_PATH', 'shopkeeper.db')
+GAME_SESSION_CACHE_SIZE = int(os.environ.get('SHOPKEEPER_SESSION_CACHE_SIZE', 256)) # Hydrated sessions kept between requests; 0 = off
+RECORDING_DIR = os.environ.get('SHOPKEEPER_RECORDING_DIR') # If set, every hydrated session records its actions here for replay
+ACTION_LOG_DIR = os.environ.get('SHOPKEEPER_ACTION_LOG_DIR') # If set, actions are appended to per-character logs and full saves are only written at snapshots
+ACTION_LOG_SNAPSHOT_EVERY = int(os.environ.get('SHOPKEEPER_ACTION_LOG_SNAPSHOT_EVERY', 50)) # Logged actions between full snapshots
+JOURNAL_ARCHIVE_DIR = os.environ.get('SHOPKEEPER_JOURNAL_ARCHIVE_DIR', 'journal_archive.d') # Compressed segments of old journal entries
+JOURNAL_INLINE_ENTRIES = int(os.environ.get('SHOPKEEPER_JOURNAL_INLINE_ENTRIES', 100)) # Newest entries always kept in the character save
+JOURNAL_SEGMENT_ENTRIES = int(os.environ.get('SHOPKEEPER_JOURNAL_SEGMENT_ENTRIES', 200)) # Entries per archive segment
+JOURNAL_PAGE_SIZE = 20 # Entries rendered on the Journal tab and returned by /api/journal by default
+JOURNAL_MAX_PAGE_SIZE = 100
 
 # --- User and Character Data Stores (Global for simplicity) ---
 users = {}
 user_characters = {}
 graveyard = {}
+character_names = CharacterNameIndex() # Every taken character name (living and dead), case-folded
+user_lookup = UserLookupIndex() # google_id / Google email -> username, kept in step by save_users()
+# (username, slot) -> hydrated Character/GameManager. Sessions idle for a game hour are rebuilt,
+# which runs the shop's offline catch-up (only setup_for_character does).
+game_session_cache = GameSessionCache(max_size=GAME_SESSION_CACHE_SIZE, max_idle=3600.0 / OFFLINE_GAME_HOURS_PER_REAL_HOUR)
+CHARACTER_SAVE_LOCK_STRIPES = 64
+# Saves of one slot are ordered by the stripe its (username, slot) hashes to; other slots rarely share it.
+character_save_locks = [threading.Lock() for _ in range(CHARACTER_SAVE_LOCK_STRIPES)]
 
 # --- Helper Functions for User Lookup ---
 def find_user_by_google_id(google_id_to_find):
-    # print(f"DEBUG_FIND_USER: Entered function. Full users dict: {users}") # Consider app.logger.debug()
-    for username, user_data in users.items():
-        # print(f"DEBUG_FIND_USER: Iterating. username='{username}', type(user_data)='{type(user_data)}'") # Consider app.logger.debug()
-        if not isinstance(user_data, dict):
-            # print(f"DEBUG_FIND_USER: CRITICAL! user_data for '{username}' is {user_data}") # Consider app.logger.error() or warning
-            pass # Added pass to make this a valid block
-        if user_data.get('google_id') == google_id_to_find: # Unindented this line
-            return username # Unindented this line
+    username = user_lookup.find_by_google_id(google_id_to_find)
+    # Double-check against the record itself in case it was edited without going through save_users().
+    if username in users and users[username].get('google_id') == google_id_to_find:
+        return username
     return None
 
 def find_user_by_email(email_to_find):
-    for username, user_data in users.items():
-        if user_data.get('email_google') == email_to_find: # Check against Google email
-            return username
+    username = user_lookup.find_by_email(email_to_find)
+    if username in users and users[username].get('email_google') == email_to_find: # Check against Google email
+        return username
     return None
 
 # --- Data Persistence Functions ---
+def create_storage(backend_name=None):
+    """Builds the storage backend selected by SHOPKEEPER_STORAGE_BACKEND ('json' or 'sqlite')."""
+    backend_name = (backend_name or STORAGE_BACKEND).lower()
+    json_storage = JsonStorage(USERS_FILE, CHARACTERS_DIR, GRAVEYARD_DIR,
+                               legacy_characters_file=CHARACTERS_FILE, legacy_graveyard_file=GRAVEYARD_FILE,
+                               wal_file=None if MULTI_PROCESS else CHARACTERS_WAL_FILE, # The log is private to one process
+                               checkpoint_every=WAL_CHECKPOINT_EVERY, fsync_batch_size=WAL_FSYNC_BATCH,
+                               names_file=CHARACTER_NAMES_FILE)
+    if backend_name == 'json':
+        return json_storage
+    if backend_name == 'sqlite':
+        sqlite_storage = SQLiteStorage(SQLITE_DB_FILE)
+        if sqlite_storage.is_empty() and not json_storage.is_empty():
+            print(f"INFO: Importing existing JSON save data into {SQLITE_DB_FILE}.")
+            copy_storage(json_storage, sqlite_storage)
+        return sqlite_storage
+    print(f"WARNING: Unknown storage backend '{backend_name}'. Falling back to JSON files.")
+    return json_storage
+
+storage = None # Opened per process by init_process()
+journal_archive = JournalArchive(JOURNAL_ARCHIVE_DIR)
+action_logs = ActionLogStore(ACTION_LOG_DIR, snapshot_every=ACTION_LOG_SNAPSHOT_EVERY, shared=MULTI_PROCESS) if ACTION_LOG_DIR else None
+coordinator = StorageCoordinator(LOCK_DIR) if MULTI_PROCESS else None
+USERS_RECORD = 'users' # Coordinator keys of the shared documents; each user's own records use user_record_key()
+NAMES_RECORD = 'names'
+
+def user_record_key(username):
+    return f"user:{username}"
+
+@contextlib.contextmanager
+def coordinated_write(key):
+    """
+    Holds a record's cross-worker lock around a save and bumps its stamp afterwards,
+    so other workers reload it. Does nothing unless MULTI_PROCESS is on.
+    """
+    if coordinator is None:
+        yield
+        return
+    with coordinator.lock(key):
+        yield
+        coordinator.bump(key)
+
+def refresh_users():
+    """Reloads the users document if another worker saved it. Returns True if it did."""
+    if coordinator is None or not coordinator.refresh(USERS_RECORD):
+        return False
+    users.clear()
+    users.update(storage.load_users())
+    user_lookup.rebuild(users)
+    return True
+
+def refresh_character_names():
+    """Reloads the character name index if another worker took a name."""
+    if coordinator is None or not coordinator.refresh(NAMES_RECORD):
+        return
+    persisted_names = storage.load_character_names()
+    if persisted_names is not None:
+        character_names.replace(persisted_names)
+
+def refresh_user_records(username):
+    """Reloads a user's slots and graveyard if another worker saved them, dropping anything cached from the old copies."""
+    if coordinator is None or not coordinator.refresh(user_record_key(username)):
+        return
+    characters = storage.load_characters(username)
+    if characters is None:
+        user_characters.pop(username, None)
+    else:
+        user_characters[username] = characters
+    graveyard_entries = storage.load_graveyard(username)
+    if graveyard_entries is None:
+        graveyard.pop(username, None)
+    else:
+        graveyard[username] = graveyard_entries
+    game_session_cache.invalidate_user(username)
+    if action_logs is not None:
+        action_logs.forget_user(username) # Another worker may have appended to the user's logs
+        if characters is not None:
+            restore_user_from_action_logs(username, characters) # Storage only has the slots as of their last snapshot
+
 def load_data():
-    global users, user_characters, graveyard # Add graveyard to globals
+    if coordinator is not None:
+        coordinator.mark_all_seen() # Before loading: anything saved from here on is reloaded later
+    loaded_users_data = storage.load_users()
 
+    # Data migration check
+    # Operate on a copy if direct modification during iteration is problematic,
+    # or build a new dictionary. Here, modifying loaded_users_data directly is fine.
     users_migrated = False # Flag to track if migration occurred
-    try:
-        with open(USERS_FILE, 'r', encoding='utf-8') as f:
-            loaded_users_data = json.load(f)
-
-        # Data migration check
-        # Operate on a copy if direct modification during iteration is problematic,
-        # or build a new dictionary. Here, modifying loaded_users_data directly is fine.
-        for username, user_data in loaded_users_data.items():
-            if isinstance(user_data, str):
-                print(f"Migrating user data for user '{username}' to new format.")
-                loaded_users_data[username] = {
-                    "password": generate_password_hash(user_data), # Hash the original string password
-                    "google_id": None,
-                    "email_google": None,
-                    "display_name_google": None
-                }
-                users_migrated = True
-            # No need for the elif isinstance(user_data, dict) ... as it does nothing.
-
-        users.clear()
-        users.update(loaded_users_data)
-
-        if users_migrated:
-            save_users()
-
-
-    except FileNotFoundError:
-        print(f"INFO: {USERS_FILE} not found. Starting with an empty user list.")
-        print(f"INFO: Please use the registration page to create the first user.")
-        users.clear() # Ensure users is empty
-        # user_characters.setdefault(username, []) # This line is not needed here as no user is created
-        save_users() # Save the empty users list to create the file
-    except json.JSONDecodeError:
-        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-        backup_filename = f"{USERS_FILE}.corrupted.{timestamp}"
-        try:
-            shutil.copy2(USERS_FILE, backup_filename) # Use copy2 to preserve metadata
-            print(f"Warning: Could not decode {USERS_FILE}. It has been backed up to {backup_filename}.")
-        except Exception as backup_e:
-            print(f"Warning: Could not decode {USERS_FILE}. Failed to create backup: {backup_e}")
-        # print("Starting with default user data.") # Old message
-        print(f"INFO: {USERS_FILE} was corrupted. Starting with an empty user list after backing up the corrupted file.")
-        print(f"INFO: Please use the registration page to create users.")
-        users.clear() # Ensure users is empty
-        # No default user data should be added here.
-        save_users() # Save the empty users list
+    for username, user_data in loaded_users_data.items():
+        if isinstance(user_data, str):
+            print(f"Migrating user data for user '{username}' to new format.")
+            loaded_users_data[username] = {
+                "password": generate_password_hash(user_data), # Hash the original string password
+                "google_id": None,
+                "email_google": None,
+                "display_name_google": None
+            }
+            users_migrated = True
+
+    users.clear()
+    users.update(loaded_users_data)
+    user_lookup.rebuild(users)
+
+    if users_migrated:
+        save_users()
 
+    # Characters and graveyard are read one user at a time from the backend.
+    user_characters.clear()
+    user_characters.update(storage.iter_user_characters())
 
-    try:
-        with open(CHARACTERS_FILE, 'r', encoding='utf-8') as f:
-            user_characters = json.load(f)
-    except FileNotFoundError:
-        user_characters = {} # Start empty if file not found
-        save_user_characters() # Create the file
-    except json.JSONDecodeError:
-        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-        backup_filename = f"{CHARACTERS_FILE}.corrupted.{timestamp}"
-        try:
-            shutil.copy2(CHARACTERS_FILE, backup_filename)
-            print(f"Warning: Could not decode {CHARACTERS_FILE}. It has been backed up to {backup_filename}.")
-        except Exception as backup_e:
-            print(f"Warning: Could not decode {CHARACTERS_FILE}. Failed to create backup: {backup_e}")
-        print("Starting with empty characters data.")
-        user_characters = {}
-        save_user_characters() # This will overwrite the original corrupted file
-
-    # Load graveyard data
-    try:
-        with open(GRAVEYARD_FILE, 'r', encoding='utf-8') as f:
-            graveyard = json.load(f)
-    except FileNotFoundError:
-        graveyard = {}
-        # Create an empty graveyard file if it doesn't exist
-        with open(GRAVEYARD_FILE, 'w', encoding='utf-8') as f:
-            json.dump(graveyard, f, indent=4)
-        print(f"'{GRAVEYARD_FILE}' not found, created a new one.")
-    except json.JSONDecodeError:
-        timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
-        backup_filename = f"{GRAVEYARD_FILE}.corrupted.{timestamp}"
-        try:
-            shutil.copy2(GRAVEYARD_FILE, backup_filename)
-            print(f"Error decoding '{GRAVEYARD_FILE}'. It has been backed up to {backup_filename}.")
-        except Exception as backup_e:
-            print(f"Error decoding '{GRAVEYARD_FILE}'. Failed to create backup: {backup_e}")
-        print("Initializing empty graveyard data and overwriting original.")
-        graveyard = {}
-        with open(GRAVEYARD_FILE, 'w', encoding='utf-8') as f: # This overwrites the original
-            json.dump(graveyard, f, indent=4)
+    graveyard.clear()
+    graveyard.update(storage.iter_graveyards())
+
+    persisted_names = storage.load_character_names()
+    if persisted_names is None:
+        rebuild_character_name_index()
+    else:
+        character_names.replace(persisted_names)
+
+    if action_logs is not None:
+        restore_from_action_logs()
+
+
+def restore_from_action_logs():
+    """
+    With action logs, a slot is only saved in full at snapshots, so after a restart the
+    actions logged since are replayed on top of the latest snapshot (see action_log.py).
+    """
+    for username, characters in user_characters.items():
+        restored_names = restore_user_from_action_logs(username, characters)
+        if restored_names:
+            print(f"INFO: Restored {', '.join(restored_names)} ({username}) from their action logs.")
+            save_user_characters(username)
+
+def restore_user_from_action_logs(username, characters):
+    """Replaces the user's slots that their action logs have moved past with the replayed saves. Returns the restored names."""
+    restored_names = []
+    for slot_index, char_data in enumerate(characters):
+        if char_data.get('is_dead') or not char_data.get('name'):
+            continue
+        log = action_logs.open(username, char_data['name'])
+        if log.seq > char_data.get('action_seq', 0):
+            characters[slot_index] = log.restore()
+            restored_names.append(char_data['name'])
+    return restored_names
+
+
+def rebuild_character_name_index():
+    """Rebuilds the name index from the loaded characters and graveyards and persists it."""
+    character_names.rebuild(user_characters, graveyard)
+    with coordinated_write(NAMES_RECORD):
+        storage.save_character_names(character_names)
+
+def register_character_name(name):
+    """Marks a character name as taken, in memory and in the persisted index."""
+    if character_names.add(name):
+        with coordinated_write(NAMES_RECORD):
+            storage.add_character_name(name)
+
+
+def save_users(username=None):
+    """Saves one user record, or every user if no username is given, and refreshes the lookup indexes."""
+    with coordinated_write(USERS_RECORD):
+        if username is None:
+            user_lookup.rebuild(users)
+            storage.save_users(users)
+            return
+        record = users.get(username)
+        if refresh_users(): # Another worker saved users meanwhile; keep their records and this one
+            if record is None:
+                users.pop(username, None)
+            else:
+                users[username] = record
+        if username in users:
+            user_lookup.add(username, users[username])
+        else:
+            user_lookup.remove(username)
+        storage.save_user(username, users)
 
+def save_user_characters(username=None):
+    """Saves one user's character slots, or every user's if no username is given."""
+    if username is None:
+        storage.save_all_characters(user_characters)
+    else:
+        with coordinated_write(user_record_key(username)):
+            storage.save_characters(username, user_characters.get(username))
+
+def archive_journal_overflow(username, character):
+    """
+    Moves the character's oldest journal entries into the journal archive, so the
+    save keeps between JOURNAL_INLINE_ENTRIES and JOURNAL_INLINE_ENTRIES + JOURNAL_SEGMENT_ENTRIES
+    entries inline. Segments are written before the entries leave the journal.
+    """
+    journal = character.journal
+    segments = journal.overflow_segments(JOURNAL_INLINE_ENTRIES, JOURNAL_SEGMENT_ENTRIES)
+    for start, records in segments:
+        journal_archive.append_segment(username, character.name, start, records)
+    if segments:
+        journal.drop_archived(len(segments) * JOURNAL_SEGMENT_ENTRIES)
+
+def snapshot_player_character(username):
+    """g.game_manager's save data for the active character, with its journal archived down first."""
+    from flask import g
+    archive_journal_overflow(username, g.player_char)
+    return g.game_manager.character_snapshot(saved_at=time.time())
+
+def save_character_slot(username, slot_index, delta):
+    """Persists one changed character slot, writing only the delta from its previous save."""
+    with coordinated_write(user_record_key(username)):
+        storage.save_character_delta(username, slot_index, delta, user_characters[username])
+
+def character_save_lock(username, slot_index):
+    """The lock serializing saves of one character slot (shared with the slots on the same stripe)."""
+    return character_save_locks[hash((username, slot_index)) % CHARACTER_SAVE_LOCK_STRIPES]
+
+def save_player_character(username, slot_index):
+    """
+    Saves the active character into its slot as a compare-and-swap on the slot's version.
+    Every request works on the version it loaded; if another request (e.g. a second tab)
+    saved the character since, nothing is saved and False is returned, so the other
+    save is kept instead of being silently overwritten. With action logs enabled the
+    request's actions are appended to the character's log instead, and the slot is
+    only written to storage when the log takes a snapshot.
+
+    Journal archival and the snapshot run before any lock is taken. The version check,
+    log append, swap and write hold only this slot's lock stripe, which keeps one
+    character's writes in version order without making other characters wait on its disk I/O.
+    The character's version is only bumped once the write succeeded; if it fails the
+    slot is rolled back and the session dropped, so the next request reloads the save.
+    """
+    from flask import g
+    loaded_version = g.player_char.version
+    new_data = snapshot_player_character(username)
+    new_data['version'] = loaded_version + 1
+    with character_save_lock(username, slot_index):
+        current = user_characters[username][slot_index]
+        if current.get('name') != g.player_char.name or current.get('version', 0) != loaded_version:
+            discard_game_session()
+            return False
+        logged = action_logs is not None and g.game_manager.action_log is not None
+        try:
+            if logged:
+                # Saves from before random streams were saved get the seed this session drew
+                # with, or a log starting from them would replay on a different stream.
+                previous_save = current if 'rng_state' in current else dict(current, rng_state=g.game_manager.initial_rng_state)
+                with coordinated_write(user_record_key(username)): # Other workers reload the slot and reopen the log
+                    snapshot_written = action_logs.commit(username, previous_save, new_data, g.game_manager.action_log.take())
+            user_characters[username][slot_index] = new_data
+            if not logged:
+                save_character_slot(username, slot_index, character_delta(current, new_data))
+            elif snapshot_written:
+                save_user_characters(username) # Between snapshots the action log alone holds the changes
+        except Exception:
+            user_characters[username][slot_index] = current
+            discard_game_session()
+            raise
+    g.player_char.version = new_data['version']
+    mark_game_session_saved(username, slot_index)
+    return True
+
+def journal_page(username, character, cursor=None, limit=JOURNAL_PAGE_SIZE):
+    """
+    One page of a character's journal, newest first, reading archive segments only when
+    the page reaches past the inline entries.
 
-def save_users():
-    # print(f"DEBUG_SAVE_USERS: Attempting to save users. Current users dict to be saved: {users}") # Consider app.logger.debug()
-    with open(USERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(users, f, indent=4)
+    Args:
+        cursor (int, optional): Number of the entry after the newest one to return
+            (the previous page's next_cursor). Defaults to the end of the journal.
+        limit (int): Maximum number of entries.
 
-def save_user_characters():
-    with open(CHARACTERS_FILE, 'w', encoding='utf-8') as f:
-        json.dump(user_characters, f, indent=4)
+    Returns:
+        dict: {"entries": [entry dicts], "next_cursor": int or None, "total": int}
+    """
+    journal = character.journal
+    total = journal.total_count
+    stop = total if cursor is None else max(0, min(cursor, total))
+    start = max(0, stop - limit)
+    records = []
+    if start < journal.archived:
+        records.extend(journal_archive.read_entries(username, character.name, start, min(stop, journal.archived)))
+    records.extend(journal.records_between(start, stop))
+    records.reverse()
+    return {"entries": records, "next_cursor": start if start > 0 else None, "total": total}
+
+def save_graveyard(username=None):
+    """Saves one user's graveyard, or every user's if no username is given."""
+    if username is None:
+        storage.save_all_graveyards(graveyard)
+    else:
+        with coordinated_write(user_record_key(username)):
+            storage.save_graveyard(username, graveyard.get(username))
+
+def save_character_death(username, dead_char_data):
+    """Persists a character moving from the user's slots into their graveyard in one step."""
+    with coordinated_write(user_record_key(username)):
+        storage.bury_character(username, user_characters.get(username, []), graveyard.get(username, []))
+    game_session_cache.invalidate_user(username) # Remaining slots have shifted
+    discard_game_session()
+    if dead_char_data.get('name'):
+        register_character_name(dead_char_data['name']) # Dead characters keep their name reserved
+
+def mark_game_session_saved(username, slot_index):
+    """Tells the session cache that this request's character was just saved to that slot."""
+    from flask import g
+    game_session = g.get('game_session')
+    if game_session is not None and game_session.key == (username, slot_index):
+        game_session.mark_saved(user_characters[username][slot_index])
+
+def discard_game_session():
+    """Stops this request's game session from being returned to the cache."""
+    from flask import g
+    g.pop('game_session', None)
+
+def init_process():
+    """
+    Opens this process's storage backend and session store and loads the saves.
+    These hold file handles, connections and a flusher thread, none of which survive
+    a fork, so a preloading master leaves them to each worker (see create_app).
+    """
+    global storage, _process_id
+    init_session_interface()
+    storage = create_storage()
+    if WRITE_BEHIND_MS > 0 and not MULTI_PROCESS: # Other workers must see a save as soon as its lock is released
+        # Character saves are queued and written by a background thread, so requests don't wait on disk.
+        storage = WriteBehindStorage(storage, flush_interval=WRITE_BEHIND_MS / 1000.0, max_pending=WRITE_BEHIND_MAX_PENDING)
+    atexit.register(storage.close) # Flushes queued saves and checkpoints the write-ahead log on shutdown
+    load_data()
+    _process_id = os.getpid()
+
+_process_id = None # Process that ran init_process(); a forked worker sees a different pid
+_process_lock = threading.Lock()
+
+def ensure_process_ready():
+    """Runs init_process() once in every process that serves requests."""
+    if _process_id == os.getpid():
+        return
+    with _process_lock:
+        if _process_id != os.getpid():
+            init_process()
+
+def preload_static_content():
+    """
+    Loads what every worker needs and nobody changes: the events, feats, backgrounds,
+    factions, recipes and item catalog (all built when shopkeeperPython.game is imported)
+    and the compiled templates. gc.freeze() then moves them out of the garbage
+    collector's reach, so collections in forked workers don't write to (and copy)
+    the pages they share with the master.
+    """
+    for template_name in ('index.html', 'register.html'):
+        app.jinja_env.get_template(template_name)
+    gc.collect()
+    gc.freeze()
 
-def save_graveyard(): # New function to save graveyard data
-    with open(GRAVEYARD_FILE, 'w', encoding='utf-8') as f:
-        json.dump(graveyard, f, indent=4)
+_app_configured = False
 
-# Load data at application startup
-load_data()
+def create_app(config=None):
+    """
+    Finishes setting up the app and returns it. Routes and save data live at module
+    level, so there is one app per process; later calls only apply their config.
+
+    Args:
+        config (dict, optional): Flask config values, e.g. TESTING or SECRET_KEY.
+            PRELOAD=True is for a master process that forks its workers (gunicorn --preload,
+            see wsgi.py): only the static game content is loaded and frozen, and every
+            worker opens storage and loads the saves on its first request.
+    """
+    global _app_configured
+    if config:
+        app.config.update(config)
+    if not _app_configured:
+        if not app.config.get('SECRET_KEY'):
+            configure_secret_key()
+        init_google_login()
+        wsgi_app = app.wsgi_app
+        def wsgi_app_in_ready_process(environ, start_response):
+            ensure_process_ready() # Before Flask opens the session
+            return wsgi_app(environ, start_response)
+        app.wsgi_app = wsgi_app_in_ready_process
+        _app_configured = True
+    if app.config.get('PRELOAD'):
+        preload_static_content()
+    else:
+        ensure_process_ready()
+    return app
 
 # --- Helper Function for Global Character Name Uniqueness ---
 def is_character_name_taken(name_to_check: str, all_user_chars: dict, all_graveyards: dict) -> bool:
     """
     Checks if a character name is already taken globally, case-insensitively.
     Iterates through all active characters and all characters in graveyards.
+    Routes use the character_names index instead; this full scan is for arbitrary data.
     """
     lower_name_to_check = name_to_check.lower()
 
@@ -315,6 +666,17 @@ def is_character_name_taken(name_to_check: str, all_user_chars: dict, all_gravey
                     return True
     return False
 
+def start_session_recording(username, slot_index):
+    """Starts recording g.game_manager into RECORDING_DIR (see game/recording.py for replaying)."""
+    from flask import g
+    safe_username = re.sub(r'[^A-Za-z0-9_.-]', '_', username)
+    os.makedirs(RECORDING_DIR, exist_ok=True)
+    path = os.path.join(RECORDING_DIR, f"{safe_username}-{slot_index}-{int(time.time() * 1000)}.jsonl")
+    try:
+        g.game_manager.start_recording(path)
+    except OSError as e:
+        app.logger.error(f"Could not start session recording at {path}: {e}")
+
 # --- Application Context Globals Setup ---
 # These will be managed per request using Flask's 'g' object.
 
@@ -327,13 +689,16 @@ def before_request_setup():
     from flask import g  # Import g here to avoid circular dependency issues at module level
 
     g.output_stream = io.StringIO()
-    # Default character if no one is logged in or selected
-    default_char = Character(name=None)
-    default_char.gold = 50 # Default starting gold
+    g.player_messages = game_log.MessageBuffer() # Player-facing messages from the game modules (see game_log.py)
+    g.player_messages_token = game_log.set_player_buffer(g.player_messages)
+    g.game_session = None
 
     username = session.get('username')
+    if coordinator is not None:
+        sync_with_other_workers(username)
     selected_slot_index = session.get('selected_character_slot')
     active_char_instance = None
+    active_char_data = None
 
     # This flag helps determine if game_manager.setup_for_character() should be called.
     # It's true if an actual character is loaded, false if using the placeholder default_char.
@@ -344,7 +709,16 @@ def before_request_setup():
         if 0 <= selected_slot_index < len(characters_list):
             char_data = characters_list[selected_slot_index]
             if not char_data.get('is_dead', False):
+                cached_session = game_session_cache.checkout(username, selected_slot_index, char_data)
+                if cached_session is not None:
+                    # Reuse the objects from a previous request; only the output stream is per request.
+                    g.game_session = cached_session
+                    g.player_char = cached_session.character
+                    g.game_manager = cached_session.game_manager
+                    g.game_manager.output_stream = g.output_stream
+                    return
                 active_char_instance = Character.from_dict(char_data)
+                active_char_data = char_data
                 character_loaded_for_setup = True # A specific character is being loaded
             else:
                 session.pop('selected_character_slot', None)
@@ -357,17 +731,27 @@ def before_request_setup():
     if active_char_instance:
         g.player_char = active_char_instance
     else:
+        # Default character if no one is logged in or selected
+        default_char = Character(name=None)
+        default_char.gold = 50 # Default starting gold
         g.player_char = default_char
         # If no active character, ensure game_manager doesn't think it's set up for a real game state
         character_loaded_for_setup = False
 
     g.game_manager = GameManager(player_character=g.player_char, output_stream=g.output_stream)
 
+    if character_loaded_for_setup and action_logs is not None:
+        g.game_manager.action_log = ActionLogRecorder() # Before setup, so an offline catch-up is logged too
+
     if character_loaded_for_setup:
         # This setup is for an existing, loaded character.
         # It ensures the GM knows about the current town, etc.
         g.game_manager.setup_for_character(g.player_char) # g.player_char is active_char_instance here
-        if not g.game_manager.is_game_setup:
+        if g.game_manager.is_game_setup:
+            g.game_session = GameSession(username, selected_slot_index, g.player_char, g.game_manager, active_char_data)
+            if RECORDING_DIR:
+                start_session_recording(username, selected_slot_index)
+        else:
             # This implies an issue with loading the character's environment (e.g. town not found)
             flash(f"Warning: Failed to fully initialize game world for {g.player_char.name}. Some features might be unavailable or the character may be in an invalid state. Consider re-selecting or contacting support if issues persist.", "error")
             # Potentially revert to a default state if setup fails critically
@@ -379,6 +763,53 @@ def before_request_setup():
         pass
 
 
+def sync_with_other_workers(username):
+    """
+    MULTI_PROCESS only. Requests that may change the user's data hold the user's lock
+    until the request ends, so no other worker saves the user in between; then
+    everything another worker saved since this one last read it is reloaded.
+    """
+    from flask import g
+    if username and request.method not in ('GET', 'HEAD', 'OPTIONS'):
+        coordinator.acquire(user_record_key(username))
+        g.coordinator_lock = user_record_key(username)
+    refresh_users()
+    refresh_character_names()
+    if username:
+        refresh_user_records(username)
+
+
+@app.teardown_request
+def release_user_lock(exc):
+    """Releases the lock taken by sync_with_other_workers(). Registered first, so it runs last."""
+    from flask import g
+    key = g.pop('coordinator_lock', None)
+    if key is not None:
+        coordinator.release(key)
+
+
+@app.teardown_request
+def return_game_session(exc):
+    """
+    Hands this request's game session back to the cache. A session is only kept if
+    it still matches what is saved: after a GET, or after a request that saved it.
+    Anything else (errors, POSTs that changed state without saving) is dropped.
+    Also stops routing player messages to this request's buffer.
+    """
+    from flask import g
+    token = g.pop('player_messages_token', None)
+    if token is not None:
+        game_log.reset_player_buffer(token)
+    game_session = g.pop('game_session', None)
+    if game_session is None or exc is not None:
+        return
+    if request.method != 'GET' and not game_session.saved_this_request:
+        return
+    characters_list = user_characters.get(game_session.username, [])
+    if 0 <= game_session.slot_index < len(characters_list) and characters_list[game_session.slot_index] is game_session.source_data:
+        game_session_cache.checkin(game_session)
+
+
 # --- Authentication Routes ---
 
 @app.route('/login/google_initiate')
@@ -400,6 +831,7 @@ def login_route():
     user_data = users.get(username)
 
     if user_data and user_data.get('password') and check_password_hash(user_data['password'], password):
+        regenerate_session()
         session['username'] = username
         flash('Login successful!', 'success')
     else:
@@ -414,6 +846,7 @@ def logout_route():
     session.pop('character_creation_name', None)
     session.pop('awaiting_event_choice', None) # Clear event flag
     session.pop('pending_event_data', None)    # Clear event data
+    regenerate_session()
     get_flashed_messages() # Clear any existing flashed messages before adding new one
     flash('You have been logged out.', 'success')
     return redirect(url_for('display_game_output'))
@@ -428,19 +861,21 @@ def register_page():
             flash('Username and password are required.', 'error')
             return redirect(url_for('register_page'))
 
-        if username in users:
-            flash('Username already exists. Please choose another.', 'error')
-            return redirect(url_for('register_page'))
-
-        users[username] = {
-            'password': generate_password_hash(password),
-            'google_id': None,
-            'email_google': None,
-            'display_name_google': None
-        }
+        with coordinated_write(USERS_RECORD): # No other worker can register the same name in between
+            refresh_users()
+            if username in users:
+                flash('Username already exists. Please choose another.', 'error')
+                return redirect(url_for('register_page'))
+
+            users[username] = {
+                'password': generate_password_hash(password),
+                'google_id': None,
+                'email_google': None,
+                'display_name_google': None
+            }
+            save_users(username)
         user_characters[username] = []
-        save_users()
-        save_user_characters()
+        save_user_characters(username)
         flash('Registration successful! Please log in.', 'success')
         return redirect(url_for('display_game_output'))
 
@@ -470,6 +905,9 @@ def select_character_route(slot_index: int):
     characters_list = user_characters.get(username, [])
 
     if 0 <= slot_index < len(characters_list):
+        previous_slot = session.get('selected_character_slot')
+        if previous_slot is not None and previous_slot != slot_index:
+            game_session_cache.invalidate(username, previous_slot) # Switching away; free the old session
         session['selected_character_slot'] = slot_index
         session.pop('character_creation_stats', None)
         session.pop('character_creation_name', None)
@@ -506,7 +944,7 @@ def create_character_route():
         return redirect(url_for('display_game_output', action='create_new_char'))
 
     # --- Global Character Name Uniqueness Check ---
-    if is_character_name_taken(char_name, user_characters, graveyard):
+    if char_name in character_names:
         flash(f"Character name '{char_name}' is already taken. Please choose another.", 'error')
         app.logger.warning(f"CREATE_CHARACTER_ROUTE: Character name '{char_name}' taken for user '{username}'.")
         session['character_creation_name'] = char_name # Persist name
@@ -547,9 +985,17 @@ def create_character_route():
     new_character.hp = new_character.get_effective_max_hp()
     new_character.gold = 50 # Standard starting gold for new characters
 
-    # Store character in user_characters
-    user_characters[username].append(new_character.to_dict())
-    save_user_characters() # Save after adding a new character
+    # Store character in user_characters. The names lock keeps other workers from taking the name before it is saved.
+    with coordinated_write(NAMES_RECORD):
+        refresh_character_names()
+        if char_name in character_names:
+            flash(f"Character name '{char_name}' is already taken. Please choose another.", 'error')
+            session['character_creation_name'] = char_name
+            return redirect(url_for('display_game_output', action='create_new_char'))
+        user_characters[username].append(new_character.to_dict(rng_state=GameRandom().to_dict())) # Seeded from the start, so its action log replays
+        save_user_characters(username) # Save after adding a new character
+        register_character_name(char_name)
+    game_session_cache.invalidate_user(username) # Slot list changed
 
     # Automatically select the newly created character
     session['selected_character_slot'] = len(user_characters[username]) - 1
@@ -618,6 +1064,7 @@ def display_game_output():
     shop_inventory_display = ["Empty"]
     player_inventory_display = ["Empty"]
     player_journal_display = []
+    journal_next_cursor = None
     dead_characters_info = []
     character_creation_stats_display = None
     pending_char_name_display = None
@@ -665,8 +1112,8 @@ def display_game_output():
                 if g.player_char.name is not None: # If a character was somehow loaded
                     g.player_char = Character(name=None)
                     g.player_char.gold = 50
-                    g.game_manager.character = g.player_char
-                    g.game_manager.is_game_setup = False # Reset GM state for default character
+                    # Fresh GM for the placeholder; the loaded one may be a cached session and must stay intact.
+                    g.game_manager = GameManager(player_character=g.player_char, output_stream=g.output_stream)
 
                 g.output_stream.truncate(0)
                 g.output_stream.seek(0)
@@ -747,14 +1194,20 @@ def display_game_output():
                 shop_inventory_display = [f"{name} (x{qty})" for name, qty in shop_items.items()] or ["Empty"]
 
                 # For player inventory, pass full item dicts for JS modal and cues
-                player_inventory_for_template = [item.to_dict() for item in g.player_char.inventory] if g.player_char and g.player_char.inventory else []
+                player_inventory_for_template = []
+                if g.player_char and g.player_char.inventory:
+                    for stack_key, item in zip(stack_keys(g.player_char.inventory), g.player_char.inventory):
+                        item_dict = item.to_dict()
+                        item_dict['stack_key'] = stack_key # Matches the keys /api/action sends in inventory deltas
+                        player_inventory_for_template.append(item_dict)
                 player_inventory_display = player_inventory_for_template # JS will now use this directly for names and data
 
                 # current_game_output will be built from g.output_stream at the end
                 if g.game_manager.shop:
                     available_recipes = g.game_manager.shop.BASIC_RECIPES # Assuming this is a static/class member or simple property
                 if hasattr(g.player_char, 'journal'):
-                    player_journal_display = g.player_char.journal
+                    player_journal_display = g.player_char.journal[-JOURNAL_PAGE_SIZE:] # Older pages come from /api/journal
+                    journal_next_cursor = max(g.player_char.journal.total_count - JOURNAL_PAGE_SIZE, 0) or None
             else: # No character is active/loaded (and not decided to show creation form by action=create_new_char)
                   # g.player_char is default, g.game_manager is default.
                   # g.output_stream might have messages from before_request_setup (e.g. dead char selected).
@@ -806,6 +1259,7 @@ def display_game_output():
 
     if not player_char_loaded_or_selected: # If no specific character active, journal is empty
         player_journal_display = []
+        journal_next_cursor = None
 
     # available_towns from g.game_manager (already set if GM exists)
     if g.game_manager:
@@ -936,6 +1390,7 @@ def display_game_output():
                            all_towns_data_json=json.dumps(all_towns_data),
                            available_recipes=available_recipes,
                            player_journal=player_journal_display,
+                           journal_next_cursor=journal_next_cursor,
                            popup_action_result=popup_action_result,
                            hemlock_herbs_json=json.dumps(HEMLOCK_HERBS), # Module global constant
                            borin_items_json=json.dumps(BORIN_ITEMS), # Added for Borin's items
@@ -1028,14 +1483,26 @@ def parse_action_details(details_str: str) -> dict:
         return {}
 
 
-@app.route('/action', methods=['POST'])
-def perform_action():
+ACTION_COMPLETED = 'completed' # The action ran (possibly with an error written to the game log)
+ACTION_REJECTED = 'rejected' # Nothing was run, e.g. no action name or no living character
+ACTION_CHARACTER_DIED = 'character_died' # The action ran and the character was moved to the graveyard
+ACTION_CONFLICT = 'conflict' # The action ran, but the character was saved elsewhere first; nothing was saved
+SAVE_CONFLICT_MESSAGE = "This character was changed in another tab or window, so this action was not saved. Showing the latest save."
+
+# Pseudo-action running several hours in one request: details {"hours": N, "policy": "wait" | "tend_shop"}.
+FAST_FORWARD_ACTION = 'fast_forward'
+
+def run_player_action(action_name, action_details_str, notify=flash):
+    """
+    Runs one game action for the character on g, then saves the character or buries it.
+
+    Shared by the /action form route and the /api/action JSON route. Messages for the
+    player go through notify(message, category), which is flash() for the form route.
+    Returns ACTION_COMPLETED, ACTION_REJECTED, ACTION_CHARACTER_DIED or ACTION_CONFLICT.
+    """
     from flask import g # Access g for current request context
     # output_stream, player_char, game_manager_instance are now on g.
 
-    action_name = request.form.get('action_name')
-    action_details_str = request.form.get('action_details', '{}')
-
     # --- Restore active_haggling_session from Flask session if this is a haggle choice action ---
     if action_name in ["PROCESS_PLAYER_HAGGLE_CHOICE_SELL", "PROCESS_PLAYER_HAGGLE_CHOICE_BUY"]:
         if hasattr(g, 'game_manager') and g.game_manager:
@@ -1058,9 +1525,6 @@ def perform_action():
     # else:
     #     print("DEBUG /action route: g.game_manager is None")
 
-    action_name = request.form.get('action_name')
-    action_details_str = request.form.get('action_details', '{}')
-
     # --- Start of Diagnostic Logging (using g) ---
     # print(f"\n--- /action route hit ---")
     # print(f"Received action_name: {action_name}")
@@ -1090,14 +1554,16 @@ def perform_action():
             name_display = "Rest (Short)"
         elif name_technical == "rest_long":
             name_display = "Rest (Long)"
+        elif name_technical == FAST_FORWARD_ACTION:
+            name_display = f"Pass {details_dict.get('hours', 1)} Hour(s)"
         # Add more specific overrides here if other actions need custom display names
 
         return name_display
 
     if not action_name:
-        flash("Error: No action selected. Please choose an action.", "error")
+        notify("Error: No action selected. Please choose an action.", "error")
         # game_manager_instance._print("Error: No action_name provided.") # Kept for log, flash is for user
-        return redirect(url_for('display_game_output'))
+        return ACTION_REJECTED
 
     # Use the updated parse_action_details function
     details_dict = parse_action_details(action_details_str) # parse_action_details now uses g.game_manager
@@ -1108,23 +1574,23 @@ def perform_action():
 
         # Ensure a living character is loaded (now from g)
         if g.player_char is None or g.player_char.name is None or g.player_char.is_dead:
-            flash("No active character or character is dead. Cannot perform action.", "error")
-            return redirect(url_for('display_game_output'))
+            notify("No active character or character is dead. Cannot perform action.", "error")
+            return ACTION_REJECTED
 
         # Crafting specific check: item name must be provided
         if action_name == "craft":
             item_name_to_craft = details_dict.get("item_name")
             if not item_name_to_craft:
-                flash("Error: Item name cannot be empty for crafting.", "error")
+                notify("Error: Item name cannot be empty for crafting.", "error")
                 # No need to call perform_hourly_action if this fails
-                return redirect(url_for('display_game_output'))
+                return ACTION_REJECTED
 
         # Explicitly check GameManager's setup status for the current g.player_char
         # This is crucial because g.game_manager.character should be the same as g.player_char
         # and g.game_manager.is_game_setup should be True if setup was successful via before_request_setup.
         if not g.game_manager.is_game_setup or g.game_manager.character != g.player_char:
-            flash(f"Cannot perform action. Game world not fully initialized for {g.player_char.name}. Try re-selecting the character or ensure the character is valid.", "error")
-            return redirect(url_for('display_game_output'))
+            notify(f"Cannot perform action. Game world not fully initialized for {g.player_char.name}. Try re-selecting the character or ensure the character is valid.", "error")
+            return ACTION_REJECTED
 
         # The following 'buy_from_npc' block seems like a placeholder or an alternative action path.
         # For the current task, we are focusing on actions going through perform_hourly_action.
@@ -1138,10 +1604,14 @@ def perform_action():
         #
         # Existing actions are handled by perform_hourly_action using g.game_manager
         if g.player_char is None or g.player_char.name is None or g.player_char.is_dead: # Redundant due to earlier check, but safe
-            flash("No active character or character is dead. Cannot perform action.", "error")
-            return redirect(url_for('display_game_output'))
+            notify("No active character or character is dead. Cannot perform action.", "error")
+            return ACTION_REJECTED
         else:
-            action_result_data = g.game_manager.perform_hourly_action(action_name, details_dict)
+            if action_name == FAST_FORWARD_ACTION:
+                # Runs all the hours in-process; the save below then happens once for the whole stretch.
+                action_result_data = g.game_manager.fast_forward(details_dict.get("hours", 1), str(details_dict.get("policy", "wait")))
+            else:
+                action_result_data = g.game_manager.perform_hourly_action(action_name, details_dict)
 
             # --- Handle action result (event, haggle, or complete) ---
             if isinstance(action_result_data, dict):
@@ -1153,7 +1623,7 @@ def perform_action():
                     # Clear any generic event session flags as haggling takes precedence
                     session.pop('awaiting_event_choice', None)
                     session.pop('pending_event_data', None)
-                    flash("A potential transaction requires your attention!", "info")
+                    notify("A potential transaction requires your attention!", "info")
                 elif result_type == 'event_pending':
                     # If a generic event occurs, ensure any prior haggling session flags are cleared
                     # as the generic event popup will now take precedence for this render.
@@ -1167,16 +1637,16 @@ def perform_action():
                         'choices': event_details.get('choices')
                     }
                     event_name_for_flash = event_details.get('name', 'An event')
-                    flash(f"EVENT: {event_name_for_flash}! Check Journal or Game Log for details.", "info")
+                    notify(f"EVENT: {event_name_for_flash}! Check Journal or Game Log for details.", "info")
                     # g.game_manager._print already handled by GameManager
                 else: # 'action_complete' or other types
                     session.pop('awaiting_event_choice', None)
                     session.pop('pending_event_data', None)
-                    flash(f"Action '{action_name_display}' performed. Check Journal or Game Log for details.", "info")
+                    notify(f"Action '{action_name_display}' performed. Check Journal or Game Log for details.", "info")
             else: # Should not happen if perform_hourly_action always returns a dict
                 session.pop('awaiting_event_choice', None)
                 session.pop('pending_event_data', None)
-                flash(f"Action '{action_name_display}' processed (unknown result type). Check Journal or Game Log.", "warning")
+                notify(f"Action '{action_name_display}' processed (unknown result type). Check Journal or Game Log.", "warning")
 
             # --- Clear session haggling data if haggle concluded ---
             if action_name in ["PROCESS_PLAYER_HAGGLE_CHOICE_SELL", "PROCESS_PLAYER_HAGGLE_CHOICE_BUY"]:
@@ -1197,13 +1667,9 @@ def perform_action():
             slot_index = session.get('selected_character_slot')
             if username and slot_index is not None:
                 if username in user_characters and 0 <= slot_index < len(user_characters[username]):
-                    current_town_name_to_save = g.game_manager.current_town.name if g.game_manager.current_town else "Unknown"
-                    current_time_dict = g.game_manager.time.to_dict()
-                    user_characters[username][slot_index] = g.player_char.to_dict(
-                        current_town_name=current_town_name_to_save,
-                        current_time_data=current_time_dict
-                    )
-                    save_user_characters() # Global save function is fine
+                    if not save_player_character(username, slot_index): # Only this slot's changes are written
+                        notify(SAVE_CONFLICT_MESSAGE, "error")
+                        return ACTION_CONFLICT
                 else:
                     g.game_manager._print(f"  Warning: Character slot data mismatch for user {username}, slot {slot_index}. Could not save character state after action.")
             else:
@@ -1234,30 +1700,25 @@ def perform_action():
                     timestamp=death_timestamp_str
                 )
                 if username and slot_index is not None and user_characters.get(username) and 0 <= slot_index < len(user_characters[username]):
-                    current_town_name_death_save = g.game_manager.current_town.name if g.game_manager.current_town else "Unknown"
-                    current_time_dict_death_save = g.game_manager.time.to_dict()
-                    user_characters[username][slot_index] = g.player_char.to_dict(
-                        current_town_name=current_town_name_death_save,
-                        current_time_data=current_time_dict_death_save
-                    )
-                    save_user_characters()
+                    if not save_player_character(username, slot_index):
+                        notify(SAVE_CONFLICT_MESSAGE, "error")
+                        return ACTION_CONFLICT
 
             if username and slot_index is not None:
                 if username in user_characters and 0 <= slot_index < len(user_characters[username]):
                     dead_char_data = user_characters[username].pop(slot_index)
                     dead_char_data['is_dead'] = True
                     graveyard.setdefault(username, []).append(dead_char_data)
-                    save_user_characters()
-                    save_graveyard()
-                    flash(f"{dead_char_data.get('name', 'The character')} has died and been moved to the graveyard. Their slot is now free.", "error")
+                    save_character_death(username, dead_char_data)
+                    notify(f"{dead_char_data.get('name', 'The character')} has died and been moved to the graveyard. Their slot is now free.", "error")
                     session.pop('selected_character_slot', None)
                 else:
-                    flash("Error processing character death: Character slot data mismatch.", "critical_error")
+                    notify("Error processing character death: Character slot data mismatch.", "critical_error")
                     session.pop('selected_character_slot', None)
             else:
-                flash("Error processing character death: User session data missing.", "critical_error")
+                notify("Error processing character death: User session data missing.", "critical_error")
                 session.pop('selected_character_slot', None)
-            return redirect(url_for('display_game_output'))
+            return ACTION_CHARACTER_DIED
 
     except Exception as e:
         # Ensure g.game_manager is used for printing the error
@@ -1269,11 +1730,97 @@ def perform_action():
         else: # Fallback if g.game_manager itself is missing
             print(f"CRITICAL ERROR in /action, g.game_manager not found: {e}")
             print(f"Traceback: {traceback.format_exc()}")
-        flash("An unexpected error occurred. Check the game log for more details.", "error")
+        notify("An unexpected error occurred. Check the game log for more details.", "error")
 
-    session['action_result'] = g.output_stream.getvalue() # Use g.output_stream
+    return ACTION_COMPLETED
+
+
+@app.route('/action', methods=['POST'])
+def perform_action():
+    from flask import g # Access g for current request context
+
+    outcome = run_player_action(request.form.get('action_name'), request.form.get('action_details', '{}'))
+    if outcome == ACTION_COMPLETED:
+        session['action_result'] = g.output_stream.getvalue() # Use g.output_stream
     return redirect(url_for('display_game_output'))
 
+
+@app.route('/api/action', methods=['POST'])
+def api_perform_action():
+    """
+    JSON version of /action used by the page script. Instead of redirecting to a full
+    render of index.html it returns only what the action changed (see ui_delta.py):
+    {"ok", "outcome", "messages", "log", "player_messages", "changes", "event", "haggle", "reload"}.
+    "player_messages" lists the game modules' messages as {"category", "text"} (see game/game_log.py).
+    When "reload" is true the client reloads the page, which then shows the messages,
+    action result and any event/haggle popup exactly as after a form POST.
+    """
+    from flask import g # Access g for current request context
+
+    payload = request.get_json(silent=True) or request.form
+    action_name = payload.get('action_name')
+    action_details = payload.get('action_details', '{}')
+    if isinstance(action_details, dict):
+        action_details = json.dumps(action_details)
+
+    if 'username' not in session:
+        return jsonify({"ok": False, "outcome": ACTION_REJECTED, "reload": True,
+                        "messages": [{"category": "error", "text": "Please log in first."}]}), 401
+
+    messages = []
+    def notify(message, category="message"):
+        messages.append({"category": category, "text": message})
+
+    character_loaded = bool(g.player_char and g.player_char.name and g.game_manager and g.game_manager.is_game_setup)
+    before = snapshot_ui_state(g.player_char, g.game_manager) if character_loaded else None
+
+    outcome = run_player_action(action_name, action_details, notify)
+
+    response = {
+        "ok": outcome != ACTION_REJECTED,
+        "outcome": outcome,
+        "messages": messages,
+        "log": g.output_stream.getvalue().splitlines(),
+        "player_messages": g.player_messages.to_list(),
+        "changes": {},
+        "event": session.get('pending_event_data') if session.get('awaiting_event_choice') else None,
+        "haggle": session.get('pending_haggling_data') if session.get('haggling_pending_flag') else None,
+    }
+    if before is not None and outcome not in (ACTION_CHARACTER_DIED, ACTION_CONFLICT):
+        response["changes"] = diff_ui_state(before, snapshot_ui_state(g.player_char, g.game_manager))
+
+    # Popups, deaths, save conflicts and layout changes are rendered by the full page.
+    response["reload"] = bool(before is None or outcome in (ACTION_CHARACTER_DIED, ACTION_CONFLICT) or response["event"]
+                              or response["haggle"] or response["changes"].pop("reload", False))
+    if response["reload"]:
+        for message in messages:
+            flash(message["text"], message["category"])
+        if outcome == ACTION_COMPLETED:
+            session['action_result'] = g.output_stream.getvalue()
+    return jsonify(response)
+
+@app.route('/api/journal')
+def api_journal():
+    """
+    Pages through the active character's journal, newest first:
+    GET /api/journal?cursor=<next_cursor from the previous page>&limit=<n>
+    returns {"ok", "entries", "next_cursor", "total"}; next_cursor is null on the last page.
+    """
+    from flask import g # Access g for current request context
+
+    if 'username' not in session:
+        return jsonify({"ok": False, "error": "Please log in first."}), 401
+    if not (g.player_char and g.player_char.name):
+        return jsonify({"ok": False, "error": "No character selected."}), 404
+    try:
+        cursor = int(request.args['cursor']) if request.args.get('cursor') else None
+        limit = int(request.args.get('limit', JOURNAL_PAGE_SIZE))
+    except ValueError:
+        return jsonify({"ok": False, "error": "cursor and limit must be integers."}), 400
+    limit = max(1, min(limit, JOURNAL_MAX_PAGE_SIZE))
+    page = journal_page(session['username'], g.player_char, cursor=cursor, limit=limit)
+    return jsonify({"ok": True, **page})
+
 @app.route('/submit_event_choice', methods=['POST'])
 def submit_event_choice_route():
     from flask import g # Access g for current request context
@@ -1312,7 +1859,7 @@ def submit_event_choice_route():
         return redirect(url_for('display_game_output'))
 
     # Find the event object from GAME_EVENTS
-    selected_event_obj = next((event for event in GAME_EVENTS if event.name == event_name_from_form), None)
+    selected_event_obj = GAME_EVENT_INDEX.get(event_name_from_form)
 
     if not selected_event_obj:
         flash(f"Event '{event_name_from_form}' not found in game data.", "error")
@@ -1320,10 +1867,10 @@ def submit_event_choice_route():
         session.pop('pending_event_data', None)
         return redirect(url_for('display_game_output'))
 
-    # Execute the choice
+    # Execute the choice on the character's random stream
     # The execute_skill_choice method will print to g.output_stream and log to journal
     # It uses g.game_manager.character which is g.player_char
-    execution_outcome = g.game_manager.event_manager.execute_skill_choice(selected_event_obj, choice_index)
+    execution_outcome = g.game_manager.resolve_event_choice(selected_event_obj, choice_index)
 
     if isinstance(execution_outcome, dict) and 'roll_data' in execution_outcome and \
        isinstance(execution_outcome['roll_data'], dict) and 'formatted_string' in execution_outcome['roll_data']:
@@ -1341,13 +1888,9 @@ def submit_event_choice_route():
         username = session.get('username')
         slot_idx = session.get('selected_character_slot')
         if username and slot_idx is not None and username in user_characters and 0 <= slot_idx < len(user_characters[username]):
-            current_town_name_event_save = g.game_manager.current_town.name if g.game_manager.current_town else "Unknown"
-            current_time_dict_event_save = g.game_manager.time.to_dict()
-            user_characters[username][slot_idx] = g.player_char.to_dict(
-                current_town_name=current_town_name_event_save,
-                current_time_data=current_time_dict_event_save
-            )
-            save_user_characters()
+            if not save_player_character(username, slot_idx):
+                flash(SAVE_CONFLICT_MESSAGE, "error")
+                return redirect(url_for('display_game_output'))
         else:
             g.game_manager._print("  Warning: Could not save character state after event due to session/slot mismatch.")
 
@@ -1359,8 +1902,7 @@ def submit_event_choice_route():
             dead_char_data = user_characters[username].pop(slot_idx)
             dead_char_data['is_dead'] = True
             graveyard.setdefault(username, []).append(dead_char_data)
-            save_user_characters()
-            save_graveyard()
+            save_character_death(username, dead_char_data)
             flash(f"{dead_char_data.get('name', 'The character')} has died (due to event) and been moved to the graveyard.", "error")
             session.pop('selected_character_slot', None)
             return redirect(url_for('display_game_output'))
@@ -1371,4 +1913,4 @@ def submit_event_choice_route():
 if __name__ == '__main__':
     # Note: game_manager_instance, player_char, and output_stream are no longer global module variables.
     # They are managed by before_request_setup on a per-request basis.
-    app.run(debug=True, host='0.0.0.0', port=5001)
+    create_app().run(debug=True, host='0.0.0.0', port=5001)
@@ -1,8 +1,12 @@
 # This file makes 'game' a sub-package of 'shopkeeperPython'
 from .character import Character
 from .game_manager import GameManager
-from .item import Item
+from . import item_catalog # Fills ITEM_CATALOG; needs shop and game_manager loaded
+from .item import Item, ItemDefinition, ITEM_CATALOG
+from .inventory import Inventory
 from .shop import Shop
 from .time_system import GameTime
 from .town import Town
-from .g_event import EventManager, Event, GAME_EVENTS
+from .g_event import EventManager, Event, EventIndex, GAME_EVENTS, GAME_EVENT_INDEX
+from .rng import GameRandom
+from .recording import ActionRecorder, replay_recording
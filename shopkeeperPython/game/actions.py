@@ -0,0 +1,96 @@
+"""
+Action registry for GameManager.perform_hourly_action().
+
+Every player action is a GameManager method registered under its action name
+together with the rules perform_hourly_action() applies around it: how many hours
+it takes, how much XP it is worth, whether it can trigger generic events and
+whether a wandering customer can show up afterwards. Dispatch is a single dict
+lookup, and a new action only needs a registered method:
+
+    @ACTIONS.register("fish_river", hours=2, xp=4)
+    def _action_fish_river(self, action_details: dict):
+        ...
+
+A handler method takes the action_details dict and returns one of:
+    None        - the action completed; award the declared xp.
+    int         - the action completed; award this much XP instead.
+    (xp, hours) - as int, but the action took this many hours instead of the declared time.
+    dict        - hand this result straight back to the caller (pending haggle or event,
+                  or a failure). No XP is awarded, time doesn't advance and no events run.
+"""
+
+
+class ActionHandler:
+    """
+    Declaration of one player action.
+
+    Args:
+        name (str): Action name as sent by the UI (e.g. "explore_town").
+        method_name (str): Name of the GameManager method that performs it.
+        hours (int, optional): Game hours the action takes. 0 means it is a free
+                               action: time doesn't advance and no events run.
+        xp (int, optional): XP for completing the action, used when the handler
+                            doesn't return its own figure.
+        allows_generic_events (bool, optional): Whether a generic random event can occur.
+        triggers_customers (bool, optional): Whether a wandering customer can come to
+                                             haggle over shop stock afterwards.
+    """
+    __slots__ = ("name", "method_name", "hours", "xp", "allows_generic_events", "triggers_customers")
+
+    def __init__(self, name: str, method_name: str, hours: int = 1, xp: int = 0,
+                 allows_generic_events: bool = True, triggers_customers: bool = True):
+        self.name = name
+        self.method_name = method_name
+        self.hours = hours
+        self.xp = xp
+        self.allows_generic_events = allows_generic_events
+        self.triggers_customers = triggers_customers
+
+    def run(self, game_manager, action_details: dict):
+        """Calls the handler method on game_manager (looked up by name, so overrides apply)."""
+        return getattr(game_manager, self.method_name)(action_details)
+
+    def __repr__(self):
+        return f"ActionHandler(name='{self.name}', method='{self.method_name}', hours={self.hours}, xp={self.xp})"
+
+
+# Used for action names nobody registered: perform_hourly_action() reports them and
+# the hour passes like any other.
+UNKNOWN_ACTION = ActionHandler(name="", method_name="", hours=1, xp=0)
+
+
+class ActionRegistry:
+    """Maps action names to ActionHandlers."""
+
+    def __init__(self):
+        self._handlers = {}
+
+    def register(self, name: str, **options):
+        """
+        Decorator registering a GameManager method as the handler for `name`.
+        Keyword options are passed to ActionHandler (hours, xp, allows_generic_events,
+        triggers_customers). Registering a name again replaces the earlier handler.
+        """
+        def decorator(method):
+            self._handlers[name] = ActionHandler(name, method.__name__, **options)
+            return method
+        return decorator
+
+    def get(self, name: str) -> ActionHandler:
+        """Returns the handler for `name`, or UNKNOWN_ACTION."""
+        return self._handlers.get(name, UNKNOWN_ACTION)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._handlers
+
+    def __iter__(self):
+        return iter(self._handlers.values())
+
+    def __len__(self) -> int:
+        return len(self._handlers)
+
+    def names(self) -> list[str]:
+        return list(self._handlers)
+
+
+ACTIONS = ActionRegistry()
@@ -1,5 +1,8 @@
 import random
 from .item import Item # Assuming item.py is in the same directory
+from .inventory import Inventory
+from .journal import Journal, JournalEntry
+from . import game_log as log
 from .backgrounds import BACKGROUND_DEFINITIONS # Added for backgrounds
 from .feats import FEAT_DEFINITIONS # Added for feats
 from .factions import FACTION_DEFINITIONS, get_faction_definition, get_rank_by_reputation # Added for factions
@@ -9,7 +12,6 @@ from typing import TYPE_CHECKING
 if TYPE_CHECKING:
     from .shop import Shop
 
-import datetime # Added for timestamping journal entries
 from typing import Optional # Add this import
 
 # Helper function for stat rolling (4d6 drop lowest)
@@ -29,34 +31,6 @@ EXHAUSTION_EFFECTS = {
 }
 
 
-class JournalEntry:
-    def __init__(self, timestamp: datetime.datetime, action_type: str, summary: str, details: Optional[dict] = None, outcome: Optional[str] = None):
-        self.timestamp = timestamp
-        self.action_type = action_type
-        self.summary = summary
-        self.details = details # Now correctly typed as Optional[dict]
-        self.outcome = outcome
-
-    def to_dict(self) -> dict:
-        return {
-            "timestamp": self.timestamp.isoformat(),
-            "action_type": self.action_type,
-            "summary": self.summary,
-            "details": self.details,
-            "outcome": self.outcome,
-        }
-
-    @classmethod
-    def from_dict(cls, data: dict) -> 'JournalEntry':
-        return cls(
-            timestamp=datetime.datetime.fromisoformat(data["timestamp"]),
-            action_type=data["action_type"],
-            summary=data["summary"],
-            details=data.get("details"),
-            outcome=data.get("outcome"),
-        )
-
-
 class Character:
     LEVEL_XP_THRESHOLDS = { 1: 0, 2: 300, 3: 900, 4: 2700, 5: 6500 } # XP needed to reach this level
     ASI_FEAT_LEVELS = {4, 8, 12, 16, 19} # Standard D&D 5e levels for ASI/Feat
@@ -123,19 +97,20 @@ class Character:
         self.speed = 30
         self.is_dead = False # Added for perma-death
         self.current_town_name = "Starting Village" # Initialize current town name
-        self.journal = []  # Initialize journal for storing JournalEntry objects
+        self.journal = Journal()
+        self.version = 0 # Bumped on every web save; lets the app detect saves from another tab (see app.py)
 
         if self.background_id:
             background_def = next((bg for bg in BACKGROUND_DEFINITIONS if bg["id"] == self.background_id), None)
             if background_def:
-                print(f"Applying background: {background_def['name']} for {self.name}")
+                log.player("Applying background: %s for %s", background_def['name'], self.name)
                 # Apply skill bonuses
                 for skill_bonus_info in background_def.get("starting_skill_bonuses", []):
                     skill_name = skill_bonus_info["skill"]
                     bonus_amount = skill_bonus_info["bonus"]
                     self.attribute_bonuses_from_background[skill_name] = \
                         self.attribute_bonuses_from_background.get(skill_name, 0) + bonus_amount
-                    print(f"  Applied +{bonus_amount} to {skill_name} from background.")
+                    log.player("  Applied +%s to %s from background.", bonus_amount, skill_name)
 
                 # Grant starting items
                 for item_info in background_def.get("starting_items", []):
@@ -172,21 +147,38 @@ class Character:
                         new_item = Item.from_dict(item_data)
                         new_item.quantity = item_info["quantity"] # Ensure quantity is set from background
                         self.add_item_to_inventory(new_item)
-                        print(f"  Added starting item: {new_item.name} (Qty: {new_item.quantity})")
+                        log.player("  Added starting item: %s (Qty: %s)", new_item.name, new_item.quantity)
                     except Exception as e:
-                        print(f"  Error creating starting item {item_info['item_name']}: {e}. Item not added.")
+                        log.warning("  Error creating starting item %s: %s. Item not added.", item_info['item_name'], e)
 
 
                 # Add starting gold bonus
                 gold_bonus = background_def.get("starting_gold_bonus", 0)
                 self.gold += gold_bonus
                 if gold_bonus != 0:
-                    print(f"  Adjusted starting gold by {gold_bonus}. New total: {self.gold}")
+                    log.player("  Adjusted starting gold by %s. New total: %s", gold_bonus, self.gold)
             else:
-                print(f"Warning: Background ID '{self.background_id}' not found in BACKGROUND_DEFINITIONS.")
+                log.warning("Warning: Background ID '%s' not found in BACKGROUND_DEFINITIONS.", self.background_id)
 
         self._recalculate_all_attributes()
 
+    @property
+    def inventory(self) -> Inventory:
+        return self._inventory
+
+    @inventory.setter
+    def inventory(self, items):
+        # Plain lists (saves, tests) are wrapped so the name/quality indexes are always there.
+        self._inventory = items if isinstance(items, Inventory) else Inventory(items)
+
+    @property
+    def journal(self) -> Journal:
+        return self._journal
+
+    @journal.setter
+    def journal(self, entries):
+        self._journal = entries if isinstance(entries, Journal) else Journal(entries)
+
     @property
     def max_hp(self):
         hp_val = self.base_max_hp
@@ -239,24 +231,24 @@ class Character:
     def award_xp(self, amount: int) -> int:
         if amount == 0: return 0
         if amount < 0:
-            print(f"{self.name} loses {-amount} XP directly.")
+            log.player("%s loses %s XP directly.", self.name, -amount)
             self.xp += amount
             # Basic de-level check (simplified)
             while self.xp < self.LEVEL_XP_THRESHOLDS.get(self.level, 0) and self.level > 1:
                 self.level -=1
                 self.max_hit_dice = self.level # Recalculate max_hit_dice
                 self.hit_dice = min(self.hit_dice, self.max_hit_dice)
-                print(f"{self.name} de-leveled to Level {self.level}. Max Hit Dice: {self.max_hit_dice}.")
+                log.player("%s de-leveled to Level %s. Max Hit Dice: %s.", self.name, self.level, self.max_hit_dice)
             return amount # Return negative amount for tracking if needed
         self.pending_xp += amount
-        print(f"{self.name} is due to gain {amount} XP at end of day. Total pending: {self.pending_xp}")
+        log.player("%s is due to gain %s XP at end of day. Total pending: %s", self.name, amount, self.pending_xp)
         return amount
 
     def commit_pending_xp(self) -> int:
         if self.pending_xp <= 0: return 0
         amount_committed = self.pending_xp
         self.xp += self.pending_xp
-        print(f"{self.name} officially gains {self.pending_xp} XP. Total XP: {self.xp}")
+        log.player("%s officially gains %s XP. Total XP: %s", self.name, self.pending_xp, self.xp)
         self.pending_xp = 0
         self._check_level_up()
         return amount_committed
@@ -264,19 +256,19 @@ class Character:
     def _check_level_up(self):
         # De-leveling check (if XP significantly lost before commit)
         while self.xp < self.LEVEL_XP_THRESHOLDS.get(self.level, 0) and self.level > 1:
-            print(f"{self.name} has fallen below the XP threshold for Level {self.level}!")
+            log.player("%s has fallen below the XP threshold for Level %s!", self.name, self.level)
             self.level -=1
             self.max_hit_dice = self.level
             self.hit_dice = min(self.hit_dice, self.max_hit_dice)
             # TODO: Reduce base_max_hp appropriately based on previous level's gain. This is complex.
             # For now, HP will be capped by get_effective_max_hp() if base_max_hp isn't reduced.
-            print(f"{self.name} de-leveled to Level {self.level}. Max Hit Dice: {self.max_hit_dice}.")
+            log.player("%s de-leveled to Level %s. Max Hit Dice: %s.", self.name, self.level, self.max_hit_dice)
 
         # Level up check
         next_level_threshold_xp = self.LEVEL_XP_THRESHOLDS.get(self.level + 1, float('inf'))
         while self.xp >= next_level_threshold_xp:
             self.level += 1
-            print(f"{self.name} leveled up to Level {self.level}!")
+            log.player("%s leveled up to Level %s!", self.name, self.level)
             self.max_hit_dice = self.level
             self.hit_dice = min(self.hit_dice + 1, self.max_hit_dice) # Gain 1 HD, cap at new max
 
@@ -298,15 +290,15 @@ class Character:
             self.hp += hp_gained_this_level # Add the HP gained to current HP
             self.hp = min(self.hp, self.get_effective_max_hp()) # Ensure it doesn't exceed new max
 
-            print(f"  {self.name} gained {hp_gained_this_level} HP. Max HP is now {self.get_effective_max_hp()}.")
+            log.player("  %s gained %s HP. Max HP is now %s.", self.name, hp_gained_this_level, self.get_effective_max_hp())
 
             if self.level in self.ASI_FEAT_LEVELS:
                 self.pending_asi_feat_choice = True
-                print(f"  {self.name} has an Ability Score Improvement or Feat choice available!")
+                log.player("  %s has an Ability Score Improvement or Feat choice available!", self.name)
                 # Skill points are not allocated on ASI/Feat levels
             else:
                 self.skill_points_to_allocate += 1 # Standard per GDD for non-ASI levels
-                print(f"  {self.name} gained 1 skill point. Total skill points to allocate: {self.skill_points_to_allocate}.")
+                log.player("  %s gained 1 skill point. Total skill points to allocate: %s.", self.name, self.skill_points_to_allocate)
 
             next_level_threshold_xp = self.LEVEL_XP_THRESHOLDS.get(self.level + 1, float('inf'))
 
@@ -317,40 +309,40 @@ class Character:
         self.exhaustion_level = min(self.exhaustion_level, 6) # Cap at 6
 
         if self.exhaustion_level > old_level:
-            print(f"  {self.name} gains {amount} level(s) of exhaustion. New level: {self.exhaustion_level} ({self.get_exhaustion_effects()})")
+            log.player("  %s gains %s level(s) of exhaustion. New level: %s (%s)", self.name, amount, self.exhaustion_level, self.get_exhaustion_effects())
             if self.exhaustion_level >= 4 and old_level < 4: # HP max halved effect
                 self.hp = min(self.hp, self.get_effective_max_hp()) # Adjust current HP if it exceeds new max
-                print(f"  HP maximum now {self.get_effective_max_hp()}. Current HP adjusted to {self.hp}.")
+                log.player("  HP maximum now %s. Current HP adjusted to %s.", self.get_effective_max_hp(), self.hp)
             if self.exhaustion_level >= 6 and not self.is_dead : # Check not already dead to print message once
                 self.is_dead = True
                 self.hp = 0 # Explicitly set HP to 0 on death
-                print(f"  {self.name} has succumbed to their ailments and is now dead.")
+                log.player("  %s has succumbed to their ailments and is now dead.", self.name)
         elif self.exhaustion_level == old_level and self.exhaustion_level < 6 and amount > 0 and not self.is_dead:
-             print(f"  {self.name}'s exhaustion level remains {self.exhaustion_level} ({self.get_exhaustion_effects()}). No effective change from this event, though gain was attempted.")
+             log.player("  %s's exhaustion level remains %s (%s). No effective change from this event, though gain was attempted.", self.name, self.exhaustion_level, self.get_exhaustion_effects())
         # No message if already at 6 and trying to add more, as it's capped.
 
     def get_exhaustion_effects(self) -> str:
         return EXHAUSTION_EFFECTS.get(self.exhaustion_level, "Unknown exhaustion level.")
 
     def take_short_rest(self, hit_dice_to_spend: int) -> int:
-        if hit_dice_to_spend <= 0: print("Must spend at least one hit die."); return 0
-        if hit_dice_to_spend > self.hit_dice: print(f"Cannot spend {hit_dice_to_spend} HD, only {self.hit_dice} available."); return 0
+        if hit_dice_to_spend <= 0: log.player("Must spend at least one hit die."); return 0
+        if hit_dice_to_spend > self.hit_dice: log.player("Cannot spend %s HD, only %s available.", hit_dice_to_spend, self.hit_dice); return 0
         total_healed = 0; con_mod = self._calculate_modifier(self.stats["CON"], is_base_stat_score=True)
-        print(f"{self.name} takes short rest, spending {hit_dice_to_spend} HD (CON mod: {con_mod}).")
+        log.player("%s takes short rest, spending %s HD (CON mod: %s).", self.name, hit_dice_to_spend, con_mod)
         for i in range(hit_dice_to_spend):
             roll = random.randint(1,8); healed_this_die = max(0, roll + con_mod); old_hp = self.hp
             self.hp = min(self.get_effective_max_hp(), self.hp + healed_this_die)
             actual_healed = self.hp - old_hp; total_healed += actual_healed
-            print(f"  HD {i+1}: Rolled {roll}+{con_mod}={healed_this_die}. Healed {actual_healed} HP. HP: {self.hp}/{self.get_effective_max_hp()}")
+            log.player("  HD %s: Rolled %s+%s=%s. Healed %s HP. HP: %s/%s", i + 1, roll, con_mod, healed_this_die, actual_healed, self.hp, self.get_effective_max_hp())
         self.hit_dice -= hit_dice_to_spend
-        print(f"Total HP recovered: {total_healed}. HD left: {self.hit_dice}/{self.max_hit_dice}"); return total_healed
+        log.player("Total HP recovered: %s. HD left: %s/%s", total_healed, self.hit_dice, self.max_hit_dice); return total_healed
 
     def attempt_long_rest(self, food_available: bool = True, drink_available: bool = True, hours_of_rest: int = 8, interruption_chance: float = 0.1) -> dict:
-        print(f"\n{self.name} attempts a long rest...")
-        if hours_of_rest < 8: msg = "Not enough time for a full long rest."; print(msg); return {"success": False, "message": msg}
+        log.player("\n%s attempts a long rest...", self.name)
+        if hours_of_rest < 8: msg = "Not enough time for a full long rest."; log.player(msg); return {"success": False, "message": msg}
         if hours_of_rest < 8:
             msg = "Not enough time for a full long rest."
-            print(msg)
+            log.player(msg)
             # No exhaustion gain here, just not enough time.
             return {"success": False, "message": msg, "conditions_met": False, "hours_rested": hours_of_rest}
 
@@ -360,13 +352,13 @@ class Character:
             if not food_available: missing_supplies.append("Food")
             if not drink_available: missing_supplies.append("Drink")
             msg = f"Long rest conditions not met: missing {', '.join(missing_supplies)}. Gained 1 exhaustion."
-            print(msg)
+            log.player(msg)
             return {"success": False, "message": msg, "conditions_met": False, "hours_rested": hours_of_rest}
 
         # Conditions met (food, drink, time), rest can proceed pending interruptions (handled by GameManager)
         # Benefits are NOT applied here anymore. They will be applied by a separate method
         # called by GameManager if no interruption occurs or if an event outcome allows it.
-        print(f"  {self.name} settles down for a long rest. Basic conditions (food/drink/time) are met.")
+        log.player("  %s settles down for a long rest. Basic conditions (food/drink/time) are met.", self.name)
         return {"success": True, "message": "Basic conditions for long rest met. Awaiting completion or interruption.", "conditions_met": True, "hours_rested": hours_of_rest}
 
     def apply_long_rest_benefits(self, rest_quality: str = "successful"):
@@ -374,10 +366,10 @@ class Character:
         Applies the mechanical benefits of a long rest, potentially modified by an interruption event's outcome.
         Called by GameManager after event resolution or if no event occurred.
         """
-        print(f"  {self.name} is concluding their long rest. Outcome quality: '{rest_quality}'.")
+        log.player("  %s is concluding their long rest. Outcome quality: '%s'.", self.name, rest_quality)
 
         if rest_quality == "failed":
-            print(f"  Rest was a failure. No benefits gained. Exhaustion may have increased from event.")
+            log.player("  Rest was a failure. No benefits gained. Exhaustion may have increased from event.")
             # Exhaustion gain from the event itself would be handled by the event outcome.
             # If 'failed' means specifically due to sickness event, exhaustion is already applied.
             return
@@ -387,7 +379,7 @@ class Character:
             self.hp = min(self.get_effective_max_hp(), self.hp + (self.get_effective_max_hp() - self.hp) // 2) # Recover half of missing HP
             recovered_hd = max(1, self.max_hit_dice // 4) # Recover 1/4 HD (min 1)
             self.hit_dice = min(self.max_hit_dice, self.hit_dice + recovered_hd)
-            print(f"  Rest was poor. HP partially restored to {self.hp}. Recovered {recovered_hd} HD. No exhaustion relief.")
+            log.player("  Rest was poor. HP partially restored to %s. Recovered %s HD. No exhaustion relief.", self.hp, recovered_hd)
             return
 
         if rest_quality == "partial": # Disturbed, but some benefit
@@ -396,7 +388,7 @@ class Character:
             self.hit_dice = min(self.max_hit_dice, self.hit_dice + recovered_hd)
             # No exhaustion removal for partial rest, or maybe 1 level if very generous and event didn't add any.
             # For now, no exhaustion removal on partial.
-            print(f"  Rest was partial. HP significantly restored to {self.hp}. Recovered {recovered_hd} HD. No exhaustion relief.")
+            log.player("  Rest was partial. HP significantly restored to %s. Recovered %s HD. No exhaustion relief.", self.hp, recovered_hd)
             return
 
         # "successful" or "mostly_successful" (full benefits)
@@ -409,13 +401,13 @@ class Character:
         if self.exhaustion_level > 0:
             self.exhaustion_level -= 1
             exhaustion_removed_this_rest = 1
-            print(f"  {self.name} feels less exhausted. New level: {self.exhaustion_level} ({self.get_exhaustion_effects()})")
+            log.player("  %s feels less exhausted. New level: %s (%s)", self.name, self.exhaustion_level, self.get_exhaustion_effects())
         else:
             pass # No exhaustion to remove.
 
         # Placeholder for other D&D 5e long rest rules like spell slot recovery
-        print(f"  {self.name} completed a {'mostly successful' if rest_quality == 'mostly_successful' else 'successful'} long rest.")
-        print(f"  HP fully restored to {self.hp}. Recovered {recovered_hd} HD (Total: {self.hit_dice}/{self.max_hit_dice}). Exhaustion reduced by {exhaustion_removed_this_rest}.")
+        log.player("  %s completed a %s long rest.", self.name, 'mostly successful' if rest_quality == 'mostly_successful' else 'successful')
+        log.player("  HP fully restored to %s. Recovered %s HD (Total: %s/%s). Exhaustion reduced by %s.", self.hp, recovered_hd, self.hit_dice, self.max_hit_dice, exhaustion_removed_this_rest)
 
 
     def heal_hp(self, amount_to_heal: int) -> int:
@@ -437,22 +429,22 @@ class Character:
         if not hasattr(item, 'quantity'):
             item.quantity = 1
 
-        for existing_item in self.inventory:
-            if existing_item.name == item.name and existing_item.quality == item.quality:
-                # Ensure existing_item also has quantity, though it should if added by this method
-                if not hasattr(existing_item, 'quantity'):
-                    existing_item.quantity = 0 # Should not happen if items are consistently managed
-                existing_item.quantity += item.quantity
-                print(f"Stacked {item.quantity}x {item.name} ({item.quality}) in {self.name}'s inventory. New total: {existing_item.quantity}.")
-                return
+        existing_item = self.inventory.find_stack(item.name, item.quality)
+        if existing_item is not None:
+            # Ensure existing_item also has quantity, though it should if added by this method
+            if not hasattr(existing_item, 'quantity'):
+                existing_item.quantity = 0 # Should not happen if items are consistently managed
+            existing_item.quantity += item.quantity
+            log.debug("Stacked %sx %s (%s) in %s's inventory. New total: %s.", item.quantity, item.name, item.quality, self.name, existing_item.quantity)
+            return
 
         # If no stackable item found, add as new item
         self.inventory.append(item)
-        print(f"{item.name} (Qty: {item.quantity}, Quality: {item.quality}) added as new stack to {self.name}'s inventory.")
+        log.debug("%s (Qty: %s, Quality: %s) added as new stack to %s's inventory.", item.name, item.quantity, item.quality, self.name)
 
     def remove_item_from_inventory(self, item_name: str) -> Item | None:
-        for item in self.inventory:
-            if item.name == item_name: self.inventory.remove(item); print(f"{item_name} removed (first found)."); return item
+        item = self.inventory.first(item_name)
+        if item: self.inventory.remove(item); log.debug("%s removed (first found).", item_name); return item
         return None
     def remove_specific_item_from_inventory(self, item_instance: Item) -> bool:
         if item_instance in self.inventory: self.inventory.remove(item_instance); return True
@@ -460,103 +452,105 @@ class Character:
 
     def _apply_item_effects(self, item: Item):
         if not item.is_magical: return
-        print(f"Applying effects from {item.name}...")
+        log.debug("Applying effects from %s...", item.name)
         for type, val in item.effects.items():
             if type=="stat_bonus":
-                for stat,bonus in val.items(): self.stat_bonuses[stat]=self.stat_bonuses.get(stat,0)+bonus; print(f"  {stat}+{bonus}. New bonus: {self.stat_bonuses[stat]}. Effective: {self.get_effective_stat(stat)}")
-            elif type=="ac_bonus": self.ac_bonus+=val; print(f"  AC+{val}. New AC bonus: {self.ac_bonus}")
+                for stat,bonus in val.items(): self.stat_bonuses[stat]=self.stat_bonuses.get(stat,0)+bonus; log.debug("  %s+%s. New bonus: %s. Effective: %s", stat, bonus, self.stat_bonuses[stat], self.get_effective_stat(stat))
+            elif type=="ac_bonus": self.ac_bonus+=val; log.debug("  AC+%s. New AC bonus: %s", val, self.ac_bonus)
     def _remove_item_effects(self, item: Item):
         if not item.is_magical: return
-        print(f"Removing effects from {item.name}...")
+        log.debug("Removing effects from %s...", item.name)
         for type, val in item.effects.items():
             if type=="stat_bonus":
-                for stat,bonus in val.items(): self.stat_bonuses[stat]=self.stat_bonuses.get(stat,0)-bonus; print(f"  {stat}-{bonus}. New bonus: {self.stat_bonuses[stat]}. Effective: {self.get_effective_stat(stat)}")
-            elif type=="ac_bonus": self.ac_bonus-=val; print(f"  AC-{val}. New AC bonus: {self.ac_bonus}")
+                for stat,bonus in val.items(): self.stat_bonuses[stat]=self.stat_bonuses.get(stat,0)-bonus; log.debug("  %s-%s. New bonus: %s. Effective: %s", stat, bonus, self.stat_bonuses[stat], self.get_effective_stat(stat))
+            elif type=="ac_bonus": self.ac_bonus-=val; log.debug("  AC-%s. New AC bonus: %s", val, self.ac_bonus)
     def reapply_attuned_item_effects(self):
         self.stat_bonuses = {stat: 0 for stat in self.stats} # Reset all bonuses
         self.ac_bonus = 0
-        print(f"Reapplying effects for {self.name}'s attuned items...")
+        log.debug("Reapplying effects for %s's attuned items...", self.name)
         for item in self.attuned_items: self._apply_item_effects(item)
         self._recalculate_all_attributes()
 
     def attune_item(self, item_name: str) -> bool:
-        item_to_attune=next((i for i in self.inventory if i.name==item_name),None)
-        if not item_to_attune: print(f"Cannot attune: {item_name} not in inventory."); return False
-        if not item_to_attune.is_magical or not item_to_attune.is_attunement: print(f"Cannot attune: {item_name} not magical/attunement."); return False
-        if item_to_attune in self.attuned_items: print(f"Cannot attune: {item_name} already attuned."); return False
-        if len(self.attuned_items) >= self.attunement_slots: print(f"Cannot attune: No slots left."); return False
+        item_to_attune=self.inventory.first(item_name)
+        if not item_to_attune: log.player("Cannot attune: %s not in inventory.", item_name); return False
+        if not item_to_attune.is_magical or not item_to_attune.is_attunement: log.player("Cannot attune: %s not magical/attunement.", item_name); return False
+        if item_to_attune in self.attuned_items: log.player("Cannot attune: %s already attuned.", item_name); return False
+        if len(self.attuned_items) >= self.attunement_slots: log.player("Cannot attune: No slots left."); return False
         if self.remove_specific_item_from_inventory(item_to_attune):
             self.attuned_items.append(item_to_attune); self._apply_item_effects(item_to_attune)
-            print(f"{item_name} successfully attuned."); return True
-        print(f"Error: Could not remove {item_name} from inventory for attunement."); return False
+            log.player("%s successfully attuned.", item_name); return True
+        log.warning("Error: Could not remove %s from inventory for attunement.", item_name); return False
     def unattune_item(self, item_name: str) -> bool:
         item_to_unattune=next((i for i in self.attuned_items if i.name==item_name),None)
-        if not item_to_unattune: print(f"Cannot unattune: {item_name} not attuned."); return False
+        if not item_to_unattune: log.player("Cannot unattune: %s not attuned.", item_name); return False
         self._remove_item_effects(item_to_unattune); self.attuned_items.remove(item_to_unattune)
-        self.add_item_to_inventory(item_to_unattune); print(f"{item_name} successfully unattuned."); return True
+        self.add_item_to_inventory(item_to_unattune); log.player("%s successfully unattuned.", item_name); return True
     def use_consumable_item(self, item_name: str) -> bool:
-        item_to_use=next((i for i in self.inventory if i.name==item_name),None)
-        if not item_to_use: print(f"Cannot use: {item_name} not in inventory."); return False
-        if not item_to_use.is_consumable: print(f"Cannot use: {item_name} not consumable."); return False
-        print(f"{self.name} uses {item_name}!");
+        item_to_use=self.inventory.first(item_name)
+        if not item_to_use: log.player("Cannot use: %s not in inventory.", item_name); return False
+        if not item_to_use.is_consumable: log.player("Cannot use: %s not consumable.", item_name); return False
+        log.player("%s uses %s!", self.name, item_name);
         for type,val in item_to_use.effects.items():
-            if type=="heal_hp": old_hp=self.hp; self.hp=min(self.get_effective_max_hp(),self.hp+val); print(f"  Healed {self.hp-old_hp} HP. HP: {self.hp}/{self.get_effective_max_hp()}")
-            elif type=="restore_hit_dice": old_hd=self.hit_dice; self.hit_dice=min(self.max_hit_dice,self.hit_dice+val); print(f"  Restored {self.hit_dice-old_hd} HD. HD: {self.hit_dice}/{self.max_hit_dice}")
-            elif type=="cast_spell": print(f"  {self.name} casts {val}!")
+            if type=="heal_hp": old_hp=self.hp; self.hp=min(self.get_effective_max_hp(),self.hp+val); log.player("  Healed %s HP. HP: %s/%s", self.hp - old_hp, self.hp, self.get_effective_max_hp())
+            elif type=="restore_hit_dice": old_hd=self.hit_dice; self.hit_dice=min(self.max_hit_dice,self.hit_dice+val); log.player("  Restored %s HD. HD: %s/%s", self.hit_dice - old_hd, self.hit_dice, self.max_hit_dice)
+            elif type=="cast_spell": log.player("  %s casts %s!", self.name, val)
 
         # Handle quantity
         if item_to_use.quantity > 1:
             item_to_use.quantity -= 1
-            print(f"  Used one {item_name}. Quantity remaining: {item_to_use.quantity}.")
+            log.player("  Used one %s. Quantity remaining: %s.", item_name, item_to_use.quantity)
         elif item_to_use.quantity == 1:
             if not self.remove_specific_item_from_inventory(item_to_use): # Removes the item instance
-                print(f"CRITICAL: Failed to remove consumed {item_name} (quantity 1) from inventory.")
+                log.warning("CRITICAL: Failed to remove consumed %s (quantity 1) from inventory.", item_name)
                 # Potentially roll back effects or handle error state if removal fails critically
             else:
-                print(f"  Consumed the last {item_name}.")
+                log.player("  Consumed the last %s.", item_name)
         else: # quantity <= 0, should not happen if item management is correct
-            print(f"Warning: Attempted to use {item_name} with quantity {item_to_use.quantity}. Item not properly removed or state error.")
+            log.warning("Warning: Attempted to use %s with quantity %s. Item not properly removed or state error.", item_name, item_to_use.quantity)
             # Still return True if effects were applied, but log this issue.
 
         return True
 
     def display_character_info(self):
-        print(f"\n--- Character: {self.name} ---")
-        print(f"Level: {self.level}, XP: {self.xp} (Pending: {self.pending_xp})")
-        print(f"HP: {self.hp}/{self.get_effective_max_hp()}, HD: {self.hit_dice}/{self.max_hit_dice}")
-        print(f"Gold: {self.gold}")
-        print(f"Exhaustion: {self.exhaustion_level} ({self.get_exhaustion_effects()})")
-        print(f"Speed: {self.get_effective_speed()}")
-        print(f"Base Stats: {self.stats}")
-        print(f"Stat Bonuses: {self.stat_bonuses}")
-        print(f"Effective Stats: {{'STR':{self.get_effective_stat('STR')}, 'DEX':{self.get_effective_stat('DEX')}, 'CON':{self.get_effective_stat('CON')}, 'INT':{self.get_effective_stat('INT')}, 'WIS':{self.get_effective_stat('WIS')}, 'CHA':{self.get_effective_stat('CHA')}}}")
-        print("Attributes:")
+        if not log.debug_enabled(): # Skip computing the effective stats nobody will see
+            return
+        log.debug("\n--- Character: %s ---", self.name)
+        log.debug("Level: %s, XP: %s (Pending: %s)", self.level, self.xp, self.pending_xp)
+        log.debug("HP: %s/%s, HD: %s/%s", self.hp, self.get_effective_max_hp(), self.hit_dice, self.max_hit_dice)
+        log.debug("Gold: %s", self.gold)
+        log.debug("Exhaustion: %s (%s)", self.exhaustion_level, self.get_exhaustion_effects())
+        log.debug("Speed: %s", self.get_effective_speed())
+        log.debug("Base Stats: %s", self.stats)
+        log.debug("Stat Bonuses: %s", self.stat_bonuses)
+        log.debug("Effective Stats: {'STR':%s, 'DEX':%s, 'CON':%s, 'INT':%s, 'WIS':%s, 'CHA':%s}", self.get_effective_stat('STR'), self.get_effective_stat('DEX'), self.get_effective_stat('CON'), self.get_effective_stat('INT'), self.get_effective_stat('WIS'), self.get_effective_stat('CHA'))
+        log.debug("Attributes:")
         for attr_name in sorted(self.ATTRIBUTE_DEFINITIONS.keys()):
             score = self.get_attribute_score(attr_name)
-            print(f"  {attr_name}: {score:+}") # {:+} ensures a sign (+ or -) is shown
-        print(f"AC Bonus: {self.ac_bonus}")
-        print(f"Attunement Slots Used: {len(self.attuned_items)}/{self.attunement_slots}")
-        if self.attuned_items: print("Attuned Items:"); [print(f"  - {i.name} ({i.quality})") for i in self.attuned_items]
-        else: print("Attuned Items: None")
-        if self.inventory: print("Inventory:"); [print(f"  - {i.name} ({i.quality})") for i in self.inventory]
-        else: print("Inventory: Empty")
-        print("-------------------------")
+            log.debug("  %s: %s", attr_name, format(score, "+")) # {:+} ensures a sign (+ or -) is shown
+        log.debug("AC Bonus: %s", self.ac_bonus)
+        log.debug("Attunement Slots Used: %s/%s", len(self.attuned_items), self.attunement_slots)
+        if self.attuned_items: log.debug("Attuned Items:"); [log.debug("  - %s (%s)", i.name, i.quality) for i in self.attuned_items]
+        else: log.debug("Attuned Items: None")
+        if self.inventory: log.debug("Inventory:"); [log.debug("  - %s (%s)", i.name, i.quality) for i in self.inventory]
+        else: log.debug("Inventory: Empty")
+        log.debug("-------------------------")
 
     def buy_item_from_shop(self, item_name: str, quantity: int, shop: 'Shop') -> tuple[list[Item], int]:
         items_bought=[]; total_spent=0
         for i in range(quantity):
             item_instance, price = shop.sell_item_to_character(item_name, self)
-            if item_instance: items_bought.append(item_instance); self.add_item_to_inventory(item_instance); total_spent+=price; print(f"  Bought {item_name} for {price}g. ({i+1}/{quantity}) Gold: {self.gold}")
+            if item_instance: items_bought.append(item_instance); self.add_item_to_inventory(item_instance); total_spent+=price; log.player("  Bought %s for %sg. (%s/%s) Gold: %s", item_name, price, i + 1, quantity, self.gold)
             else: break
-        if items_bought: print(f"{self.name} bought {len(items_bought)} of {item_name}(s) for {total_spent}g.")
-        elif quantity>0: print(f"{self.name} failed to buy any '{item_name}'.")
+        if items_bought: log.player("%s bought %s of %s(s) for %sg.", self.name, len(items_bought), item_name, total_spent)
+        elif quantity>0: log.player("%s failed to buy any '%s'.", self.name, item_name)
         return items_bought, total_spent
     def sell_item_to_shop(self, item_to_sell: Item, shop: 'Shop') -> int:
-        if item_to_sell not in self.inventory: print(f"  {self.name} doesn't have {item_to_sell.name}."); return 0
+        if item_to_sell not in self.inventory: log.player("  %s doesn't have %s.", self.name, item_to_sell.name); return 0
         price_paid = shop.buy_item_from_character(item_to_sell, self)
         if price_paid > 0:
-            if self.remove_specific_item_from_inventory(item_to_sell): print(f"  {item_to_sell.name} sold. Gold: {self.gold}"); return price_paid
-            else: print(f"  CRITICAL: Sold {item_to_sell.name}, but failed to remove from inventory!"); return price_paid
+            if self.remove_specific_item_from_inventory(item_to_sell): log.player("  %s sold. Gold: %s", item_to_sell.name, self.gold); return price_paid
+            else: log.warning("  CRITICAL: Sold %s, but failed to remove from inventory!", item_to_sell.name); return price_paid
         return 0
 
     def has_items(self, items_to_check: dict) -> tuple[bool, dict]:
@@ -575,7 +569,7 @@ class Character:
         for item_name, required_quantity in items_to_check.items():
             # Count items by name. This assumes items with the same name are stackable for crafting.
             # If specific Item instances matter (e.g. with different qualities), this logic would need adjustment.
-            current_quantity = sum(item.quantity for item in self.inventory if item.name == item_name)
+            current_quantity = self.inventory.quantity_of(item_name)
             if current_quantity < required_quantity:
                 missing_items[item_name] = required_quantity - current_quantity
 
@@ -598,55 +592,53 @@ class Character:
         can_consume, _ = self.has_items(items_to_consume)
         if not can_consume:
             # This case should ideally be prevented by a prior call to has_items
-            print(f"CHARACTER: {self.name} cannot consume items due to insufficient quantities (checked before consumption).")
+            log.debug("CHARACTER: %s cannot consume items due to insufficient quantities (checked before consumption).", self.name)
             return False
 
         for item_name, quantity_to_consume in items_to_consume.items():
             consumed_so_far = 0
-            # Iterate backwards to safely remove items from the list
-            for i in range(len(self.inventory) - 1, -1, -1):
-                item_in_inventory = self.inventory[i]
-                if item_in_inventory.name == item_name:
-                    if item_in_inventory.quantity > (quantity_to_consume - consumed_so_far):
-                        # Item stack has more than needed, reduce quantity
-                        item_in_inventory.quantity -= (quantity_to_consume - consumed_so_far)
-                        consumed_so_far = quantity_to_consume
-                        break
-                    else:
-                        # Consume the whole stack (or what's left of it)
-                        consumed_so_far += item_in_inventory.quantity
-                        self.inventory.pop(i) # Remove the item stack
+            # Newest stacks first
+            for item_in_inventory in reversed(self.inventory.stacks_named(item_name)):
+                if item_in_inventory.quantity > (quantity_to_consume - consumed_so_far):
+                    # Item stack has more than needed, reduce quantity
+                    item_in_inventory.quantity -= (quantity_to_consume - consumed_so_far)
+                    consumed_so_far = quantity_to_consume
+                    break
+                else:
+                    # Consume the whole stack (or what's left of it)
+                    consumed_so_far += item_in_inventory.quantity
+                    self.inventory.remove(item_in_inventory) # Remove the item stack
                 if consumed_so_far >= quantity_to_consume:
                     break
 
             if consumed_so_far < quantity_to_consume:
                 # This indicates an issue, as has_items should have caught this.
                 # It might happen if items are not stackable and counts are off.
-                print(f"CHARACTER: Error consuming {item_name} for {self.name}. Needed {quantity_to_consume}, consumed {consumed_so_far}. Inventory might be inconsistent.")
+                log.warning("CHARACTER: Error consuming %s for %s. Needed %s, consumed %s. Inventory might be inconsistent.", item_name, self.name, quantity_to_consume, consumed_so_far)
                 # It might be necessary to roll back changes if a partial consumption is not acceptable.
                 # For now, we'll return False and log the error.
                 return False
 
-        print(f"CHARACTER: {self.name} successfully consumed items: {items_to_consume}")
+        log.debug("CHARACTER: %s successfully consumed items: %s", self.name, items_to_consume)
         return True
 
-    def _perform_single_roll(self, skill_name: str, dc: int) -> dict:
+    def _perform_single_roll(self, skill_name: str, dc: int, rng=random) -> dict:
         """Helper function to perform a single d20 roll with disadvantage if applicable."""
         if skill_name not in self.ATTRIBUTE_DEFINITIONS:
             # This case should ideally be caught before calling this internal helper
-            print(f"Warning: Invalid attribute/skill '{skill_name}' for check.")
+            log.warning("Warning: Invalid attribute/skill '%s' for check.", skill_name)
             return {
                 "success": False, "d20_roll": 1, "modifier": 0, "total_value": 1, "dc": dc,
                 "is_critical_hit": False, "is_critical_failure": True,
                 "disadvantage_details": "Invalid skill", "reroll_details": None
             }
 
-        roll1 = random.randint(1, 20)
+        roll1 = rng.randint(1, 20)
         d20_final_roll = roll1
         disadvantage_details_str = ""
 
         if self.exhaustion_level >= 1:  # Disadvantage on ability checks
-            roll2 = random.randint(1, 20)
+            roll2 = rng.randint(1, 20)
             d20_final_roll = min(roll1, roll2)
             disadvantage_details_str = f"(rolled {roll1},{roll2} dis, took {d20_final_roll})"
 
@@ -663,7 +655,7 @@ class Character:
         # If a nat 1 + mod still meets DC, it's not a failure unless house rule.
         # For now, we'll stick to total_value vs DC for success, but report crits.
 
-        print(f"  {self.name} {skill_name} check (DC {dc}). Roll: {d20_final_roll}{disadvantage_details_str} + {modifier_value} (Attribute Score) = {total_check_value}. {'Success' if check_success else 'Failure'}")
+        log.player("  %s %s check (DC %s). Roll: %s%s + %s (Attribute Score) = %s. %s", self.name, skill_name, dc, d20_final_roll, disadvantage_details_str, modifier_value, total_check_value, 'Success' if check_success else 'Failure')
 
         return {
             "success": check_success,
@@ -676,9 +668,10 @@ class Character:
             "disadvantage_details": disadvantage_details_str
         }
 
-    def perform_skill_check(self, skill_name:str, dc:int, can_use_reroll_item:bool=True) -> dict:
+    def perform_skill_check(self, skill_name:str, dc:int, can_use_reroll_item:bool=True, rng=random) -> dict:
+        """rng: the game's GameRandom during an action (see rng.py); the random module otherwise."""
         if skill_name not in self.ATTRIBUTE_DEFINITIONS:
-            print(f"Warning: Invalid attribute/skill '{skill_name}' for check.")
+            log.warning("Warning: Invalid attribute/skill '%s' for check.", skill_name)
             # Return a default failure structure
             return {
                 "success": False, "d20_roll": 1, "modifier": 0, "total_value": 1, "dc": dc,
@@ -686,7 +679,7 @@ class Character:
                 "disadvantage_details": "Invalid skill", "reroll_details": None
             }
 
-        initial_roll_result = self._perform_single_roll(skill_name, dc)
+        initial_roll_result = self._perform_single_roll(skill_name, dc, rng)
 
         # Prepare the final result structure, initially based on the first roll
         final_result = {**initial_roll_result, "reroll_details": None}
@@ -697,15 +690,15 @@ class Character:
             # A more robust system might use item tags or specific effect keys.
             reroll_item = next((i for i in self.inventory if "Lucky Charm" in i.name and i.effects.get("allow_reroll")), None)
             if reroll_item:
-                print(f"  {self.name} has {reroll_item.name}! Using for reroll...")
+                log.player("  %s has %s! Using for reroll...", self.name, reroll_item.name)
                 if reroll_item.is_consumable:
                     if self.remove_specific_item_from_inventory(reroll_item):
-                        print(f"  {reroll_item.name} consumed.")
+                        log.player("  %s consumed.", reroll_item.name)
                     else:
                         # This should not happen if item was found.
-                        print(f"  Error consuming {reroll_item.name}.")
+                        log.warning("  Error consuming %s.", reroll_item.name)
 
-                reroll_attempt_result = self._perform_single_roll(skill_name, dc)
+                reroll_attempt_result = self._perform_single_roll(skill_name, dc, rng)
                 final_result["reroll_details"] = reroll_attempt_result
 
                 # Update top-level keys to reflect the reroll's outcome
@@ -761,15 +754,16 @@ class Character:
             "hit_dice": self.hit_dice,
             "max_hit_dice": self.max_hit_dice,
             "attunement_slots": self.attunement_slots, # Though fixed, good to save
-            "attuned_items": [item.to_dict() for item in self.attuned_items],
+            "attuned_items": [item.to_save_dict() for item in self.attuned_items],
             "exhaustion_level": self.exhaustion_level,
-            "inventory": [item.to_dict() for item in self.inventory],
+            "inventory": [item.to_save_dict() for item in self.inventory],
             "gold": self.gold,
             "skill_points_to_allocate": self.skill_points_to_allocate,
             "speed": self.speed,
             "is_dead": self.is_dead, # Added for perma-death
             "current_town_name": town_name_to_save,
-            "journal": [entry.to_dict() for entry in self.journal], # Serialize journal entries
+            "journal": self.journal.records(),
+            "journal_archived": self.journal.archived,
             "background_id": self.background_id,
             "appearance_data": self.appearance_data,
             "attribute_bonuses_from_background": self.attribute_bonuses_from_background,
@@ -812,11 +806,7 @@ class Character:
         char.attribute_bonuses_from_background = data.get("attribute_bonuses_from_background", {})
 
         # Load journal entries
-        journal_data = data.get("journal", [])
-        if journal_data: # Check if journal data exists
-            char.journal = [JournalEntry.from_dict(entry_data) for entry_data in journal_data]
-        else:
-            char.journal = [] # Default to empty list if no journal data
+        char.journal = Journal(data.get("journal", []), archived=data.get("journal_archived", 0)) # Raw records; entries are built when read
 
         # If character is dead, ensure HP is 0.
         if char.is_dead:
@@ -843,15 +833,16 @@ class Character:
             "hit_dice": self.hit_dice,
             "max_hit_dice": self.max_hit_dice,
             "attunement_slots": self.attunement_slots,
-            "attuned_items": [item.to_dict() for item in self.attuned_items],
+            "attuned_items": [item.to_save_dict() for item in self.attuned_items],
             "exhaustion_level": self.exhaustion_level,
-            "inventory": [item.to_dict() for item in self.inventory],
+            "inventory": [item.to_save_dict() for item in self.inventory],
             "gold": self.gold,
             "skill_points_to_allocate": self.skill_points_to_allocate,
             "speed": self.speed,
             "is_dead": self.is_dead,
             "current_town_name": town_name_to_save,
-            "journal": [entry.to_dict() for entry in self.journal],
+            "journal": self.journal.records(),
+            "journal_archived": self.journal.archived,
             "background_id": self.background_id,
             "appearance_data": self.appearance_data,
             "attribute_bonuses_from_background": self.attribute_bonuses_from_background,
@@ -873,7 +864,7 @@ class Character:
         """
         primary_stat_name = self.ATTRIBUTE_DEFINITIONS.get(attribute_name)
         if not primary_stat_name:
-            print(f"Warning: Attribute '{attribute_name}' not found in ATTRIBUTE_DEFINITIONS.")
+            log.warning("Warning: Attribute '%s' not found in ATTRIBUTE_DEFINITIONS.", attribute_name)
             return 0 # Should not happen if called from _recalculate_all_attributes
 
         effective_stat_score = self.get_effective_stat(primary_stat_name)
@@ -916,10 +907,10 @@ class Character:
         """
         feat_def = next((f for f in FEAT_DEFINITIONS if f["id"] == feat_id), None)
         if not feat_def:
-            print(f"Warning: Feat ID '{feat_id}' not found in FEAT_DEFINITIONS. No effects applied.")
+            log.warning("Warning: Feat ID '%s' not found in FEAT_DEFINITIONS. No effects applied.", feat_id)
             return
 
-        print(f"Applying effects for feat: {feat_def['name']} for {self.name}")
+        log.player("Applying effects for feat: %s for %s", feat_def['name'], self.name)
         recalculate_attributes = False
         recalculate_stats_dependent = False
 
@@ -930,7 +921,7 @@ class Character:
             if effect_type == "base_max_hp_bonus":
                 old_max_hp = self.get_effective_max_hp()
                 self.base_max_hp += value
-                print(f"  Increased base_max_hp by {value}. New base_max_hp: {self.base_max_hp}")
+                log.player("  Increased base_max_hp by %s. New base_max_hp: %s", value, self.base_max_hp)
                 # Ensure current HP is updated correctly relative to new max HP
                 new_max_hp = self.get_effective_max_hp()
                 if self.hp == old_max_hp or self.is_dead: # If at full HP (before bonus) or dead, set to new max (or more if previously above new max for some reason)
@@ -950,24 +941,24 @@ class Character:
                 if attribute_name in self.ATTRIBUTE_DEFINITIONS:
                     self.feat_attribute_bonuses[attribute_name] = \
                         self.feat_attribute_bonuses.get(attribute_name, 0) + value
-                    print(f"  Applied +{value} to {attribute_name} from feat {feat_id}.")
+                    log.player("  Applied +%s to %s from feat %s.", value, attribute_name, feat_id)
                     recalculate_attributes = True
                 else:
-                    print(f"  Warning: Unknown attribute '{attribute_name}' in feat {feat_id}. Effect not applied.")
+                    log.warning("  Warning: Unknown attribute '%s' in feat %s. Effect not applied.", attribute_name, feat_id)
 
             elif effect_type == "stat_bonus":
                 stat_name = effect.get("stat")
                 if stat_name in self.STAT_NAMES:
                     self.feat_stat_bonuses[stat_name] = \
                         self.feat_stat_bonuses.get(stat_name, 0) + value
-                    print(f"  Applied +{value} to {stat_name} from feat {feat_id}.")
+                    log.player("  Applied +%s to %s from feat %s.", value, stat_name, feat_id)
                     # Recalculating attributes is necessary as they depend on stats
                     recalculate_attributes = True
                     recalculate_stats_dependent = True # To indicate CON dependent things like HP might change.
                 else:
-                    print(f"  Warning: Unknown stat '{stat_name}' in feat {feat_id}. Effect not applied.")
+                    log.warning("  Warning: Unknown stat '%s' in feat %s. Effect not applied.", stat_name, feat_id)
             else:
-                print(f"  Warning: Unknown effect type '{effect_type}' in feat {feat_id}. Effect not applied.")
+                log.warning("  Warning: Unknown effect type '%s' in feat %s. Effect not applied.", effect_type, feat_id)
 
         if recalculate_attributes: # This implies stats might have changed too
             self._recalculate_all_attributes()
@@ -1011,14 +1002,14 @@ class Character:
         """Adds a feat to the character if valid and not already present."""
         feat_def = next((f for f in FEAT_DEFINITIONS if f["id"] == feat_id), None)
         if not feat_def:
-            print(f"Error: Feat ID '{feat_id}' is not a valid feat definition.")
+            log.warning("Error: Feat ID '%s' is not a valid feat definition.", feat_id)
             return False
         if feat_id in self.feats:
-            print(f"Info: Character {self.name} already has feat '{feat_id}'.")
+            log.player("Info: Character %s already has feat '%s'.", self.name, feat_id)
             return False
 
         self.feats.append(feat_id)
-        print(f"Feat '{feat_def['name']}' added to {self.name}.")
+        log.player("Feat '%s' added to %s.", feat_def['name'], self.name)
         self.apply_feat_effects(feat_id)
         return True
 
@@ -1026,8 +1017,12 @@ class Character:
         """Checks if the character has a specific feat."""
         return feat_id in self.feats
 
-    def to_dict(self, current_town_name: str = None, current_time_data: dict = None) -> dict:
+    def to_dict(self, current_town_name: str = None, current_time_data: dict = None,
+                shop_data: dict = None, rng_state: dict = None, saved_at: float = None) -> dict:
         # If current_town_name is None, default to "Starting Village"
+        # shop_data is the player's Shop.to_dict(); saved_at is the wall-clock time.time() of the save,
+        # which lets the shop catch up on the time the player was away.
+        # rng_state is the GameManager's random stream position (GameRandom.to_dict()).
         town_name_to_save = current_town_name if current_town_name is not None else "Starting Village"
         data = {
             "name": self.name,
@@ -1042,15 +1037,16 @@ class Character:
             "hit_dice": self.hit_dice,
             "max_hit_dice": self.max_hit_dice,
             "attunement_slots": self.attunement_slots,
-            "attuned_items": [item.to_dict() for item in self.attuned_items],
+            "attuned_items": [item.to_save_dict() for item in self.attuned_items],
             "exhaustion_level": self.exhaustion_level,
-            "inventory": [item.to_dict() for item in self.inventory],
+            "inventory": [item.to_save_dict() for item in self.inventory],
             "gold": self.gold,
             "skill_points_to_allocate": self.skill_points_to_allocate,
             "speed": self.speed,
             "is_dead": self.is_dead,
             "current_town_name": town_name_to_save,
-            "journal": [entry.to_dict() for entry in self.journal],
+            "journal": self.journal.records(),
+            "journal_archived": self.journal.archived,
             "background_id": self.background_id,
             "appearance_data": self.appearance_data,
             "attribute_bonuses_from_background": self.attribute_bonuses_from_background,
@@ -1059,9 +1055,16 @@ class Character:
             "feat_stat_bonuses": self.feat_stat_bonuses,
             "faction_reputations": self.faction_reputations,
             "pending_asi_feat_choice": self.pending_asi_feat_choice,
+            "version": self.version,
         }
         if current_time_data is not None:
             data["game_time_snapshot"] = current_time_data
+        if shop_data is not None:
+            data["shop_snapshot"] = shop_data
+        if rng_state is not None:
+            data["rng_state"] = rng_state
+        if saved_at is not None:
+            data["last_saved_at"] = saved_at
         return data
 
     @classmethod
@@ -1110,12 +1113,12 @@ class Character:
 
         # Load game time snapshot
         char.loaded_game_time_data = data.get("game_time_snapshot", None) # Store it on the character instance
+        char.loaded_shop_data = data.get("shop_snapshot", None)
+        char.last_saved_at = data.get("last_saved_at", None)
+        char.version = data.get("version", 0)
+        char.loaded_rng_state = data.get("rng_state", None)
 
-        journal_data = data.get("journal", [])
-        if journal_data:
-            char.journal = [JournalEntry.from_dict(entry_data) for entry_data in journal_data]
-        else:
-            char.journal = []
+        char.journal = Journal(data.get("journal", []), archived=data.get("journal_archived", 0)) # Raw records; entries are built when read
 
         if char.is_dead:
             char.hp = 0
@@ -1131,16 +1134,16 @@ class Character:
         Allocates a skill point to the specified skill.
         """
         if self.skill_points_to_allocate <= 0:
-            print(f"Error: {self.name} has no skill points to allocate.")
+            log.player("Error: %s has no skill points to allocate.", self.name, category="error")
             return False
 
         if skill_name not in self.ATTRIBUTE_DEFINITIONS:
-            print(f"Error: '{skill_name}' is not a valid skill.")
+            log.player("Error: '%s' is not a valid skill.", skill_name, category="error")
             return False
 
         self.chosen_skill_bonuses[skill_name] = self.chosen_skill_bonuses.get(skill_name, 0) + 1
         self.skill_points_to_allocate -= 1
-        print(f"{self.name} allocated 1 skill point to {skill_name}. New bonus: {self.chosen_skill_bonuses[skill_name]}. Points remaining: {self.skill_points_to_allocate}.")
+        log.player("%s allocated 1 skill point to %s. New bonus: %s. Points remaining: %s.", self.name, skill_name, self.chosen_skill_bonuses[skill_name], self.skill_points_to_allocate)
         # No need to call _recalculate_all_attributes here, as get_attribute_score directly uses chosen_skill_bonuses.
         return True
 
@@ -1149,12 +1152,12 @@ class Character:
         """Sets or clears the pending ASI/Feat choice flag."""
         self.pending_asi_feat_choice = status
         if not status:
-            print(f"ASI/Feat choice for {self.name} has been made or deferred.")
+            log.player("ASI/Feat choice for %s has been made or deferred.", self.name)
 
     def apply_stat_increase_choice(self, stat_primary: str, points_primary: int, stat_secondary: str = None, points_secondary: int = 0) -> bool:
         """Applies an ability score increase choice."""
         if not self.pending_asi_feat_choice:
-            print(f"Error: No ASI/Feat choice is currently pending for {self.name}.")
+            log.player("Error: No ASI/Feat choice is currently pending for %s.", self.name, category="error")
             return False
 
         valid_points_config = (points_primary == 2 and points_secondary == 0 and not stat_secondary) or \
@@ -1162,11 +1165,11 @@ class Character:
                               (points_primary == 1 and points_secondary == 0 and not stat_secondary) # Single +1 option
 
         if not valid_points_config:
-            print("Error: Invalid ASI point distribution. Choose +2 to one stat, or +1 to two different stats, or +1 to one stat.")
+            log.player("Error: Invalid ASI point distribution. Choose +2 to one stat, or +1 to two different stats, or +1 to one stat.", category="error")
             return False
 
         if stat_primary not in self.STAT_NAMES or (stat_secondary and stat_secondary not in self.STAT_NAMES):
-            print(f"Error: Invalid stat name provided. Valid stats are: {self.STAT_NAMES}")
+            log.player("Error: Invalid stat name provided. Valid stats are: %s", self.STAT_NAMES, category="error")
             return False
 
         # Check 20 cap (common 5e rule, can be adjusted)
@@ -1175,7 +1178,7 @@ class Character:
         can_apply_secondary = not stat_secondary or (self.stats.get(stat_secondary, 0) + points_secondary) <= MAX_STAT_VALUE
 
         if not can_apply_primary or not can_apply_secondary:
-            print(f"Error: Stat increase would exceed cap of {MAX_STAT_VALUE}.")
+            log.player("Error: Stat increase would exceed cap of %s.", MAX_STAT_VALUE, category="error")
             return False
 
         # Apply changes
@@ -1184,11 +1187,11 @@ class Character:
 
         # Apply changes
         self.stats[stat_primary] = self.stats.get(stat_primary, 0) + points_primary
-        print(f"  {stat_primary} increased by {points_primary} to {self.stats[stat_primary]}.")
+        log.player("  %s increased by %s to %s.", stat_primary, points_primary, self.stats[stat_primary])
 
         if stat_secondary and points_secondary > 0:
             self.stats[stat_secondary] = self.stats.get(stat_secondary, 0) + points_secondary
-            print(f"  {stat_secondary} increased by {points_secondary} to {self.stats[stat_secondary]}.")
+            log.player("  %s increased by %s to %s.", stat_secondary, points_secondary, self.stats[stat_secondary])
 
         self._recalculate_all_attributes() # Updates attribute modifiers based on new stats
 
@@ -1204,23 +1207,23 @@ class Character:
             self.base_max_hp += hp_change_from_con_mod_increase
             self.hp += hp_change_from_con_mod_increase # Also increase current HP by the same amount
             self.hp = min(self.hp, self.get_effective_max_hp()) # Ensure current HP doesn't exceed new max
-            print(f"  Max HP updated by {hp_change_from_con_mod_increase} due to CON change. New Max HP: {self.get_effective_max_hp()}.")
+            log.player("  Max HP updated by %s due to CON change. New Max HP: %s.", hp_change_from_con_mod_increase, self.get_effective_max_hp())
 
         self.reapply_attuned_item_effects() # If other stats affect items or if CON change has other implications handled here
 
         self.set_pending_asi_feat_choice(False)
-        print(f"  {self.name} applied Ability Score Increases.")
+        log.player("  %s applied Ability Score Increases.", self.name)
         return True
 
     def apply_feat_choice(self, feat_id: str) -> bool:
         """Applies a feat choice."""
         if not self.pending_asi_feat_choice:
-            print(f"Error: No ASI/Feat choice is currently pending for {self.name}.")
+            log.player("Error: No ASI/Feat choice is currently pending for %s.", self.name, category="error")
             return False
 
         if self.add_feat(feat_id): # add_feat already prints messages and applies effects
             self.set_pending_asi_feat_choice(False)
-            print(f"  {self.name} chose feat: {feat_id}.")
+            log.player("  %s chose feat: %s.", self.name, feat_id)
             return True
         else:
             # add_feat would print why it failed (e.g., already has feat, invalid feat)
@@ -1250,7 +1253,7 @@ class Character:
         Updates the character's reputation score for a faction and checks for rank changes.
         """
         if not self.get_faction_data(faction_id):
-            print(f"Warning: Faction ID '{faction_id}' not found. Cannot update reputation.")
+            log.warning("Warning: Faction ID '%s' not found. Cannot update reputation.", faction_id)
             return
 
         current_details = self.faction_reputations.get(faction_id)
@@ -1261,22 +1264,22 @@ class Character:
             # but can be initialized here if reputation is gained before formal joining.
             initial_rank = get_rank_by_reputation(faction_id, 0)
             if not initial_rank: # Should not happen if faction definition is correct
-                print(f"Error: Could not determine initial rank for faction '{faction_id}'.")
+                log.warning("Error: Could not determine initial rank for faction '%s'.", faction_id)
                 return
             self.faction_reputations[faction_id] = {"score": 0, "rank_name": initial_rank["name"]}
             current_details = self.faction_reputations[faction_id]
-            print(f"{self.name} now has a reputation with {self.get_faction_data(faction_id)['name']}, starting at {initial_rank['name']}.")
+            log.player("%s now has a reputation with %s, starting at %s.", self.name, self.get_faction_data(faction_id)['name'], initial_rank['name'])
 
         old_score = current_details["score"]
         new_score = old_score + amount
         current_details["score"] = new_score
 
-        print(f"{self.name}'s reputation with {self.get_faction_data(faction_id)['name']} changed by {amount} to {new_score}.")
+        log.player("%s's reputation with %s changed by %s to %s.", self.name, self.get_faction_data(faction_id)['name'], amount, new_score)
 
         # Check for rank change
         new_rank_def = get_rank_by_reputation(faction_id, new_score)
         if not new_rank_def: # Should not happen
-            print(f"Error: Could not determine rank for score {new_score} in faction '{faction_id}'.")
+            log.warning("Error: Could not determine rank for score %s in faction '%s'.", new_score, faction_id)
             return
 
         old_rank_name = current_details["rank_name"]
@@ -1284,7 +1287,7 @@ class Character:
 
         if new_rank_name != old_rank_name:
             current_details["rank_name"] = new_rank_name
-            print(f"{self.name} has achieved the rank of {new_rank_name} with {self.get_faction_data(faction_id)['name']}!")
+            log.player("%s has achieved the rank of %s with %s!", self.name, new_rank_name, self.get_faction_data(faction_id)['name'])
             # Here, you could also trigger application of new rank benefits if they are immediate
             # For now, benefits are mostly checked passively (e.g. shop discounts)
 
@@ -1295,19 +1298,19 @@ class Character:
         """
         faction_def = self.get_faction_data(faction_id)
         if not faction_def:
-            print(f"Error: Faction ID '{faction_id}' not found. Cannot join.")
+            log.warning("Error: Faction ID '%s' not found. Cannot join.", faction_id)
             return False
 
         if faction_id in self.faction_reputations:
-            print(f"{self.name} is already a member of {faction_def['name']}.")
+            log.player("%s is already a member of %s.", self.name, faction_def['name'])
             return False
 
         # Determine initial rank (usually the one requiring 0 reputation)
         initial_rank = get_rank_by_reputation(faction_id, 0)
         if not initial_rank:
-            print(f"Error: Could not determine initial rank for faction '{faction_id}'. Joining failed.")
+            log.warning("Error: Could not determine initial rank for faction '%s'. Joining failed.", faction_id)
             return False
 
         self.faction_reputations[faction_id] = {"score": 0, "rank_name": initial_rank["name"]}
-        print(f"{self.name} has joined {faction_def['name']} with the rank of {initial_rank['name']}.")
+        log.player("%s has joined %s with the rank of %s.", self.name, faction_def['name'], initial_rank['name'])
         return True
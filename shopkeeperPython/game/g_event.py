@@ -1,4 +1,6 @@
 import random
+from bisect import bisect_right
+from . import game_log as log
 try:
     from .character import Character
     from .item import Item
@@ -81,6 +83,50 @@ class Event:
         )
 
 
+class EventIndex:
+    """
+    Read-only lookup structure over an event catalog, built once.
+
+    Events are bucketed by (skill, event_type), with each bucket sorted by min_level,
+    so the events a character of a given level can get are a bisect away instead of
+    a scan over every event and choice. A None skill or event_type means "any".
+    """
+
+    def __init__(self, events: list[Event]):
+        self.events = tuple(events)
+        self.by_name = {event.name: event for event in self.events}
+        buckets = {}
+        for event in self.events:
+            skills = {choice.get('skill') for choice in event.skill_check_options if choice.get('skill')}
+            keys = {(None, None), (None, event.event_type)}
+            for skill in skills:
+                keys.add((skill, event.event_type))
+                keys.add((skill, None))
+            for key in keys:
+                buckets.setdefault(key, []).append(event)
+        self._buckets = {}
+        for key, bucket in buckets.items():
+            bucket.sort(key=lambda event: event.min_level) # Stable: keeps catalog order within a level
+            self._buckets[key] = ([event.min_level for event in bucket], tuple(bucket))
+
+    def eligible(self, level: int, skill: str = None, event_type: str = None) -> tuple[Event, ...]:
+        """Events with min_level <= level, optionally offering a `skill` check and/or of `event_type`."""
+        bucket = self._buckets.get((skill, event_type))
+        if bucket is None:
+            return ()
+        levels, events = bucket
+        return events[:bisect_right(levels, level)]
+
+    def get(self, name: str) -> Event | None:
+        return self.by_name.get(name)
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def __iter__(self):
+        return iter(self.events)
+
+
 class EventManager:
     def __init__(self, character: Character, game_manager): # Added game_manager
         self.character = character
@@ -88,6 +134,11 @@ class EventManager:
         self.todays_events_history: list[str] = []
         self.current_tracking_day: int = -1 # To be updated by GameManager
 
+    @property
+    def rng(self):
+        """The game's random stream (see rng.py), or the random module without a game manager."""
+        return getattr(self.game_manager, 'rng', None) or random
+
     def reset_daily_event_history(self, game_day: int):
         """Resets the history of events that occurred today."""
         if self.current_tracking_day != game_day:
@@ -121,7 +172,7 @@ class EventManager:
         selected_event = None
         if unseen_today_events:
             # Prefer unseen events
-            selected_event = random.choice(unseen_today_events)
+            selected_event = self.rng.choice(unseen_today_events)
             # print(f"DEBUG: Selected from unseen events. Pool size: {len(unseen_today_events)}")
         elif seen_today_events:
             # If all possible events have been seen today, choose from them
@@ -135,17 +186,17 @@ class EventManager:
                 # Try to pick an event that isn't the one that just happened
                 selectable_seen_events = [e for e in seen_today_events if e.name != last_event_name]
                 if selectable_seen_events:
-                    selected_event = random.choice(selectable_seen_events)
+                    selected_event = self.rng.choice(selectable_seen_events)
                     # print(f"DEBUG: Selected from seen_today_events (excluding last). Pool size: {len(selectable_seen_events)}")
                 else:
                     # This case means all seen_today_events are the same as the last event,
                     # which implies seen_today_events had only one unique event type, and it was the last one.
                     # Fallback to original behavior if filtering results in an empty list.
-                    selected_event = random.choice(seen_today_events)
+                    selected_event = self.rng.choice(seen_today_events)
                     # print(f"DEBUG: Selected from seen_today_events (fallback, could be same as last). Pool size: {len(seen_today_events)}")
             else:
                 # Original behavior if only one event type in seen_today_events or no history
-                selected_event = random.choice(seen_today_events)
+                selected_event = self.rng.choice(seen_today_events)
                 # print(f"DEBUG: Selected from seen_today_events (original path). Pool size: {len(seen_today_events)}")
         else:
             # This case should ideally not be reached if possible_events was not empty.
@@ -160,25 +211,29 @@ class EventManager:
         # print(f"DEBUG: Added {selected_event.name} to todays_events_history. History size: {len(self.todays_events_history)}")
         return selected_event.name # Return the name of the triggered event
 
-    def trigger_long_rest_interruption_event(self, all_possible_events: list[Event], base_interruption_chance: float = 0.20) -> tuple[bool, Event | None]:
+    def trigger_long_rest_interruption_event(self, all_possible_events: 'EventIndex | list[Event]', base_interruption_chance: float = 0.20) -> tuple[bool, Event | None]:
         """
         Attempts to trigger a long rest interruption event.
+        all_possible_events is an EventIndex or a plain list of events to filter.
         Returns a tuple: (True, triggered_event_object) if an event is triggered, (False, None) otherwise.
         """
         if not self.character or not hasattr(self.character, 'level'):
             self.game_manager._print("EventManager: Cannot trigger rest interruption, character or level info missing.")
             return False, None
 
-        if random.random() > base_interruption_chance:
+        if self.rng.random() > base_interruption_chance:
             self.game_manager._print("EventManager: Long rest proceeds without event interruption (chance roll failed).")
             return False, None
 
         self.reset_daily_event_history(self.game_manager.time.current_day)
 
-        possible_interruption_events = [
-            event for event in all_possible_events
-            if event.event_type == "rest_interruption" and self.character.level >= event.min_level
-        ]
+        if isinstance(all_possible_events, EventIndex):
+            possible_interruption_events = all_possible_events.eligible(self.character.level, event_type="rest_interruption")
+        else:
+            possible_interruption_events = [
+                event for event in all_possible_events
+                if event.event_type == "rest_interruption" and self.character.level >= event.min_level
+            ]
 
         if not possible_interruption_events:
             self.game_manager._print("EventManager: No suitable 'rest_interruption' events found for character level.")
@@ -195,11 +250,11 @@ class EventManager:
 
         selected_event_object = None
         if unseen_today_events:
-            selected_event_object = random.choice(unseen_today_events)
+            selected_event_object = self.rng.choice(unseen_today_events)
         elif seen_today_events:
             self.game_manager._print("EventManager: All available rest interruption events for this trigger have already occurred today. Repeating one.")
             # Potentially add logic to avoid immediate repetition if multiple seen events exist
-            selected_event_object = random.choice(seen_today_events)
+            selected_event_object = self.rng.choice(seen_today_events)
         else: # Should not be reached if possible_interruption_events was populated
             self.game_manager._print("EventManager: No rest interruption events available after filtering (unexpected).")
             return False, None
@@ -218,13 +273,13 @@ class EventManager:
         Prepares and returns the list of choices for the player for a given event.
         Calculates scaled DCs and item requirement descriptions.
         """
-        print(f"\n--- Event: {event_instance.name} ---")
-        print(f"Description: {event_instance.description}")
+        log.debug("\n--- Event: %s ---", event_instance.name)
+        log.debug("Description: %s", event_instance.description)
 
         choices_for_ui = []
         if not hasattr(self.character, 'level'):
             # Fallback if character object doesn't have a level (e.g. simplified test character)
-            print("Warning: Character has no level attribute. Using level 1 for DC scaling.")
+            log.warning("Warning: Character has no level attribute. Using level 1 for DC scaling.")
             character_level = 1
         else:
             character_level = self.character.level
@@ -260,7 +315,7 @@ class EventManager:
             choices_for_ui.append(choice_ui_data)
 
         if not choices_for_ui and event_instance.outcomes: # Handle events with no skill checks (direct outcomes)
-            print("This event has a direct outcome.")
+            log.debug("This event has a direct outcome.")
             # If there are no skill check choices, but there are outcomes,
             # we might imply a default action or that the event just happens.
             # For now, this method is about presenting choices. If no choices, it returns empty.
@@ -275,10 +330,10 @@ class EventManager:
 
 
         if choices_for_ui:
-            print("\nPlayer Choices:")
+            log.debug("\nPlayer Choices:")
             for choice_ui in choices_for_ui:
                 req_desc = f" ({choice_ui['item_requirement_desc']})" if 'item_requirement_desc' in choice_ui else ""
-                print(f"  {choice_ui['id']}. {choice_ui['text']} [{choice_ui['skill']} DC {choice_ui['dc']}{req_desc}]")
+                log.debug("  %s. %s [%s DC %s%s]", choice_ui['id'], choice_ui['text'], choice_ui['skill'], choice_ui['dc'], req_desc)
 
         return choices_for_ui
 
@@ -308,7 +363,7 @@ class EventManager:
                 auto_success_by_item = False
                 final_roll_data = {"status": "direct_outcome", "success": True, "dc": 0}
             else:
-                print(f"Error: Invalid choice index ({choice_index}) or no skill check options for event '{event_instance.name}'.")
+                log.warning("Error: Invalid choice index (%s) or no skill check options for event '%s'.", choice_index, event_instance.name)
                 return {"message": "Error: Invalid choice or event configuration.", "rolled_successfully": False, "details": {}}
         else:
             selected_choice = event_instance.skill_check_options[choice_index]
@@ -337,11 +392,11 @@ class EventManager:
                             break
 
                 if found_item_in_inventory:
-                    print(f"Item '{item_name_req}' is available.")
+                    log.player("Item '%s' is available.", item_name_req)
                     if item_req.get('effect') == 'auto_success':
                         check_successful = True
                         auto_success_by_item = True
-                        print(f"Outcome automatically successful due to {item_name_req}.")
+                        log.player("Outcome automatically successful due to %s.", item_name_req)
                         roll_result_dict = {"status": "auto_success", "item_used": item_name_req, "dc": 0, "success": True}
                         # Future: if item_req.get('consumable', False) and hasattr(self.character, 'remove_item_from_inventory'):
                         #     self.character.remove_item_from_inventory(found_item_in_inventory)
@@ -350,9 +405,9 @@ class EventManager:
                         reduction_value = item_req.get('value', 0)
                         original_dc = scaled_dc
                         scaled_dc = max(1, scaled_dc - reduction_value)
-                        print(f"DC reduced from {original_dc} to {scaled_dc} by {item_name_req}.")
+                        log.player("DC reduced from %s to %s by %s.", original_dc, scaled_dc, item_name_req)
                 elif item_req.get('effect') == 'enable_choice_or_auto_fail': # Example of a hard requirement
-                    print(f"Item '{item_name_req}' required for this choice but not found. Outcome is failure.")
+                    log.player("Item '%s' required for this choice but not found. Outcome is failure.", item_name_req)
                     check_successful = False # Force failure if item is essential and missing
                     # This assignment of outcome_key might be too early if check_successful can be True later
                     # outcome_key = selected_choice.get('failure_outcome_key', 'failure')
@@ -364,14 +419,14 @@ class EventManager:
                 # roll_result_dict is already initialized above
                 if skill_to_check and hasattr(self.character, 'perform_skill_check'):
                     # print(f"Performing {skill_to_check} check against DC {scaled_dc}.") # perform_skill_check now prints this
-                    roll_result_dict = self.character.perform_skill_check(skill_name=skill_to_check, dc=scaled_dc)
+                    roll_result_dict = self.character.perform_skill_check(skill_name=skill_to_check, dc=scaled_dc, rng=self.rng)
                     check_successful = roll_result_dict["success"]
                 elif not skill_to_check: # No skill defined, could be auto-pass or auto-fail based on design for that choice
-                    print(f"No skill defined for choice '{selected_choice.get('choice_text', 'Unnamed choice')}'. Assuming success as no skill/DC implies narrative choice.")
+                    log.player("No skill defined for choice '%s'. Assuming success as no skill/DC implies narrative choice.", selected_choice.get('choice_text', 'Unnamed choice'))
                     check_successful = True # If no skill and no DC, assume success.
                     roll_result_dict = {"status": "no_skill_check_required", "dc": 0, "success": True}
                 else: # Character cannot perform skill checks
-                    print(f"Error: Character object does not have 'perform_skill_check' method. Assuming failure for skill check.")
+                    log.warning("Error: Character object does not have 'perform_skill_check' method. Assuming failure for skill check.")
                     check_successful = False
                     roll_result_dict = {"status": "perform_skill_check_missing", "dc": scaled_dc, "success": False}
 
@@ -384,11 +439,11 @@ class EventManager:
             alt_outcome_key = "failure" if outcome_key != "failure" else "success" # Try alternative if primary missing
             chosen_outcome = event_instance.outcomes.get(alt_outcome_key)
             if chosen_outcome:
-                print(f"Warning: Outcome key '{outcome_key}' not found. Using alternative '{alt_outcome_key}'.")
+                log.warning("Warning: Outcome key '%s' not found. Using alternative '%s'.", outcome_key, alt_outcome_key)
             else:
                 # Ensure check_successful is defined even if outcome is missing
                 if 'check_successful' not in locals(): check_successful = False # Default if not set
-                print(f"Error: Outcome key '{outcome_key}' (and alternative) not defined for event '{event_instance.name}'. Using generic failure.")
+                log.warning("Error: Outcome key '%s' (and alternative) not defined for event '%s'. Using generic failure.", outcome_key, event_instance.name)
                 return {"message": f"Event '{event_instance.name}' concluded without a specific outcome message (key: {outcome_key}).",
                         "rolled_successfully": check_successful,
                         "outcome_details": {"error": "Outcome not found"},
@@ -396,7 +451,7 @@ class EventManager:
                         }
 
         outcome_message = chosen_outcome.get('message', 'No message for this outcome.')
-        print(f"Outcome ({('Success' if check_successful else 'Failure')} - Key: {outcome_key}): {outcome_message}")
+        log.player("Outcome (%s - Key: %s): %s", 'Success' if check_successful else 'Failure', outcome_key, outcome_message)
 
         # The 'effects' sub-dictionary of the chosen outcome
         outcome_effects_to_apply = chosen_outcome.get("effects", {})
@@ -411,16 +466,16 @@ class EventManager:
             applied_effects_summary["xp_change"] = xp_change
             # print(f"  XP Changed by {xp_change}. Current Pending XP: {getattr(self.character, 'pending_xp', 'N/A')}") # Already printed by award_xp
         elif xp_change != 0:
-            print(f"  Error: Character has no 'award_xp' method for XP change of {xp_change}.")
+            log.warning("  Error: Character has no 'award_xp' method for XP change of %s.", xp_change)
 
         # Gold Changes
         gold_change = outcome_effects_to_apply.get("gold_change", 0)
         if gold_change != 0 and hasattr(self.character, 'gold'):
             self.character.gold += gold_change
             applied_effects_summary["gold_change"] = gold_change
-            print(f"  Gold changed by {gold_change}. Current Gold: {self.character.gold}")
+            log.player("  Gold changed by %s. Current Gold: %s", gold_change, self.character.gold)
         elif gold_change != 0:
-             print(f"  Error: Character has no 'gold' attribute for Gold change of {gold_change}.")
+             log.warning("  Error: Character has no 'gold' attribute for Gold change of %s.", gold_change)
 
         # Item Rewards
         item_reward_details = outcome_effects_to_apply.get("item_reward")
@@ -444,7 +499,7 @@ class EventManager:
                     applied_effects_summary.setdefault("items_gained", []).append({"name": item_name, "quantity": item_qty})
                     # print(f"  Gained item: {item_name} (Quantity: {item_qty})") # Printed by add_item_to_inventory
                 except Exception as e:
-                    print(f"  Error creating/adding item reward '{item_name}': {e}")
+                    log.warning("  Error creating/adding item reward '%s': %s", item_name, e)
 
         # Item Loss
         item_loss_details = outcome_effects_to_apply.get("item_loss")
@@ -464,9 +519,9 @@ class EventManager:
                     applied_effects_summary.setdefault("items_lost", []).append({"name": item_to_lose_name, "quantity": items_removed_count})
                     # print(f"  Lost {items_removed_count}x {item_to_lose_name}.") # Printed by remove_item
                 else:
-                    print(f"  Tried to lose {item_to_lose_name}, but not found in inventory or failed to remove.")
+                    log.player("  Tried to lose %s, but not found in inventory or failed to remove.", item_to_lose_name)
             elif item_loss_details.get("type") == "random_valuable":
-                print(f"  Placeholder: Player would lose a random valuable item.")
+                log.player("  Placeholder: Player would lose a random valuable item.")
 
         # HP Loss (example of another direct effect)
         hp_loss = outcome_effects_to_apply.get("hp_loss", 0)
@@ -474,19 +529,19 @@ class EventManager:
             # Assuming direct HP reduction, not "damage" which might interact with resistances later
             self.character.hp = max(0, self.character.hp - hp_loss)
             applied_effects_summary["hp_lost"] = hp_loss
-            print(f"  Lost {hp_loss} HP. Current HP: {self.character.hp}/{self.character.get_effective_max_hp()}")
+            log.player("  Lost %s HP. Current HP: %s/%s", hp_loss, self.character.hp, self.character.get_effective_max_hp())
             if self.character.hp == 0:
-                 print(f"  {self.character.name} has been knocked unconscious or worse!")
+                 log.player("  %s has been knocked unconscious or worse!", self.character.name)
                  # Potentially trigger gain_exhaustion or death checks here or in Character class via take_damage method
 
         # Rest Quality Application (for long rest interruption events)
         outcome_rest_quality = outcome_effects_to_apply.get("rest_quality")
         if outcome_rest_quality and hasattr(self.character, 'apply_long_rest_benefits'):
-            print(f"  Event outcome indicates rest quality: '{outcome_rest_quality}'. Applying rest benefits accordingly.")
+            log.player("  Event outcome indicates rest quality: '%s'. Applying rest benefits accordingly.", outcome_rest_quality)
             self.character.apply_long_rest_benefits(rest_quality=outcome_rest_quality)
             applied_effects_summary["rest_outcome_applied"] = outcome_rest_quality
         elif outcome_rest_quality: # Has rest_quality but character can't apply it
-            print(f"  Warning: Event outcome specified rest_quality '{outcome_rest_quality}', but character cannot apply rest benefits.")
+            log.warning("  Warning: Event outcome specified rest_quality '%s', but character cannot apply rest benefits.", outcome_rest_quality)
 
 
         # Journal Entry
@@ -510,7 +565,7 @@ class EventManager:
                 outcome=outcome_message
             )
         else:
-            print("EventManager: GameManager or add_journal_entry not available. Cannot log event to journal.")
+            log.debug("EventManager: GameManager or add_journal_entry not available. Cannot log event to journal.")
 
         return {
             "message": outcome_message,
@@ -1198,6 +1253,8 @@ GAME_EVENTS.extend([
     event_nightmares_rest
 ])
 
+GAME_EVENT_INDEX = EventIndex(GAME_EVENTS)
+
 if __name__ == "__main__":
     import datetime # Added for MockGameManager timestamping
     print("--- Event System Test ---")
@@ -0,0 +1,130 @@
+"""
+Logging facade for the game modules.
+
+The game reports through three functions instead of print():
+
+    log.player("%s leveled up to Level %s!", name, level)     # something the player should see
+    log.debug("SHOP: Added %s to inventory.", item_name)       # developer chatter
+    log.warning("Saved town '%s' not found.", town_name)      # a problem worth an operator's attention
+
+Messages are %-style templates plus arguments and are only formatted when
+somebody reads them. debug and warning go to the standard logging module
+(loggers "shopkeeper.debug" and "shopkeeper.game"), so a disabled level costs
+a function call and a level check. Turn debug output on with e.g.
+logging.getLogger("shopkeeper.debug").setLevel(logging.DEBUG).
+
+Player messages go to the MessageBuffer installed for the current request or
+run (collect_player_messages(), or set_player_buffer() in request hooks). With
+no buffer they are logged at INFO on "shopkeeper.player", which is silent unless
+logging is configured for it (the CLI in main.py does).
+"""
+import contextlib
+import contextvars
+import logging
+
+DEBUG_LOGGER = logging.getLogger("shopkeeper.debug")
+GAME_LOGGER = logging.getLogger("shopkeeper.game")
+PLAYER_LOGGER = logging.getLogger("shopkeeper.player")
+
+
+class PlayerMessage:
+    """One player-facing message, formatted on first access to .text."""
+    __slots__ = ("category", "template", "args")
+
+    def __init__(self, category: str, template: str, args: tuple):
+        self.category = category
+        self.template = template
+        self.args = args
+
+    @property
+    def text(self) -> str:
+        return self.template % self.args if self.args else self.template
+
+    def to_dict(self) -> dict:
+        return {"category": self.category, "text": self.text}
+
+
+class MessageBuffer:
+    """
+    Player messages collected during one request or run.
+
+    Args:
+        limit (int, optional): Messages kept; later ones are counted in `dropped` instead.
+    """
+
+    def __init__(self, limit: int = 500):
+        self.limit = limit
+        self.dropped = 0
+        self._messages = []
+
+    def add(self, category: str, template: str, args: tuple = ()) -> None:
+        if len(self._messages) >= self.limit:
+            self.dropped += 1
+            return
+        self._messages.append(PlayerMessage(category, template, args))
+
+    def texts(self) -> list[str]:
+        return [message.text for message in self._messages]
+
+    def to_list(self) -> list[dict]:
+        return [message.to_dict() for message in self._messages]
+
+    def clear(self) -> None:
+        self._messages.clear()
+        self.dropped = 0
+
+    def __iter__(self):
+        return iter(self._messages)
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+
+_player_buffer = contextvars.ContextVar("shopkeeper_player_buffer", default=None)
+
+
+def player(template: str, *args, category: str = "info") -> None:
+    """A message for the player: 'info', or 'error' for rejected requests."""
+    buffer = _player_buffer.get()
+    if buffer is not None:
+        buffer.add(category, template, args)
+    elif PLAYER_LOGGER.isEnabledFor(logging.INFO):
+        PLAYER_LOGGER.info(template, *args)
+
+
+def debug(template: str, *args) -> None:
+    if DEBUG_LOGGER.isEnabledFor(logging.DEBUG):
+        DEBUG_LOGGER.debug(template, *args)
+
+
+def warning(template: str, *args) -> None:
+    GAME_LOGGER.warning(template, *args)
+
+
+def debug_enabled() -> bool:
+    """For callers that would do extra work just to build debug output."""
+    return DEBUG_LOGGER.isEnabledFor(logging.DEBUG)
+
+
+def set_player_buffer(buffer: MessageBuffer | None) -> contextvars.Token:
+    """Routes player messages in the current context to buffer. Undo with reset_player_buffer(token)."""
+    return _player_buffer.set(buffer)
+
+
+def reset_player_buffer(token: contextvars.Token) -> None:
+    _player_buffer.reset(token)
+
+
+def current_player_buffer() -> MessageBuffer | None:
+    return _player_buffer.get()
+
+
+@contextlib.contextmanager
+def collect_player_messages(buffer: MessageBuffer = None):
+    """Collects the player messages of the enclosed block into buffer (a new one by default)."""
+    buffer = buffer if buffer is not None else MessageBuffer()
+    token = _player_buffer.set(buffer)
+    try:
+        yield buffer
+    finally:
+        _player_buffer.reset(token)
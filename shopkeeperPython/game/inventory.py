@@ -0,0 +1,131 @@
+"""
+Indexed inventory used by Character and Shop.
+
+Inventory is a list of Item stacks (so templates, saves and existing code keep
+iterating, indexing and appending as before) that also keeps two lookups up to
+date as stacks are added and removed:
+
+    (name, quality) -> stack   for stacking new items onto an existing stack
+    name -> [stacks]           for "do I have 3 Iron Ingots" and "sell me a Dagger"
+
+Both map to the Item objects themselves, so code that changes a stack's
+quantity in place (item.quantity -= 1) needs no bookkeeping. quantity_of()
+sums the stacks of one name, which is a handful of qualities at most, however
+many stacks the inventory holds.
+"""
+from .item import Item
+
+
+class Inventory(list):
+    """A list of Item stacks indexed by name and by (name, quality)."""
+
+    def __init__(self, items=()):
+        super().__init__()
+        self._stacks = {}
+        self._by_name = {}
+        self.extend(items)
+
+    # --- Lookups ---
+
+    def find_stack(self, name: str, quality: str) -> Item | None:
+        """The stack new items of this name and quality are added to, if there is one."""
+        return self._stacks.get((name, quality))
+
+    def first(self, name: str) -> Item | None:
+        """The oldest stack of the named item, whatever its quality."""
+        stacks = self._by_name.get(name)
+        return stacks[0] if stacks else None
+
+    def stacks_named(self, name: str) -> list[Item]:
+        """All stacks of the named item, oldest first."""
+        return list(self._by_name.get(name, ()))
+
+    def quantity_of(self, name: str) -> int:
+        """Total quantity of the named item across its stacks."""
+        return sum(stack.quantity for stack in self._by_name.get(name, ()))
+
+    def __contains__(self, item) -> bool:
+        return any(stack is item for stack in self._by_name.get(getattr(item, "name", None), ()))
+
+    # --- Index maintenance ---
+
+    def _index(self, item: Item) -> None:
+        self._by_name.setdefault(item.name, []).append(item)
+        self._stacks.setdefault((item.name, item.quality), item)
+
+    def _unindex(self, item: Item) -> None:
+        stacks = self._by_name[item.name]
+        for position, stack in enumerate(stacks):
+            if stack is item:
+                del stacks[position]
+                break
+        if not stacks:
+            del self._by_name[item.name]
+        key = (item.name, item.quality)
+        if self._stacks.get(key) is item:
+            # Duplicate stacks (e.g. from old saves) take over as the stacking target.
+            replacement = next((stack for stack in stacks if stack.quality == item.quality), None)
+            if replacement is None:
+                del self._stacks[key]
+            else:
+                self._stacks[key] = replacement
+
+    def _reindex(self) -> None:
+        self._stacks.clear()
+        self._by_name.clear()
+        for item in self:
+            self._index(item)
+
+    # --- list mutators ---
+
+    def append(self, item: Item) -> None:
+        super().append(item)
+        self._index(item)
+
+    def extend(self, items) -> None:
+        for item in items:
+            self.append(item)
+
+    def __iadd__(self, items):
+        self.extend(items)
+        return self
+
+    def insert(self, position: int, item: Item) -> None:
+        super().insert(position, item)
+        self._reindex() # Keeps "oldest first" in list order
+
+    def remove(self, item: Item) -> None:
+        if item not in self:
+            raise ValueError("Inventory.remove(x): x not in inventory")
+        super().remove(item)
+        self._unindex(item)
+
+    def pop(self, position: int = -1) -> Item:
+        item = super().pop(position)
+        self._unindex(item)
+        return item
+
+    def clear(self) -> None:
+        super().clear()
+        self._stacks.clear()
+        self._by_name.clear()
+
+    def __setitem__(self, position, value) -> None:
+        super().__setitem__(position, value)
+        self._reindex()
+
+    def __delitem__(self, position) -> None:
+        super().__delitem__(position)
+        self._reindex()
+
+    def sort(self, *args, **kwargs) -> None:
+        super().sort(*args, **kwargs)
+        self._reindex()
+
+    def reverse(self) -> None:
+        super().reverse()
+        self._reindex()
+
+    def __reduce__(self):
+        # Rebuild through __init__ so copies and pickles get their indexes.
+        return (self.__class__, (list(self),))
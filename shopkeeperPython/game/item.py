@@ -1,3 +1,8 @@
+import json
+import weakref
+
+from .town import freeze
+
 QUALITY_TIERS = ["Common", "Uncommon", "Rare", "Very Rare", "Legendary", "Mythical"]
 QUALITY_VALUE_MULTIPLIERS = {
     "Common": 1.0,
@@ -8,25 +13,115 @@ QUALITY_VALUE_MULTIPLIERS = {
     "Mythical": 25.0
 }
 
-class Item:
+class ItemDefinition:
     """
-    Represents an item in the Shopkeeper Python game.
+    What every stack of an item has in common: name, description, value, type,
+    effects and flags. Definitions are interned (see intern()), so all stacks of
+    "Iron Ingot" share one definition and one effects dict, which is frozen for
+    that reason.
     """
-    def __init__(self, name: str, description: str, base_value: int, item_type: str, quality: str,
-                 effects: dict = None, is_magical: bool = False, is_attunement: bool = False, is_consumable: bool = False, quantity: int = 1):
+    __slots__ = ("name", "description", "base_value", "item_type", "effects",
+                 "is_magical", "is_attunement", "is_consumable", "__weakref__")
+
+    FIELDS = ("name", "description", "base_value", "item_type", "effects", "is_magical", "is_attunement", "is_consumable")
+
+    def __init__(self, name: str, description: str, base_value: int, item_type: str, effects: dict = None,
+                 is_magical: bool = False, is_attunement: bool = False, is_consumable: bool = False):
         self.name = name
         self.description = description
         self.base_value = base_value
         self.item_type = item_type
-        if quality not in QUALITY_TIERS:
-            raise ValueError(f"Invalid quality: {quality}. Must be one of {QUALITY_TIERS}")
-        self.quality = quality
-        self.effects = effects if effects else {}
+        self.effects = freeze(effects or {})
         self.is_magical = is_magical
         self.is_attunement = is_attunement
         self.is_consumable = is_consumable
+
+    @classmethod
+    def intern(cls, name: str, description: str, base_value: int, item_type: str, effects: dict = None,
+               is_magical: bool = False, is_attunement: bool = False, is_consumable: bool = False) -> 'ItemDefinition':
+        """Returns the shared definition with these fields, creating it if needed."""
+        key = (name, description, base_value, item_type, json.dumps(effects or {}, sort_keys=True, default=repr),
+               bool(is_magical), bool(is_attunement), bool(is_consumable))
+        definition = _INTERNED_DEFINITIONS.get(key)
+        if definition is None:
+            definition = cls(name, description, base_value, item_type, effects, is_magical, is_attunement, is_consumable)
+            _INTERNED_DEFINITIONS[key] = definition
+        return definition
+
+    def replace(self, **changes) -> 'ItemDefinition':
+        """The interned definition with some fields changed."""
+        fields = {field: getattr(self, field) for field in self.FIELDS}
+        fields.update(changes)
+        return ItemDefinition.intern(**fields)
+
+    def to_dict(self) -> dict:
+        return {field: getattr(self, field) for field in self.FIELDS}
+
+    def __repr__(self):
+        return f"ItemDefinition(name='{self.name}', type='{self.item_type}', base_value={self.base_value})"
+
+
+# Every live definition, by value. Definitions no item refers to any more are dropped.
+_INTERNED_DEFINITIONS = weakref.WeakValueDictionary()
+
+# Definitions of the game's known items by name (see item_catalog.py). Saved stacks of
+# these items store only the name, quality and quantity.
+ITEM_CATALOG: dict[str, ItemDefinition] = {}
+
+
+def register_item_definition(definition: ItemDefinition) -> ItemDefinition:
+    """Adds a definition to the catalog unless an item of that name is already there."""
+    return ITEM_CATALOG.setdefault(definition.name, definition)
+
+
+def _definition_field(field: str) -> property:
+    def getter(item):
+        return getattr(item.definition, field)
+
+    def setter(item, value):
+        item.definition = item.definition.replace(**{field: value})
+    return property(getter, setter)
+
+
+class Item:
+    """
+    Represents an item in the Shopkeeper Python game: a stack of `quantity` items of
+    one quality. Everything else is read from the shared ItemDefinition; assigning
+    one of those fields (item.effects = ...) moves this stack to another definition.
+    """
+    __slots__ = ("definition", "quality", "quantity")
+
+    def __init__(self, name: str, description: str, base_value: int, item_type: str, quality: str,
+                 effects: dict = None, is_magical: bool = False, is_attunement: bool = False, is_consumable: bool = False, quantity: int = 1):
+        if quality not in QUALITY_TIERS:
+            raise ValueError(f"Invalid quality: {quality}. Must be one of {QUALITY_TIERS}")
+        self.definition = ItemDefinition.intern(name, description, base_value, item_type, effects,
+                                                is_magical, is_attunement, is_consumable)
+        self.quality = quality
         self.quantity = quantity
-        self.value = int(self.base_value * QUALITY_VALUE_MULTIPLIERS.get(self.quality, 1.0))
+
+    @classmethod
+    def from_definition(cls, definition: ItemDefinition, quality: str, quantity: int = 1) -> 'Item':
+        if quality not in QUALITY_TIERS:
+            raise ValueError(f"Invalid quality: {quality}. Must be one of {QUALITY_TIERS}")
+        item = cls.__new__(cls)
+        item.definition = definition
+        item.quality = quality
+        item.quantity = quantity
+        return item
+
+    name = _definition_field("name")
+    description = _definition_field("description")
+    base_value = _definition_field("base_value")
+    item_type = _definition_field("item_type")
+    effects = _definition_field("effects")
+    is_magical = _definition_field("is_magical")
+    is_attunement = _definition_field("is_attunement")
+    is_consumable = _definition_field("is_consumable")
+
+    @property
+    def value(self) -> int:
+        return int(self.definition.base_value * QUALITY_VALUE_MULTIPLIERS.get(self.quality, 1.0))
 
     def __repr__(self):
         return (f"Item(name='{self.name}', type='{self.item_type}', quality='{self.quality}', value={self.value}, "
@@ -34,23 +129,26 @@ class Item:
 
     def to_dict(self):
         """Converts the item object to a dictionary for JSON serialization."""
-        return {
-            "name": self.name,
-            "description": self.description,
-            "base_value": self.base_value,
-            "item_type": self.item_type,
-            "quality": self.quality,
-            "effects": self.effects,
-            "is_magical": self.is_magical,
-            "is_attunement": self.is_attunement,
-            "is_consumable": self.is_consumable,
-            "quantity": self.quantity,
-            # self.value is derived so not saved
-        }
+        data = self.definition.to_dict()
+        data["quality"] = self.quality
+        data["quantity"] = self.quantity
+        # self.value is derived so not saved
+        return data
+
+    def to_save_dict(self):
+        """Like to_dict, but catalog items are saved as just their name (the catalog id), quality and quantity."""
+        if ITEM_CATALOG.get(self.definition.name) is self.definition:
+            return {"name": self.definition.name, "quality": self.quality, "quantity": self.quantity}
+        return self.to_dict()
 
     @classmethod
     def from_dict(cls, data: dict):
-        """Creates an Item instance from a dictionary."""
+        """Creates an Item instance from a dictionary written by to_dict or to_save_dict."""
+        if "description" not in data: # Catalog item saved by to_save_dict
+            definition = ITEM_CATALOG.get(data["name"])
+            if definition is None:
+                raise ValueError(f"Unknown item definition: {data['name']}")
+            return cls.from_definition(definition, data["quality"], data.get("quantity", 1))
         return cls(
             name=data["name"],
             description=data["description"],
@@ -0,0 +1,56 @@
+"""
+Builds ITEM_CATALOG (see item.py) from the game's item tables.
+
+Earlier sources win when two tables define the same name. An item whose fields
+differ from its catalog entry (e.g. Borin's Scrap Metal, which has its own
+description) still works; it just gets its own interned definition and is saved
+in full.
+"""
+from .item import ITEM_CATALOG, ItemDefinition, register_item_definition
+from .shop import Shop
+from .game_manager import RESOURCE_ITEM_DEFINITIONS, HEMLOCK_HERBS, BORIN_ITEMS, EXPLORATION_FINDS
+
+
+def _recipe_definition(name: str, recipe: dict) -> ItemDefinition:
+    # Same fields and defaults as Shop.craft_item uses for the crafted stack.
+    return ItemDefinition.intern(
+        name=name,
+        description=recipe.get("description", "A crafted item."),
+        base_value=recipe["base_value"],
+        item_type=recipe["type"],
+        effects=recipe.get("effects", {}),
+        is_magical=recipe.get("is_magical", recipe["type"] in ["potion", "scroll", "weapon", "armor", "ring", "amulet"]),
+        is_attunement=recipe.get("is_attunement", False),
+        is_consumable=recipe.get("is_consumable", recipe["type"] in ["potion", "food", "scroll"]),
+    )
+
+
+def _table_definition(name: str, entry: dict) -> ItemDefinition:
+    return ItemDefinition.intern(
+        name=name,
+        description=entry["description"],
+        base_value=entry["base_value"],
+        item_type=entry["item_type"],
+        effects=entry.get("effects", {}),
+        is_magical=entry.get("is_magical", False),
+        is_attunement=entry.get("is_attunement", False),
+        is_consumable=entry.get("is_consumable", False),
+    )
+
+
+def build_item_catalog() -> dict[str, ItemDefinition]:
+    for name, recipe in Shop.BASIC_RECIPES.items():
+        register_item_definition(_recipe_definition(name, recipe))
+    for recipes in Shop.ADVANCED_RECIPES.values():
+        for name, recipe in recipes.items():
+            register_item_definition(_recipe_definition(name, recipe))
+    for table in (RESOURCE_ITEM_DEFINITIONS, HEMLOCK_HERBS, BORIN_ITEMS):
+        for name, entry in table.items():
+            register_item_definition(_table_definition(name, entry))
+    for find in EXPLORATION_FINDS:
+        if find["type"] == "item":
+            register_item_definition(_table_definition(find["name"], find))
+    return ITEM_CATALOG
+
+
+build_item_catalog()
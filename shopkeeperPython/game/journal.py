@@ -0,0 +1,122 @@
+"""
+Character journal.
+
+A character's journal grows with almost every action, so it is kept as the raw
+records it is saved as ({"timestamp", "action_type", "summary", "details",
+"outcome"} dicts). JournalEntry objects are built only for the entries that are
+actually read (journal[-1], the Journal tab), and loading or saving a character
+copies the record list without parsing or re-serializing old entries.
+
+Long-lived characters don't keep every entry inline: the app moves the oldest
+records into compressed archive segments (see JournalArchive in storage.py) and
+the journal only remembers how many entries were moved out. Entries are numbered
+from 0, oldest first, across the archive and the inline records.
+"""
+import datetime
+from collections.abc import Sequence
+from typing import Optional
+
+
+class JournalEntry:
+    def __init__(self, timestamp: datetime.datetime, action_type: str, summary: str, details: Optional[dict] = None, outcome: Optional[str] = None):
+        self.timestamp = timestamp
+        self.action_type = action_type
+        self.summary = summary
+        self.details = details # Now correctly typed as Optional[dict]
+        self.outcome = outcome
+
+    def to_dict(self) -> dict:
+        return {
+            "timestamp": self.timestamp.isoformat(),
+            "action_type": self.action_type,
+            "summary": self.summary,
+            "details": self.details,
+            "outcome": self.outcome,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> 'JournalEntry':
+        return cls(
+            timestamp=datetime.datetime.fromisoformat(data["timestamp"]),
+            action_type=data["action_type"],
+            summary=data["summary"],
+            details=data.get("details"),
+            outcome=data.get("outcome"),
+        )
+
+
+class Journal(Sequence):
+    """
+    The journal entries of one character, oldest first, stored as raw records.
+
+    Indexing and iterating return JournalEntry objects built on the fly; entries
+    are treated as immutable once written. Only the inline entries are indexed;
+    the first `archived` entries live in the character's archive.
+
+    Args:
+        records (list, optional): Saved entry dicts (or JournalEntry objects).
+        archived (int, optional): Number of older entries already moved to the archive.
+    """
+
+    def __init__(self, records=(), archived: int = 0):
+        self._records = [record.to_dict() if isinstance(record, JournalEntry) else record for record in records]
+        self.archived = archived
+
+    def append(self, entry) -> None:
+        """Adds a JournalEntry (or an entry dict) at the end."""
+        self._records.append(entry.to_dict() if isinstance(entry, JournalEntry) else entry)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [JournalEntry.from_dict(record) for record in self._records[index]]
+        return JournalEntry.from_dict(self._records[index])
+
+    def __iter__(self):
+        return (JournalEntry.from_dict(record) for record in self._records)
+
+    def __reversed__(self):
+        return (JournalEntry.from_dict(record) for record in reversed(self._records))
+
+    def records(self) -> list[dict]:
+        """The inline entries as saved, oldest first (a new list sharing the entry dicts)."""
+        return list(self._records)
+
+    @property
+    def total_count(self) -> int:
+        """Number of entries ever written, archived ones included."""
+        return self.archived + len(self._records)
+
+    def records_between(self, start: int, stop: int) -> list[dict]:
+        """Inline records numbered start to stop-1 (archived numbers are skipped)."""
+        return self._records[max(start - self.archived, 0):max(stop - self.archived, 0)]
+
+    def overflow_segments(self, keep: int, segment_size: int) -> list[tuple[int, list[dict]]]:
+        """
+        The oldest inline records to archive, as (first entry number, records) segments
+        of exactly segment_size records, leaving at least `keep` entries inline.
+        Nothing is removed until drop_archived() is called.
+        """
+        segments = []
+        offset = 0
+        while len(self._records) - offset >= keep + segment_size:
+            segments.append((self.archived + offset, self._records[offset:offset + segment_size]))
+            offset += segment_size
+        return segments
+
+    def drop_archived(self, count: int) -> None:
+        """Removes the oldest `count` inline records once they are safely archived."""
+        del self._records[:count]
+        self.archived += count
+
+    def __eq__(self, other):
+        if isinstance(other, Journal):
+            return self.archived == other.archived and self._records == other._records
+        return NotImplemented
+
+    def __repr__(self):
+        if self.archived:
+            return f"Journal({len(self._records)} entries, {self.archived} archived)"
+        return f"Journal({len(self._records)} entries)"
@@ -0,0 +1,102 @@
+"""
+Offline catch-up for player shops.
+
+While a player is away their shop keeps trading. When the character is loaded
+again, catch_up_shop() works out what wandering customers would have bought
+during the elapsed game hours in one step instead of replaying every hour.
+
+Each hour a customer shows up with probability Shop.BASE_NPC_BUY_CHANCE plus the
+capped reputation bonus, picks one eligible stack at random and buys all of it.
+Since a sold stack is gone, the stacks sold over H hours are a uniformly random
+subset of size min(N, S), where N is the number of hours with a customer and S
+the number of eligible stacks. N is drawn by jumping from one customer to the
+next (geometric gaps between Bernoulli successes) and stops as soon as every
+stack is sold, so the work is proportional to the inventory, not to the time away.
+
+The buy chance is taken from the reputation at the start of the catch-up; the
+reputation gained from offline sales only counts from the next hour played.
+"""
+import math
+import random
+import time
+
+from .shop import Shop
+
+# Game hours that pass for each real hour the player is away.
+OFFLINE_GAME_HOURS_PER_REAL_HOUR = 1.0
+# Catch-up is capped at four game weeks.
+MAX_OFFLINE_GAME_HOURS = 24 * 28
+
+OFFLINE_BUYER_NAME = "Passing Customer"
+NON_SALEABLE_ITEM_TYPES = ("quest_item", "special_currency")
+
+
+def offline_game_hours(last_saved_at: float | None, now: float | None = None) -> int:
+    """Whole game hours that passed since last_saved_at (a time.time() value), capped."""
+    if not last_saved_at:
+        return 0
+    now = time.time() if now is None else now
+    elapsed_real_hours = max(0.0, now - last_saved_at) / 3600.0
+    return min(int(elapsed_real_hours * OFFLINE_GAME_HOURS_PER_REAL_HOUR), MAX_OFFLINE_GAME_HOURS)
+
+
+def offline_credited_until(last_saved_at: float, hours: int, now: float) -> float:
+    """
+    The time up to which an absence since last_saved_at is covered by `hours` game hours
+    of catch-up. The remainder of a partial hour is left for the next catch-up; time past
+    the cap is forfeited.
+    """
+    if hours >= MAX_OFFLINE_GAME_HOURS:
+        return now
+    return last_saved_at + hours * 3600.0 / OFFLINE_GAME_HOURS_PER_REAL_HOUR
+
+
+def npc_buy_chance(shop: Shop) -> float:
+    """Chance per hour that a wandering customer wants to buy something (no temporary boosts)."""
+    reputation_bonus = min(shop.reputation * Shop.REPUTATION_BUY_CHANCE_MULTIPLIER, Shop.MAX_NPC_BUY_CHANCE_BONUS)
+    return Shop.BASE_NPC_BUY_CHANCE + reputation_bonus
+
+
+def count_buyers(hours: int, chance: float, limit: int, rng=random) -> int:
+    """
+    Number of hours out of `hours` in which a customer shows up, each with probability
+    `chance` (a Binomial(hours, chance) draw), counting no further than `limit`.
+    """
+    if hours <= 0 or limit <= 0 or chance <= 0:
+        return 0
+    if chance >= 1:
+        return min(hours, limit)
+    log_miss = math.log(1.0 - chance)
+    buyers = 0
+    hour = 0
+    while buyers < limit:
+        # Hours until the next customer: geometric, drawn by inversion. 1 - random() is in (0, 1].
+        hour += int(math.log(1.0 - rng.random()) / log_miss) + 1
+        if hour > hours:
+            break
+        buyers += 1
+    return buyers
+
+
+def catch_up_shop(shop: Shop, hours: int, rng=random) -> dict:
+    """
+    Applies `hours` game hours of passive trading to shop. Each sold stack goes for
+    the customer's opening offer, as if the sale had been accepted without haggling.
+
+    Returns:
+        dict: {"hours", "buyers", "sales": [(item_name, quantity, price), ...], "gold_earned"}
+    """
+    summary = {"hours": max(0, hours), "buyers": 0, "sales": [], "gold_earned": 0}
+    eligible_stacks = [item for item in shop.inventory if item.item_type not in NON_SALEABLE_ITEM_TYPES and item.quantity > 0]
+    buyers = count_buyers(hours, npc_buy_chance(shop), len(eligible_stacks), rng=rng)
+    summary["buyers"] = buyers
+    for item in rng.sample(eligible_stacks, buyers):
+        haggling_data = shop.initiate_haggling_for_item_sale(item, npc_name=OFFLINE_BUYER_NAME)
+        if not haggling_data:
+            continue
+        price = haggling_data["initial_offer"]
+        quantity = haggling_data["quantity"]
+        if shop.finalize_haggled_sale(item, price, quantity):
+            summary["sales"].append((item.name, quantity, price))
+            summary["gold_earned"] += price
+    return summary
@@ -0,0 +1,165 @@
+"""
+Recording and offline replay of game sessions.
+
+An ActionRecorder attached to a GameManager (GameManager.start_recording()) keeps a
+snapshot of the character at the start of the recording, including the random
+stream position (see rng.py), and then logs every hourly action, event choice and
+offline catch-up with its details, the stream counter it ran on and the result type.
+Replaying the entries against the snapshot reproduces the session exactly, which
+makes slow or buggy sessions reproducible on a dev box:
+
+    python -m shopkeeperPython.game.recording session.jsonl --repeat 20 --profile
+
+A recording is either a dict {"version", "snapshot", "entries"} (JSON) or a JSON
+lines file whose first line is {"snapshot": ...} followed by one entry per line,
+which is what a recorder with a path appends to as the session goes on.
+"""
+import argparse
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+
+from . import game_log
+
+RECORDING_VERSION = 1
+
+
+def make_entry(kind: str, name: str, details: dict | None, rng_counter: int, result, haggling_session: dict = None) -> dict:
+    """
+    One recorded step. kind is "action" (perform_hourly_action), "event_choice"
+    (resolve_event_choice) or "offline_catch_up" (catch_up_offline_shop, details {"hours"}).
+    """
+    entry = {
+        "kind": kind,
+        "name": name,
+        "details": details or {},
+        "rng_counter": rng_counter,
+        "result": result.get("type") if isinstance(result, dict) else None,
+    }
+    if haggling_session:
+        entry["haggling_session"] = dict(haggling_session) # Copy: haggling mutates the session dict
+    return entry
+
+
+class ActionRecorder:
+    """
+    Log of the actions taken through a GameManager.
+
+    Args:
+        snapshot (dict): Character save data at the start of the recording.
+        path (str, optional): JSON lines file to write the recording to as it grows.
+    """
+
+    def __init__(self, snapshot: dict, path: str = None):
+        self.snapshot = snapshot
+        self.entries = []
+        self.path = path
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(json.dumps({"version": RECORDING_VERSION, "snapshot": snapshot}) + "\n")
+
+    def record(self, kind: str, name: str, details: dict | None, rng_counter: int, result, haggling_session: dict = None) -> dict:
+        """Adds one entry, see make_entry()."""
+        entry = make_entry(kind, name, details, rng_counter, result, haggling_session)
+        self.entries.append(entry)
+        if self.path:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        return entry
+
+    def to_dict(self) -> dict:
+        return {"version": RECORDING_VERSION, "snapshot": self.snapshot, "entries": list(self.entries)}
+
+
+def load_recording(path: str) -> dict:
+    """Reads a recording written as JSON or as JSON lines."""
+    with open(path, encoding="utf-8") as f:
+        text = f.read()
+    try:
+        data = json.loads(text)
+        if "entries" in data:
+            return data
+    except json.JSONDecodeError:
+        pass
+    lines = [json.loads(line) for line in text.splitlines() if line.strip()]
+    if not lines or "snapshot" not in lines[0]:
+        raise ValueError(f"'{path}' is not a session recording.")
+    return {"version": lines[0].get("version", RECORDING_VERSION), "snapshot": lines[0]["snapshot"], "entries": lines[1:]}
+
+
+def replay_recording(recording: dict, output_stream=None):
+    """
+    Replays a recording on a fresh GameManager.
+
+    Returns:
+        tuple: (game_manager, divergences) where divergences lists (entry_index, recorded_result,
+               replayed_result) for entries whose result type differs from the recorded one.
+    """
+    # Imported here: game_manager imports this module for ActionRecorder.
+    from .character import Character
+    from .game_manager import GameManager
+
+    output_stream = output_stream if output_stream is not None else io.StringIO()
+    snapshot = dict(recording["snapshot"])
+    snapshot.pop("last_saved_at", None) # No offline catch-up on replay
+    character = Character.from_dict(snapshot)
+    game_manager = GameManager(player_character=character, output_stream=output_stream)
+    game_manager.setup_for_character(character)
+
+    divergences = []
+    for index, entry in enumerate(recording["entries"]):
+        game_manager.rng.counter = entry["rng_counter"]
+        if entry["kind"] == "event_choice":
+            event = game_manager.event_index.get(entry["name"])
+            result = game_manager.resolve_event_choice(event, entry["details"].get("choice_index", 0))
+        elif entry["kind"] == "offline_catch_up":
+            result = game_manager.catch_up_offline_shop(entry["details"].get("hours", 0))
+        else:
+            if "haggling_session" in entry:
+                game_manager.active_haggling_session = dict(entry["haggling_session"])
+            result = game_manager.perform_hourly_action(entry["name"], dict(entry["details"]))
+        replayed_result = result.get("type") if isinstance(result, dict) else None
+        if replayed_result != entry.get("result"):
+            divergences.append((index, entry.get("result"), replayed_result))
+    return game_manager, divergences
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay a recorded game session.")
+    parser.add_argument("recording", help="Recording file (JSON or JSON lines).")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay this many times and report timings.")
+    parser.add_argument("--profile", action="store_true", help="Profile the replays and print the top functions.")
+    args = parser.parse_args(argv)
+
+    recording = load_recording(args.recording)
+    profiler = cProfile.Profile() if args.profile else None
+    timings = []
+    divergences = []
+    game_manager = None
+    for _ in range(max(1, args.repeat)):
+        started = time.perf_counter()
+        if profiler:
+            profiler.enable()
+        with game_log.collect_player_messages(game_log.MessageBuffer(limit=0)):
+            game_manager, divergences = replay_recording(recording)
+        if profiler:
+            profiler.disable()
+        timings.append(time.perf_counter() - started)
+
+    character = game_manager.character
+    print(f"Replayed {len(recording['entries'])} entries for {character.name} "
+          f"{len(timings)} time(s): best {min(timings) * 1000:.1f} ms, mean {sum(timings) / len(timings) * 1000:.1f} ms.")
+    print(f"Final state: {game_manager.time.get_time_string()}, gold {character.gold}, level {character.level}, "
+          f"shop gold {game_manager.shop.gold if game_manager.shop else 'n/a'}.")
+    for index, recorded, replayed in divergences:
+        print(f"Divergence at entry {index}: recorded '{recorded}', replayed '{replayed}'.")
+    if profiler:
+        pstats.Stats(profiler, stream=sys.stdout).sort_stats("cumulative").print_stats(25)
+    return 1 if divergences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
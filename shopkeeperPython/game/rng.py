@@ -0,0 +1,84 @@
+"""
+Per-character random streams.
+
+Each GameManager owns a GameRandom and game code draws from it explicitly
+(self.rng.random(), rng.choice(...)) instead of from the module-level random
+functions. While a GameManager runs an action inside GameRandom.activate(), the
+stream draws from its own random.Random seeded from the character's seed and the
+number of actions taken so far. Each action therefore gets its own substream, and
+the stream position persists with the character as two integers (seed, counter)
+instead of the full Mersenne Twister state.
+
+Nothing is shared between streams, so actions of different players run in
+parallel and no other code using the random module can shift their draws.
+Functions that also run outside a game (character creation, tests) take an
+optional rng and fall back to the random module.
+"""
+import contextlib
+import random
+import secrets
+
+
+class GameRandom:
+    """
+    Seed and position of one character's random stream.
+
+    Args:
+        seed (int, optional): Stream seed. A new one is drawn from the OS when omitted.
+        counter (int, optional): Number of activations (actions) already drawn from the stream.
+    """
+
+    def __init__(self, seed: int = None, counter: int = 0):
+        self.seed = secrets.randbits(63) if seed is None else int(seed)
+        self.counter = int(counter)
+        self._active = False
+        self._generator = random.Random(f"{self.seed}:{self.counter}")
+
+    @contextlib.contextmanager
+    def activate(self):
+        """
+        Runs the enclosed block on this stream's next substream. Nested activations
+        share the outer one's substream.
+        """
+        if self._active:
+            yield
+            return
+        self._generator = random.Random(f"{self.seed}:{self.counter}")
+        self.counter += 1
+        self._active = True
+        try:
+            yield
+        finally:
+            self._active = False
+
+    # The draws used by the game, with the same meaning as the random module's functions.
+    def random(self) -> float:
+        return self._generator.random()
+
+    def uniform(self, a: float, b: float) -> float:
+        return self._generator.uniform(a, b)
+
+    def randint(self, a: int, b: int) -> int:
+        return self._generator.randint(a, b)
+
+    def randrange(self, *args) -> int:
+        return self._generator.randrange(*args)
+
+    def choice(self, seq):
+        return self._generator.choice(seq)
+
+    def sample(self, population, k: int) -> list:
+        return self._generator.sample(population, k)
+
+    def to_dict(self) -> dict:
+        return {"seed": self.seed, "counter": self.counter}
+
+    @classmethod
+    def from_dict(cls, data: dict | None) -> 'GameRandom':
+        """Restores a saved stream; saves from before streams existed get a new one."""
+        if not data:
+            return cls()
+        return cls(seed=data.get("seed"), counter=data.get("counter", 0))
+
+    def __repr__(self):
+        return f"GameRandom(seed={self.seed}, counter={self.counter})"
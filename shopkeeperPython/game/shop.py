@@ -1,3 +1,4 @@
+import random
 # Import Character for type hinting only to avoid circular dependency at runtime
 from typing import TYPE_CHECKING, Tuple
 if TYPE_CHECKING:
@@ -5,7 +6,9 @@ if TYPE_CHECKING:
     # from .town import Town # Town for type hinting - already imported below
 
 from .item import Item # Removed QUALITY_TIERS, QUALITY_VALUE_MULTIPLIERS
+from .inventory import Inventory
 from .town import Town
+from . import game_log as log
 
 
 class Shop:
@@ -85,22 +88,30 @@ class Shop:
         return (f"Shop(name='{self.name}', owner='{self.owner_name}', town='{self.town.name if self.town else 'None'}', "
                 f"gold={self.gold}, specialization='{self.specialization}', level={self.shop_level}, reputation={self.reputation}, slots={len(self.inventory)}/{self.max_inventory_slots})")
 
+    @property
+    def inventory(self) -> Inventory:
+        return self._inventory
+
+    @inventory.setter
+    def inventory(self, items):
+        self._inventory = items if isinstance(items, Inventory) else Inventory(items)
+
     def update_town(self, new_town: 'Town'):
         """Updates the shop's associated town."""
         self.town = new_town
-        print(f"Shop '{self.name}' has updated its town to {new_town.name}.")
+        log.debug("Shop '%s' has updated its town to %s.", self.name, new_town.name)
 
     def add_item_to_inventory(self, item: Item):
         # Check if the item is stackable and already exists in inventory
-        for existing_item in self.inventory:
-            if existing_item.name == item.name and existing_item.quality == item.quality and hasattr(existing_item, 'quantity') and hasattr(item, 'quantity'):
-                existing_item.quantity += item.quantity
-                print(f"SHOP: Stacked {item.quantity}x {item.name} (Total: {existing_item.quantity}). Inventory slots: {len(self.inventory)}/{self.max_inventory_slots}.")
-                return
+        existing_item = self.inventory.find_stack(item.name, item.quality)
+        if existing_item is not None and hasattr(existing_item, 'quantity') and hasattr(item, 'quantity'):
+            existing_item.quantity += item.quantity
+            log.debug("SHOP: Stacked %sx %s (Total: %s). Inventory slots: %s/%s.", item.quantity, item.name, existing_item.quantity, len(self.inventory), self.max_inventory_slots)
+            return
 
         # If not stackable or doesn't exist, check for new slot
         if len(self.inventory) >= self.max_inventory_slots:
-            print(f"SHOP: Cannot add {item.name}. Inventory is full ({len(self.inventory)}/{self.max_inventory_slots} slots).")
+            log.debug("SHOP: Cannot add %s. Inventory is full (%s/%s slots).", item.name, len(self.inventory), self.max_inventory_slots)
             return
 
         # Ensure item has quantity BEFORE accessing it in print or other logic
@@ -109,7 +120,7 @@ class Shop:
 
         self.inventory.append(item)
         # Now it's safe to access item.quantity
-        print(f"SHOP: Added {item.name} (Qty: {item.quantity}) to inventory. Inventory slots: {len(self.inventory)}/{self.max_inventory_slots}.")
+        log.debug("SHOP: Added %s (Qty: %s) to inventory. Inventory slots: %s/%s.", item.name, item.quantity, len(self.inventory), self.max_inventory_slots)
 
 
     def remove_item_from_inventory(self, item_name: str, specific_item_to_remove: Item = None) -> Item | None:
@@ -133,7 +144,7 @@ class Shop:
         if specific_item_to_remove and specific_item_to_remove in self.inventory:
             item_instance_in_inventory = specific_item_to_remove
         else: # Fallback to finding by name if specific instance isn't directly provided or matched
-            item_instance_in_inventory = next((item for item in self.inventory if item.name == item_name), None)
+            item_instance_in_inventory = self.inventory.first(item_name)
 
         if not item_instance_in_inventory:
             # print(f"SHOP: Item '{item_name}' not found in inventory for removal.")
@@ -191,7 +202,7 @@ class Shop:
                 break
         return determined_quality
 
-    def craft_item(self, item_name: str, character: 'Character') -> Item | None:
+    def craft_item(self, item_name: str, character: 'Character', rng=random) -> Item | None:
         if not self.can_craft(item_name):
             # GameManager usually prints this
             # print(f"Cannot craft {item_name}. Recipe unknown or prerequisites not met.")
@@ -205,7 +216,7 @@ class Shop:
             recipe = self.ADVANCED_RECIPES[self.specialization][item_name]
         else:
             # This should not be reached if can_craft was called first
-            print(f"SHOP: Recipe for {item_name} not found for specialization {self.specialization}.")
+            log.debug("SHOP: Recipe for %s not found for specialization %s.", item_name, self.specialization)
             return None
 
         ingredients = recipe.get("ingredients", {})
@@ -214,7 +225,7 @@ class Shop:
             can_craft_item, missing_items = character.has_items(ingredients)
             if not can_craft_item:
                 missing_items_str = ", ".join([f"{qty} {name}" for name, qty in missing_items.items()])
-                print(f"SHOP: Cannot craft {item_name}. Missing ingredients for {character.name}: {missing_items_str}.")
+                log.debug("SHOP: Cannot craft %s. Missing ingredients for %s: %s.", item_name, character.name, missing_items_str)
                 return None
 
         # Proceed with crafting if ingredients are present or not required
@@ -223,8 +234,7 @@ class Shop:
         final_quality_name = base_quality_name
 
         # Critical Success/Failure Roll
-        import random # Make sure to import random if not already done globally in the file
-        crit_roll = random.random()
+        crit_roll = rng.random()
 
         current_quality_names = [q_name for _, q_name in self.QUALITY_THRESHOLDS]
 
@@ -234,22 +244,22 @@ class Shop:
                 new_index = min(current_index + self.CRITICAL_SUCCESS_QUALITY_BONUS, len(current_quality_names) - 1)
                 final_quality_name = current_quality_names[new_index]
                 if final_quality_name != base_quality_name:
-                    print(f"SHOP: Critical Success! Crafted {item_name} resulted in {final_quality_name} quality (up from {base_quality_name}).")
+                    log.debug("SHOP: Critical Success! Crafted %s resulted in %s quality (up from %s).", item_name, final_quality_name, base_quality_name)
                 else:
-                    print(f"SHOP: Critical Success! Crafted {item_name} at {base_quality_name} (already max or no change).")
+                    log.debug("SHOP: Critical Success! Crafted %s at %s (already max or no change).", item_name, base_quality_name)
             except ValueError:
-                print(f"SHOP: Warning - base quality {base_quality_name} not in defined tiers for critical success.")
+                log.warning("SHOP: Warning - base quality %s not in defined tiers for critical success.", base_quality_name)
         elif crit_roll <= self.CRITICAL_SUCCESS_CHANCE + self.CRITICAL_FAILURE_CHANCE: # Check only if not crit success
             try:
                 current_index = current_quality_names.index(base_quality_name)
                 new_index = max(current_index + self.CRITICAL_FAILURE_QUALITY_PENALTY, 0)
                 final_quality_name = current_quality_names[new_index]
                 if final_quality_name != base_quality_name:
-                    print(f"SHOP: Critical Failure! Crafted {item_name} resulted in {final_quality_name} quality (down from {base_quality_name}).")
+                    log.debug("SHOP: Critical Failure! Crafted %s resulted in %s quality (down from %s).", item_name, final_quality_name, base_quality_name)
                 else:
-                     print(f"SHOP: Critical Failure! Crafted {item_name} at {base_quality_name} (already min or no change).")
+                     log.debug("SHOP: Critical Failure! Crafted %s at %s (already min or no change).", item_name, base_quality_name)
             except ValueError:
-                print(f"SHOP: Warning - base quality {base_quality_name} not in defined tiers for critical failure.")
+                log.warning("SHOP: Warning - base quality %s not in defined tiers for critical failure.", base_quality_name)
         else:
             # Normal success, quality remains base_quality_name
             pass
@@ -259,7 +269,7 @@ class Shop:
         if ingredients:
             if not character.consume_items(ingredients):
                 # This should ideally not happen if has_items check was accurate
-                print(f"SHOP: Error consuming ingredients for {item_name} from {character.name}'s inventory. Crafting aborted.")
+                log.warning("SHOP: Error consuming ingredients for %s from %s's inventory. Crafting aborted.", item_name, character.name)
                 # Potentially roll back crafting_experience increment if that's desired
                 # self.crafting_experience[item_name] = self.crafting_experience.get(item_name, 1) -1 # example rollback
                 return None
@@ -292,7 +302,7 @@ class Shop:
         Returns a dictionary with haggling state if successful, None otherwise.
         """
         if not item_to_sell or item_to_sell not in self.inventory:
-            print(f"SHOP: Cannot initiate haggling. Item '{item_to_sell.name if item_to_sell else 'Unknown'}' not in stock.")
+            log.debug("SHOP: Cannot initiate haggling. Item '%s' not in stock.", item_to_sell.name if item_to_sell else 'Unknown')
             return None
 
         # Calculate the shop's "ideal" selling price (player selling to NPC means shop wants higher price)
@@ -330,7 +340,7 @@ class Shop:
         # Ensure item_to_sell has a quantity attribute, defaulting to 1 if missing (though it should always exist)
         quantity_for_sale = getattr(item_to_sell, 'quantity', 1)
         if quantity_for_sale <= 0:
-            print(f"SHOP: Cannot initiate haggling for {item_to_sell.name}, quantity is {quantity_for_sale}.")
+            log.debug("SHOP: Cannot initiate haggling for %s, quantity is %s.", item_to_sell.name, quantity_for_sale)
             return None
 
 
@@ -350,7 +360,7 @@ class Shop:
             "context": "player_selling", # Player's shop is selling
             "can_still_haggle": True
         }
-        print(f"SHOP: Initiating haggling with {npc_name} for {quantity_for_sale}x {item_to_sell.name}. Initial NPC offer: {initial_npc_offer}g (Shop's ideal price: {standard_shop_price}g).")
+        log.debug("SHOP: Initiating haggling with %s for %sx %s. Initial NPC offer: %sg (Shop's ideal price: %sg).", npc_name, quantity_for_sale, item_to_sell.name, initial_npc_offer, standard_shop_price)
         return haggling_state
 
     def finalize_haggled_sale(self, item_instance_to_sell: Item, final_selling_price: int, quantity_sold: int) -> bool:
@@ -360,15 +370,15 @@ class Shop:
         It now also takes quantity_sold which comes from the haggle session.
         """
         if not item_instance_to_sell or item_instance_to_sell not in self.inventory: # Check if the instance is in inventory
-            print(f"SHOP: Error finalizing sale. Item instance '{item_instance_to_sell.name if item_instance_to_sell else 'Unknown'}' not found in stock by reference.")
+            log.warning("SHOP: Error finalizing sale. Item instance '%s' not found in stock by reference.", item_instance_to_sell.name if item_instance_to_sell else 'Unknown')
             return False
 
         if quantity_sold <= 0:
-            print(f"SHOP: Error finalizing sale. Quantity to sell for '{item_instance_to_sell.name}' is {quantity_sold}.")
+            log.warning("SHOP: Error finalizing sale. Quantity to sell for '%s' is %s.", item_instance_to_sell.name, quantity_sold)
             return False
 
         if item_instance_to_sell.quantity < quantity_sold:
-            print(f"SHOP: Error finalizing sale. Shop only has {item_instance_to_sell.quantity} of '{item_instance_to_sell.name}', but NPC tried to buy {quantity_sold}.")
+            log.warning("SHOP: Error finalizing sale. Shop only has %s of '%s', but NPC tried to buy %s.", item_instance_to_sell.quantity, item_instance_to_sell.name, quantity_sold)
             return False # Should not happen if haggle was initiated correctly with available quantity
 
         self.gold += final_selling_price
@@ -383,7 +393,7 @@ class Shop:
 
         if not item_representing_sold_portion:
             # This implies an issue with remove_item_from_inventory or inconsistent state
-            print(f"SHOP: CRITICAL ERROR - Failed to remove/decrement {quantity_sold}x '{item_instance_to_sell.name}' from inventory during sale. Reverting gold.")
+            log.warning("SHOP: CRITICAL ERROR - Failed to remove/decrement %sx '%s' from inventory during sale. Reverting gold.", quantity_sold, item_instance_to_sell.name)
             self.gold -= final_selling_price # Revert gold
             return False
 
@@ -402,13 +412,13 @@ class Shop:
             old_rep = self.reputation
             self.reputation = min(self.reputation + rep_change, self.MAX_REPUTATION)
             if self.reputation != old_rep:
-                print(f"SHOP: Selling {quantity_sold}x {item_instance_to_sell.quality} {item_instance_to_sell.name} improved shop reputation to {self.reputation} (+{self.reputation - old_rep}).")
+                log.debug("SHOP: Selling %sx %s %s improved shop reputation to %s (+%s).", quantity_sold, item_instance_to_sell.quality, item_instance_to_sell.name, self.reputation, self.reputation - old_rep)
 
-        print(f"SHOP: Successfully sold {quantity_sold}x {item_instance_to_sell.name} for {final_selling_price}g after haggling. Shop gold: {self.gold}.")
+        log.debug("SHOP: Successfully sold %sx %s for %sg after haggling. Shop gold: %s.", quantity_sold, item_instance_to_sell.name, final_selling_price, self.gold)
         if item_instance_to_sell.quantity > 0 : # If stack still exists
-             print(f"SHOP: Remaining quantity of {item_instance_to_sell.name} in shop: {item_instance_to_sell.quantity}.")
+             log.debug("SHOP: Remaining quantity of %s in shop: %s.", item_instance_to_sell.name, item_instance_to_sell.quantity)
         else: # Stack was fully depleted
-             print(f"SHOP: Sold out of {item_instance_to_sell.name}.")
+             log.debug("SHOP: Sold out of %s.", item_instance_to_sell.name)
         return True
 
     # calculate_sale_price is primarily for player buying from this shop, or shop setting its own prices.
@@ -458,10 +468,7 @@ class Shop:
         """Calculates the sale price of an item, considering town demand, shop markup, and character faction benefits."""
         item_instance = None
         if isinstance(item_or_item_name, str):
-            for item_in_stock in self.inventory: # Search in current inventory
-                if item_in_stock.name == item_or_item_name:
-                    item_instance = item_in_stock
-                    break
+            item_instance = self.inventory.first(item_or_item_name) # Search in current inventory
             if not item_instance:
                 if item_or_item_name in self.BASIC_RECIPES:
                     item_instance = Item(name=item_or_item_name, base_value=self.BASIC_RECIPES[item_or_item_name]['base_value'], item_type="unknown")
@@ -503,20 +510,16 @@ class Shop:
         return price
 
     def sell_item_to_character(self, item_name: str, character_wanting_to_buy: 'Character') -> Tuple[Item | None, int]:
-        item_instance_for_sale = None
-        for item_in_stock in self.inventory:
-            if item_in_stock.name == item_name:
-                item_instance_for_sale = item_in_stock
-                break
+        item_instance_for_sale = self.inventory.first(item_name)
         if not item_instance_for_sale:
-            print(f"SHOP: {self.name} does not have '{item_name}' in stock.")
+            log.debug("SHOP: %s does not have '%s' in stock.", self.name, item_name)
             return None, 0
 
         # Pass the character to calculate_sale_price for potential discounts
         price_to_character = self.calculate_sale_price(item_instance_for_sale, character_wanting_to_buy)
 
         if character_wanting_to_buy.gold < price_to_character:
-            print(f"SHOP: {character_wanting_to_buy.name} cannot afford {item_name} (Cost: {price_to_character}, Has: {character_wanting_to_buy.gold}).")
+            log.debug("SHOP: %s cannot afford %s (Cost: %s, Has: %s).", character_wanting_to_buy.name, item_name, price_to_character, character_wanting_to_buy.gold)
             return None, 0
 
         character_wanting_to_buy.gold -= price_to_character
@@ -524,10 +527,10 @@ class Shop:
 
         removed_item = self.remove_item_from_inventory(item_name, specific_item_to_remove=item_instance_for_sale)
         if removed_item:
-             print(f"SHOP: {self.name} sold {removed_item.name} to {character_wanting_to_buy.name} for {price_to_character} gold.")
+             log.debug("SHOP: %s sold %s to %s for %s gold.", self.name, removed_item.name, character_wanting_to_buy.name, price_to_character)
              return removed_item, price_to_character
         else:
-            print(f"SHOP: Error - {item_name} was found but could not be removed from shop inventory.")
+            log.warning("SHOP: Error - %s was found but could not be removed from shop inventory.", item_name)
             character_wanting_to_buy.gold += price_to_character
             self.gold -= price_to_character
             return None, 0
@@ -543,61 +546,63 @@ class Shop:
         price_paid_by_shop = int(item_to_buy.value * town_modifier * self.buyback_percentage) # Changed get_value() to .value
 
         if self.gold < price_paid_by_shop:
-            print(f"SHOP: {self.name} cannot afford to buy {item_to_buy.name} (Offered: {price_paid_by_shop}, Shop Gold: {self.gold}).")
+            log.debug("SHOP: %s cannot afford to buy %s (Offered: %s, Shop Gold: %s).", self.name, item_to_buy.name, price_paid_by_shop, self.gold)
             return 0
 
         self.add_item_to_inventory(item_to_buy)
         self.gold -= price_paid_by_shop
         character_selling.gold += price_paid_by_shop
 
-        print(f"SHOP: {self.name} bought {item_to_buy.name} from {character_selling.name} for {price_paid_by_shop} gold.")
+        log.debug("SHOP: %s bought %s from %s for %s gold.", self.name, item_to_buy.name, character_selling.name, price_paid_by_shop)
         return price_paid_by_shop
 
     def set_specialization(self, specialization_type: str):
         if specialization_type not in self.SPECIALIZATION_TYPES:
-            print(f"SHOP: Invalid specialization type '{specialization_type}'. Shop specialization remains {self.specialization}.")
+            log.debug("SHOP: Invalid specialization type '%s'. Shop specialization remains %s.", specialization_type, self.specialization)
             return
         self.specialization = specialization_type
-        print(f"SHOP: {self.name}'s specialization set to: {self.specialization}")
+        log.debug("SHOP: %s's specialization set to: %s", self.name, self.specialization)
 
     def upgrade_shop(self) -> bool:
         if self.shop_level >= self.MAX_SHOP_LEVEL:
-            print(f"SHOP: {self.name} is already at the maximum level ({self.MAX_SHOP_LEVEL}).")
+            log.debug("SHOP: %s is already at the maximum level (%s).", self.name, self.MAX_SHOP_LEVEL)
             return False
 
         next_level = self.shop_level + 1
         if next_level not in self.SHOP_LEVEL_CONFIG:
-            print(f"SHOP: Configuration for level {next_level} not found. Cannot upgrade.")
+            log.debug("SHOP: Configuration for level %s not found. Cannot upgrade.", next_level)
             return False
 
         self.shop_level = next_level
         self.max_inventory_slots = self.SHOP_LEVEL_CONFIG[self.shop_level]["max_inventory_slots"]
         quality_bonus = self.SHOP_LEVEL_CONFIG[self.shop_level]["crafting_quality_bonus"]
 
-        print(f"SHOP: {self.name} upgraded to Level {self.shop_level}!")
-        print(f"  - Max Inventory Slots: {self.max_inventory_slots}")
-        print(f"  - Crafting Quality Bonus: +{quality_bonus}")
+        log.debug("SHOP: %s upgraded to Level %s!", self.name, self.shop_level)
+        log.player("  - Max Inventory Slots: %s", self.max_inventory_slots)
+        log.player("  - Crafting Quality Bonus: +%s", quality_bonus)
         if self.shop_level < self.MAX_SHOP_LEVEL:
              cost_for_next = self.SHOP_LEVEL_CONFIG[self.shop_level +1 ]['cost_to_upgrade'] if self.shop_level + 1 <= self.MAX_SHOP_LEVEL else "N/A" # Check to prevent key error
              if cost_for_next != "N/A" and (self.shop_level +1) in self.SHOP_LEVEL_CONFIG : # Check if next level exists
-                  print(f"  - Cost for next upgrade (Level {self.shop_level + 1}): {self.SHOP_LEVEL_CONFIG[self.shop_level + 1]['cost_to_upgrade']}g")
+                  log.player("  - Cost for next upgrade (Level %s): %sg", self.shop_level + 1, self.SHOP_LEVEL_CONFIG[self.shop_level + 1]['cost_to_upgrade'])
         return True
 
     def display_inventory(self):
+        if not log.debug_enabled():
+            return
         if not self.inventory:
-            print(f"{self.name}'s inventory is empty. (Slots: 0/{self.max_inventory_slots})")
+            log.debug("%s's inventory is empty. (Slots: 0/%s)", self.name, self.max_inventory_slots)
             return
-        print(f"\n--- {self.name}'s Inventory (Level {self.shop_level}, Slots: {len(self.inventory)}/{self.max_inventory_slots}) (in {self.town.name if self.town else 'N/A'}) ---")
+        log.debug("\n--- %s's Inventory (Level %s, Slots: %s/%s) (in %s) ---", self.name, self.shop_level, len(self.inventory), self.max_inventory_slots, self.town.name if self.town else 'N/A')
         for item in self.inventory:
-            print(f"- {item}")
-        print("---------------------------")
+            log.debug("- %s", item)
+        log.debug("---------------------------")
 
     def to_dict(self) -> dict:
         return {
             "name": self.name,
             "owner_name": self.owner_name,
             "town_name": self.town.name if self.town else None, # Save town name
-            "inventory": [item.to_dict() for item in self.inventory],
+            "inventory": [item.to_save_dict() for item in self.inventory],
             "gold": self.gold,
             "specialization": self.specialization,
             "crafting_experience": self.crafting_experience.copy(),
@@ -612,7 +617,7 @@ class Shop:
     def from_dict(cls, data: dict, town_object: Town) -> 'Shop': # town_object must be supplied
         if not town_object and data.get("town_name"):
             # This case should ideally be handled by GameManager: find town by name
-            print(f"Warning: Shop.from_dict called for '{data['name']}' without a Town object, but town_name '{data.get('town_name')}' was in save data. Shop will have no town linkage.")
+            log.warning("Warning: Shop.from_dict called for '%s' without a Town object, but town_name '%s' was in save data. Shop will have no town linkage.", data['name'], data.get('town_name'))
             # One could raise an error or create a dummy town if town_object is critical and missing.
             # For now, we allow it but the shop might not function correctly if town is needed later.
 
@@ -626,7 +631,7 @@ class Shop:
         if shop.shop_level in Shop.SHOP_LEVEL_CONFIG:
             shop.max_inventory_slots = Shop.SHOP_LEVEL_CONFIG[shop.shop_level]["max_inventory_slots"]
         else:
-            print(f"Warning: Shop level {shop.shop_level} from save data not found in SHOP_LEVEL_CONFIG. Defaulting slots for level 1.")
+            log.warning("Warning: Shop level %s from save data not found in SHOP_LEVEL_CONFIG. Defaulting slots for level 1.", shop.shop_level)
             shop.max_inventory_slots = Shop.SHOP_LEVEL_CONFIG[1]["max_inventory_slots"] # Fallback
 
         shop.markup_percentage = data.get("markup_percentage", 1.2)
@@ -1,3 +1,6 @@
+from . import game_log as log
+
+
 class GameTime:
     """
     Manages game time including hour and day.
@@ -25,14 +28,14 @@ class GameTime:
         Returns:
             tuple[int, int]: A tuple containing (days_passed, new_current_hour).
         """
-        print(f"  DEBUG GameTime.advance_hour: Start. Current: Day {self.current_day}, {self.current_hour:02d}:00. Advancing by {hours} hour(s).")
+        log.debug("  DEBUG GameTime.advance_hour: Start. Current: Day %s, %02d:00. Advancing by %s hour(s).", self.current_day, self.current_hour, hours)
 
         if hours < 0:
-            print("  DEBUG GameTime.advance_hour: Cannot advance time by a negative number of hours.")
+            log.debug("  DEBUG GameTime.advance_hour: Cannot advance time by a negative number of hours.")
             return 0, self.current_hour
 
         if hours == 0:
-            print("  DEBUG GameTime.advance_hour: Advancing by 0 hours, no change.")
+            log.debug("  DEBUG GameTime.advance_hour: Advancing by 0 hours, no change.")
             return 0, self.current_hour
 
         days_passed = 0
@@ -43,9 +46,9 @@ class GameTime:
             self.current_day += 1
             days_passed += 1
             # This print is already useful:
-            print(f"A new day has begun! It is now Day {self.current_day}.")
+            log.player("A new day has begun! It is now Day %s.", self.current_day)
 
-        print(f"  DEBUG GameTime.advance_hour: End. New time: Day {self.current_day}, {self.current_hour:02d}:00. Days passed this call: {days_passed}.")
+        log.debug("  DEBUG GameTime.advance_hour: End. New time: Day %s, %02d:00. Days passed this call: %s.", self.current_day, self.current_hour, days_passed)
         return days_passed, self.current_hour
 
     def get_time_string(self) -> str:
@@ -1,4 +1,70 @@
 # from .g_event import Event # Would be needed if active_local_events stores Event objects
+from . import game_log as log
+
+
+class FrozenDict(dict):
+    """A dict that refuses modification. Still serialises with json.dumps like a normal dict."""
+
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("This data is shared by every player and is read-only. Copy it before changing it.")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def freeze(value):
+    """Recursively converts dicts to FrozenDicts and lists to tuples."""
+    if isinstance(value, dict):
+        return FrozenDict({key: freeze(item) for key, item in value.items()})
+    if isinstance(value, (list, tuple)):
+        return tuple(freeze(item) for item in value)
+    return value
+
+
+def thaw(value):
+    """Inverse of freeze: returns plain, mutable dicts and lists."""
+    if isinstance(value, dict):
+        return {key: thaw(item) for key, item in value.items()}
+    if isinstance(value, tuple):
+        return [thaw(item) for item in value]
+    return value
+
+
+class TownTemplate:
+    """
+    Frozen, shareable definition of a town. Built once per process (see world.py)
+    and shared by every player; per-player state lives on Town overlays.
+    """
+    STATIC_FIELDS = ("name", "properties", "nearby_resources", "unique_npc_crafters",
+                     "market_demand_modifiers", "local_events_schedule", "sub_locations", "faction_hqs")
+    __slots__ = STATIC_FIELDS
+
+    def __init__(self, name: str, properties: list[str] = None, nearby_resources: list[str] = None,
+                 unique_npc_crafters: list[dict] = None, market_demand_modifiers: dict = None,
+                 local_events_schedule: list[dict] = None, sub_locations: list[dict] = None,
+                 faction_hqs: list[str] = None):
+        values = {
+            "name": name,
+            "properties": properties or [],
+            "nearby_resources": nearby_resources or [],
+            "unique_npc_crafters": unique_npc_crafters or [],
+            "market_demand_modifiers": market_demand_modifiers or {},
+            "local_events_schedule": local_events_schedule or [],
+            "sub_locations": sub_locations or [],
+            "faction_hqs": faction_hqs or [],
+        }
+        for field, value in values.items():
+            object.__setattr__(self, field, freeze(value))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("TownTemplate is immutable.")
+
+    def __repr__(self):
+        return f"TownTemplate(name='{self.name}')"
+
 
 class Town:
     """
@@ -32,7 +98,34 @@ class Town:
         self.faction_hqs = faction_hqs if faction_hqs is not None else []
         self.active_local_events = [] # List of active event objects or structs
 
-        print(f"Town '{self.name}' established.")
+        log.debug("Town '%s' established.", self.name)
+
+    @classmethod
+    def from_template(cls, template: TownTemplate) -> 'Town':
+        """
+        Creates a lightweight per-player town on top of a shared TownTemplate.
+
+        The static data (resources, NPCs, sub-locations...) is the template's frozen
+        objects, not copies. Only per-player state such as active_local_events is new.
+        Call make_mutable() before changing a static field in place, or assign a new value.
+        """
+        town = cls.__new__(cls)
+        for field in TownTemplate.STATIC_FIELDS:
+            setattr(town, field, getattr(template, field))
+        town.template = template
+        town.active_local_events = []
+        return town
+
+    def make_mutable(self, field: str):
+        """
+        Copy-on-write for overlay towns: replaces a shared frozen field with this town's
+        own mutable copy (once) and returns it.
+        """
+        value = getattr(self, field)
+        if isinstance(value, (FrozenDict, tuple)):
+            value = thaw(value)
+            setattr(self, field, value)
+        return value
 
     def get_item_price_modifier(self, item_name: str) -> float:
         """
@@ -57,7 +150,7 @@ class Town:
         """Adds a dynamic local event to the town."""
         # For now, let's assume event_details is a simple dict for demonstration
         # In future, this would likely be an Event object from g_event.py
-        print(f"Event '{event_details.get('name', 'Unnamed Event')}' started in {self.name}.")
+        log.player("Event '%s' started in %s.", event_details.get('name', 'Unnamed Event'), self.name)
         self.active_local_events.append(event_details)
         # Future: Apply event effects, like temporary market demand changes
 
@@ -70,9 +163,9 @@ class Town:
                 break
         if event_found:
             self.active_local_events.remove(event_found)
-            print(f"Event '{event_name_to_remove}' ended in {self.name}.")
+            log.player("Event '%s' ended in %s.", event_name_to_remove, self.name)
         else:
-            print(f"Could not find active event '{event_name_to_remove}' to remove in {self.name}.")
+            log.player("Could not find active event '%s' to remove in %s.", event_name_to_remove, self.name)
 
     def __repr__(self):
         return f"Town(name='{self.name}', properties={len(self.properties)}, resources={len(self.nearby_resources)}, sub_locations={len(self.sub_locations)}, faction_hqs={len(self.faction_hqs)})"
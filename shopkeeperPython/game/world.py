@@ -0,0 +1,81 @@
+"""
+Shared world definitions.
+
+The towns and their NPCs are the same for every player, so they are built once per
+process as frozen TownTemplates. Each GameManager gets per-player Town overlays from
+WORLD.create_player_towns(); only the mutable bits (e.g. active_local_events) are
+allocated per player.
+"""
+from .town import Town, TownTemplate
+
+
+TOWN_DEFINITIONS = [
+    {
+        "name": "Starting Village",
+        "properties": ["Quiet farming village", "River nearby"],
+        "faction_hqs": ["merchants_guild"],
+        "nearby_resources": ["Dirty Water", "Moldy Fruit", "Wild Herb", "Small Twig", "Sturdy Branch", "Grain"],
+        "unique_npc_crafters": [{
+            "name": "Old Man Hemlock",
+            "specialty": "Herbalism",
+            "services": ["Identifies Herbs"],
+            "quests_available": [],
+            "dialogue": ["The forest speaks to those who listen.", "These old bones have seen many seasons.", "Looking for herbs, are we?"]
+        }],
+        "market_demand_modifiers": {"Minor Healing Potion": 1.1, "Bread": 0.9, "Fish": 1.05},
+        "sub_locations": [
+            {"name": "Village Shop", "description": "Your humble shop.", "actions": ["buy_from_own_shop", "sell_to_own_shop", "check_shop_inventory", "craft"]},
+            {"name": "Village Square", "description": "The central gathering point of the village.", "actions": ["explore_town", "talk_to_villager", "research_market"]},
+            {"name": "Old Man Hemlock's Hut", "description": "A small, smoky hut belonging to the local herbalist.", "actions": ["talk_to_hemlock", "buy_from_npc"]},
+            {"name": "The Sleeping Dragon Inn", "description": "A small, quiet inn. Not much happens here, but it's a place to rest or hear a whisper.", "actions": ["buy_drink_tavern", "gather_rumors_tavern"]}
+        ],
+    },
+    {
+        "name": "Steel Flow City",
+        "properties": ["Major mining hub", "Strong warrior tradition"],
+        "faction_hqs": ["local_militia"],
+        "nearby_resources": ["Scrap Metal", "Stone Fragment", "Dirty Water", "Sturdy Branch"],
+        "unique_npc_crafters": [{
+            "name": "Borin Stonebeard",
+            "specialty": "Blacksmithing",
+            "services": ["Repairs Gear", "Sells Metal Ingots"],
+            "quests_available": ["Clear Mine Pests"],
+            "dialogue": ["The clang of the hammer is music to my ears.", "Need something sturdy, eh?", "Steel and sweat, that's the way!"]
+        }],
+        "market_demand_modifiers": {"Simple Dagger": 1.25, "Iron Sword": 1.3, "Minor Healing Potion": 1.15, "Stale Ale": 0.8},
+        "sub_locations": [
+            {"name": "City Market", "description": "A bustling marketplace.", "actions": ["explore_town", "research_market", "visit_general_store_sfc"]},
+            {"name": "The Rusty Pickaxe Tavern", "description": "A rowdy place favored by miners.", "actions": ["buy_drink_tavern", "gather_rumors_tavern"]},
+            {"name": "Borin Stonebeard's Smithy", "description": "The workshop of the renowned blacksmith.", "actions": ["talk_to_borin", "repair_gear_borin"]}
+        ],
+    },
+]
+
+DEFAULT_TOWN_NAME = "Starting Village"
+
+
+class WorldRegistry:
+    """
+    Holds the frozen TownTemplates for the whole process.
+
+    Args:
+        town_definitions (list[dict]): Keyword arguments for each TownTemplate, in display order.
+        default_town_name (str): Name of the town new characters start in.
+    """
+
+    def __init__(self, town_definitions: list[dict], default_town_name: str):
+        self.town_templates = tuple(TownTemplate(**definition) for definition in town_definitions)
+        self.templates_by_name = {template.name: template for template in self.town_templates}
+        if default_town_name not in self.templates_by_name:
+            raise ValueError(f"Default town '{default_town_name}' is not defined.")
+        self.default_town_name = default_town_name
+
+    def get_template(self, town_name: str) -> TownTemplate | None:
+        return self.templates_by_name.get(town_name)
+
+    def create_player_towns(self) -> list[Town]:
+        """Returns fresh per-player Town overlays, one per template, in definition order."""
+        return [Town.from_template(template) for template in self.town_templates]
+
+
+WORLD = WorldRegistry(TOWN_DEFINITIONS, DEFAULT_TOWN_NAME)
@@ -0,0 +1,123 @@
+"""
+Cache of hydrated game sessions (Character + GameManager) between web requests.
+
+Rebuilding a session means Character.from_dict(), a new GameManager with its towns,
+and setup_for_character() with its Shop and EventManager. GameSessionCache keeps
+the most recently used sessions keyed by (username, slot) so a request can reuse them.
+
+A session is checked out for the duration of a request and checked back in
+afterwards, so two concurrent requests never share the same objects. Each entry
+remembers the saved character dict it matches (source_data). If the dict stored for
+that slot is no longer the same object, the entry is stale and is rebuilt. A session
+left idle for max_idle seconds is rebuilt too, so loading it runs the shop's offline
+catch-up for the time the player was away.
+"""
+import threading
+import time
+from collections import OrderedDict
+
+
+class GameSession:
+    """A hydrated character and its GameManager, plus the saved dict they match."""
+
+    def __init__(self, username: str, slot_index: int, character, game_manager, source_data: dict):
+        self.username = username
+        self.slot_index = slot_index
+        self.character = character
+        self.game_manager = game_manager
+        self.source_data = source_data
+        self.saved_this_request = False
+        self.checked_in_at = None # time.monotonic() of the last checkin
+
+    @property
+    def key(self) -> tuple:
+        return (self.username, self.slot_index)
+
+    def mark_saved(self, saved_data: dict) -> None:
+        """Records that the in-memory objects were just written out as saved_data."""
+        self.source_data = saved_data
+        self.saved_this_request = True
+
+
+class GameSessionCache:
+    """
+    Bounded LRU cache of GameSession objects.
+
+    Args:
+        max_size (int, optional): Maximum number of cached sessions. 0 disables caching.
+        max_idle (float, optional): Seconds after which an unused session expires. None keeps them.
+    """
+
+    def __init__(self, max_size: int = 256, max_idle: float = None):
+        self.max_size = max_size
+        self.max_idle = max_idle
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        self.expirations = 0
+
+    def checkout(self, username: str, slot_index: int, current_data: dict) -> GameSession | None:
+        """
+        Removes and returns the cached session for (username, slot_index) if it still
+        matches current_data (the dict currently saved for that slot). Returns None on a miss.
+        """
+        with self._lock:
+            entry = self._entries.pop((username, slot_index), None)
+            if entry is not None and self.max_idle is not None and time.monotonic() - entry.checked_in_at >= self.max_idle:
+                self.expirations += 1
+                entry = None
+            if entry is None or entry.source_data is not current_data:
+                self.misses += 1
+                return None
+            self.hits += 1
+        entry.saved_this_request = False
+        return entry
+
+    def checkin(self, entry: GameSession) -> None:
+        """Puts a session back after a request, evicting the least recently used if full."""
+        if self.max_size <= 0:
+            return
+        entry.saved_this_request = False
+        entry.checked_in_at = time.monotonic()
+        with self._lock:
+            self._entries[entry.key] = entry
+            self._entries.move_to_end(entry.key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, username: str, slot_index: int) -> None:
+        with self._lock:
+            if self._entries.pop((username, slot_index), None) is not None:
+                self.invalidations += 1
+
+    def invalidate_user(self, username: str) -> None:
+        """Drops every cached slot of a user, e.g. after slots were added or removed."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] == username]:
+                del self._entries[key]
+                self.invalidations += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_size": self.max_size,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": (self.hits / total) if total else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "expirations": self.expirations,
+            }
@@ -0,0 +1,250 @@
+"""
+Server-side Flask sessions.
+
+Flask's default session serialises the whole session dict into a signed cookie, so
+action results and pending haggle/event state travel with every request and response
+(and can exceed browser cookie limits). ServerSideSessionInterface keeps the session
+data in a store on the server and only puts an opaque random id in the cookie.
+
+Two stores are provided:
+    MemorySessionStore  - in-process dict with a TTL, for single-process deployments.
+    SQLiteSessionStore  - shared database file, for several worker processes.
+"""
+import secrets
+import threading
+import time
+
+from flask.json.tag import TaggedJSONSerializer
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    """Session dict identified by an opaque id. Tracks modification like Flask's cookie session."""
+
+    def __init__(self, initial=None, sid: str = None, new: bool = False, expires_at: float = None):
+        def on_update(session):
+            session.modified = True
+            session.accessed = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = new
+        self.expires_at = expires_at
+        self.modified = False
+        self.accessed = False
+
+    def __getitem__(self, key):
+        self.accessed = True
+        return super().__getitem__(key)
+
+    def get(self, key, default=None):
+        self.accessed = True
+        return super().get(key, default)
+
+    def setdefault(self, key, default=None):
+        self.accessed = True
+        return super().setdefault(key, default)
+
+
+class MemorySessionStore:
+    """
+    Keeps serialised sessions in a dict. Expired entries are dropped on read and swept
+    every purge_interval seconds.
+    """
+
+    def __init__(self, purge_interval: float = 60.0):
+        self._entries = {} # sid -> (payload, expires_at)
+        self._lock = threading.Lock()
+        self.purge_interval = purge_interval
+        self._last_purge = time.time()
+
+    def load(self, sid: str):
+        """Returns (payload, expires_at) for a live session, or None."""
+        with self._lock:
+            entry = self._entries.get(sid)
+            if entry is not None and entry[1] <= time.time():
+                del self._entries[sid]
+                return None
+            return entry
+
+    def save(self, sid: str, payload: str, expires_at: float) -> None:
+        with self._lock:
+            self._entries[sid] = (payload, expires_at)
+            now = time.time()
+            if now - self._last_purge >= self.purge_interval:
+                self._purge_locked(now)
+
+    def delete(self, sid: str) -> None:
+        with self._lock:
+            self._entries.pop(sid, None)
+
+    def purge_expired(self) -> None:
+        with self._lock:
+            self._purge_locked(time.time())
+
+    def _purge_locked(self, now: float) -> None:
+        for sid in [sid for sid, (_, expires_at) in self._entries.items() if expires_at <= now]:
+            del self._entries[sid]
+        self._last_purge = now
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def close(self) -> None:
+        pass
+
+
+class SQLiteSessionStore:
+    """
+    Keeps serialised sessions in an SQLite table so every worker process sees the same
+    sessions. Same interface as MemorySessionStore.
+
+    Args:
+        db_path (str): Path to the database file (':memory:' works for tests).
+        purge_interval (float, optional): Seconds between sweeps of expired rows.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS sessions (
+            sid TEXT PRIMARY KEY,
+            data TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_sessions_expires_at ON sessions(expires_at);
+    """
+
+    def __init__(self, db_path: str, purge_interval: float = 60.0):
+        import sqlite3
+        self.db_path = db_path
+        self.purge_interval = purge_interval
+        self._last_purge = time.time()
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        with self._lock, self._conn:
+            self._conn.executescript(self.SCHEMA)
+
+    def load(self, sid: str):
+        with self._lock:
+            return self._conn.execute(
+                "SELECT data, expires_at FROM sessions WHERE sid = ? AND expires_at > ?",
+                (sid, time.time())).fetchone()
+
+    def save(self, sid: str, payload: str, expires_at: float) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sessions (sid, data, expires_at) VALUES (?, ?, ?)",
+                (sid, payload, expires_at))
+            now = time.time()
+            if now - self._last_purge >= self.purge_interval:
+                self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (now,))
+                self._last_purge = now
+
+    def delete(self, sid: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE sid = ?", (sid,))
+
+    def purge_expired(self) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM sessions WHERE expires_at <= ?", (time.time(),))
+            self._last_purge = time.time()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class ServerSideSessionInterface(SessionInterface):
+    """
+    Flask session interface backed by a session store.
+
+    The cookie holds only a random id, so it is not signed. A session is written back
+    when it was modified, or when less than half of its TTL is left (so active
+    sessions don't expire while only reading).
+
+    Args:
+        store: A MemorySessionStore or SQLiteSessionStore.
+        ttl (float, optional): Seconds of inactivity after which a session expires.
+    """
+
+    serializer = TaggedJSONSerializer()
+    session_class = ServerSideSession
+
+    def __init__(self, store, ttl: float = 86400.0):
+        self.store = store
+        self.ttl = ttl
+
+    def _new_session(self) -> ServerSideSession:
+        return self.session_class(sid=secrets.token_urlsafe(32), new=True)
+
+    def regenerate(self, session: ServerSideSession) -> None:
+        """
+        Moves the session's data to a new random id and drops the old record. Call it
+        whenever the logged-in user changes, so an id planted or leaked before login
+        never names an authenticated session.
+        """
+        if not session.new:
+            self.store.delete(session.sid)
+        session.sid = secrets.token_urlsafe(32)
+        session.expires_at = None
+        session.modified = True
+
+    def open_session(self, app, request) -> ServerSideSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if not sid:
+            return self._new_session()
+        record = self.store.load(sid)
+        if record is None:
+            return self._new_session()
+        payload, expires_at = record
+        try:
+            data = self.serializer.loads(payload)
+        except ValueError:
+            return self._new_session()
+        return self.session_class(data, sid=sid, expires_at=expires_at)
+
+    def save_session(self, app, session: ServerSideSession, response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.accessed:
+            response.vary.add("Cookie")
+
+        if not session:
+            # Emptied (e.g. logout): drop the stored record and the cookie.
+            if session.modified and not session.new:
+                self.store.delete(session.sid)
+                response.delete_cookie(name, domain=domain, path=path,
+                                       secure=self.get_cookie_secure(app),
+                                       httponly=self.get_cookie_httponly(app))
+                response.vary.add("Cookie")
+            return
+
+        now = time.time()
+        needs_refresh = session.expires_at is None or session.expires_at - now < self.ttl / 2
+        if not (session.modified or needs_refresh):
+            return
+
+        session.expires_at = now + self.ttl
+        self.store.save(session.sid, self.serializer.dumps(dict(session)), session.expires_at)
+
+        if session.new or self.should_set_cookie(app, session):
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+            response.vary.add("Cookie")
@@ -0,0 +1,279 @@
+"""
+Headless batch simulation for balance tuning and capacity planning.
+
+Rolls N characters, drives each one through GameManager.perform_hourly_action()
+for M game days with a scripted policy and aggregates the results: gold curves,
+level distribution, death rate and how often events and customer haggles came up.
+Characters are spread over a multiprocessing pool. All game output (GameManager
+output streams and the game modules' player messages, see game/game_log.py) is
+dropped, so a run is bound by the game logic rather than by the terminal.
+
+    python -m shopkeeperPython.simulation --characters 2000 --days 14 --policy shopkeeper --format csv
+
+A policy is a function (game_manager) -> (action_name, action_details) registered
+with @register_policy("name"). Pool workers look policies up by name, so custom
+policies must be registered when their module is imported.
+
+Every character uses its own seed (base seed + index) for its stat rolls, its
+policy and its GameManager random stream, so a run is reproducible whatever the
+number of processes.
+"""
+import argparse
+import contextlib
+import csv
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+from collections import Counter
+
+from shopkeeperPython.game import game_log
+from shopkeeperPython.game.character import Character
+from shopkeeperPython.game.game_manager import GameManager
+from shopkeeperPython.game.rng import GameRandom
+
+
+class _NullStream:
+    """File-like sink that drops everything written to it."""
+
+    def write(self, message: str) -> int:
+        return len(message)
+
+    def flush(self) -> None:
+        pass
+
+
+NULL_STREAM = _NullStream()
+
+# Follow-up actions per simulated hour (haggles, event choices) before giving up on a result.
+MAX_FOLLOW_UPS = 5
+
+POLICIES = {}
+
+
+def register_policy(name: str):
+    """Decorator registering a policy function under `name`."""
+    def decorator(policy):
+        POLICIES[name] = policy
+        return policy
+    return decorator
+
+
+@register_policy("idle")
+def idle_policy(game_manager):
+    return "wait", {}
+
+
+@register_policy("shopkeeper")
+def shopkeeper_policy(game_manager):
+    """Minds the shop during opening hours and waits the night out."""
+    if 8 <= game_manager.time.current_hour < 20:
+        return "tend_shop", {}
+    return "wait", {}
+
+
+@register_policy("explorer")
+def explorer_policy(game_manager):
+    """Explores and gathers during the day, tends the shop in the evening."""
+    hour = game_manager.time.current_hour
+    if 6 <= hour < 18:
+        return random.choice(("explore_town", "gather_resources")), {}
+    if 18 <= hour < 22:
+        return "tend_shop", {}
+    return "wait", {}
+
+
+@register_policy("mixed")
+def mixed_policy(game_manager):
+    """A bit of everything, picked at random every hour."""
+    return random.choice(("tend_shop", "explore_town", "gather_resources", "research_market", "organize_inventory", "wait")), {}
+
+
+def _settle(game_manager, result, counters: Counter):
+    """Answers pending haggles (accept sales, decline purchases) and event choices (random option)."""
+    for _ in range(MAX_FOLLOW_UPS):
+        if not isinstance(result, dict):
+            return result
+        if result.get("type") == "haggling_pending":
+            counters["haggles"] += 1
+            if result["haggling_data"].get("context") == "player_buying":
+                result = game_manager.perform_hourly_action("PROCESS_PLAYER_HAGGLE_CHOICE_BUY", {"haggle_choice": "decline"})
+            else:
+                result = game_manager.perform_hourly_action("PROCESS_PLAYER_HAGGLE_CHOICE_SELL", {"haggle_choice": "accept"})
+        elif result.get("type") == "event_pending":
+            event_data = result["event_data"]
+            counters["event:" + event_data["name"]] += 1
+            event = game_manager.event_index.get(event_data["name"])
+            if event:
+                game_manager.resolve_event_choice(event, random.randrange(len(event_data["choices"])))
+            return None
+        else:
+            return result
+    return result
+
+
+def simulate_character(seed: int, days: int, policy_name: str) -> dict:
+    """
+    Plays one freshly rolled character for `days` game days with the named policy.
+
+    Returns:
+        dict: {"seed", "policy", "days_played", "dead", "level", "gold_by_day", "shop_gold_by_day", "counters"}
+              gold_by_day[i] is the character's gold at the end of day i + 1 (shorter if they died).
+    """
+    with game_log.collect_player_messages(game_log.MessageBuffer(limit=0)):
+        return _play_character(seed, days, policy_name)
+
+
+def _play_character(seed: int, days: int, policy_name: str) -> dict:
+    policy = POLICIES[policy_name]
+    random.seed(seed)
+    player = Character(name=f"Sim {seed}")
+    player.stats = Character.roll_all_stats()
+    player.roll_stats()
+    game_manager = GameManager(player_character=player, output_stream=NULL_STREAM)
+    game_manager.setup_for_character(player)
+    game_manager.rng = GameRandom(seed)
+
+    start_day = game_manager.time.current_day
+    end_day = start_day + days
+    recorded_day = start_day
+    gold_by_day = []
+    shop_gold_by_day = []
+    counters = Counter()
+    max_steps = days * 24 * 2 # Guard against policies picking actions that take no time
+    for _ in range(max_steps):
+        if player.is_dead or game_manager.time.current_day >= end_day:
+            break
+        action_name, action_details = policy(game_manager)
+        counters["action:" + action_name] += 1
+        _settle(game_manager, game_manager.perform_hourly_action(action_name, action_details), counters)
+        while recorded_day < min(game_manager.time.current_day, end_day):
+            gold_by_day.append(player.gold)
+            shop_gold_by_day.append(game_manager.shop.gold if game_manager.shop else 0)
+            recorded_day += 1
+
+    return {
+        "seed": seed,
+        "policy": policy_name,
+        "days_played": len(gold_by_day),
+        "dead": bool(player.is_dead),
+        "level": player.level,
+        "gold_by_day": gold_by_day,
+        "shop_gold_by_day": shop_gold_by_day,
+        "counters": dict(counters),
+    }
+
+
+def _silence_output() -> None:
+    """Pool initializer: drop anything the game still prints in worker processes."""
+    sys.stdout = NULL_STREAM
+
+
+def _simulate_task(task: tuple) -> dict:
+    return simulate_character(*task)
+
+
+def run_simulation(characters: int, days: int, policy_name: str = "shopkeeper",
+                   processes: int | None = None, base_seed: int = 0) -> list[dict]:
+    """
+    Simulates `characters` characters, in a process pool unless processes is 1.
+    Returns the per-character results ordered by seed.
+    """
+    if policy_name not in POLICIES:
+        raise ValueError(f"Unknown policy '{policy_name}'. Available: {', '.join(sorted(POLICIES))}")
+    tasks = [(base_seed + index, days, policy_name) for index in range(characters)]
+    processes = processes or os.cpu_count() or 1
+    if processes == 1 or characters <= 1:
+        with contextlib.redirect_stdout(NULL_STREAM):
+            results = [_simulate_task(task) for task in tasks]
+    else:
+        chunksize = max(1, characters // (processes * 4))
+        with multiprocessing.Pool(processes=processes, initializer=_silence_output) as pool:
+            results = list(pool.imap_unordered(_simulate_task, tasks, chunksize=chunksize))
+    return sorted(results, key=lambda result: result["seed"])
+
+
+def _curve(values_by_character: list[list[int]], days: int) -> list[dict]:
+    curve = []
+    for day_index in range(days):
+        values = [values[day_index] for values in values_by_character if len(values) > day_index]
+        curve.append({
+            "day": day_index + 1,
+            "alive": len(values),
+            "mean": statistics.fmean(values) if values else 0.0,
+            "median": statistics.median(values) if values else 0,
+            "min": min(values) if values else 0,
+            "max": max(values) if values else 0,
+        })
+    return curve
+
+
+def aggregate_results(results: list[dict], days: int) -> dict:
+    """Rolls per-character results up into the report written by the CLI."""
+    counters = Counter()
+    for result in results:
+        counters.update(result["counters"])
+    deaths = sum(1 for result in results if result["dead"])
+    return {
+        "characters": len(results),
+        "days": days,
+        "policies": sorted({result["policy"] for result in results}),
+        "deaths": deaths,
+        "death_rate": deaths / len(results) if results else 0.0,
+        "level_distribution": dict(sorted(Counter(result["level"] for result in results).items())),
+        "gold_curve": _curve([result["gold_by_day"] for result in results], days),
+        "shop_gold_curve": _curve([result["shop_gold_by_day"] for result in results], days),
+        "action_counts": {key.split(":", 1)[1]: count for key, count in sorted(counters.items()) if key.startswith("action:")},
+        "event_counts": {key.split(":", 1)[1]: count for key, count in sorted(counters.items()) if key.startswith("event:")},
+        "haggles": counters.get("haggles", 0),
+    }
+
+
+def write_report(report: dict, stream, output_format: str = "json") -> None:
+    """Writes the report as JSON, or as CSV rows of (section, key, field, value)."""
+    if output_format == "json":
+        json.dump(report, stream, indent=2)
+        stream.write("\n")
+        return
+    writer = csv.writer(stream)
+    writer.writerow(["section", "key", "field", "value"])
+    for field in ("characters", "days", "deaths", "death_rate", "haggles"):
+        writer.writerow(["summary", "", field, report[field]])
+    for level, count in report["level_distribution"].items():
+        writer.writerow(["level_distribution", level, "characters", count])
+    for section in ("gold_curve", "shop_gold_curve"):
+        for point in report[section]:
+            for field in ("alive", "mean", "median", "min", "max"):
+                writer.writerow([section, point["day"], field, point[field]])
+    for section in ("action_counts", "event_counts"):
+        for name, count in report[section].items():
+            writer.writerow([section, name, "count", count])
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Run many headless shopkeeper characters and report aggregate stats.")
+    parser.add_argument("--characters", type=int, default=100, help="Number of characters to simulate.")
+    parser.add_argument("--days", type=int, default=7, help="Game days to play per character.")
+    parser.add_argument("--policy", default="shopkeeper", choices=sorted(POLICIES), help="Scripted policy driving the characters.")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes (default: CPU count, 1 runs in-process).")
+    parser.add_argument("--seed", type=int, default=0, help="Base random seed; character i uses seed + i.")
+    parser.add_argument("--format", dest="output_format", default="json", choices=("json", "csv"))
+    parser.add_argument("--output", default="-", help="Output file (default: stdout).")
+    args = parser.parse_args(argv)
+    if args.characters < 1 or args.days < 1:
+        parser.error("--characters and --days must be at least 1.")
+
+    results = run_simulation(args.characters, args.days, args.policy, processes=args.processes, base_seed=args.seed)
+    report = aggregate_results(results, args.days)
+    if args.output == "-":
+        write_report(report, sys.stdout, args.output_format)
+    else:
+        with open(args.output, "w", newline="") as f:
+            write_report(report, f, args.output_format)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
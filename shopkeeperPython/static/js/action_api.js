@@ -0,0 +1,296 @@
+// In-page action client: sends actions to /api/action and patches the page with the
+// returned delta instead of POSTing the action form and re-rendering the whole page.
+//
+// main_ui.js fills in the hidden action_name / action_details inputs and calls
+// actionForm.submit(); that call is routed through submitAction() below. When the
+// server answers with "reload" (events, haggling, death, layout changes) the page is
+// reloaded, which renders exactly what a normal form POST would have shown.
+(function () {
+    'use strict';
+
+    const config = window.gameConfig || {};
+
+    function toast(message, type) {
+        if (typeof window.showToast === 'function') {
+            window.showToast(message, type, 7000);
+            return;
+        }
+        const container = document.getElementById('toast-container');
+        if (!container) return;
+        const el = document.createElement('div');
+        el.className = `toast toast-${type}`;
+        const text = document.createElement('span');
+        text.className = 'toast-message';
+        text.textContent = message;
+        el.appendChild(text);
+        container.appendChild(el);
+        setTimeout(() => el.classList.add('show'), 100);
+        setTimeout(() => el.remove(), 7000);
+    }
+
+    function toastType(category) {
+        if (category === 'error' || category === 'critical_error') return 'error';
+        if (category === 'warning' || category === 'success') return category;
+        return 'info';
+    }
+
+    function setText(selector, value) {
+        document.querySelectorAll(selector).forEach(el => { el.textContent = value; });
+    }
+
+    // --- Player inventory ---
+    function buildItemCard(key, item) {
+        const card = document.createElement('div');
+        card.className = 'inventory-item-card';
+        card.setAttribute('role', 'listitem');
+        card.dataset.stackKey = key;
+
+        const icon = document.createElement('div');
+        icon.className = 'item-icon-placeholder';
+        icon.setAttribute('aria-hidden', 'true');
+        card.appendChild(icon);
+
+        const name = document.createElement('div');
+        name.className = 'item-name';
+        name.textContent = item.quantity > 1 ? `${item.name} (x${item.quantity})` : item.name;
+        card.appendChild(name);
+
+        const actions = document.createElement('div');
+        actions.className = 'item-actions';
+        const addButton = (cssClass, label) => {
+            const button = document.createElement('button');
+            button.type = 'button';
+            button.className = `action-button ${cssClass}`;
+            button.dataset.itemName = item.name;
+            button.textContent = label;
+            actions.appendChild(button);
+        };
+        if (item.is_consumable) addButton('use-item-button', 'Use');
+        if (item.is_attunement && !(config.playerAttunedItemNames || []).includes(item.name)) addButton('attune-item-button', 'Attune');
+        card.appendChild(actions);
+        return card;
+    }
+
+    function playerInventoryGrid() {
+        let grid = document.querySelector('.player-inventory-grid');
+        if (grid) return grid;
+        const heading = document.getElementById('player-items-heading');
+        const section = heading ? heading.parentElement : null;
+        if (!section) return null;
+        section.querySelectorAll('p').forEach(p => p.remove()); // "Player inventory is empty."
+        grid = document.createElement('div');
+        grid.className = 'inventory-grid player-inventory-grid';
+        grid.setAttribute('role', 'list');
+        section.appendChild(grid);
+        return grid;
+    }
+
+    function applyInventoryDelta(delta) {
+        const current = {};
+        (config.playerInventory || []).forEach(item => { current[item.stack_key] = item; });
+        Object.entries(delta.changed).forEach(([key, item]) => { current[key] = Object.assign({ stack_key: key }, item); });
+        delta.removed.forEach(key => { delete current[key]; });
+        config.playerInventory = delta.order.map(key => current[key]).filter(Boolean);
+
+        const grid = playerInventoryGrid();
+        if (!grid) return false;
+        const cards = {};
+        grid.querySelectorAll('.inventory-item-card').forEach(card => { cards[card.dataset.stackKey] = card; });
+        delta.removed.forEach(key => { if (cards[key]) cards[key].remove(); });
+        delta.order.forEach(key => {
+            let card = cards[key];
+            if (key in delta.changed) {
+                const fresh = buildItemCard(key, delta.changed[key]);
+                if (card) card.replaceWith(fresh);
+                card = fresh;
+            }
+            if (card) grid.appendChild(card); // Appending in order also moves existing cards into place
+        });
+        setText('.mini-player-item-count', config.playerInventory.length);
+        return true;
+    }
+
+    // --- Shop stock (summary lines, re-rendered whole) ---
+    function applyShopStock(lines) {
+        const heading = document.getElementById('shop-stock-heading');
+        const section = heading ? heading.parentElement : null;
+        if (!section) return false;
+        section.querySelectorAll('.shop-inventory-grid, p').forEach(el => el.remove());
+        if (lines.length === 0) {
+            const empty = document.createElement('p');
+            empty.textContent = 'Shop inventory is currently empty.';
+            section.appendChild(empty);
+        } else {
+            const grid = document.createElement('div');
+            grid.className = 'inventory-grid shop-inventory-grid';
+            grid.setAttribute('role', 'list');
+            lines.forEach(line => {
+                const card = document.createElement('div');
+                card.className = 'inventory-item-card shop-item-card';
+                card.setAttribute('role', 'listitem');
+                card.innerHTML = '<div class="item-icon-placeholder" aria-hidden="true"></div><div class="item-name"></div><button type="button" class="buy-item-button action-button">Buy</button>';
+                card.querySelector('.item-name').textContent = line;
+                card.querySelector('button').dataset.itemName = line;
+                grid.appendChild(card);
+            });
+            section.appendChild(grid);
+        }
+        setText('.mini-shop-item-count', lines.length);
+        return true;
+    }
+
+    // --- Journal ---
+    function applyJournal(entries) {
+        const logBox = document.querySelector('#log-panel-content .log-box');
+        if (!logBox) return false;
+        let list = document.getElementById('journal-entries-list');
+        if (!list) {
+            logBox.querySelectorAll('p').forEach(p => p.remove()); // "No journal entries yet."
+            list = document.createElement('ul');
+            list.id = 'journal-entries-list';
+            list.setAttribute('role', 'list');
+            logBox.appendChild(list);
+        }
+        entries.forEach(entry => list.insertBefore(journalListItem(entry), list.firstChild)); // Newest first, like the template
+        return true;
+    }
+
+    function journalListItem(entry) {
+        const li = document.createElement('li');
+        li.setAttribute('role', 'listitem');
+        const add = (tag, cssClass, text) => {
+            const el = document.createElement(tag);
+            el.className = cssClass;
+            el.textContent = text;
+            li.appendChild(el);
+        };
+        add('span', 'journal-timestamp', entry.timestamp ? entry.timestamp.replace('T', ' ').slice(0, 19) : 'No timestamp');
+        add('strong', 'journal-action-type', entry.action_type);
+        add('p', 'journal-summary', entry.summary);
+        if (entry.details && Object.keys(entry.details).length > 0) {
+            add('div', 'journal-details', 'Details: ' + Object.entries(entry.details).map(([k, v]) => `${k}: ${v}`).join(', '));
+        }
+        if (entry.outcome) add('p', 'journal-outcome', `Outcome: ${entry.outcome}`);
+        return li;
+    }
+
+    // The page only renders the newest journal entries; older pages come from /api/journal.
+    function initJournalPaging() {
+        const button = document.getElementById('journal-older-button');
+        if (!button || !config.apiJournalUrl || !window.fetch) return;
+        button.addEventListener('click', () => {
+            button.disabled = true;
+            fetch(`${config.apiJournalUrl}?cursor=${encodeURIComponent(button.dataset.cursor)}`, {
+                credentials: 'same-origin',
+                headers: { 'Accept': 'application/json' },
+            })
+                .then(response => response.json())
+                .then(page => {
+                    if (!page.ok) throw new Error(page.error);
+                    const list = document.getElementById('journal-entries-list');
+                    page.entries.forEach(entry => list.appendChild(journalListItem(entry)));
+                    if (page.next_cursor === null) {
+                        button.remove();
+                    } else {
+                        button.dataset.cursor = page.next_cursor;
+                        button.disabled = false;
+                    }
+                })
+                .catch(error => {
+                    console.error('Journal request failed:', error);
+                    button.disabled = false;
+                });
+        });
+    }
+
+    function applyChanges(changes) {
+        let patched = true;
+        if ('gold' in changes) {
+            config.playerGold = changes.gold;
+            setText('.mini-gold-value, .full-gold-value', `${changes.gold} G`);
+        }
+        if ('hp' in changes || 'max_hp' in changes) {
+            const hp = 'hp' in changes ? changes.hp : null;
+            const maxHp = 'max_hp' in changes ? changes.max_hp : null;
+            if (hp !== null) setText('.full-hp-value', hp);
+            if (maxHp !== null) setText('.full-max-hp-value', maxHp);
+            const mini = document.querySelector('.mini-hp-value');
+            if (mini) {
+                const [oldHp, oldMax] = mini.textContent.split('/');
+                mini.textContent = `${hp !== null ? hp : oldHp}/${maxHp !== null ? maxHp : oldMax}`;
+            }
+        }
+        if ('time' in changes) setText('.mini-time-value, .full-time-value', changes.time);
+        if ('shop' in changes && changes.shop) {
+            config.shopData = Object.assign({}, config.shopData || {}, changes.shop);
+            setText('.mini-shop-level-value', changes.shop.level);
+        }
+        if (changes.player_inventory) patched = applyInventoryDelta(changes.player_inventory) && patched;
+        if (changes.shop_stock) patched = applyShopStock(changes.shop_stock) && patched;
+        if (changes.journal) patched = applyJournal(changes.journal) && patched;
+        return patched;
+    }
+
+    let inFlight = false;
+
+    function submitAction(form) {
+        if (inFlight) return; // One action at a time, like a form POST
+        const body = new URLSearchParams(new FormData(form));
+        inFlight = true;
+        fetch(config.apiActionUrl, {
+            method: 'POST',
+            body,
+            credentials: 'same-origin',
+            headers: { 'Accept': 'application/json' },
+        })
+            .then(response => response.json())
+            .then(result => {
+                if (result.reload || !applyChanges(result.changes || {})) {
+                    window.location.reload(); // The server already queued the messages for the reloaded page
+                    return;
+                }
+                (result.messages || []).forEach(m => toast(m.text, toastType(m.category)));
+                const log = (result.log || []).join(' ').trim();
+                if (log) toast(log, 'info');
+            })
+            .catch(error => {
+                // The action may or may not have run; show the real state instead of re-posting.
+                console.error('Action request failed:', error);
+                window.location.reload();
+            })
+            .finally(() => { inFlight = false; });
+    }
+
+    // "Wait 8 Hours" style buttons: one fast_forward action instead of one request per hour.
+    function initFastForwardButtons(form) {
+        document.querySelectorAll('.fast-forward-button').forEach(button => {
+            button.addEventListener('click', () => {
+                form.querySelector('#action_name_hidden').value = 'fast_forward';
+                form.querySelector('#action_details').value = JSON.stringify({
+                    hours: parseInt(button.dataset.hours, 10),
+                    policy: button.dataset.policy,
+                });
+                form.submit();
+            });
+        });
+    }
+
+    function init() {
+        const form = document.getElementById('actionForm');
+        initJournalPaging();
+        if (!form) return;
+        initFastForwardButtons(form);
+        if (!config.apiActionUrl || !window.fetch) return; // Plain form POSTs still work
+        form.submit = () => submitAction(form);
+        form.addEventListener('submit', event => {
+            event.preventDefault();
+            submitAction(form);
+        });
+    }
+
+    if (document.readyState === 'loading') {
+        document.addEventListener('DOMContentLoaded', init);
+    } else {
+        init();
+    }
+})();
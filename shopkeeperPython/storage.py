@@ -0,0 +1,1323 @@
+"""
+Persistence helpers for the web app.
+
+Character and graveyard data used to live in one big JSON file each, which meant
+every save rewrote every player's data. ShardedJsonStore keeps one small JSON file
+("shard") per user instead, so saving after an action only touches that user's file.
+
+app.py talks to a StorageBackend: JsonStorage (files, the default) or SQLiteStorage.
+
+Every file is replaced atomically (temp file, fsync, rename), so a crash can never
+leave a half-written save behind. JsonStorage can additionally log character updates
+to an append-only WriteAheadLog and only rewrite shard files at checkpoints.
+
+Old journal entries are kept out of the character saves altogether, in a
+JournalArchive of compressed, write-once segment files.
+
+After an action only a few fields of a character change, so the app saves a
+character_delta (changed fields, changed inventory stacks, new journal entries)
+through StorageBackend.save_character_delta instead of the user's whole slot list.
+
+When several worker processes serve the app, a StorageCoordinator gives them
+per-record advisory locks and change stamps, so each worker can tell when its
+in-memory copy of a record is out of date.
+"""
+import contextlib
+import datetime
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from urllib.parse import quote, unquote
+
+try:
+    import fcntl
+except ImportError: # Not on Windows; locks then only cover the threads of one process
+    fcntl = None
+
+SHARD_SUFFIX = '.json'
+
+
+def fsync_directory(directory: str) -> None:
+    """Makes a rename durable. Not supported on every platform, so failures are ignored."""
+    try:
+        fd = os.open(directory or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_json(path: str, data, indent=4) -> None:
+    """
+    Writes data as JSON to path so that readers see either the old or the new file,
+    never a truncated one.
+
+    Args:
+        path (str): Destination file.
+        data: JSON-serialisable value.
+        indent (int, optional): Passed to json.dump. Defaults to 4.
+    """
+    directory = os.path.dirname(path) or '.'
+    fd, temp_path = tempfile.mkstemp(prefix='.' + os.path.basename(path) + '.', suffix='.tmp', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    fsync_directory(directory)
+
+
+class WriteAheadLog:
+    """
+    Append-only log of JSON records, one per line.
+
+    Records are flushed to the OS on every append; fsync happens every
+    fsync_batch_size records or fsync_interval seconds, whichever comes first, so
+    a busy server pays for one fsync per batch instead of one per save.
+
+    Args:
+        path (str): Log file path.
+        fsync_batch_size (int, optional): Records per fsync. 1 means fsync every append.
+        fsync_interval (float, optional): Maximum seconds between fsyncs while records are pending.
+    """
+
+    def __init__(self, path: str, fsync_batch_size: int = 1, fsync_interval: float = 1.0):
+        self.path = path
+        self.fsync_batch_size = max(1, fsync_batch_size)
+        self.fsync_interval = fsync_interval
+        self._file = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._file is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        return self._file
+
+    def append(self, record: dict) -> None:
+        line = json.dumps(record, separators=(',', ':')) + '\n'
+        with self._lock:
+            f = self._open()
+            f.write(line)
+            f.flush()
+            self._unsynced += 1
+            if (self._unsynced >= self.fsync_batch_size
+                    or time.monotonic() - self._last_sync >= self.fsync_interval):
+                self._sync_locked()
+
+    def _sync_locked(self):
+        if self._file is not None and self._unsynced:
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def sync(self) -> None:
+        """Forces any batched records to disk."""
+        with self._lock:
+            self._sync_locked()
+
+    def replay(self):
+        """
+        Yields the records in the log in order. A torn final line (from a crash
+        mid-append) is reported and skipped.
+        """
+        try:
+            f = open(self.path, 'r', encoding='utf-8')
+        except FileNotFoundError:
+            return
+        with f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Warning: Ignoring unreadable record at line {line_number} of '{self.path}' (incomplete write).")
+                    return
+
+    def truncate(self) -> None:
+        """Empties the log once its records have been checkpointed."""
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.flush()
+                os.fsync(f.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is not None:
+                self._sync_locked()
+                self._file.close()
+                self._file = None
+
+
+def path_component(key: str) -> str:
+    """Returns a filesystem-safe, reversible file or directory name for a key (user or character name)."""
+    encoded = quote(key, safe='')
+    if encoded.startswith('.'): # Never produce hidden files or '.'/'..'
+        encoded = '%2E' + encoded[1:]
+    return encoded
+
+
+def shard_filename(key: str) -> str:
+    """Returns a filesystem-safe, reversible file name for a user key."""
+    return path_component(key) + SHARD_SUFFIX
+
+
+def key_from_shard_filename(filename: str) -> str | None:
+    """Inverse of shard_filename. Returns None for files that are not shards."""
+    if not filename.endswith(SHARD_SUFFIX) or filename.startswith('.'):
+        return None
+    return unquote(filename[:-len(SHARD_SUFFIX)])
+
+
+class CharacterNameIndex:
+    """
+    Case-folded set of every character name in use, living or dead, so a
+    uniqueness check is a set lookup instead of a scan over every save.
+    """
+
+    def __init__(self, names=()):
+        self._names = {self.key(name) for name in names}
+
+    @staticmethod
+    def key(name: str) -> str:
+        return name.casefold()
+
+    def __contains__(self, name) -> bool:
+        return isinstance(name, str) and self.key(name) in self._names
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self):
+        return iter(sorted(self._names))
+
+    def add(self, name: str) -> bool:
+        """Adds a name. Returns False if it was already present."""
+        key = self.key(name)
+        if key in self._names:
+            return False
+        self._names.add(key)
+        return True
+
+    def replace(self, names) -> None:
+        self._names = {self.key(name) for name in names}
+
+    def rebuild(self, *collections: dict) -> None:
+        """Rebuilds from one or more username -> list of character dicts mappings."""
+        self._names = {
+            self.key(char_data['name'])
+            for collection in collections
+            for char_list in collection.values()
+            for char_data in char_list
+            if isinstance(char_data, dict) and isinstance(char_data.get('name'), str)
+        }
+
+
+class UserLookupIndex:
+    """
+    Secondary indexes over the users mapping: Google account id -> username and
+    Google email -> username, so OAuth logins don't scan every account.
+    """
+
+    def __init__(self):
+        self.by_google_id = {}
+        self.by_email = {}
+        self._indexed_keys = {} # username -> (google_id, email) currently indexed for it
+
+    def rebuild(self, users: dict) -> None:
+        self.by_google_id.clear()
+        self.by_email.clear()
+        self._indexed_keys.clear()
+        for username, user_data in users.items():
+            self.add(username, user_data)
+
+    def add(self, username: str, user_data) -> None:
+        """Indexes (or re-indexes) one user record."""
+        self.remove(username)
+        if not isinstance(user_data, dict):
+            return
+        google_id = user_data.get('google_id')
+        email = user_data.get('email_google')
+        if google_id:
+            self.by_google_id[google_id] = username
+        if email:
+            self.by_email[email] = username
+        self._indexed_keys[username] = (google_id, email)
+
+    def remove(self, username: str) -> None:
+        google_id, email = self._indexed_keys.pop(username, (None, None))
+        if google_id and self.by_google_id.get(google_id) == username:
+            del self.by_google_id[google_id]
+        if email and self.by_email.get(email) == username:
+            del self.by_email[email]
+
+    def find_by_google_id(self, google_id) -> str | None:
+        return self.by_google_id.get(google_id)
+
+    def find_by_email(self, email) -> str | None:
+        return self.by_email.get(email)
+
+
+class ShardedJsonStore:
+    """
+    Stores a mapping of key -> JSON value as one file per key inside a directory.
+
+    Args:
+        directory (str): Directory holding the shard files. Created on demand.
+        legacy_file (str, optional): Path to an old single-file JSON dict. If the shard
+            directory does not exist yet, its contents are split into shards on first load.
+    """
+
+    def __init__(self, directory: str, legacy_file: str = None):
+        self.directory = directory
+        self.legacy_file = legacy_file
+
+    def _path_for(self, key: str) -> str:
+        return os.path.join(self.directory, shard_filename(key))
+
+    def ensure_ready(self) -> int:
+        """
+        Creates the shard directory, migrating the legacy file into it if needed.
+
+        Returns:
+            int: Number of records migrated from the legacy file (0 if none).
+        """
+        if os.path.isdir(self.directory):
+            return 0
+        os.makedirs(self.directory, exist_ok=True)
+        if not self.legacy_file or not os.path.exists(self.legacy_file):
+            return 0
+        try:
+            with open(self.legacy_file, 'r', encoding='utf-8') as f:
+                legacy_data = json.load(f)
+        except json.JSONDecodeError:
+            print(f"Warning: Could not decode legacy file '{self.legacy_file}'. Nothing migrated.")
+            return 0
+        if not isinstance(legacy_data, dict):
+            print(f"Warning: Legacy file '{self.legacy_file}' is not a JSON object. Nothing migrated.")
+            return 0
+        for key, value in legacy_data.items():
+            self.save(key, value)
+        print(f"INFO: Migrated {len(legacy_data)} record(s) from '{self.legacy_file}' into '{self.directory}'.")
+        return len(legacy_data)
+
+    def keys(self):
+        """Yields every stored key without reading any shard contents."""
+        if not os.path.isdir(self.directory):
+            return
+        with os.scandir(self.directory) as entries:
+            for entry in entries:
+                if not entry.is_file():
+                    continue
+                key = key_from_shard_filename(entry.name)
+                if key is not None:
+                    yield key
+
+    def load(self, key: str, default=None):
+        """
+        Reads a single shard. A corrupted shard is backed up and treated as missing,
+        so one bad file never takes the other players' data down with it.
+        """
+        path = self._path_for(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+        except json.JSONDecodeError:
+            timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+            backup_filename = f"{path}.corrupted.{timestamp}"
+            try:
+                shutil.move(path, backup_filename)
+                print(f"Warning: Could not decode shard '{path}'. It has been moved to {backup_filename}.")
+            except Exception as backup_e:
+                print(f"Warning: Could not decode shard '{path}'. Failed to move it aside: {backup_e}")
+            return default
+
+    def iter_items(self):
+        """Lazily yields (key, value) pairs, reading one shard at a time."""
+        for key in self.keys():
+            value = self.load(key)
+            if value is not None:
+                yield key, value
+
+    def save(self, key: str, value) -> None:
+        """Atomically writes a single shard."""
+        os.makedirs(self.directory, exist_ok=True)
+        atomic_write_json(self._path_for(key), value)
+
+    def delete(self, key: str) -> None:
+        """Removes a shard if it exists."""
+        try:
+            os.remove(self._path_for(key))
+        except FileNotFoundError:
+            pass
+
+    def save_all(self, data: dict) -> None:
+        """Writes every record in data and removes shards for keys no longer present."""
+        for key, value in data.items():
+            self.save(key, value)
+        for stale_key in set(self.keys()) - set(data):
+            self.delete(stale_key)
+
+
+class JournalArchive:
+    """
+    Old journal entries of every character, as gzip-compressed JSON segments.
+
+    Each character gets a directory (<directory>/<user>/<character name>/) of segment
+    files. A segment holds a run of consecutive entries and is named after the number
+    of its first entry (see game/journal.py), e.g. 0000000200.json.gz. Segments are
+    only ever added, never rewritten: writing a segment that already exists (a save
+    retried after a crash) is a no-op, since archived entries never change.
+
+    Args:
+        directory (str): Root directory of the archive. Created on demand.
+    """
+    SEGMENT_SUFFIX = '.json.gz'
+
+    def __init__(self, directory: str):
+        self.directory = directory
+
+    def _character_dir(self, username: str, character_name: str) -> str:
+        return os.path.join(self.directory, path_component(username), path_component(character_name))
+
+    def _segment_path(self, username: str, character_name: str, start: int) -> str:
+        return os.path.join(self._character_dir(username, character_name), f"{start:010d}{self.SEGMENT_SUFFIX}")
+
+    def append_segment(self, username: str, character_name: str, start: int, records: list) -> None:
+        """Durably writes one segment of records, the first being entry number `start`."""
+        path = self._segment_path(username, character_name, start)
+        if os.path.exists(path):
+            return
+        directory = os.path.dirname(path)
+        os.makedirs(directory, exist_ok=True)
+        payload = gzip.compress(json.dumps(records, separators=(',', ':')).encode('utf-8'))
+        fd, temp_path = tempfile.mkstemp(prefix='.segment.', suffix='.tmp', dir=directory)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        fsync_directory(directory)
+
+    def segment_starts(self, username: str, character_name: str) -> list[int]:
+        """Numbers of the first entry of each segment, in order."""
+        try:
+            filenames = os.listdir(self._character_dir(username, character_name))
+        except FileNotFoundError:
+            return []
+        return sorted(int(filename[:-len(self.SEGMENT_SUFFIX)]) for filename in filenames
+                      if filename.endswith(self.SEGMENT_SUFFIX) and not filename.startswith('.'))
+
+    def read_segment(self, username: str, character_name: str, start: int) -> list[dict]:
+        with open(self._segment_path(username, character_name, start), 'rb') as f:
+            return json.loads(gzip.decompress(f.read()).decode('utf-8'))
+
+    def read_entries(self, username: str, character_name: str, start: int, stop: int) -> list[dict]:
+        """
+        Archived entry records numbered start to stop-1, oldest first. Only the
+        segments overlapping that range are read.
+        """
+        starts = self.segment_starts(username, character_name)
+        records = []
+        for index, segment_start in enumerate(starts):
+            segment_stop = starts[index + 1] if index + 1 < len(starts) else None
+            if segment_start >= stop or (segment_stop is not None and segment_stop <= start):
+                continue
+            segment = self.read_segment(username, character_name, segment_start)
+            records.extend(segment[max(start - segment_start, 0):stop - segment_start])
+        return records
+
+
+def _journal_delta(old: dict, new: dict) -> dict | None:
+    """New journal records and how many old ones went to the archive, or None if the journal wasn't just appended to."""
+    old_records, new_records = old.get("journal") or [], new.get("journal") or []
+    dropped = new.get("journal_archived", 0) - old.get("journal_archived", 0)
+    kept = len(old_records) - dropped
+    if dropped < 0 or kept < 0 or len(new_records) < kept:
+        return None
+    return {"drop": dropped, "append": new_records[kept:]}
+
+
+def _stacks_delta(old_stacks: list, new_stacks: list) -> dict | None:
+    """Changed positions of a list of stacks, or None if most of the list changed anyway."""
+    changed = {str(index): stack for index, stack in enumerate(new_stacks)
+               if index >= len(old_stacks) or old_stacks[index] != stack}
+    if len(changed) * 2 > len(new_stacks):
+        return None
+    return {"length": len(new_stacks), "stacks": changed}
+
+
+def character_delta(old: dict, new: dict) -> dict:
+    """
+    What changed between two saves of the same character, small enough to log per action.
+
+    Returns:
+        dict: {"base_version", "version", "set": {field: value}, "unset": [fields],
+        "inventory": {"length", "stacks": {position: stack}} (optional),
+        "journal": {"drop", "append"} (optional)}. apply_character_delta(old, delta) == new.
+    """
+    delta = {"base_version": old.get("version", 0), "version": new.get("version", 0), "set": {},
+             "unset": [key for key in old if key not in new]}
+    for key, value in new.items():
+        if key in ("journal", "journal_archived"):
+            continue
+        if key == "inventory" and isinstance(old.get(key), list):
+            stacks = _stacks_delta(old[key], value)
+            if stacks is not None:
+                if stacks["stacks"] or stacks["length"] != len(old[key]):
+                    delta["inventory"] = stacks
+                continue
+        if key not in old or old[key] != value:
+            delta["set"][key] = value
+    journal = _journal_delta(old, new)
+    if journal is None:
+        delta["set"]["journal"] = new.get("journal", [])
+        delta["set"]["journal_archived"] = new.get("journal_archived", 0)
+    elif journal["drop"] or journal["append"]:
+        delta["journal"] = journal
+        delta["set"]["journal_archived"] = new.get("journal_archived", 0)
+    return delta
+
+
+def apply_character_delta(old: dict, delta: dict) -> dict:
+    """Returns a new character dict with delta (from character_delta) applied; old is left unchanged."""
+    new = {key: value for key, value in old.items() if key not in delta["unset"]}
+    new.update(delta["set"])
+    if "inventory" in delta:
+        inventory = list(old.get("inventory", [])[:delta["inventory"]["length"]])
+        inventory.extend([None] * (delta["inventory"]["length"] - len(inventory)))
+        for position, stack in delta["inventory"]["stacks"].items():
+            inventory[int(position)] = stack
+        new["inventory"] = inventory
+    if "journal" in delta:
+        new["journal"] = old.get("journal", [])[delta["journal"]["drop"]:] + delta["journal"]["append"]
+    new["version"] = delta["version"]
+    return new
+
+
+class StorageBackend:
+    """
+    Interface used by app.py to persist users, character slots and graveyards.
+
+    The app keeps working copies in its module-level dicts; a backend only has to
+    load everything at startup and write back the records that changed.
+    """
+
+    def load_users(self) -> dict:
+        raise NotImplementedError
+
+    def save_users(self, users: dict) -> None:
+        raise NotImplementedError
+
+    def save_user(self, username: str, users: dict) -> None:
+        """
+        Saves the record for username. users is the app's full in-memory mapping,
+        for backends that can only write the whole document.
+        """
+        raise NotImplementedError
+
+    def iter_user_characters(self):
+        """Yields (username, list of character dicts) pairs."""
+        raise NotImplementedError
+
+    def load_characters(self, username: str) -> list | None:
+        raise NotImplementedError
+
+    def save_characters(self, username: str, characters: list | None) -> None:
+        """Replaces a user's character slots. None removes them."""
+        raise NotImplementedError
+
+    def save_character_delta(self, username: str, slot_index: int, delta: dict, characters: list) -> None:
+        """
+        Saves one changed slot. delta is character_delta(previous save, characters[slot_index]);
+        characters is the user's full slot list after the change. Backends that can't
+        store a delta on its own simply save the full list.
+        """
+        self.save_characters(username, characters)
+
+    def save_all_characters(self, user_characters: dict) -> None:
+        raise NotImplementedError
+
+    def iter_graveyards(self):
+        """Yields (username, list of dead character dicts) pairs."""
+        raise NotImplementedError
+
+    def load_graveyard(self, username: str) -> list | None:
+        raise NotImplementedError
+
+    def save_graveyard(self, username: str, entries: list | None) -> None:
+        raise NotImplementedError
+
+    def save_all_graveyards(self, graveyard: dict) -> None:
+        raise NotImplementedError
+
+    def bury_character(self, username: str, characters: list, graveyard_entries: list) -> None:
+        """
+        Persists a character death: the user's remaining slots and their graveyard
+        are written together. Backends should make this atomic where they can.
+        """
+        raise NotImplementedError
+
+    def load_character_names(self) -> list | None:
+        """Returns the persisted character name index, or None if there isn't one."""
+        return None
+
+    def save_character_names(self, names) -> None:
+        """Persists a freshly rebuilt name index. Optional."""
+        pass
+
+    def add_character_name(self, name: str) -> None:
+        """Records one newly taken name in the persisted index. Optional."""
+        pass
+
+    def is_empty(self) -> bool:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class JsonStorage(StorageBackend):
+    """
+    File based backend: one users JSON file plus per-user shards for characters
+    and graveyards (see ShardedJsonStore).
+
+    With a wal_file, character and graveyard saves are appended to a WriteAheadLog
+    and the shard files are only rewritten every checkpoint_every records (and on
+    close). Anything still in the log is replayed into the shards on startup.
+
+    Args:
+        users_file (str): Path of the users JSON file.
+        characters_dir (str): Shard directory for character slots.
+        graveyard_dir (str): Shard directory for graveyards.
+        legacy_characters_file (str, optional): Old single-file characters store to migrate.
+        legacy_graveyard_file (str, optional): Old single-file graveyard store to migrate.
+        wal_file (str, optional): Write-ahead log path. None writes shards directly.
+        checkpoint_every (int, optional): Logged records between shard checkpoints.
+        fsync_batch_size (int, optional): Log records per fsync, see WriteAheadLog.
+        names_file (str, optional): Append-only file of taken character names (one per line).
+            None means the name index is rebuilt from the saves on every start.
+    """
+
+    CHARACTERS = 'characters'
+    GRAVEYARD = 'graveyard'
+
+    def __init__(self, users_file: str, characters_dir: str, graveyard_dir: str,
+                 legacy_characters_file: str = None, legacy_graveyard_file: str = None,
+                 wal_file: str = None, checkpoint_every: int = 100, fsync_batch_size: int = 1,
+                 names_file: str = None):
+        self.users_file = users_file
+        self.names_file = names_file
+        self.character_store = ShardedJsonStore(characters_dir, legacy_file=legacy_characters_file)
+        self.graveyard_store = ShardedJsonStore(graveyard_dir, legacy_file=legacy_graveyard_file)
+        self.wal = WriteAheadLog(wal_file, fsync_batch_size=fsync_batch_size) if wal_file else None
+        self.checkpoint_every = max(1, checkpoint_every)
+        self._pending = {} # (collection, key) -> latest value not yet written to its shard
+        self._records_since_checkpoint = 0
+        self._lock = threading.RLock()
+        self._recovered = False
+
+    def _store_for(self, collection: str) -> ShardedJsonStore:
+        return self.character_store if collection == self.CHARACTERS else self.graveyard_store
+
+    def _recover(self):
+        """Applies whatever the log holds from a previous run, then empties it."""
+        if self._recovered or self.wal is None:
+            return
+        with self._lock:
+            if self._recovered:
+                return
+            self.character_store.ensure_ready()
+            self.graveyard_store.ensure_ready()
+            replayed = 0
+            for record in self.wal.replay():
+                for collection, key, value in record.get("writes", []):
+                    self._pending[(collection, key)] = value
+                for username, slot_index, delta in record.get("deltas", []):
+                    self._replay_delta(username, slot_index, delta)
+                replayed += 1
+            if replayed:
+                print(f"INFO: Replaying {replayed} unsaved update(s) from '{self.wal.path}'.")
+            self._recovered = True
+            self.checkpoint()
+
+    def _write(self, writes: list) -> None:
+        """writes is a list of (collection, key, value); value None deletes the record."""
+        if self.wal is None:
+            for collection, key, value in writes:
+                store = self._store_for(collection)
+                if value is None:
+                    store.delete(key)
+                else:
+                    store.save(key, value)
+            return
+        self._recover()
+        with self._lock:
+            self.wal.append({"writes": [list(write) for write in writes]}) # One record, so it replays all-or-nothing
+            for collection, key, value in writes:
+                self._pending[(collection, key)] = value
+            self._records_since_checkpoint += 1
+            if self._records_since_checkpoint >= self.checkpoint_every:
+                self.checkpoint()
+
+    def _replay_delta(self, username: str, slot_index: int, delta: dict) -> None:
+        characters = self._pending.get((self.CHARACTERS, username))
+        if characters is None:
+            characters = self.character_store.load(username) or []
+        if not 0 <= slot_index < len(characters):
+            print(f"Warning: Logged save for '{username}' slot {slot_index} has no matching slot. Skipped.")
+            return
+        version = characters[slot_index].get("version", 0)
+        if version >= delta["version"]:
+            return # Already in the shard (a crash during a checkpoint)
+        if version != delta["base_version"]:
+            print(f"Warning: Logged save for '{username}' slot {slot_index} expects version {delta['base_version']}, found {version}. Skipped.")
+            return
+        characters = list(characters)
+        characters[slot_index] = apply_character_delta(characters[slot_index], delta)
+        self._pending[(self.CHARACTERS, username)] = characters
+
+    def checkpoint(self) -> None:
+        """Writes every pending record to its shard and empties the log."""
+        if self.wal is None:
+            return
+        with self._lock:
+            self.wal.sync()
+            for (collection, key), value in self._pending.items():
+                store = self._store_for(collection)
+                if value is None:
+                    store.delete(key)
+                else:
+                    store.save(key, value)
+            self._pending.clear()
+            self._records_since_checkpoint = 0
+            self.wal.truncate()
+
+    def load_users(self) -> dict:
+        try:
+            with open(self.users_file, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            print(f"INFO: {self.users_file} not found. Starting with an empty user list.")
+            print(f"INFO: Please use the registration page to create the first user.")
+            self.save_users({}) # Save the empty users list to create the file
+            return {}
+        except json.JSONDecodeError:
+            timestamp = datetime.datetime.now().strftime("%Y%m%d%H%M%S")
+            backup_filename = f"{self.users_file}.corrupted.{timestamp}"
+            try:
+                shutil.copy2(self.users_file, backup_filename) # Use copy2 to preserve metadata
+                print(f"Warning: Could not decode {self.users_file}. It has been backed up to {backup_filename}.")
+            except Exception as backup_e:
+                print(f"Warning: Could not decode {self.users_file}. Failed to create backup: {backup_e}")
+            print(f"INFO: {self.users_file} was corrupted. Starting with an empty user list after backing up the corrupted file.")
+            print(f"INFO: Please use the registration page to create users.")
+            self.save_users({})
+            return {}
+
+    def save_users(self, users: dict) -> None:
+        atomic_write_json(self.users_file, users)
+
+    def save_user(self, username: str, users: dict) -> None:
+        self.save_users(users) # The users file is a single document
+
+    def _iter_collection(self, collection: str):
+        store = self._store_for(collection)
+        store.ensure_ready()
+        self._recover()
+        self.checkpoint()
+        return store.iter_items()
+
+    def iter_user_characters(self):
+        return self._iter_collection(self.CHARACTERS)
+
+    def load_characters(self, username: str) -> list | None:
+        self._recover()
+        with self._lock:
+            if (self.CHARACTERS, username) in self._pending:
+                return self._pending[(self.CHARACTERS, username)]
+        return self.character_store.load(username)
+
+    def save_characters(self, username: str, characters: list | None) -> None:
+        self._write([(self.CHARACTERS, username, characters)])
+
+    def save_character_delta(self, username: str, slot_index: int, delta: dict, characters: list) -> None:
+        if self.wal is None:
+            self.save_characters(username, characters)
+            return
+        self._recover()
+        with self._lock:
+            self.wal.append({"deltas": [[username, slot_index, delta]]}) # Only the changes are logged
+            self._pending[(self.CHARACTERS, username)] = characters
+            self._records_since_checkpoint += 1
+            if self._records_since_checkpoint >= self.checkpoint_every:
+                self.checkpoint()
+
+    def save_all_characters(self, user_characters: dict) -> None:
+        self._recover()
+        self.checkpoint()
+        self.character_store.save_all(user_characters)
+
+    def iter_graveyards(self):
+        return self._iter_collection(self.GRAVEYARD)
+
+    def load_graveyard(self, username: str) -> list | None:
+        self._recover()
+        with self._lock:
+            if (self.GRAVEYARD, username) in self._pending:
+                return self._pending[(self.GRAVEYARD, username)]
+        return self.graveyard_store.load(username)
+
+    def save_graveyard(self, username: str, entries: list | None) -> None:
+        self._write([(self.GRAVEYARD, username, entries)])
+
+    def save_all_graveyards(self, graveyard: dict) -> None:
+        self._recover()
+        self.checkpoint()
+        self.graveyard_store.save_all(graveyard)
+
+    def bury_character(self, username: str, characters: list, graveyard_entries: list) -> None:
+        # With a log both writes land in one record. Without one, graveyard goes first:
+        # a crash in between leaves the character in both places (recoverable) instead of in neither.
+        self._write([(self.GRAVEYARD, username, graveyard_entries), (self.CHARACTERS, username, characters)])
+
+    def load_character_names(self) -> list | None:
+        if not self.names_file:
+            return None
+        try:
+            with open(self.names_file, 'r', encoding='utf-8') as f:
+                return [line.rstrip('\n') for line in f if line.strip()]
+        except FileNotFoundError:
+            return None
+
+    def save_character_names(self, names) -> None:
+        if not self.names_file:
+            return
+        directory = os.path.dirname(self.names_file) or '.'
+        fd, temp_path = tempfile.mkstemp(prefix='.names.', suffix='.tmp', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for name in names:
+                f.write(name + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.names_file)
+
+    def add_character_name(self, name: str) -> None:
+        if not self.names_file:
+            return
+        with open(self.names_file, 'a', encoding='utf-8') as f:
+            f.write(CharacterNameIndex.key(name) + '\n')
+
+    def is_empty(self) -> bool:
+        if os.path.exists(self.users_file):
+            return False
+        return next(self.character_store.keys(), None) is None
+
+    def close(self) -> None:
+        if self.wal is not None:
+            self.checkpoint()
+            self.wal.close()
+
+
+class SQLiteStorage(StorageBackend):
+    """
+    SQLite backend. Uses WAL mode so several worker processes can read while one
+    writes, and keeps users, character slots and graveyard entries in indexed
+    tables so single records are read and written without touching the rest.
+
+    Args:
+        db_path (str): Path to the database file (':memory:' works for tests).
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS users (
+            username TEXT PRIMARY KEY,
+            google_id TEXT,
+            email TEXT,
+            data TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_users_google_id ON users(google_id);
+        CREATE INDEX IF NOT EXISTS idx_users_email ON users(email);
+
+        CREATE TABLE IF NOT EXISTS character_slots (
+            username TEXT NOT NULL,
+            slot INTEGER NOT NULL,
+            name TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (username, slot)
+        );
+        CREATE INDEX IF NOT EXISTS idx_character_slots_name ON character_slots(name COLLATE NOCASE);
+
+        CREATE TABLE IF NOT EXISTS graveyard (
+            username TEXT NOT NULL,
+            position INTEGER NOT NULL,
+            name TEXT,
+            data TEXT NOT NULL,
+            PRIMARY KEY (username, position)
+        );
+        CREATE INDEX IF NOT EXISTS idx_graveyard_name ON graveyard(name COLLATE NOCASE);
+
+        CREATE TABLE IF NOT EXISTS known_users (
+            username TEXT PRIMARY KEY
+        );
+    """
+
+    def __init__(self, db_path: str):
+        import sqlite3
+        import threading
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        # One shared connection guarded by a lock; Flask may serve requests from several threads.
+        self._conn = sqlite3.connect(db_path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA busy_timeout=30000")
+        with self._lock, self._conn:
+            self._conn.executescript(self.SCHEMA)
+
+    # known_users remembers users whose character list exists but is empty, so a
+    # reload returns {'name': []} exactly like the JSON backend does.
+
+    def load_users(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT username, data FROM users").fetchall()
+        return {username: json.loads(data) for username, data in rows}
+
+    def _write_user(self, username: str, user_data):
+        google_id = user_data.get('google_id') if isinstance(user_data, dict) else None
+        email = user_data.get('email_google') if isinstance(user_data, dict) else None
+        self._conn.execute(
+            "INSERT OR REPLACE INTO users (username, google_id, email, data) VALUES (?, ?, ?, ?)",
+            (username, google_id, email, json.dumps(user_data)))
+
+    def save_users(self, users: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM users")
+            for username, user_data in users.items():
+                self._write_user(username, user_data)
+
+    def save_user(self, username: str, users: dict) -> None:
+        with self._lock, self._conn:
+            if username in users:
+                self._write_user(username, users[username])
+            else:
+                self._conn.execute("DELETE FROM users WHERE username = ?", (username,))
+
+    def _grouped(self, table: str, order_column: str):
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT username, data FROM {table} ORDER BY username, {order_column}").fetchall()
+        grouped = {}
+        for username, data in rows:
+            grouped.setdefault(username, []).append(json.loads(data))
+        return grouped
+
+    def iter_user_characters(self):
+        grouped = self._grouped("character_slots", "slot")
+        with self._lock:
+            known = [row[0] for row in self._conn.execute("SELECT username FROM known_users")]
+        for username in known:
+            grouped.setdefault(username, [])
+        return iter(grouped.items())
+
+    def load_characters(self, username: str) -> list | None:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM character_slots WHERE username = ? ORDER BY slot", (username,)).fetchall()
+            known = self._conn.execute(
+                "SELECT 1 FROM known_users WHERE username = ?", (username,)).fetchone()
+        if not rows and not known:
+            return None
+        return [json.loads(data) for (data,) in rows]
+
+    def _write_characters(self, username: str, characters: list | None):
+        self._conn.execute("DELETE FROM character_slots WHERE username = ?", (username,))
+        if characters is None:
+            self._conn.execute("DELETE FROM known_users WHERE username = ?", (username,))
+            return
+        self._conn.execute("INSERT OR IGNORE INTO known_users (username) VALUES (?)", (username,))
+        self._conn.executemany(
+            "INSERT INTO character_slots (username, slot, name, data) VALUES (?, ?, ?, ?)",
+            [(username, slot, char_data.get('name') if isinstance(char_data, dict) else None, json.dumps(char_data))
+             for slot, char_data in enumerate(characters)])
+
+    def save_characters(self, username: str, characters: list | None) -> None:
+        with self._lock, self._conn:
+            self._write_characters(username, characters)
+
+    def save_character_delta(self, username: str, slot_index: int, delta: dict, characters: list) -> None:
+        char_data = characters[slot_index]
+        with self._lock, self._conn: # Only the changed slot's row is rewritten
+            self._conn.execute("INSERT OR IGNORE INTO known_users (username) VALUES (?)", (username,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO character_slots (username, slot, name, data) VALUES (?, ?, ?, ?)",
+                (username, slot_index, char_data.get('name'), json.dumps(char_data)))
+
+    def save_all_characters(self, user_characters: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM character_slots")
+            self._conn.execute("DELETE FROM known_users")
+            for username, characters in user_characters.items():
+                self._write_characters(username, characters)
+
+    def iter_graveyards(self):
+        return iter(self._grouped("graveyard", "position").items())
+
+    def _write_graveyard(self, username: str, entries: list | None):
+        self._conn.execute("DELETE FROM graveyard WHERE username = ?", (username,))
+        if not entries:
+            return
+        self._conn.executemany(
+            "INSERT INTO graveyard (username, position, name, data) VALUES (?, ?, ?, ?)",
+            [(username, position, entry.get('name') if isinstance(entry, dict) else None, json.dumps(entry))
+             for position, entry in enumerate(entries)])
+
+    def load_graveyard(self, username: str) -> list | None:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM graveyard WHERE username = ? ORDER BY position", (username,)).fetchall()
+        return [json.loads(data) for (data,) in rows] if rows else None
+
+    def save_graveyard(self, username: str, entries: list | None) -> None:
+        with self._lock, self._conn:
+            self._write_graveyard(username, entries)
+
+    def save_all_graveyards(self, graveyard: dict) -> None:
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM graveyard")
+            for username, entries in graveyard.items():
+                self._write_graveyard(username, entries)
+
+    def bury_character(self, username: str, characters: list, graveyard_entries: list) -> None:
+        with self._lock, self._conn: # Single transaction: the move either fully happens or not at all
+            self._write_graveyard(username, graveyard_entries)
+            self._write_characters(username, characters)
+
+    def load_character_names(self) -> list | None:
+        # Names live in indexed columns of the slot and graveyard tables already.
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name FROM character_slots WHERE name IS NOT NULL "
+                "UNION SELECT name FROM graveyard WHERE name IS NOT NULL").fetchall()
+        return [name for (name,) in rows]
+
+    def is_empty(self) -> bool:
+        with self._lock:
+            for table in ("users", "character_slots", "graveyard", "known_users"):
+                if self._conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+                    return False
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def copy_storage(source: StorageBackend, destination: StorageBackend) -> None:
+    """Copies every user, character slot and graveyard entry from one backend to another."""
+    destination.save_users(source.load_users())
+    destination.save_all_characters(dict(source.iter_user_characters()))
+    destination.save_all_graveyards(dict(source.iter_graveyards()))
+
+
+class WriteBehindStorage(StorageBackend):
+    """
+    Wraps another backend so request handlers never wait on disk for character saves.
+
+    save_characters / save_character_delta / save_graveyard / bury_character only record
+    the latest value per user (plus the queued deltas); a background thread hands them to
+    the wrapped backend every flush_interval seconds, or straight away once max_pending
+    users are waiting. Several full saves for the same user in one window collapse into a
+    single write; deltas are passed on in order. close() stops the thread and
+    flushes synchronously. User records and full saves are passed straight through.
+
+    Args:
+        backend (StorageBackend): Backend that does the actual writing.
+        flush_interval (float, optional): Longest time (seconds) a save may stay unflushed.
+        max_pending (int, optional): Number of dirty users that triggers an early flush.
+    """
+
+    def __init__(self, backend: StorageBackend, flush_interval: float = 0.2, max_pending: int = 64):
+        self.backend = backend
+        self.flush_interval = flush_interval
+        self.max_pending = max(1, max_pending)
+        self._pending = {} # username -> {'characters': list|None, 'graveyard': list|None}
+        self._condition = threading.Condition()
+        self._flush_lock = threading.Lock() # Keeps flushes in order
+        self._stopping = False
+        self.flush_count = 0
+        self._thread = threading.Thread(target=self._run, name="shopkeeper-save-flusher", daemon=True)
+        self._thread.start()
+
+    def _mark(self, username: str, **values) -> None:
+        with self._condition:
+            self._pending.setdefault(username, {}).update(values)
+            if len(self._pending) >= self.max_pending:
+                self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if not self._stopping:
+                    self._condition.wait(self.flush_interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def flush(self) -> None:
+        """Writes every pending save to the wrapped backend."""
+        with self._flush_lock:
+            with self._condition:
+                batch, self._pending = self._pending, {}
+            if not batch:
+                return
+            for username, values in batch.items():
+                try:
+                    if 'characters' in values and 'graveyard' in values:
+                        self.backend.bury_character(username, values['characters'], values['graveyard'])
+                    elif 'deltas' in values:
+                        for slot_index, delta in values['deltas']:
+                            self.backend.save_character_delta(username, slot_index, delta, values['characters'])
+                    elif 'characters' in values:
+                        self.backend.save_characters(username, values['characters'])
+                    else:
+                        self.backend.save_graveyard(username, values['graveyard'])
+                except Exception as e:
+                    print(f"Warning: Could not save data for user '{username}': {e}. Will retry.")
+                    with self._condition:
+                        newer = self._pending.get(username, {})
+                        self._pending[username] = {**values, **newer}
+                        self._pending[username].pop('deltas', None) # Retry with the full slot list
+            self.flush_count += 1
+
+    def pending_count(self) -> int:
+        with self._condition:
+            return len(self._pending)
+
+    def load_users(self) -> dict:
+        return self.backend.load_users()
+
+    def save_users(self, users: dict) -> None:
+        self.backend.save_users(users)
+
+    def save_user(self, username: str, users: dict) -> None:
+        self.backend.save_user(username, users)
+
+    def iter_user_characters(self):
+        self.flush()
+        return self.backend.iter_user_characters()
+
+    def load_characters(self, username: str) -> list | None:
+        with self._condition:
+            values = self._pending.get(username)
+            if values and 'characters' in values:
+                return values['characters']
+        return self.backend.load_characters(username)
+
+    def save_characters(self, username: str, characters: list | None) -> None:
+        # Copy the slot list so later in-place edits by the caller don't leak into the queued save.
+        self._mark(username, characters=list(characters) if characters is not None else None)
+        with self._condition:
+            self._pending.get(username, {}).pop('deltas', None) # The full list supersedes queued deltas
+
+    def save_character_delta(self, username: str, slot_index: int, delta: dict, characters: list) -> None:
+        with self._condition:
+            values = self._pending.setdefault(username, {})
+            if 'characters' not in values or 'deltas' in values: # Deltas only stack on deltas, never on a queued full save
+                values.setdefault('deltas', []).append((slot_index, delta))
+            values['characters'] = list(characters)
+            if len(self._pending) >= self.max_pending:
+                self._condition.notify()
+
+    def save_all_characters(self, user_characters: dict) -> None:
+        self.flush()
+        self.backend.save_all_characters(user_characters)
+
+    def iter_graveyards(self):
+        self.flush()
+        return self.backend.iter_graveyards()
+
+    def load_graveyard(self, username: str) -> list | None:
+        with self._condition:
+            values = self._pending.get(username)
+            if values and 'graveyard' in values:
+                return values['graveyard']
+        return self.backend.load_graveyard(username)
+
+    def save_graveyard(self, username: str, entries: list | None) -> None:
+        self._mark(username, graveyard=list(entries) if entries is not None else None)
+
+    def save_all_graveyards(self, graveyard: dict) -> None:
+        self.flush()
+        self.backend.save_all_graveyards(graveyard)
+
+    def bury_character(self, username: str, characters: list, graveyard_entries: list) -> None:
+        self._mark(username, characters=list(characters), graveyard=list(graveyard_entries))
+
+    def load_character_names(self) -> list | None:
+        return self.backend.load_character_names()
+
+    def save_character_names(self, names) -> None:
+        self.backend.save_character_names(names)
+
+    def add_character_name(self, name: str) -> None:
+        self.backend.add_character_name(name)
+
+    def is_empty(self) -> bool:
+        return self.pending_count() == 0 and self.backend.is_empty()
+
+    def close(self) -> None:
+        with self._condition:
+            self._stopping = True
+            self._condition.notify()
+        if self._thread.is_alive():
+            self._thread.join()
+        self.flush()
+        self.backend.close()
+
+
+class StorageCoordinator:
+    """
+    Lets several worker processes (e.g. gunicorn --workers N) share one set of saves.
+
+    Every record key (a username, or "users" / "names" for the shared documents) gets
+    two small files in `directory`:
+
+        <key>.lock    flock()ed while a worker reads-then-writes the record
+        <key>.stamp   a counter bumped after every write to the record
+
+    A worker remembers the stamp it last loaded each record at. If the stamp on disk
+    differs, another worker has written the record since and the copy in memory has
+    to be reloaded (see refresh()). Locks are re-entrant within a thread.
+
+    Args:
+        directory (str): Directory of the lock and stamp files, shared by all workers.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._seen = {} # key -> stamp this process last loaded the record at
+        self._held = threading.local() # key -> [fd, depth] for the locks the current thread holds
+        self._thread_locks = {}
+        self._guard = threading.Lock()
+
+    def _path(self, key: str, suffix: str) -> str:
+        return os.path.join(self.directory, path_component(key) + suffix)
+
+    def _held_locks(self) -> dict:
+        if not hasattr(self._held, 'locks'):
+            self._held.locks = {}
+        return self._held.locks
+
+    def acquire(self, key: str) -> None:
+        """Blocks until this thread holds key's lock. Every acquire() needs a release()."""
+        held = self._held_locks()
+        if key in held:
+            held[key][1] += 1
+            return
+        with self._guard:
+            thread_lock = self._thread_locks.setdefault(key, threading.Lock())
+        thread_lock.acquire()
+        try:
+            fd = os.open(self._path(key, '.lock'), os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+            except BaseException:
+                os.close(fd)
+                raise
+        except BaseException:
+            thread_lock.release()
+            raise
+        held[key] = [fd, 1]
+
+    def release(self, key: str) -> None:
+        held = self._held_locks()
+        entry = held[key]
+        entry[1] -= 1
+        if entry[1]:
+            return
+        del held[key]
+        try:
+            if fcntl is not None:
+                fcntl.flock(entry[0], fcntl.LOCK_UN)
+        finally:
+            os.close(entry[0])
+            self._thread_locks[key].release()
+
+    @contextlib.contextmanager
+    def lock(self, key: str):
+        self.acquire(key)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def stamp(self, key: str) -> int:
+        """The record's current change stamp (0 if it was never written through a coordinator)."""
+        try:
+            with open(self._path(key, '.stamp'), 'r', encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except (FileNotFoundError, ValueError):
+            return 0
+
+    def bump(self, key: str) -> int:
+        """Records a write to key (call it while holding key's lock) and returns the new stamp."""
+        with self.lock(key):
+            stamp = self.stamp(key) + 1
+            atomic_write_json(self._path(key, '.stamp'), stamp, indent=None)
+            self._seen[key] = stamp # Our own write doesn't make our copy stale
+            return stamp
+
+    def mark_all_seen(self) -> None:
+        """Remembers every current stamp. Call it right *before* loading everything at startup."""
+        for filename in os.listdir(self.directory):
+            if filename.endswith('.stamp'):
+                key = unquote(filename[:-len('.stamp')])
+                self._seen[key] = self.stamp(key)
+
+    def refresh(self, key: str) -> bool:
+        """
+        True if key was written by another process since this one last saw it; the
+        caller must then reload the record. The new stamp counts as seen from now on.
+        """
+        stamp = self.stamp(key)
+        if stamp == self._seen.get(key, 0):
+            return False
+        self._seen[key] = stamp
+        return True
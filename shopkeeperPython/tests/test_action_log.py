@@ -0,0 +1,98 @@
+import os
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from shopkeeperPython.action_log import ActionLogRecorder, ActionLogStore, CharacterActionLog
+from shopkeeperPython.game.character import Character
+from shopkeeperPython.game.game_manager import GameManager
+
+
+class TestActionLog(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.store = ActionLogStore(os.path.join(self.temp_dir, 'action_log.d'), snapshot_every=4, fsync=False)
+        player = Character(name="Logged Tester")
+        player.stats = {stat: 12 for stat in Character.STAT_NAMES}
+        player.roll_stats()
+        self.game_manager = GameManager(player_character=player, output_stream=StringIO())
+        self.game_manager.setup_for_character(player)
+        self.game_manager.action_log = ActionLogRecorder()
+        self.save = self.game_manager.character_snapshot()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _play(self, hours):
+        """Plays and commits one action per hour, like one web request each; returns the snapshot flags."""
+        snapshots = []
+        with redirect_stdout(StringIO()):
+            for hour in range(hours):
+                self.game_manager.perform_hourly_action(["explore_town", "tend_shop", "wait"][hour % 3])
+                new_save = self.game_manager.character_snapshot()
+                snapshots.append(self.store.commit("alice", self.save, new_save, self.game_manager.action_log.take()))
+                self.save = new_save
+        return snapshots
+
+    def test_snapshots_every_n_entries(self):
+        self.assertEqual(self._play(9), [False, False, False, True, False, False, False, True, False])
+        log = self.store.open("alice", "Logged Tester")
+        self.assertEqual((log.seq, log.snapshot_seqs()), (9, [0, 4, 8]))
+        self.assertEqual(self.save["action_seq"], 9)
+        recording = log.read()
+        self.assertEqual(len(recording["entries"]), 1) # Only the entries after the latest snapshot
+        self.assertEqual(recording["entries"][0]["rng_counter"], self.save["rng_state"]["counter"] - 1)
+
+    def test_restore_replays_from_the_latest_snapshot(self):
+        self._play(6)
+        reopened = CharacterActionLog(self.store.open("alice", "Logged Tester").directory)
+        restored = reopened.restore()
+        for key in ("gold", "inventory", "game_time_snapshot", "shop_snapshot", "rng_state", "action_seq"):
+            self.assertEqual(restored[key], self.save[key], key)
+
+    def test_rollback_to_an_earlier_entry(self):
+        saves = [self.save]
+        for _ in range(5):
+            self._play(1)
+            saves.append(self.save)
+        log = self.store.open("alice", "Logged Tester")
+        restored = log.restore(seq=2)
+        self.assertEqual(restored["action_seq"], 2)
+        self.assertEqual(restored["game_time_snapshot"], saves[2]["game_time_snapshot"])
+        self.assertEqual(restored["rng_state"], saves[2]["rng_state"])
+
+    def test_torn_last_line_is_dropped(self):
+        self._play(2)
+        log = self.store.open("alice", "Logged Tester")
+        with open(os.path.join(log.directory, 'events-0000000000.jsonl'), 'a', encoding='utf-8') as f:
+            f.write('{"kind": "act')
+        reopened = CharacterActionLog(log.directory, fsync=False)
+        self.assertEqual(reopened.seq, 2)
+        reopened.append([{"kind": "action", "name": "wait", "details": {}, "rng_counter": 2, "result": None}])
+        self.assertEqual(len(CharacterActionLog(log.directory).read()["entries"]), 3)
+
+    def test_out_of_step_save_starts_a_new_snapshot(self):
+        self._play(2)
+        self.save = dict(self.save, action_seq=0, gold=1234) # E.g. restored from a backup
+        with redirect_stdout(StringIO()):
+            self._play(1)
+        log = self.store.open("alice", "Logged Tester")
+        self.assertEqual(log.snapshot_seqs(), [0, 2])
+        self.assertEqual(log.read(2)["snapshot"]["gold"], 1234)
+
+    def test_shared_store_sees_appends_from_other_processes(self):
+        self.store.shared = True
+        self._play(1)
+        log = self.store.open("alice", "Logged Tester")
+        other_process = ActionLogStore(self.store.directory, snapshot_every=4, fsync=False)
+        other_process.open("alice", "Logged Tester").append([{"kind": "action", "name": "wait", "details": {}, "rng_counter": 1, "result": None}])
+        self.save["action_seq"] = 2 # The other process's save
+        self._play(1)
+        self.assertEqual((log.seq, log.snapshot_seqs()), (3, [0]))
+
+
+if __name__ == '__main__':
+    unittest.main()
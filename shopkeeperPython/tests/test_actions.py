@@ -0,0 +1,101 @@
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from shopkeeperPython.game.actions import ACTIONS, UNKNOWN_ACTION, ActionRegistry
+from shopkeeperPython.game.character import Character
+from shopkeeperPython.game.game_manager import GameManager
+
+
+class TestActionRegistry(unittest.TestCase):
+
+    def test_register_records_method_and_options(self):
+        registry = ActionRegistry()
+
+        class Dummy:
+            @registry.register("fish_river", hours=2, xp=4, triggers_customers=False)
+            def _action_fish_river(self, action_details):
+                return action_details["catch"]
+
+        handler = registry.get("fish_river")
+        self.assertIn("fish_river", registry)
+        self.assertEqual(handler.method_name, "_action_fish_river")
+        self.assertEqual((handler.hours, handler.xp), (2, 4))
+        self.assertTrue(handler.allows_generic_events)
+        self.assertFalse(handler.triggers_customers)
+        self.assertEqual(handler.run(Dummy(), {"catch": 3}), 3)
+
+    def test_unknown_action(self):
+        self.assertIs(ACTIONS.get("no_such_action"), UNKNOWN_ACTION)
+
+    def test_every_handler_is_a_game_manager_method(self):
+        self.assertGreater(len(ACTIONS), 25)
+        for handler in ACTIONS:
+            self.assertTrue(callable(getattr(GameManager, handler.method_name, None)), handler.name)
+
+    def test_declared_rules(self):
+        self.assertEqual(ACTIONS.get("travel_to_town").hours, 3)
+        self.assertEqual(ACTIONS.get("rest_long").hours, 8)
+        for name in ("PROCESS_PLAYER_HAGGLE_CHOICE_SELL", "PROCESS_PLAYER_HAGGLE_CHOICE_BUY",
+                     "ALLOCATE_SKILL_POINT", "PROCESS_ASI_FEAT_CHOICE"):
+            self.assertEqual(ACTIONS.get(name).hours, 0, name)
+            self.assertFalse(ACTIONS.get(name).triggers_customers, name)
+        for name in ("set_shop_specialization", "upgrade_shop", "craft"):
+            self.assertFalse(ACTIONS.get(name).allows_generic_events, name)
+        self.assertTrue(ACTIONS.get("wait").triggers_customers)
+
+
+class TestActionDispatch(unittest.TestCase):
+
+    def setUp(self):
+        self.player = Character(name="Dispatch Tester")
+        self.output = StringIO()
+        self.gm = GameManager(player_character=self.player, output_stream=self.output)
+        self.gm.setup_for_character(self.player)
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_declared_xp_and_hours_applied(self, mock_random):
+        hour_before = self.gm.time.current_hour
+        with patch.object(self.player, 'award_xp') as mock_award_xp:
+            self.gm.perform_hourly_action("wait")
+        mock_award_xp.assert_called_once_with(1)
+        self.assertEqual(self.gm.time.current_hour, (hour_before + 1) % 24)
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_failed_travel_costs_one_hour_and_no_xp(self, mock_random):
+        hour_before = self.gm.time.current_hour
+        with patch.object(self.player, 'award_xp') as mock_award_xp:
+            self.gm.perform_hourly_action("travel_to_town", {"town_name": "Atlantis"})
+        mock_award_xp.assert_not_called()
+        self.assertEqual(self.gm.time.current_hour, (hour_before + 1) % 24)
+
+    def test_free_action_does_not_advance_time(self):
+        time_before = self.gm.time.get_time_string()
+        self.gm.perform_hourly_action("ALLOCATE_SKILL_POINT", {"skill_name": "Persuasion"})
+        self.assertEqual(self.gm.time.get_time_string(), time_before)
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_unknown_action_is_reported(self, mock_random):
+        result = self.gm.perform_hourly_action("juggle")
+        self.assertEqual(result["type"], "action_complete")
+        self.assertIn("Action 'juggle' not recognized", self.output.getvalue())
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_new_action_plugs_in(self, mock_random):
+        def _action_sweep_floor(gm, action_details):
+            gm._print("  The floor is spotless.")
+            return action_details.get("bonus_xp", 0)
+
+        with patch.dict(ACTIONS._handlers), patch.object(GameManager, "_action_sweep_floor", _action_sweep_floor, create=True):
+            ACTIONS.register("sweep_floor", hours=2)(_action_sweep_floor)
+            hour_before = self.gm.time.current_hour
+            with patch.object(self.player, 'award_xp') as mock_award_xp:
+                self.gm.perform_hourly_action("sweep_floor", {"bonus_xp": 6})
+        mock_award_xp.assert_called_once_with(6)
+        self.assertIn("The floor is spotless.", self.output.getvalue())
+        self.assertEqual(self.gm.time.current_hour, (hour_before + 2) % 24)
+        self.assertNotIn("sweep_floor", ACTIONS)
+
+
+if __name__ == '__main__':
+    unittest.main()
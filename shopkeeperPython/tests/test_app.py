@@ -5,9 +5,11 @@ from werkzeug.security import generate_password_hash # Added import
 import json # Added for json.dumps
 from unittest.mock import patch
 
-from shopkeeperPython.app import app, users, user_characters, graveyard, is_character_name_taken
+from shopkeeperPython.app import app, create_app, users, user_characters, graveyard, is_character_name_taken, rebuild_character_name_index
 from shopkeeperPython.game.character import Character
 
+create_app() # Opens storage and loads the saves
+
 # Helper to initialize a default character dict for tests
 def create_default_char_dict(name, level=1, is_dead=False):
     return {
@@ -33,6 +35,23 @@ def create_default_char_dict(name, level=1, is_dead=False):
         "current_town_name": "Starting Village"
     }
 
+# Runs one app worker in its own process for the multi-worker tests: it plays as testuser
+# with slot 0 selected and answers each line on stdin with "OUTCOME <outcome of a wait action>".
+WORKER_SCRIPT = """
+import sys
+from unittest.mock import patch
+patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99).start() # No random events
+from shopkeeperPython.app import app, create_app
+create_app()
+client = app.test_client()
+with client.session_transaction() as sess:
+    sess['username'] = 'testuser'
+    sess['selected_character_slot'] = 0
+print('READY', flush=True)
+for line in sys.stdin:
+    print('OUTCOME', client.post('/api/action', data={'action_name': 'wait'}).get_json()['outcome'], flush=True)
+"""
+
 class TestApp(unittest.TestCase):
     def setUp(self):
         """Set up test client and backup original data."""
@@ -62,6 +81,7 @@ class TestApp(unittest.TestCase):
         }
         user_characters['testuser'] = []
         graveyard['testuser'] = []
+        rebuild_character_name_index() # The name index only tracks changes made through the app
 
 
     def tearDown(self):
@@ -72,6 +92,7 @@ class TestApp(unittest.TestCase):
         user_characters.update(self.original_user_characters)
         graveyard.clear()
         graveyard.update(self.original_graveyard)
+        rebuild_character_name_index()
         # Session is typically handled by the test client context,
         # but explicit clearing can be done if issues arise.
         # with self.client.session_transaction() as sess:
@@ -101,6 +122,7 @@ class TestApp(unittest.TestCase):
         """Test character name uniqueness via the /create_character route."""
         # Setup: A character "TakenName" already exists for 'testuser'
         user_characters['testuser'] = [create_default_char_dict(name="TakenName")]
+        rebuild_character_name_index()
 
         with self.client.session_transaction() as sess:
             sess['username'] = 'testuser'
@@ -131,7 +153,28 @@ class TestApp(unittest.TestCase):
         created_names = sorted([c['name'] for c in user_characters['testuser']])
         self.assertIn('TakenName', created_names)
         self.assertIn('UniqueNewName', created_names)
+        new_char = next(c for c in user_characters['testuser'] if c['name'] == 'UniqueNewName')
+        self.assertIn('rng_state', new_char) # Seeded at creation, so its action log can replay it
+
+
+    def test_login_and_logout_issue_new_session_ids(self):
+        """A session id held before login (e.g. planted by an attacker) no longer works after it."""
+        cookie_name = app.config['SESSION_COOKIE_NAME']
+        with self.client.session_transaction() as sess:
+            sess['character_creation_name'] = 'Planted'
+        planted_sid = self.client.get_cookie(cookie_name).value
+
+        self.client.post('/login', data={'username': 'testuser', 'password': 'password123'})
+        login_sid = self.client.get_cookie(cookie_name).value
+        self.assertNotEqual(login_sid, planted_sid)
+        self.assertIsNone(app.session_interface.store.load(planted_sid))
+        with self.client.session_transaction() as sess:
+            self.assertEqual(sess['username'], 'testuser')
 
+        self.client.get('/logout')
+        logout_cookie = self.client.get_cookie(cookie_name)
+        self.assertNotEqual(logout_cookie.value if logout_cookie else None, login_sid)
+        self.assertIsNone(app.session_interface.store.load(login_sid))
 
     @patch('shopkeeperPython.game.character.Character.reroll_single_stat')
     def test_character_reroll_flow_and_creation(self, mock_reroll_single_stat):
@@ -212,6 +255,7 @@ class TestApp(unittest.TestCase):
     def test_char_creation_name_taken_flash(self):
         """Test flash message when character name is already taken."""
         user_characters['testuser'] = [create_default_char_dict(name="TakenName")]
+        rebuild_character_name_index()
         self._login_and_go_to_char_creation() # To set up session stats
 
         with self.client.session_transaction() as sess: # Ensure creation stats are in session
@@ -346,8 +390,305 @@ class TestApp(unittest.TestCase):
         response_html = response.data.decode('utf-8')
         self.assertIn(f"  {char_name} waits.", response_html)
 
-    @patch('shopkeeperPython.game.game_manager.random.random')
-    @patch('shopkeeperPython.game.game_manager.random.choice')
+    def test_game_session_reused_after_action(self):
+        """The page load after an action reuses the session hydrated for the action."""
+        from shopkeeperPython.app import game_session_cache
+        self._setup_user_and_character_for_actions()
+        hits_before = game_session_cache.hits
+
+        self.client.post('/action', data={'action_name': 'wait'}, follow_redirects=True)
+
+        self.assertEqual(game_session_cache.hits, hits_before + 1) # The redirected GET was a cache hit
+        response = self.client.post('/action', data={'action_name': 'wait'}, follow_redirects=True)
+        self.assertIn("waits.", response.data.decode('utf-8'))
+        self.assertEqual(game_session_cache.hits, hits_before + 3)
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_cached_session_catches_up_after_a_long_absence(self, mock_game_random_random):
+        """A session cached before the player left is rebuilt on return, so the shop catches up on the time away."""
+        import time
+        from shopkeeperPython.game.offline_progress import catch_up_shop
+        self._setup_user_and_character_for_actions()
+        self.assertEqual(self.client.post('/api/action', data={'action_name': 'wait'}).get_json()['outcome'], 'completed')
+
+        with patch('shopkeeperPython.game_sessions.time') as mock_cache_time, \
+             patch('shopkeeperPython.game.game_manager.time') as mock_game_time, \
+             patch('shopkeeperPython.game.game_manager.catch_up_shop', wraps=catch_up_shop) as mock_catch_up:
+            mock_cache_time.monotonic.return_value = time.monotonic() + 5 * 3600
+            mock_game_time.time.return_value = time.time() + 5 * 3600
+            self.assertEqual(self.client.get('/').status_code, 200)
+        self.assertEqual(mock_catch_up.call_args.args[1], 5)
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99) # No events or customers
+    def test_api_action_returns_delta(self, mock_game_random_random):
+        """/api/action answers with JSON containing only what changed, not the page."""
+        char_name = self._setup_user_and_character_for_actions()
+
+        response = self.client.post('/api/action', data={'action_name': 'wait'})
+        self.assertEqual(response.status_code, 200)
+        result = response.get_json()
+        self.assertTrue(result['ok'])
+        self.assertFalse(result['reload'])
+        self.assertIn(f"  {char_name} waits.", result['log'])
+        self.assertIsInstance(result['player_messages'], list)
+        self.assertTrue(all(set(message) == {'category', 'text'} for message in result['player_messages']))
+        self.assertIn('time', result['changes']) # An hour passed
+        self.assertNotIn('gold', result['changes']) # Unchanged fields are left out
+        self.assertLess(len(response.data), 4000)
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_fast_forward_action_saves_once(self, mock_game_random_random):
+        """A fast_forward action runs all its hours in one request and saves the character once."""
+        self._setup_user_and_character_for_actions()
+        with patch('shopkeeperPython.app.save_character_slot') as mock_save:
+            result = self.client.post('/api/action', data={
+                'action_name': 'fast_forward',
+                'action_details': json.dumps({'hours': 8, 'policy': 'wait'}),
+            }).get_json()
+        self.assertEqual(result['outcome'], 'completed')
+        self.assertEqual(result['changes']['time'], "Day 1, 15:00")
+        mock_save.assert_called_once()
+        self.assertEqual(mock_save.call_args.args[:2], ('testuser', 0)) # Saved as a delta of slot 0
+        self.assertEqual(user_characters['testuser'][0]['game_time_snapshot']['current_hour'], 15)
+        self.assertIn('shop_snapshot', user_characters['testuser'][0]) # Shop and save time kept for offline catch-up
+        self.assertIn('last_saved_at', user_characters['testuser'][0])
+        self.assertEqual(user_characters['testuser'][0]['rng_state']['counter'], 8) # One substream per hour played
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random')
+    @patch('shopkeeperPython.game.rng.GameRandom.choice')
+    def test_api_action_inventory_and_gold_delta(self, mock_game_random_choice, mock_game_random_random):
+        """Found items and gold show up as per-stack and scalar changes."""
+        self._setup_user_and_character_for_actions()
+        mock_game_random_random.return_value = 0.1
+        mock_game_random_choice.return_value = {
+            "type": "item", "name": "Shiny Pebble", "description": "A smooth, oddly shiny pebble.",
+            "base_value": 1, "item_type": "trinket", "quality": "Common", "quantity": 1
+        }
+
+        result = self.client.post('/api/action', json={'action_name': 'explore_town', 'action_details': {}}).get_json()
+
+        inventory_delta = result['changes']['player_inventory']
+        self.assertIn("Shiny Pebble|Common", inventory_delta['changed'])
+        self.assertEqual(inventory_delta['removed'], [])
+        self.assertEqual(user_characters['testuser'][0]['inventory'][-1]['name'], "Shiny Pebble") # Saved like /action
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_journal_is_archived_and_paged(self, mock_game_random_random):
+        """Old journal entries move to the archive on save and are read back through /api/journal."""
+        import shutil
+        import tempfile
+        from shopkeeperPython.storage import JournalArchive
+        char_name = self._setup_user_and_character_for_actions()
+        archive_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, archive_dir, ignore_errors=True)
+        user_characters['testuser'][0]['journal'] = [
+            {"timestamp": f"2024-01-01T08:0{index}:00", "action_type": "Note", "summary": f"Entry {index}", "details": None, "outcome": None}
+            for index in range(8)]
+        with patch('shopkeeperPython.app.journal_archive', JournalArchive(archive_dir)), \
+             patch('shopkeeperPython.app.JOURNAL_INLINE_ENTRIES', 2), \
+             patch('shopkeeperPython.app.JOURNAL_SEGMENT_ENTRIES', 3):
+            self.client.post('/api/action', data={'action_name': 'wait'})
+            saved = user_characters['testuser'][0]
+            self.assertEqual((len(saved['journal']), saved['journal_archived']), (2, 6)) # Two whole segments moved out
+            total = 8
+
+            entries, cursor = [], None
+            while True:
+                page = self.client.get('/api/journal', query_string={'limit': 4, **({'cursor': cursor} if cursor else {})}).get_json()
+                self.assertTrue(page['ok'])
+                self.assertEqual(page['total'], total)
+                self.assertLessEqual(len(page['entries']), 4)
+                entries.extend(page['entries'])
+                cursor = page['next_cursor']
+                if cursor is None:
+                    break
+        self.assertEqual(len(entries), total)
+        self.assertEqual([entry['summary'] for entry in entries], [f"Entry {index}" for index in reversed(range(8))])
+        self.assertIn(char_name, self.client.get('/').data.decode('utf-8'))
+
+    def test_api_journal_requires_login(self):
+        self.assertEqual(self.client.get('/api/journal').status_code, 401)
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_save_conflict_keeps_the_other_save(self, mock_game_random_random):
+        """A save from another tab while an action runs wins; the action's save is refused."""
+        from shopkeeperPython.game.game_manager import GameManager
+        self._setup_user_and_character_for_actions()
+        original_perform = GameManager.perform_hourly_action
+
+        def other_tab_saves_first(manager, action_name, details):
+            stored = user_characters['testuser'][0]
+            user_characters['testuser'][0] = dict(stored, gold=777, version=stored.get('version', 0) + 1)
+            return original_perform(manager, action_name, details)
+
+        with patch.object(GameManager, 'perform_hourly_action', autospec=True, side_effect=other_tab_saves_first):
+            result = self.client.post('/api/action', data={'action_name': 'wait'}).get_json()
+        self.assertEqual(result['outcome'], 'conflict')
+        self.assertTrue(result['reload'])
+        self.assertEqual((user_characters['testuser'][0]['gold'], user_characters['testuser'][0]['version']), (777, 1))
+
+        result = self.client.post('/api/action', data={'action_name': 'wait'}).get_json() # Works on the latest save
+        self.assertEqual(result['outcome'], 'completed')
+        self.assertEqual((user_characters['testuser'][0]['gold'], user_characters['testuser'][0]['version']), (777, 2))
+
+    def test_save_locks_are_a_fixed_set(self):
+        """Every slot maps to one of a fixed set of locks, so none pile up for dead or moved slots."""
+        from shopkeeperPython.app import CHARACTER_SAVE_LOCK_STRIPES, character_save_lock
+        self.assertIs(character_save_lock('testuser', 0), character_save_lock('testuser', 0))
+        locks = {id(character_save_lock(f"user{i}", slot)) for i in range(500) for slot in range(3)}
+        self.assertLessEqual(len(locks), CHARACTER_SAVE_LOCK_STRIPES)
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_failed_save_keeps_the_version(self, mock_game_random_random):
+        """A save whose write fails is rolled back, and the next action saves on top of the stored version."""
+        self._setup_user_and_character_for_actions()
+        with patch('shopkeeperPython.app.action_logs', None), \
+             patch('shopkeeperPython.app.save_character_slot', side_effect=OSError("disk full")):
+            self.client.post('/api/action', data={'action_name': 'wait'})
+        self.assertEqual(user_characters['testuser'][0].get('version', 0), 0)
+
+        result = self.client.post('/api/action', data={'action_name': 'wait'}).get_json()
+        self.assertEqual(result['outcome'], 'completed')
+        self.assertEqual(user_characters['testuser'][0]['version'], 1)
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_saves_from_other_workers_are_reloaded(self, mock_game_random_random):
+        """With several workers, a request first reloads whatever another worker saved for the user."""
+        import os
+        import shutil
+        import tempfile
+        from shopkeeperPython.storage import JsonStorage, StorageCoordinator
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        backend = JsonStorage(os.path.join(temp_dir, 'users.json'), os.path.join(temp_dir, 'chars.d'), os.path.join(temp_dir, 'graves.d'))
+        this_worker = StorageCoordinator(os.path.join(temp_dir, 'locks.d'))
+        other_worker = StorageCoordinator(os.path.join(temp_dir, 'locks.d'))
+        self._setup_user_and_character_for_actions()
+
+        with patch('shopkeeperPython.app.storage', backend), patch('shopkeeperPython.app.coordinator', this_worker):
+            self.assertEqual(self.client.post('/api/action', data={'action_name': 'wait'}).get_json()['outcome'], 'completed')
+            saved = backend.load_characters('testuser')[0]
+            self.assertEqual(saved['version'], 1)
+
+            with other_worker.lock('user:testuser'):
+                backend.save_characters('testuser', [dict(saved, gold=4321, version=2)])
+                other_worker.bump('user:testuser')
+
+            self.assertEqual(self.client.post('/api/action', data={'action_name': 'wait'}).get_json()['outcome'], 'completed')
+            self.assertEqual(user_characters['testuser'][0]['gold'], 4321)
+            self.assertEqual(backend.load_characters('testuser')[0]['version'], 3)
+            self.assertTrue(other_worker.refresh('user:testuser')) # This worker's save was announced too
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_actions_are_logged_between_snapshots(self, mock_game_random_random):
+        """With action logs, actions are appended to the log and the slot is saved in full only at snapshots."""
+        import shutil
+        import tempfile
+        from shopkeeperPython.action_log import ActionLogStore
+        from shopkeeperPython.app import restore_from_action_logs
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir, ignore_errors=True)
+        store = ActionLogStore(log_dir, snapshot_every=3, fsync=False)
+        char_name = self._setup_user_and_character_for_actions()
+
+        with patch('shopkeeperPython.app.action_logs', store), \
+             patch('shopkeeperPython.app.save_user_characters') as full_save, \
+             patch('shopkeeperPython.app.save_character_slot') as delta_save:
+            for _ in range(4):
+                self.assertEqual(self.client.post('/api/action', data={'action_name': 'wait'}).get_json()['outcome'], 'completed')
+            delta_save.assert_not_called()
+            full_save.assert_called_once_with('testuser') # The snapshot after the third action
+            latest = user_characters['testuser'][0]
+            self.assertEqual(latest['action_seq'], 4)
+
+            # After a restart storage only has the snapshot; the fourth action is replayed from the log.
+            user_characters['testuser'][0] = store.open('testuser', char_name).read(3)["snapshot"]
+            restore_from_action_logs()
+        restored = user_characters['testuser'][0]
+        self.assertEqual(restored['action_seq'], 4)
+        self.assertEqual(restored['game_time_snapshot'], latest['game_time_snapshot'])
+        self.assertEqual(restored['rng_state'], latest['rng_state'])
+        self.assertEqual(restored['version'], latest['version']) # Not the snapshot's
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_first_log_snapshot_of_an_unseeded_save_keeps_the_stream(self, mock_game_random_random):
+        """A save from before random streams were saved is logged with the seed its session used, so it replays exactly."""
+        import shutil
+        import tempfile
+        from shopkeeperPython.action_log import ActionLogStore
+        log_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, log_dir, ignore_errors=True)
+        store = ActionLogStore(log_dir, snapshot_every=50, fsync=False)
+        char_name = self._setup_user_and_character_for_actions() # The slot has no rng_state
+
+        with patch('shopkeeperPython.app.action_logs', store), patch('shopkeeperPython.app.save_user_characters'):
+            for _ in range(3):
+                self.assertEqual(self.client.post('/api/action', data={'action_name': 'wait'}).get_json()['outcome'], 'completed')
+        latest = user_characters['testuser'][0]
+        restored = store.open('testuser', char_name).restore()
+        for key in ('rng_state', 'game_time_snapshot', 'gold', 'action_seq', 'version'):
+            self.assertEqual(restored[key], latest[key], key)
+
+    def _start_worker(self, data_dir, env):
+        import subprocess
+        import sys
+        worker = subprocess.Popen([sys.executable, '-c', WORKER_SCRIPT], cwd=data_dir, env=env, text=True,
+                                  stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.addCleanup(worker.wait, 30)
+        self.addCleanup(worker.stdin.close)
+        self._read_worker_line(worker, 'READY')
+        return worker
+
+    def _read_worker_line(self, worker, prefix):
+        for line in worker.stdout: # Skip whatever else the app prints
+            if line.startswith(prefix):
+                return line[len(prefix):].strip()
+        self.fail(f"Worker exited before printing {prefix}.")
+
+    def test_logged_actions_from_two_workers_stay_in_order(self):
+        """Two worker processes taking turns on one character append one unbroken action log."""
+        import os
+        import shutil
+        import tempfile
+        from shopkeeperPython.action_log import ActionLogStore
+        from shopkeeperPython.storage import JsonStorage
+        data_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, data_dir, ignore_errors=True)
+        seed = JsonStorage(os.path.join(data_dir, 'users.json'), os.path.join(data_dir, 'user_characters.d'),
+                           os.path.join(data_dir, 'graveyard.d'))
+        seed.save_users({'testuser': users['testuser']})
+        seed.save_characters('testuser', [create_default_char_dict(name="SharedHero")])
+        seed.close()
+        log_dir = os.path.join(data_dir, 'actions.d')
+        env = dict(os.environ, SHOPKEEPER_MULTI_PROCESS='1', SHOPKEEPER_ACTION_LOG_DIR=log_dir,
+                   PYTHONPATH=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        workers = {'A': self._start_worker(data_dir, env), 'B': self._start_worker(data_dir, env)}
+
+        for name in 'AABAB':
+            workers[name].stdin.write('wait\n')
+            workers[name].stdin.flush()
+            self.assertEqual(self._read_worker_line(workers[name], 'OUTCOME'), 'completed')
+
+        log = ActionLogStore(log_dir).open('testuser', 'SharedHero')
+        self.assertEqual(log.seq, 5)
+        self.assertEqual(log.snapshot_seqs(), [0]) # No forked history
+        recording = log.read()
+        self.assertEqual([entry['rng_counter'] for entry in recording['entries']], [0, 1, 2, 3, 4])
+        self.assertEqual([entry['version'] for entry in recording['entries']], [1, 2, 3, 4, 5])
+
+    def test_api_action_requires_login(self):
+        response = self.client.post('/api/action', data={'action_name': 'wait'})
+        self.assertEqual(response.status_code, 401)
+        self.assertTrue(response.get_json()['reload'])
+
+    def test_api_action_rejected_without_action_name(self):
+        self._setup_user_and_character_for_actions()
+        result = self.client.post('/api/action', data={}).get_json()
+        self.assertFalse(result['ok'])
+        self.assertEqual(result['messages'][0]['category'], 'error')
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random')
+    @patch('shopkeeperPython.game.rng.GameRandom.choice')
     def test_action_explore_town_find_gold(self, mock_game_random_choice, mock_game_random_random):
         """Test explore_town action results in finding gold."""
         char_name = self._setup_user_and_character_for_actions()
@@ -374,8 +715,8 @@ class TestApp(unittest.TestCase):
         updated_char_data = user_characters[username][0] # Reload character data
         self.assertEqual(updated_char_data.get('gold', 0), initial_gold + gold_find_amount)
 
-    @patch('shopkeeperPython.game.game_manager.random.random')
-    @patch('shopkeeperPython.game.game_manager.random.choice')
+    @patch('shopkeeperPython.game.rng.GameRandom.random')
+    @patch('shopkeeperPython.game.rng.GameRandom.choice')
     def test_action_explore_town_find_item(self, mock_game_random_choice, mock_game_random_random):
         """Test explore_town action results in finding a specific item."""
         char_name = self._setup_user_and_character_for_actions()
@@ -451,5 +792,23 @@ class TestApp(unittest.TestCase):
         self.assertEqual(updated_char_data['current_town_name'], "Starting Village")
 
 
+
+class TestAppFactory(unittest.TestCase):
+
+    def test_forked_worker_sets_up_on_its_first_request(self):
+        """A process that hasn't opened storage yet (e.g. a worker forked from a preloading master) does so before its first request."""
+        with patch('shopkeeperPython.app._process_id', -1), patch('shopkeeperPython.app.init_process') as init_process:
+            app.test_client().get('/')
+        init_process.assert_called_once()
+
+    def test_preload_only_loads_and_freezes_static_content(self):
+        self.addCleanup(app.config.pop, 'PRELOAD', None)
+        with patch('shopkeeperPython.app.gc.freeze') as freeze, patch('shopkeeperPython.app.init_process') as init_process, \
+             patch('shopkeeperPython.app._process_id', -1):
+            self.assertIs(create_app({'PRELOAD': True}), app)
+        freeze.assert_called_once()
+        init_process.assert_not_called()
+
+
 if __name__ == '__main__':
     unittest.main()
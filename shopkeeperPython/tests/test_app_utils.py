@@ -9,7 +9,9 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')
 # This import will initialize app.py's global game_manager_instance,
 # whose _print output will go to its own output_stream (a StringIO).
 # We are only testing the return value of parse_action_details here.
-from shopkeeperPython.app import app, parse_action_details, before_request_setup as app_before_request_setup
+from shopkeeperPython.app import app, create_app, parse_action_details, before_request_setup as app_before_request_setup
+
+create_app() # Opens storage and loads the saves
 
 class TestAppUtils(unittest.TestCase):
 
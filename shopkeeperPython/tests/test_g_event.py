@@ -1,5 +1,5 @@
 import unittest
-from shopkeeperPython.game.g_event import Event, GAME_EVENTS
+from shopkeeperPython.game.g_event import Event, EventIndex, GAME_EVENTS, GAME_EVENT_INDEX
 from shopkeeperPython.game.character import Character # Using actual Character for some Event tests if simple
 from shopkeeperPython.game.item import Item # Using actual Item for some Event tests
 
@@ -183,6 +183,49 @@ class TestEventClass(unittest.TestCase):
         self.assertIn("choices=1", repr_with_options)
 
 
+class TestEventIndex(unittest.TestCase):
+    def _event(self, name, min_level, event_type="generic", skills=()):
+        return Event(name=name, description="", outcomes={}, event_type=event_type, min_level=min_level,
+                     skill_check_options=[{"choice_text": s, "skill": s} for s in skills])
+
+    def setUp(self):
+        self.events = [
+            self._event("Late Generic", 3),
+            self._event("Early Generic", 1, skills=["Persuasion"]),
+            self._event("Mid Persuasion", 2, skills=["Persuasion", "Insight"]),
+            self._event("Rest Noise", 1, event_type="rest_interruption", skills=["Perception"]),
+        ]
+        self.index = EventIndex(self.events)
+
+    def test_eligible_by_level_and_type(self):
+        self.assertEqual([e.name for e in self.index.eligible(1, event_type="generic")], ["Early Generic"])
+        self.assertEqual([e.name for e in self.index.eligible(3, event_type="generic")],
+                         ["Early Generic", "Mid Persuasion", "Late Generic"])
+        self.assertEqual([e.name for e in self.index.eligible(5, event_type="rest_interruption")], ["Rest Noise"])
+        self.assertEqual(self.index.eligible(0, event_type="generic"), ())
+
+    def test_eligible_by_skill(self):
+        self.assertEqual([e.name for e in self.index.eligible(2, skill="Persuasion")], ["Early Generic", "Mid Persuasion"])
+        self.assertEqual([e.name for e in self.index.eligible(2, skill="Perception")], ["Rest Noise"])
+        self.assertEqual(self.index.eligible(2, skill="Perception", event_type="generic"), ())
+        self.assertEqual(self.index.eligible(9, skill="Juggling"), ())
+
+    def test_matches_linear_scan_over_game_events(self):
+        skills = {c.get('skill') for e in GAME_EVENTS for c in e.skill_check_options if c.get('skill')}
+        for level in range(0, 6):
+            expected = {e.name for e in GAME_EVENTS if level >= e.min_level and e.event_type == "generic"}
+            self.assertEqual({e.name for e in GAME_EVENT_INDEX.eligible(level, event_type="generic")}, expected)
+            for skill in skills:
+                expected = {e.name for e in GAME_EVENTS if level >= e.min_level and
+                            any(c.get('skill') == skill for c in e.skill_check_options)}
+                self.assertEqual({e.name for e in GAME_EVENT_INDEX.eligible(level, skill=skill)}, expected, skill)
+
+    def test_lookup_by_name(self):
+        self.assertIs(self.index.get("Mid Persuasion"), self.events[2])
+        self.assertIsNone(self.index.get("Nope"))
+        self.assertEqual(len(GAME_EVENT_INDEX), len(GAME_EVENTS))
+
+
 class TestAllGameEventsIntegrity(unittest.TestCase):
     def test_all_events_in_game_events_list_are_valid(self):
         """
@@ -460,7 +503,7 @@ class TestEventManager(unittest.TestCase):
         self.assertTrue(result["rolled_successfully"])
         self.assertEqual(result["message"], self.sample_event.outcomes["door_opened"]["message"])
         self.mock_character.award_xp.assert_called_with(40)
-        self.mock_character.perform_skill_check.assert_called_once_with(skill_name="Athletics", dc=19) # Check called with reduced DC
+        self.mock_character.perform_skill_check.assert_called_once_with(skill_name="Athletics", dc=19, rng=self.event_manager.rng) # Check called with reduced DC
         self.assertIsNotNone(result.get("roll_data"))
         self.assertTrue(result.get("roll_data").get("success"))
         self.mock_game_manager.add_journal_entry.assert_called_once()
@@ -480,7 +523,7 @@ class TestEventManager(unittest.TestCase):
 
         self.assertFalse(result["rolled_successfully"])
         self.assertEqual(result["message"], self.sample_event.outcomes["door_stuck"]["message"])
-        self.mock_character.perform_skill_check.assert_called_once_with(skill_name="Athletics", dc=22) # Called with original scaled DC
+        self.mock_character.perform_skill_check.assert_called_once_with(skill_name="Athletics", dc=22, rng=self.event_manager.rng) # Called with original scaled DC
         self.mock_game_manager.add_journal_entry.assert_called_once()
 
     def test_execute_skill_choice_dc_scaling(self):
@@ -492,7 +535,7 @@ class TestEventManager(unittest.TestCase):
         self.event_manager.execute_skill_choice(self.sample_event, choice_index=0)
 
         # Check that perform_skill_check was called with the correctly scaled DC
-        self.mock_character.perform_skill_check.assert_called_with(skill_name="Investigation", dc=18)
+        self.mock_character.perform_skill_check.assert_called_with(skill_name="Investigation", dc=18, rng=self.event_manager.rng)
 
     def test_execute_skill_choice_invalid_choice_index(self):
         result = self.event_manager.execute_skill_choice(self.sample_event, choice_index=99)
@@ -0,0 +1,97 @@
+import io
+import logging
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from shopkeeperPython.game import game_log
+from shopkeeperPython.game.character import Character
+from shopkeeperPython.game.item import Item
+from shopkeeperPython.game.time_system import GameTime
+
+
+class TestPlayerMessages(unittest.TestCase):
+
+    def test_collects_into_buffer(self):
+        with game_log.collect_player_messages() as buffer:
+            game_log.player("%s gains %s XP.", "Tess", 20)
+            game_log.player("Error: no points left.", category="error")
+        self.assertEqual(buffer.texts(), ["Tess gains 20 XP.", "Error: no points left."])
+        self.assertEqual(buffer.to_list()[1], {"category": "error", "text": "Error: no points left."})
+        self.assertIsNone(game_log.current_player_buffer())
+
+    def test_formatting_is_deferred(self):
+        class Counted:
+            calls = 0
+
+            def __str__(self):
+                Counted.calls += 1
+                return "counted"
+
+        with game_log.collect_player_messages() as buffer:
+            game_log.player("Value: %s", Counted())
+        self.assertEqual(Counted.calls, 0)
+        self.assertEqual(buffer.texts(), ["Value: counted"])
+        self.assertEqual(Counted.calls, 1)
+
+    def test_template_without_args_is_not_formatted(self):
+        with game_log.collect_player_messages() as buffer:
+            game_log.player("100% sold out")
+        self.assertEqual(buffer.texts(), ["100% sold out"])
+
+    def test_buffer_limit(self):
+        with game_log.collect_player_messages(game_log.MessageBuffer(limit=2)) as buffer:
+            for index in range(5):
+                game_log.player("Message %s", index)
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer.dropped, 3)
+
+    def test_without_buffer_logs_to_player_logger(self):
+        with self.assertLogs("shopkeeper.player", level="INFO") as captured:
+            game_log.player("%s arrives.", "Tess")
+        self.assertEqual(captured.records[0].getMessage(), "Tess arrives.")
+
+    def test_game_modules_do_not_print(self):
+        character = Character(name="Quiet")
+        character.roll_stats()
+        out = io.StringIO()
+        with redirect_stdout(out), game_log.collect_player_messages() as buffer:
+            character.add_item_to_inventory(Item(name="Rope", description="", base_value=1, item_type="tool", quality="Common", quantity=1))
+            GameTime(start_hour=23).advance_hour(1)
+        self.assertEqual(out.getvalue(), "")
+        self.assertIn("A new day has begun! It is now Day 2.", buffer.texts())
+
+
+class TestDebugChannel(unittest.TestCase):
+
+    def test_disabled_debug_skips_logging_call(self):
+        game_log.DEBUG_LOGGER.setLevel(logging.INFO)
+        self.addCleanup(game_log.DEBUG_LOGGER.setLevel, logging.NOTSET)
+        self.assertFalse(game_log.debug_enabled())
+        with patch.object(game_log.DEBUG_LOGGER, "debug") as debug:
+            game_log.debug("Stacked %s", "Rope")
+        debug.assert_not_called()
+
+    def test_enabled_debug(self):
+        with self.assertLogs("shopkeeper.debug", level="DEBUG") as captured:
+            self.assertTrue(game_log.debug_enabled())
+            game_log.debug("SHOP: Added %s (Qty: %s).", "Rope", 2)
+        self.assertEqual(captured.records[0].getMessage(), "SHOP: Added Rope (Qty: 2).")
+
+    def test_display_character_info_is_skipped_when_debug_is_off(self):
+        game_log.DEBUG_LOGGER.setLevel(logging.INFO)
+        self.addCleanup(game_log.DEBUG_LOGGER.setLevel, logging.NOTSET)
+        character = Character(name="Quiet")
+        character.roll_stats()
+        with patch.object(character, "get_effective_max_hp") as get_max_hp:
+            character.display_character_info()
+        get_max_hp.assert_not_called()
+
+    def test_warning(self):
+        with self.assertLogs("shopkeeper.game", level="WARNING") as captured:
+            game_log.warning("Warning: Feat ID '%s' not found.", "nope")
+        self.assertEqual(captured.records[0].getMessage(), "Warning: Feat ID 'nope' not found.")
+
+
+if __name__ == '__main__':
+    unittest.main()
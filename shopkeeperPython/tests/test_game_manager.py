@@ -47,7 +47,7 @@ class TestGameManager(unittest.TestCase):
 
     # --- Tests for item quantity ---
 
-    @patch('random.choice')
+    @patch('shopkeeperPython.game.rng.GameRandom.choice')
     def test_explore_town_action_item_with_quantity(self, mock_random_choice):
         """Test explore_town action finds an item with specified quantity."""
         # Ensure EXPLORATION_FINDS is globally available or mock game_manager.EXPLORATION_FINDS
@@ -56,23 +56,23 @@ class TestGameManager(unittest.TestCase):
         mock_random_choice.return_value = item_to_find
 
         # Mock random.random to prevent other random events from interfering
-        with patch('random.random', return_value=0.99): # Make sure not to trigger other random events
+        with patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99): # Make sure not to trigger other random events
              # Also ensure the 20% chance to find *something* passes
-            with patch('shopkeeperPython.game.game_manager.random.random', return_value=0.10): # This random is for the 20% chance
+            with patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.10): # This random is for the 20% chance
                 self.gm.perform_hourly_action("explore_town")
 
         found_item = next((item for item in self.player.inventory if item.name == "Test Rock"), None)
         self.assertIsNotNone(found_item)
         self.assertEqual(found_item.quantity, 2)
 
-    @patch('random.choice')
+    @patch('shopkeeperPython.game.rng.GameRandom.choice')
     def test_explore_town_action_item_default_quantity(self, mock_random_choice):
         """Test explore_town action finds an item that defaults to quantity 1."""
         item_to_find = {"type": "item", "name": "Test Stick", "description": "A stick.", "base_value": 0, "item_type": "component", "quality": "Common"} # No quantity specified
         mock_random_choice.return_value = item_to_find
 
-        with patch('random.random', return_value=0.99): # Prevent other random events
-            with patch('shopkeeperPython.game.game_manager.random.random', return_value=0.10): # Pass 20% chance
+        with patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99): # Prevent other random events
+            with patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.10): # Pass 20% chance
                 self.gm.perform_hourly_action("explore_town")
 
         found_item = next((item for item in self.player.inventory if item.name == "Test Stick"), None)
@@ -93,7 +93,7 @@ class TestGameManager(unittest.TestCase):
 
         self.gm.shop.inventory = [] # Clear shop inventory
 
-        with patch('random.random', return_value=0.99): # Prevent random events
+        with patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99): # Prevent random events
             self.gm.perform_hourly_action("craft", {"item_name": "Minor Healing Potion"})
 
         # Check shop inventory for crafted item
@@ -114,7 +114,7 @@ class TestGameManager(unittest.TestCase):
         self.player.inventory = [] # Ensure player has no ingredients
         self.gm.shop.inventory = []
 
-        with patch('random.random', return_value=0.99): # Prevent random events
+        with patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99): # Prevent random events
             self.gm.perform_hourly_action("craft", {"item_name": "Minor Healing Potion"})
 
         crafted_potion = next((item for item in self.gm.shop.inventory if item.name == "Minor Healing Potion"), None)
@@ -123,8 +123,8 @@ class TestGameManager(unittest.TestCase):
         self.assertEqual(len(self.player.inventory), 0)
 
 
-    @patch('random.randint')
-    @patch('random.choice')
+    @patch('shopkeeperPython.game.rng.GameRandom.randint')
+    @patch('shopkeeperPython.game.rng.GameRandom.choice')
     def test_gather_resources_action(self, mock_random_choice, mock_random_randint):
         """Test gather_resources action gives item with correct quantity."""
         # Setup GM's current town and its resources
@@ -139,7 +139,7 @@ class TestGameManager(unittest.TestCase):
 
         self.player.inventory = [] # Clear inventory for test
 
-        with patch('random.random', return_value=0.99): # Prevent other random events
+        with patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99): # Prevent other random events
             self.gm.perform_hourly_action("gather_resources")
 
         gathered_herb = next((item for item in self.player.inventory if item.name == "Wild Herb"), None)
@@ -168,7 +168,7 @@ class TestGameManager(unittest.TestCase):
             })
 
 
-        with patch('random.random', return_value=0.99): # Prevent other random events
+        with patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99): # Prevent other random events
             self.gm.perform_hourly_action("buy_from_npc", {"npc_name": "Old Man Hemlock", "item_name": "Sunpetal", "quantity": quantity_to_buy})
 
         self.assertEqual(self.player.gold, initial_gold - expected_cost)
@@ -198,7 +198,7 @@ class TestGameManager(unittest.TestCase):
         self.assertEqual(self.player.gold, 100) # Gold should not change
         self.assertEqual(self.gm.shop.shop_level, initial_shop_level) # Level should not change
 
-    @patch('random.random', return_value=0.99) # Prevent random events
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99) # Prevent random events
     def test_action_upgrade_shop_max_level(self, mock_random_main): # mock_random_main to avoid conflict if other patches are added
         # Manually set shop to max level for testing this action
         self.gm.shop.shop_level = Shop.MAX_SHOP_LEVEL
@@ -209,7 +209,7 @@ class TestGameManager(unittest.TestCase):
         self.assertEqual(self.player.gold, initial_gold) # Gold should not change
         self.assertEqual(self.gm.shop.shop_level, Shop.MAX_SHOP_LEVEL) # Level should remain max
 
-    @patch('random.random') # Patch to control NPC sale chance
+    @patch('shopkeeperPython.game.rng.GameRandom.random') # Patch to control NPC sale chance
     def test_action_craft_advanced_item_correct_specialization(self, mock_random):
         mock_random.return_value = 0.99 # Ensure NPC sale doesn't happen during specialization set or craft
         self.gm.perform_hourly_action("set_shop_specialization", {"specialization_name": "Blacksmith"})
@@ -222,7 +222,7 @@ class TestGameManager(unittest.TestCase):
         crafted_item = next((item for item in self.gm.shop.inventory if item.name == "Iron Armor"), None)
         self.assertIsNotNone(crafted_item)
 
-    @patch('random.random') # Patch to control NPC sale chance
+    @patch('shopkeeperPython.game.rng.GameRandom.random') # Patch to control NPC sale chance
     def test_action_craft_advanced_item_wrong_specialization(self, mock_random):
         mock_random.return_value = 0.99 # Ensure NPC sale doesn't happen
         self.gm.perform_hourly_action("set_shop_specialization", {"specialization_name": "Alchemist"})
@@ -233,8 +233,8 @@ class TestGameManager(unittest.TestCase):
 
         self.assertEqual(len(self.gm.shop.inventory), initial_inventory_count) # Item should not be crafted
 
-    @patch('random.uniform')
-    @patch('random.random')
+    @patch('shopkeeperPython.game.rng.GameRandom.uniform')
+    @patch('shopkeeperPython.game.rng.GameRandom.random')
     def test_npc_purchase_chance_with_reputation(self, mock_random_roll, mock_uniform):
         mock_uniform.return_value = 0.9 # for npc_offer_percentage if a sale occurs
 
@@ -315,7 +315,7 @@ class TestGameManager(unittest.TestCase):
         initial_hit_dice = self.player.hit_dice = 3
         # self.player.hit_die_type = 8 # d8 - This attribute doesn't exist on Character, HD is d8 by default in rest logic
 
-        with patch('random.randint', return_value=5): # Mock HD roll
+        with patch('shopkeeperPython.game.rng.GameRandom.randint', return_value=5): # Mock HD roll
             self.gm.perform_hourly_action("rest_short")
 
         self.assertEqual(self.player.hit_dice, initial_hit_dice - 1)
@@ -390,7 +390,7 @@ class TestGameManager(unittest.TestCase):
         self.gm.current_town = self.gm.towns_map["Steel Flow City"] # Has "The Rusty Pickaxe Tavern"
 
         initial_journal_len = len(self.player.journal)
-        with patch('random.choice', return_value="Test rumor") as mock_choice:
+        with patch('shopkeeperPython.game.rng.GameRandom.choice', return_value="Test rumor") as mock_choice:
             self.gm.perform_hourly_action("gather_rumors_tavern")
 
         self.assertIn("Test rumor", self.test_output_stream.getvalue())
@@ -407,7 +407,7 @@ class TestGameManager(unittest.TestCase):
         initial_xp = self.player.xp
         initial_journal_len = len(self.player.journal)
 
-        with patch('random.random', return_value=0.5) as mock_random: # Not triggering the 10% discovery
+        with patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.5) as mock_random: # Not triggering the 10% discovery
             self.gm.perform_hourly_action("study_local_history")
 
         self.assertIn(f"{self.player.name} spends an hour studying local history", self.test_output_stream.getvalue())
@@ -426,7 +426,7 @@ class TestGameManager(unittest.TestCase):
         self.test_output_stream.truncate(0)
         self.test_output_stream.seek(0)
 
-        with patch('random.random', return_value=0.05) as mock_random: # Triggering the 10% discovery
+        with patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.05) as mock_random: # Triggering the 10% discovery
             self.gm.perform_hourly_action("study_local_history")
         self.assertIn("Uncovered a minor local secret", self.test_output_stream.getvalue())
         # XP from this action (10 base + 5 discovery) is added to previous pending_xp
@@ -466,6 +466,45 @@ class TestGameManager(unittest.TestCase):
         self.assertTrue(last_entry.outcome.startswith("Hopefully, this will attract more customers!")) # Journal outcome check is good
         self.assertAlmostEqual(self.gm.shop.temporary_customer_boost, initial_boost + 0.05)
 
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99) # No events or customers
+    def test_fast_forward_runs_every_hour(self, mock_random):
+        start_hour, start_day = self.gm.time.current_hour, self.gm.time.current_day
+        with patch.object(self.gm, '_run_end_of_day_summary', wraps=self.gm._run_end_of_day_summary) as mock_summary:
+            result = self.gm.fast_forward(24, "wait")
+        self.assertEqual(result["type"], "action_complete")
+        self.assertEqual(result["hours_elapsed"], 24)
+        self.assertEqual((self.gm.time.current_hour, self.gm.time.current_day), (start_hour, start_day + 1))
+        mock_summary.assert_called_once() # The day rolled over once
+        self.assertEqual(self.player.pending_xp, 24) # 1 XP per hour waited
+
+    def test_fast_forward_stops_for_haggling(self):
+        hour_before = self.gm.time.current_hour
+        # Rolls happen after each hour has passed: no customer in the first hour, a haggling one in the second.
+        first_hour_over = lambda: 0.0 if (self.gm.time.current_hour - hour_before) % 24 >= 2 else 0.99
+        with patch('shopkeeperPython.game.rng.GameRandom.random', side_effect=first_hour_over):
+            result = self.gm.fast_forward(8, "tend_shop")
+        self.assertEqual(result["type"], "haggling_pending")
+        self.assertEqual(result["hours_elapsed"], 2)
+        self.assertEqual(self.gm.time.current_hour, (hour_before + 2) % 24)
+        self.assertIsNotNone(self.gm.active_haggling_session)
+
+    def test_fast_forward_rejects_bad_input(self):
+        time_before = self.gm.time.get_time_string()
+        self.assertEqual(self.gm.fast_forward(0, "wait")["type"], "action_failed")
+        self.assertEqual(self.gm.fast_forward(GameManager.MAX_FAST_FORWARD_HOURS + 1, "wait")["type"], "action_failed")
+        self.assertEqual(self.gm.fast_forward(4, "dance")["type"], "action_failed")
+        self.assertEqual(self.gm.time.get_time_string(), time_before)
+
+    @patch('shopkeeperPython.game.rng.GameRandom.random', return_value=0.99)
+    def test_fast_forward_custom_policy(self, mock_random):
+        actions_taken = []
+        def policy(gm):
+            actions_taken.append(gm.time.current_hour)
+            return ("study_local_history", {})
+        result = self.gm.fast_forward(3, policy)
+        self.assertEqual(result["hours_elapsed"], 3)
+        self.assertEqual(len(actions_taken), 3)
+
 
 if __name__ == '__main__':
     unittest.main()
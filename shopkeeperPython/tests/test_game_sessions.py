@@ -0,0 +1,76 @@
+import unittest
+from unittest.mock import patch
+
+from shopkeeperPython.game_sessions import GameSession, GameSessionCache
+
+
+def make_session(username="alice", slot_index=0, source_data=None):
+    return GameSession(username, slot_index, character=object(), game_manager=object(),
+                       source_data=source_data if source_data is not None else {"name": "Hero"})
+
+
+class TestGameSessionCache(unittest.TestCase):
+
+    def test_checkout_hit_and_miss_counters(self):
+        cache = GameSessionCache(max_size=4)
+        session = make_session()
+        cache.checkin(session)
+
+        self.assertIs(cache.checkout("alice", 0, session.source_data), session)
+        self.assertIsNone(cache.checkout("alice", 0, session.source_data)) # Checked out, so not shared
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_stale_source_data_is_a_miss(self):
+        cache = GameSessionCache(max_size=4)
+        session = make_session()
+        cache.checkin(session)
+        self.assertIsNone(cache.checkout("alice", 0, {"name": "Hero"})) # Equal, but not the saved object
+        self.assertEqual(len(cache), 0)
+
+    def test_mark_saved_tracks_new_source(self):
+        cache = GameSessionCache(max_size=4)
+        session = make_session()
+        saved_data = {"name": "Hero", "gold": 99}
+        session.mark_saved(saved_data)
+        self.assertTrue(session.saved_this_request)
+        cache.checkin(session)
+        self.assertIs(cache.checkout("alice", 0, saved_data), session)
+
+    def test_lru_eviction(self):
+        cache = GameSessionCache(max_size=2)
+        first, second, third = make_session(slot_index=0), make_session(slot_index=1), make_session("bob")
+        for session in (first, second, third):
+            cache.checkin(session)
+        self.assertEqual(cache.evictions, 1)
+        self.assertIsNone(cache.checkout("alice", 0, first.source_data))
+        self.assertIs(cache.checkout("bob", 0, third.source_data), third)
+
+    def test_invalidate_user(self):
+        cache = GameSessionCache(max_size=4)
+        cache.checkin(make_session(slot_index=0))
+        cache.checkin(make_session(slot_index=1))
+        cache.checkin(make_session("bob"))
+        cache.invalidate_user("alice")
+        self.assertEqual(len(cache), 1)
+        self.assertEqual(cache.stats()["invalidations"], 2)
+
+    def test_idle_sessions_expire(self):
+        cache = GameSessionCache(max_size=4, max_idle=3600)
+        session = make_session()
+        with patch('shopkeeperPython.game_sessions.time.monotonic', return_value=1000.0):
+            cache.checkin(session)
+        with patch('shopkeeperPython.game_sessions.time.monotonic', return_value=1000.0 + 3599):
+            self.assertIs(cache.checkout("alice", 0, session.source_data), session)
+            cache.checkin(session)
+        with patch('shopkeeperPython.game_sessions.time.monotonic', return_value=1000.0 + 3599 + 3600):
+            self.assertIsNone(cache.checkout("alice", 0, session.source_data))
+        self.assertEqual((cache.hits, cache.misses, cache.stats()["expirations"]), (1, 1, 1))
+
+    def test_disabled_cache_keeps_nothing(self):
+        cache = GameSessionCache(max_size=0)
+        cache.checkin(make_session())
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,107 @@
+import copy
+import pickle
+import unittest
+
+from shopkeeperPython.game.character import Character
+from shopkeeperPython.game.inventory import Inventory
+from shopkeeperPython.game.item import Item
+from shopkeeperPython.game.shop import Shop
+from shopkeeperPython.game.town import Town
+
+
+def make_item(name, quality="Common", quantity=1):
+    return Item(name=name, description="", base_value=10, item_type="component", quality=quality, quantity=quantity)
+
+
+class TestInventory(unittest.TestCase):
+
+    def test_lookups_follow_adds_and_removes(self):
+        ingot = make_item("Iron Ingot", quantity=2)
+        fine_ingot = make_item("Iron Ingot", "Rare", 3)
+        rope = make_item("Rope")
+        inventory = Inventory([ingot, rope])
+        inventory.append(fine_ingot)
+
+        self.assertEqual(list(inventory), [ingot, rope, fine_ingot])
+        self.assertIs(inventory.find_stack("Iron Ingot", "Rare"), fine_ingot)
+        self.assertIs(inventory.first("Iron Ingot"), ingot)
+        self.assertEqual(inventory.quantity_of("Iron Ingot"), 5)
+        self.assertIn(rope, inventory)
+        self.assertNotIn(make_item("Rope"), inventory) # Membership is by identity
+
+        inventory.remove(ingot)
+        self.assertIsNone(inventory.find_stack("Iron Ingot", "Common"))
+        self.assertIs(inventory.first("Iron Ingot"), fine_ingot)
+        inventory.pop()
+        self.assertEqual(inventory.quantity_of("Iron Ingot"), 0)
+        self.assertEqual(inventory.stacks_named("Iron Ingot"), [])
+        with self.assertRaises(ValueError):
+            inventory.remove(ingot)
+
+    def test_quantity_changes_in_place_are_seen(self):
+        herbs = make_item("Herb Bundle", quantity=4)
+        inventory = Inventory([herbs])
+        herbs.quantity -= 3
+        self.assertEqual(inventory.quantity_of("Herb Bundle"), 1)
+
+    def test_duplicate_stack_takes_over_as_stacking_target(self):
+        first, second = make_item("Rope"), make_item("Rope")
+        inventory = Inventory([first, second])
+        self.assertIs(inventory.find_stack("Rope", "Common"), first)
+        inventory.remove(first)
+        self.assertIs(inventory.find_stack("Rope", "Common"), second)
+
+    def test_slice_assignment_and_copies_keep_indexes(self):
+        rope, water = make_item("Rope"), make_item("Clean Water")
+        inventory = Inventory([rope])
+        inventory[:] = [water]
+        self.assertIsNone(inventory.first("Rope"))
+        self.assertIs(inventory.first("Clean Water"), water)
+        for clone in (copy.deepcopy(inventory), pickle.loads(pickle.dumps(inventory))):
+            self.assertIsInstance(clone, Inventory)
+            self.assertEqual(clone.quantity_of("Clean Water"), 1)
+
+
+class TestCharacterAndShopInventories(unittest.TestCase):
+
+    def test_character_wraps_assigned_lists(self):
+        character = Character(name="Hoarder")
+        character.inventory = [make_item("Scrap Metal", quantity=2)]
+        self.assertIsInstance(character.inventory, Inventory)
+        character.add_item_to_inventory(make_item("Scrap Metal", quantity=3))
+        self.assertEqual(len(character.inventory), 1)
+        self.assertEqual(character.has_items({"Scrap Metal": 5}), (True, {}))
+        self.assertEqual(character.has_items({"Scrap Metal": 6}), (False, {"Scrap Metal": 1}))
+
+    def test_consume_items_uses_newest_stacks_first(self):
+        character = Character(name="Crafter")
+        common, rare = make_item("Iron Ingot", quantity=2), make_item("Iron Ingot", "Rare", 2)
+        character.inventory = [common, rare]
+        self.assertTrue(character.consume_items({"Iron Ingot": 3}))
+        self.assertEqual(list(character.inventory), [common])
+        self.assertEqual(common.quantity, 1)
+
+    def test_hoarder_inventory(self):
+        character = Character(name="Hoarder")
+        for index in range(500):
+            character.add_item_to_inventory(make_item(f"Trinket {index}"))
+        character.add_item_to_inventory(make_item("Trinket 250", quantity=4))
+        self.assertEqual(len(character.inventory), 500)
+        self.assertEqual(character.inventory.quantity_of("Trinket 250"), 5)
+        self.assertTrue(character.consume_items({"Trinket 250": 5}))
+        self.assertIsNone(character.inventory.first("Trinket 250"))
+        self.assertEqual(len(character.inventory), 499)
+
+    def test_shop_round_trip_and_sale(self):
+        shop = Shop(name="Stall", owner_name="Owner", town=Town(name="Testville", properties=[], nearby_resources=[], unique_npc_crafters=[]))
+        shop.add_item_to_inventory(make_item("Dagger"))
+        shop.add_item_to_inventory(make_item("Dagger"))
+        self.assertEqual(len(shop.inventory), 1)
+        loaded = Shop.from_dict(shop.to_dict(), shop.town)
+        self.assertIsInstance(loaded.inventory, Inventory)
+        self.assertEqual(loaded.inventory.quantity_of("Dagger"), 2)
+        self.assertGreater(loaded.calculate_sale_price("Dagger"), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,5 +1,6 @@
 import unittest
-from shopkeeperPython.game.item import Item, QUALITY_TIERS, QUALITY_VALUE_MULTIPLIERS
+from shopkeeperPython.game.item import Item, ItemDefinition, ITEM_CATALOG, QUALITY_TIERS, QUALITY_VALUE_MULTIPLIERS
+from shopkeeperPython.game.shop import Shop
 
 class TestItem(unittest.TestCase):
 
@@ -79,5 +80,55 @@ class TestItem(unittest.TestCase):
         with self.assertRaises(ValueError):
             Item(name="Invalid Quality Item", description="Desc", base_value=10, item_type="misc", quality="Super Mythical")
 
+
+class TestItemDefinitions(unittest.TestCase):
+
+    def test_stacks_share_one_definition(self):
+        first = Item(name="Iron Ingot", description="A bar of refined iron.", base_value=10, item_type="component", quality="Common")
+        second = Item(name="Iron Ingot", description="A bar of refined iron.", base_value=10, item_type="component", quality="Rare", quantity=4)
+        self.assertIs(first.definition, second.definition)
+        self.assertIs(first.definition, ITEM_CATALOG["Iron Ingot"])
+        self.assertFalse(hasattr(first, "__dict__"))
+        with self.assertRaises(AttributeError):
+            first.colour = "grey"
+
+    def test_shared_effects_are_read_only(self):
+        potion = Item(name="Shared Potion", description="Desc", base_value=5, item_type="potion", quality="Common", effects={"healing": 5})
+        with self.assertRaises(TypeError):
+            potion.effects["healing"] = 50
+        self.assertEqual(potion.effects.copy(), {"healing": 5})
+
+    def test_assigning_a_field_moves_only_that_stack(self):
+        plain = Item(name="Old Coin", description="A worn, unidentifiable coin.", base_value=1, item_type="trinket", quality="Common")
+        lucky = Item(name="Old Coin", description="A worn, unidentifiable coin.", base_value=1, item_type="trinket", quality="Common")
+        lucky.effects = {"allow_reroll": True}
+        self.assertEqual(plain.effects, {})
+        self.assertEqual(lucky.effects, {"allow_reroll": True})
+        self.assertIsNot(lucky.definition, ITEM_CATALOG["Old Coin"])
+
+    def test_catalog_items_save_compactly(self):
+        recipe = Shop.BASIC_RECIPES["Minor Healing Potion"]
+        potion = Item(name="Minor Healing Potion", description=recipe["description"], base_value=recipe["base_value"],
+                      item_type=recipe["type"], quality="Uncommon", effects=recipe["effects"],
+                      is_magical=True, is_consumable=True, quantity=2)
+        saved = potion.to_save_dict()
+        self.assertEqual(saved, {"name": "Minor Healing Potion", "quality": "Uncommon", "quantity": 2})
+        loaded = Item.from_dict(saved)
+        self.assertIs(loaded.definition, potion.definition)
+        self.assertEqual((loaded.quality, loaded.quantity, loaded.value), ("Uncommon", 2, potion.value))
+        self.assertEqual(potion.to_dict()["description"], recipe["description"]) # Full form for the UI
+
+    def test_unknown_items_save_in_full(self):
+        item = Item(name="Homemade Trinket", description="Desc", base_value=3, item_type="misc", quality="Common")
+        self.assertEqual(item.to_save_dict(), item.to_dict())
+        with self.assertRaises(ValueError):
+            Item.from_dict({"name": "No Such Item", "quality": "Common", "quantity": 1})
+
+    def test_intern_returns_same_definition(self):
+        first = ItemDefinition.intern("Test Rune", "Desc", 4, "misc", {"power": [1, 2]})
+        self.assertIs(first, ItemDefinition.intern("Test Rune", "Desc", 4, "misc", {"power": [1, 2]}))
+        self.assertIsNot(first, ItemDefinition.intern("Test Rune", "Other", 4, "misc", {"power": [1, 2]}))
+
+
 if __name__ == '__main__':
     unittest.main()
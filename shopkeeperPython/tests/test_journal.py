@@ -0,0 +1,73 @@
+import datetime
+import unittest
+from unittest.mock import patch
+
+from shopkeeperPython.game.character import Character
+from shopkeeperPython.game.journal import Journal, JournalEntry
+
+
+def make_record(index):
+    return {"timestamp": datetime.datetime(2024, 1, 1, 8, index % 60).isoformat(), "action_type": "Wait",
+            "summary": f"Waited #{index}", "details": {"index": index}, "outcome": None}
+
+
+class TestJournal(unittest.TestCase):
+
+    def test_entries_are_built_when_read(self):
+        journal = Journal([make_record(0), make_record(1)])
+        journal.append(JournalEntry(datetime.datetime(2024, 1, 2), "Craft", "Made a dagger", {"item": "Dagger"}))
+
+        self.assertEqual(len(journal), 3)
+        last = journal[-1]
+        self.assertIsInstance(last, JournalEntry)
+        self.assertEqual((last.action_type, last.details), ("Craft", {"item": "Dagger"}))
+        self.assertEqual([entry.summary for entry in reversed(journal)], ["Made a dagger", "Waited #1", "Waited #0"])
+        self.assertEqual([entry.summary for entry in journal[:2]], ["Waited #0", "Waited #1"])
+        self.assertEqual(journal.records()[-1]["timestamp"], "2024-01-02T00:00:00")
+
+    def test_load_and_save_do_not_parse_old_entries(self):
+        data = Character(name="Veteran").to_dict()
+        data["journal"] = [make_record(index) for index in range(1000)]
+        with patch.object(JournalEntry, "from_dict", wraps=JournalEntry.from_dict) as from_dict:
+            character = Character.from_dict(data)
+            character.journal.append(JournalEntry(datetime.datetime(2024, 2, 1), "Wait", "One more"))
+            saved = character.to_dict()
+        from_dict.assert_not_called()
+        self.assertEqual(len(saved["journal"]), 1001)
+        self.assertIs(saved["journal"][0], data["journal"][0]) # Old records pass through untouched
+
+    def test_loading_does_not_modify_source_data(self):
+        data = Character(name="Source").to_dict()
+        data["journal"] = [make_record(0)]
+        character = Character.from_dict(data)
+        character.journal.append(make_record(1))
+        self.assertEqual(len(data["journal"]), 1)
+
+    def test_assigning_a_list_wraps_it(self):
+        character = Character(name="Writer")
+        character.journal = [JournalEntry(datetime.datetime(2024, 1, 1), "Wait", "Waited")]
+        self.assertIsInstance(character.journal, Journal)
+        self.assertEqual(character.journal[0].summary, "Waited")
+
+    def test_overflow_is_archived_in_whole_segments(self):
+        journal = Journal([make_record(index) for index in range(25)])
+        segments = journal.overflow_segments(keep=5, segment_size=10)
+        self.assertEqual([(start, len(records)) for start, records in segments], [(0, 10), (10, 10)])
+        self.assertEqual(len(journal), 25) # Nothing leaves until the segments are written
+
+        journal.drop_archived(20)
+        self.assertEqual((len(journal), journal.archived, journal.total_count), (5, 20, 25))
+        self.assertEqual(journal[0].details, {"index": 20})
+        self.assertEqual(journal.overflow_segments(keep=5, segment_size=10), [])
+        self.assertEqual([record["details"]["index"] for record in journal.records_between(18, 22)], [20, 21])
+
+    def test_archived_count_is_saved(self):
+        character = Character(name="Chronicler")
+        character.journal = Journal([make_record(0)], archived=400)
+        loaded = Character.from_dict(character.to_dict())
+        self.assertEqual(loaded.journal.archived, 400)
+        self.assertEqual(loaded.journal.total_count, 401)
+
+
+if __name__ == '__main__':
+    unittest.main()
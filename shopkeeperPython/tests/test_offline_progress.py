@@ -0,0 +1,153 @@
+import random
+import unittest
+from io import StringIO
+from unittest.mock import patch
+
+from shopkeeperPython.game.character import Character
+from shopkeeperPython.game.game_manager import GameManager
+from shopkeeperPython.game.item import Item
+from shopkeeperPython.game.offline_progress import (
+    MAX_OFFLINE_GAME_HOURS, catch_up_shop, count_buyers, npc_buy_chance, offline_game_hours
+)
+from shopkeeperPython.game.shop import Shop
+from shopkeeperPython.game.town import Town
+
+
+def make_shop(stack_count=5):
+    town = Town("Testville", [], [], [], {})
+    shop = Shop("Test Shop", "Tester", town)
+    for i in range(stack_count):
+        shop.add_item_to_inventory(Item(name=f"Widget {i}", description="A widget.", base_value=20, item_type="trinket", quality="Common", quantity=2))
+    return shop
+
+
+class TestOfflineHelpers(unittest.TestCase):
+
+    def test_offline_game_hours(self):
+        self.assertEqual(offline_game_hours(None), 0)
+        self.assertEqual(offline_game_hours(1000.0, now=1000.0 + 5 * 3600 + 59), 5)
+        self.assertEqual(offline_game_hours(1000.0, now=500.0), 0)
+        self.assertEqual(offline_game_hours(1.0, now=1.0 + 365 * 24 * 3600), MAX_OFFLINE_GAME_HOURS)
+
+    def test_buy_chance_includes_capped_reputation(self):
+        shop = make_shop(0)
+        self.assertAlmostEqual(npc_buy_chance(shop), Shop.BASE_NPC_BUY_CHANCE)
+        shop.reputation = 10_000
+        self.assertAlmostEqual(npc_buy_chance(shop), Shop.BASE_NPC_BUY_CHANCE + Shop.MAX_NPC_BUY_CHANCE_BONUS)
+
+    def test_count_buyers_bounds(self):
+        rng = random.Random(7)
+        self.assertEqual(count_buyers(0, 0.5, 10, rng), 0)
+        self.assertEqual(count_buyers(100, 0.0, 10, rng), 0)
+        self.assertEqual(count_buyers(100, 1.0, 10, rng), 10)
+        self.assertEqual(count_buyers(3, 1.0, 10, rng), 3)
+        for _ in range(50):
+            self.assertLessEqual(count_buyers(20, 0.3, 4, rng), 4)
+
+    def test_count_buyers_matches_binomial_mean(self):
+        rng = random.Random(11)
+        draws = [count_buyers(200, 0.1, 10_000, rng) for _ in range(2000)]
+        self.assertAlmostEqual(sum(draws) / len(draws), 20.0, delta=0.5)
+
+    def test_count_buyers_stops_at_limit_for_long_absences(self):
+        class CountingRandom(random.Random):
+            calls = 0
+            def random(self):
+                CountingRandom.calls += 1
+                return super().random()
+
+        rng = CountingRandom(3)
+        self.assertEqual(count_buyers(10**9, 0.1, 5, rng), 5)
+        self.assertEqual(CountingRandom.calls, 5)
+
+
+class TestCatchUpShop(unittest.TestCase):
+
+    def test_sells_whole_stacks_for_shop_gold(self):
+        shop = make_shop(3)
+        gold_before = shop.gold
+        summary = catch_up_shop(shop, 10_000, rng=random.Random(1))
+        self.assertEqual(summary["buyers"], 3)
+        self.assertEqual(len(summary["sales"]), 3)
+        self.assertEqual(shop.inventory, [])
+        self.assertEqual(shop.gold, gold_before + summary["gold_earned"])
+        self.assertTrue(all(quantity == 2 for _, quantity, _ in summary["sales"]))
+
+    def test_no_hours_no_sales(self):
+        shop = make_shop(3)
+        summary = catch_up_shop(shop, 0)
+        self.assertEqual(summary["sales"], [])
+        self.assertEqual(len(shop.inventory), 3)
+
+    def test_quest_items_are_not_sold(self):
+        shop = make_shop(0)
+        shop.add_item_to_inventory(Item(name="Sealed Letter", description="Not for sale.", base_value=0, item_type="quest_item", quality="Common"))
+        summary = catch_up_shop(shop, 10_000)
+        self.assertEqual(summary["buyers"], 0)
+        self.assertEqual(len(shop.inventory), 1)
+
+
+class TestGameManagerShopRestore(unittest.TestCase):
+
+    def _saved_character(self, saved_at):
+        player = Character(name="Away Tester")
+        gm = GameManager(player_character=player, output_stream=StringIO())
+        gm.setup_for_character(player)
+        gm.shop.gold = 1234
+        gm.shop.reputation = 15
+        data = player.to_dict(current_town_name=gm.current_town.name, current_time_data=gm.time.to_dict(),
+                              shop_data=gm.shop.to_dict(), saved_at=saved_at)
+        return data, [item.name for item in gm.shop.inventory]
+
+    def _load(self, data):
+        player = Character.from_dict(data)
+        gm = GameManager(player_character=player, output_stream=StringIO())
+        gm.setup_for_character(player)
+        return player, gm
+
+    def test_saved_shop_is_restored(self):
+        data, item_names = self._saved_character(saved_at=None)
+        player, gm = self._load(data)
+        self.assertEqual(gm.shop.gold, 1234)
+        self.assertEqual(gm.shop.reputation, 15)
+        self.assertEqual([item.name for item in gm.shop.inventory], item_names)
+        self.assertIs(gm.shop.town, gm.current_town)
+
+    def test_catch_up_runs_on_load_without_advancing_time(self):
+        data, _ = self._saved_character(saved_at=1.0) # Long ago: capped catch-up
+        with patch('shopkeeperPython.game.game_manager.catch_up_shop', wraps=catch_up_shop) as mock_catch_up:
+            player, gm = self._load(data)
+        mock_catch_up.assert_called_once_with(gm.shop, MAX_OFFLINE_GAME_HOURS, rng=gm.rng)
+        self.assertEqual(gm.time.to_dict(), data["game_time_snapshot"])
+        self.assertGreater(player.last_saved_at, 1.0) # Time past the cap is forfeited
+        self.assertEqual(gm.offline_credit_lag, 0.0)
+        if gm.shop.gold > 1234:
+            self.assertEqual(player.journal[-1].action_type, "Offline Sales")
+
+    def test_partial_hours_carry_over_to_the_next_catch_up(self):
+        """Away 1.5 hours, saved on load, then away 0.5 hours more: 2 hours are credited in total."""
+        saved_at = 1_000_000.0
+        data, _ = self._saved_character(saved_at=saved_at)
+        with patch('shopkeeperPython.game.game_manager.time') as mock_time, \
+             patch('shopkeeperPython.game.game_manager.catch_up_shop', wraps=catch_up_shop) as mock_catch_up:
+            mock_time.time.return_value = saved_at + 1.5 * 3600
+            player, gm = self._load(data)
+            self.assertEqual(player.last_saved_at, saved_at + 3600)
+            data = gm.character_snapshot(saved_at=saved_at + 1.5 * 3600)
+            self.assertEqual(data["last_saved_at"], saved_at + 3600)
+
+            mock_time.time.return_value = saved_at + 2 * 3600
+            self._load(data)
+        self.assertEqual([call.args[1] for call in mock_catch_up.call_args_list], [1, 1])
+
+    def test_new_character_gets_starting_stock_and_no_catch_up(self):
+        player = Character(name="Fresh Tester")
+        gm = GameManager(player_character=player, output_stream=StringIO())
+        with patch('shopkeeperPython.game.game_manager.catch_up_shop') as mock_catch_up:
+            gm.setup_for_character(player)
+        mock_catch_up.assert_not_called()
+        self.assertEqual(len(gm.shop.inventory), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,100 @@
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from io import StringIO
+
+from shopkeeperPython.game.character import Character
+from shopkeeperPython.game.game_manager import GameManager
+from shopkeeperPython.game.recording import ActionRecorder, load_recording, replay_recording, main as replay_main
+
+
+def _state(game_manager):
+    character = game_manager.character
+    return {
+        "time": game_manager.time.get_time_string(),
+        "gold": character.gold,
+        "hp": character.hp,
+        "pending_xp": character.pending_xp,
+        "inventory": [item.to_dict() for item in character.inventory],
+        "shop": game_manager.shop.to_dict(),
+        "journal": [(entry.action_type, entry.summary, entry.outcome) for entry in character.journal],
+        "rng": game_manager.rng.to_dict(),
+    }
+
+
+class TestRecording(unittest.TestCase):
+
+    def setUp(self):
+        self.player = Character(name="Recorded Tester")
+        self.player.stats = {stat: 12 for stat in Character.STAT_NAMES}
+        self.player.roll_stats()
+        self.game_manager = GameManager(player_character=self.player, output_stream=StringIO())
+        self.game_manager.setup_for_character(self.player)
+
+    def _play_session(self):
+        """A session with wandering customers, events and their choices."""
+        actions = ["explore_town", "gather_resources", "tend_shop", "research_market"]
+        for hour in range(60):
+            result = self.game_manager.perform_hourly_action(actions[hour % len(actions)])
+            if result.get("type") == "haggling_pending":
+                self.game_manager.perform_hourly_action("PROCESS_PLAYER_HAGGLE_CHOICE_SELL", {"haggle_choice": "accept"})
+            elif result.get("type") == "event_pending":
+                event = self.game_manager.event_index.get(result["event_data"]["name"])
+                self.game_manager.resolve_event_choice(event, 0)
+
+    def test_replay_reproduces_session(self):
+        with redirect_stdout(StringIO()):
+            recorder = self.game_manager.start_recording()
+            self._play_session()
+            replayed, divergences = replay_recording(json.loads(json.dumps(recorder.to_dict())))
+        self.assertGreaterEqual(len(recorder.entries), 60)
+        self.assertEqual(divergences, [])
+        self.assertEqual(_state(replayed), _state(self.game_manager))
+
+    def test_offline_catch_up_is_replayed(self):
+        recorder = self.game_manager.start_recording()
+        with redirect_stdout(StringIO()):
+            self.game_manager.perform_hourly_action("wait")
+            self.game_manager.catch_up_offline_shop(48)
+            replayed, divergences = replay_recording(recorder.to_dict())
+        self.assertEqual(recorder.entries[-1]["kind"], "offline_catch_up")
+        self.assertEqual(recorder.entries[-1]["details"], {"hours": 48})
+        self.assertEqual(divergences, [])
+        self.assertEqual(_state(replayed), _state(self.game_manager))
+
+    def test_entries(self):
+        recorder = self.game_manager.start_recording()
+        self.game_manager.perform_hourly_action("wait")
+        self.game_manager.perform_hourly_action("ALLOCATE_SKILL_POINT", {"skill_name": "Persuasion"})
+        self.assertEqual(recorder.snapshot["name"], "Recorded Tester")
+        self.assertEqual([(e["kind"], e["name"], e["rng_counter"]) for e in recorder.entries],
+                         [("action", "wait", 0), ("action", "ALLOCATE_SKILL_POINT", 1)])
+        self.assertEqual(recorder.entries[1]["details"], {"skill_name": "Persuasion"})
+
+    def test_json_lines_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "session.jsonl")
+            with redirect_stdout(StringIO()):
+                self.game_manager.start_recording(path)
+                self._play_session()
+            recording = load_recording(path)
+            self.assertEqual(recording["entries"], self.game_manager.recorder.entries)
+
+            with redirect_stdout(StringIO()) as out:
+                exit_code = replay_main([path, "--repeat", "2"])
+        self.assertEqual(exit_code, 0)
+        self.assertIn("Replayed", out.getvalue())
+
+    def test_not_a_recording(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "other.json")
+            with open(path, "w") as f:
+                f.write('{"name": "x"}\n')
+            with self.assertRaises(ValueError):
+                load_recording(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
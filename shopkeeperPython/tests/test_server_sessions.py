@@ -0,0 +1,129 @@
+import os
+import tempfile
+import time
+import unittest
+
+from flask import Flask, session
+
+from shopkeeperPython.server_sessions import MemorySessionStore, SQLiteSessionStore, ServerSideSessionInterface
+
+
+def make_app(store, ttl=3600):
+    app = Flask(__name__)
+    app.secret_key = 'test'
+    app.session_interface = ServerSideSessionInterface(store, ttl=ttl)
+
+    @app.route('/set/<value>')
+    def set_value(value):
+        session['action_result'] = value * 500 # Large values stay on the server
+        session['pending_haggling_data'] = {'offer': (1, 2)}
+        return 'ok'
+
+    @app.route('/get')
+    def get_value():
+        return session.get('action_result', 'none')
+
+    @app.route('/regenerate')
+    def regenerate():
+        app.session_interface.regenerate(session)
+        return 'ok'
+
+    @app.route('/clear')
+    def clear():
+        session.clear()
+        return 'ok'
+
+    return app
+
+
+class SessionInterfaceTests:
+    """Shared tests; subclasses provide make_store()."""
+
+    def setUp(self):
+        self.store = self.make_store()
+        self.app = make_app(self.store)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        self.store.close()
+
+    def _session_cookie(self):
+        return self.client.get_cookie(self.app.config['SESSION_COOKIE_NAME'])
+
+    def test_cookie_carries_only_opaque_id(self):
+        self.client.get('/set/x')
+        cookie = self._session_cookie()
+        self.assertIsNotNone(cookie)
+        self.assertLess(len(cookie.value), 64)
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.client.get('/get').get_data(as_text=True), 'x' * 500)
+
+    def test_read_only_request_does_not_set_cookie(self):
+        self.client.get('/set/x')
+        response = self.client.get('/get')
+        self.assertNotIn('Set-Cookie', response.headers)
+
+    def test_empty_session_is_not_stored(self):
+        response = self.client.get('/get')
+        self.assertNotIn('Set-Cookie', response.headers)
+        self.assertEqual(len(self.store), 0)
+
+    def test_clearing_session_deletes_record(self):
+        self.client.get('/set/x')
+        self.client.get('/clear')
+        self.assertEqual(len(self.store), 0)
+        self.assertEqual(self.client.get('/get').get_data(as_text=True), 'none')
+
+    def test_unknown_id_starts_new_session(self):
+        self.client.set_cookie(self.app.config['SESSION_COOKIE_NAME'], 'forged')
+        self.assertEqual(self.client.get('/get').get_data(as_text=True), 'none')
+        self.client.get('/set/y')
+        self.assertNotEqual(self._session_cookie().value, 'forged')
+
+    def test_regenerate_moves_data_to_new_id(self):
+        self.client.get('/set/x')
+        old_sid = self._session_cookie().value
+        self.client.get('/regenerate')
+        new_sid = self._session_cookie().value
+        self.assertNotEqual(new_sid, old_sid)
+        self.assertIsNone(self.store.load(old_sid))
+        self.assertEqual(len(self.store), 1)
+        self.assertEqual(self.client.get('/get').get_data(as_text=True), 'x' * 500)
+
+    def test_tuples_round_trip(self):
+        self.client.get('/set/x')
+        with self.client.session_transaction() as sess:
+            self.assertEqual(sess['pending_haggling_data'], {'offer': (1, 2)})
+
+    def test_expired_session_is_gone(self):
+        self.store.save('old', '{}', time.time() - 1)
+        self.assertIsNone(self.store.load('old'))
+        self.store.save('older', '{}', time.time() - 1)
+        self.store.purge_expired()
+        self.assertEqual(len(self.store), 0)
+
+
+class TestMemorySessionStore(SessionInterfaceTests, unittest.TestCase):
+
+    def make_store(self):
+        return MemorySessionStore()
+
+
+class TestSQLiteSessionStore(SessionInterfaceTests, unittest.TestCase):
+
+    def make_store(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp_dir.cleanup)
+        return SQLiteSessionStore(os.path.join(self.tmp_dir.name, 'sessions.db'))
+
+    def test_sessions_shared_between_store_instances(self):
+        self.client.get('/set/z')
+        other_store = SQLiteSessionStore(self.store.db_path)
+        self.addCleanup(other_store.close)
+        other_client = make_app(other_store).test_client()
+        other_client.set_cookie(self.app.config['SESSION_COOKIE_NAME'], self._session_cookie().value)
+        self.assertEqual(other_client.get('/get').get_data(as_text=True), 'z' * 500)
+
+
+if __name__ == '__main__':
+    unittest.main()
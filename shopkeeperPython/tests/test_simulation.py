@@ -0,0 +1,106 @@
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+
+from shopkeeperPython import simulation
+from shopkeeperPython.simulation import (
+    POLICIES, aggregate_results, register_policy, run_simulation, simulate_character, write_report
+)
+
+
+class TestSimulateCharacter(unittest.TestCase):
+
+    def test_plays_requested_days_silently(self):
+        captured = io.StringIO()
+        with redirect_stdout(captured):
+            result = run_simulation(1, 2, "shopkeeper", processes=1, base_seed=5)[0]
+        self.assertEqual(captured.getvalue(), "")
+        self.assertEqual(result["days_played"], 2)
+        self.assertEqual(len(result["gold_by_day"]), 2)
+        self.assertEqual(len(result["shop_gold_by_day"]), 2)
+        self.assertFalse(result["dead"])
+        self.assertGreater(result["counters"]["action:tend_shop"], 0)
+
+    def test_same_seed_same_result(self):
+        with redirect_stdout(io.StringIO()):
+            first = simulate_character(42, 2, "mixed")
+            second = simulate_character(42, 2, "mixed")
+        self.assertEqual(first, second)
+
+    def test_custom_policy(self):
+        calls = []
+
+        def research_policy(game_manager):
+            calls.append(game_manager.time.current_hour)
+            return "research_market", {}
+
+        with patch.dict(POLICIES):
+            register_policy("researcher")(research_policy)
+            with redirect_stdout(io.StringIO()):
+                result = simulate_character(1, 1, "researcher")
+        self.assertNotIn("researcher", POLICIES)
+        self.assertTrue(calls)
+        self.assertEqual(result["counters"]["action:research_market"], len(calls))
+
+    def test_unknown_policy(self):
+        with self.assertRaises(ValueError):
+            run_simulation(1, 1, "no_such_policy", processes=1)
+
+    def test_pool_matches_in_process_run(self):
+        with redirect_stdout(io.StringIO()):
+            serial = run_simulation(3, 1, "explorer", processes=1, base_seed=9)
+        pooled = run_simulation(3, 1, "explorer", processes=2, base_seed=9)
+        self.assertEqual(serial, pooled)
+
+
+class TestReport(unittest.TestCase):
+
+    def setUp(self):
+        self.results = [
+            {"seed": 0, "policy": "idle", "days_played": 2, "dead": False, "level": 1,
+             "gold_by_day": [100, 120], "shop_gold_by_day": [500, 510],
+             "counters": {"action:wait": 48, "event:Sudden Storm": 1, "haggles": 2}},
+            {"seed": 1, "policy": "idle", "days_played": 1, "dead": True, "level": 2,
+             "gold_by_day": [80], "shop_gold_by_day": [500],
+             "counters": {"action:wait": 20, "event:Sudden Storm": 2}},
+        ]
+
+    def test_aggregate(self):
+        report = aggregate_results(self.results, 2)
+        self.assertEqual(report["deaths"], 1)
+        self.assertEqual(report["death_rate"], 0.5)
+        self.assertEqual(report["level_distribution"], {1: 1, 2: 1})
+        self.assertEqual(report["gold_curve"][0], {"day": 1, "alive": 2, "mean": 90.0, "median": 90.0, "min": 80, "max": 100})
+        self.assertEqual(report["gold_curve"][1]["alive"], 1)
+        self.assertEqual(report["action_counts"], {"wait": 68})
+        self.assertEqual(report["event_counts"], {"Sudden Storm": 3})
+        self.assertEqual(report["haggles"], 2)
+
+    def test_json_and_csv_output(self):
+        report = aggregate_results(self.results, 2)
+        json_out = io.StringIO()
+        write_report(report, json_out, "json")
+        self.assertEqual(json.loads(json_out.getvalue())["deaths"], 1)
+
+        csv_out = io.StringIO()
+        write_report(report, csv_out, "csv")
+        lines = csv_out.getvalue().splitlines()
+        self.assertEqual(lines[0], "section,key,field,value")
+        self.assertIn("summary,,death_rate,0.5", lines)
+        self.assertIn("event_counts,Sudden Storm,count,3", lines)
+        self.assertIn("gold_curve,2,mean,120.0", lines)
+
+    def test_main_writes_report(self):
+        out = io.StringIO()
+        with patch.object(simulation.sys, "stdout", out):
+            exit_code = simulation.main(["--characters", "2", "--days", "1", "--processes", "1", "--policy", "idle"])
+        self.assertEqual(exit_code, 0)
+        report = json.loads(out.getvalue())
+        self.assertEqual(report["characters"], 2)
+        self.assertGreater(report["action_counts"]["wait"], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
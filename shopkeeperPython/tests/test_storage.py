@@ -0,0 +1,477 @@
+import unittest
+import os
+import json
+import shutil
+import tempfile
+import threading
+import time
+
+from shopkeeperPython import storage as storage_module
+from shopkeeperPython.storage import (CharacterNameIndex, UserLookupIndex, JournalArchive, ShardedJsonStore, JsonStorage, SQLiteStorage, WriteAheadLog, WriteBehindStorage,
+                                     StorageCoordinator,
+                                     copy_storage, character_delta, apply_character_delta,
+                                     atomic_write_json, shard_filename, key_from_shard_filename)
+
+
+class TestShardedJsonStore(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.shard_dir = os.path.join(self.temp_dir, 'user_characters.d')
+        self.legacy_file = os.path.join(self.temp_dir, 'user_characters.json')
+        self.store = ShardedJsonStore(self.shard_dir, legacy_file=self.legacy_file)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_shard_filename_round_trip(self):
+        for key in ["alice", "bob smith", "../etc/passwd", "weird/name?.json"]:
+            filename = shard_filename(key)
+            self.assertNotIn(os.sep, filename)
+            self.assertEqual(key_from_shard_filename(filename), key)
+        self.assertIsNone(key_from_shard_filename("notes.txt"))
+
+    def test_save_only_touches_one_shard(self):
+        self.store.save("alice", [{"name": "A"}])
+        self.store.save("bob", [{"name": "B"}])
+        bob_path = os.path.join(self.shard_dir, shard_filename("bob"))
+        bob_mtime_before = os.stat(bob_path).st_mtime_ns
+
+        self.store.save("alice", [{"name": "A2"}])
+
+        self.assertEqual(os.stat(bob_path).st_mtime_ns, bob_mtime_before)
+        self.assertEqual(self.store.load("alice"), [{"name": "A2"}])
+        self.assertEqual(sorted(self.store.keys()), ["alice", "bob"])
+
+    def test_legacy_file_is_split_into_shards(self):
+        legacy_data = {"alice": [{"name": "A"}], "bob": []}
+        with open(self.legacy_file, 'w', encoding='utf-8') as f:
+            json.dump(legacy_data, f)
+
+        migrated = self.store.ensure_ready()
+
+        self.assertEqual(migrated, 2)
+        self.assertEqual(dict(self.store.iter_items()), legacy_data)
+        # Second call is a no-op once the shard directory exists.
+        self.assertEqual(self.store.ensure_ready(), 0)
+
+    def test_corrupted_shard_is_isolated(self):
+        self.store.save("alice", [{"name": "A"}])
+        with open(os.path.join(self.shard_dir, shard_filename("bob")), 'w', encoding='utf-8') as f:
+            f.write("{not json")
+
+        loaded = dict(self.store.iter_items())
+
+        self.assertEqual(loaded, {"alice": [{"name": "A"}]})
+        self.assertTrue(any(name.startswith(shard_filename("bob") + ".corrupted.") for name in os.listdir(self.shard_dir)))
+
+    def test_save_all_removes_stale_shards(self):
+        self.store.save("alice", [])
+        self.store.save("bob", [])
+        self.store.save_all({"alice": [{"name": "A"}]})
+        self.assertEqual(list(self.store.keys()), ["alice"])
+
+
+class TestAtomicWritesAndWal(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.wal_path = os.path.join(self.temp_dir, 'user_characters.wal')
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def _make_storage(self, checkpoint_every=100):
+        return JsonStorage(os.path.join(self.temp_dir, 'users.json'),
+                           os.path.join(self.temp_dir, 'chars.d'),
+                           os.path.join(self.temp_dir, 'graves.d'),
+                           wal_file=self.wal_path, checkpoint_every=checkpoint_every)
+
+    def test_atomic_write_leaves_no_temp_files(self):
+        path = os.path.join(self.temp_dir, 'data.json')
+        atomic_write_json(path, {"a": 1})
+        atomic_write_json(path, {"a": 2})
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {"a": 2})
+        self.assertEqual(os.listdir(self.temp_dir), ['data.json'])
+
+    def test_failed_write_keeps_previous_file(self):
+        path = os.path.join(self.temp_dir, 'data.json')
+        atomic_write_json(path, {"a": 1})
+        with self.assertRaises(TypeError):
+            atomic_write_json(path, {"a": object()}) # Not serialisable, fails mid-write
+        with open(path, 'r', encoding='utf-8') as f:
+            self.assertEqual(json.load(f), {"a": 1})
+        self.assertEqual(os.listdir(self.temp_dir), ['data.json'])
+
+    def test_unclean_shutdown_is_replayed_from_wal(self):
+        storage = self._make_storage()
+        storage.save_characters("alice", [{"name": "A", "gold": 10}])
+        storage.save_characters("alice", [{"name": "A", "gold": 25}])
+        storage.bury_character("alice", [], [{"name": "A", "is_dead": True}])
+        # Simulate a crash: the process dies without close()/checkpoint().
+        self.assertIsNone(storage.character_store.load("alice"))
+        storage.wal.close()
+
+        restarted = self._make_storage()
+        self.assertEqual(dict(restarted.iter_user_characters()), {"alice": []})
+        self.assertEqual(dict(restarted.iter_graveyards()), {"alice": [{"name": "A", "is_dead": True}]})
+        self.assertEqual(os.path.getsize(self.wal_path), 0)
+
+    def test_checkpoint_every_rewrites_shards(self):
+        storage = self._make_storage(checkpoint_every=2)
+        storage.save_characters("alice", [{"name": "A"}])
+        self.assertIsNone(storage.character_store.load("alice"))
+        self.assertEqual(storage.load_characters("alice"), [{"name": "A"}]) # Served from the pending log
+        storage.save_characters("bob", [{"name": "B"}])
+        self.assertEqual(storage.character_store.load("alice"), [{"name": "A"}])
+        self.assertEqual(storage.character_store.load("bob"), [{"name": "B"}])
+        storage.close()
+
+    def test_torn_final_record_is_ignored(self):
+        wal = WriteAheadLog(self.wal_path)
+        wal.append({"writes": [["characters", "alice", [{"name": "A"}]]]})
+        wal.close()
+        with open(self.wal_path, 'a', encoding='utf-8') as f:
+            f.write('{"writes": [["characters", "bob"') # Crash mid-append
+        self.assertEqual(len(list(WriteAheadLog(self.wal_path).replay())), 1)
+
+
+class TestSQLiteStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.storage = SQLiteStorage(os.path.join(self.temp_dir, 'shopkeeper.db'))
+
+    def tearDown(self):
+        self.storage.close()
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_uses_wal_mode(self):
+        mode = self.storage._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.assertEqual(mode.lower(), "wal")
+
+    def test_users_round_trip(self):
+        users = {"alice": {"password": "hash", "google_id": "g1", "email_google": "a@example.com"}}
+        self.storage.save_users(users)
+        users["bob"] = {"password": "hash2", "google_id": None, "email_google": None}
+        self.storage.save_user("bob", users)
+        self.assertEqual(self.storage.load_users(), users)
+
+    def test_character_slots_round_trip_keeps_empty_lists(self):
+        self.storage.save_characters("alice", [{"name": "A"}, {"name": "B"}])
+        self.storage.save_characters("bob", [])
+        loaded = dict(self.storage.iter_user_characters())
+        self.assertEqual(loaded, {"alice": [{"name": "A"}, {"name": "B"}], "bob": []})
+        self.assertEqual(self.storage.load_characters("alice")[1], {"name": "B"})
+        self.assertIsNone(self.storage.load_characters("nobody"))
+
+    def test_bury_character_moves_slot_to_graveyard(self):
+        self.storage.save_characters("alice", [{"name": "A"}, {"name": "B"}])
+        self.storage.bury_character("alice", [{"name": "B"}], [{"name": "A", "is_dead": True}])
+        self.assertEqual(self.storage.load_characters("alice"), [{"name": "B"}])
+        self.assertEqual(dict(self.storage.iter_graveyards()), {"alice": [{"name": "A", "is_dead": True}]})
+        self.assertEqual(self.storage.load_graveyard("alice"), [{"name": "A", "is_dead": True}])
+        self.assertIsNone(self.storage.load_graveyard("bob"))
+
+    def test_copy_from_json_storage(self):
+        json_storage = JsonStorage(os.path.join(self.temp_dir, 'users.json'),
+                                   os.path.join(self.temp_dir, 'chars.d'),
+                                   os.path.join(self.temp_dir, 'graves.d'))
+        json_storage.save_users({"alice": {"password": "hash"}})
+        json_storage.save_characters("alice", [{"name": "A"}])
+        json_storage.save_graveyard("alice", [{"name": "Old", "is_dead": True}])
+        self.assertTrue(self.storage.is_empty())
+
+        copy_storage(json_storage, self.storage)
+
+        self.assertFalse(self.storage.is_empty())
+        self.assertEqual(self.storage.load_users(), {"alice": {"password": "hash"}})
+        self.assertEqual(dict(self.storage.iter_user_characters()), {"alice": [{"name": "A"}]})
+        self.assertEqual(dict(self.storage.iter_graveyards()), {"alice": [{"name": "Old", "is_dead": True}]})
+
+
+class TestCharacterNameIndex(unittest.TestCase):
+
+    def test_rebuild_and_case_insensitive_lookup(self):
+        index = CharacterNameIndex()
+        index.rebuild({"alice": [{"name": "Hero"}], "bob": []}, {"alice": [{"name": "Fallen"}, "junk"]})
+        self.assertIn("hero", index)
+        self.assertIn("FALLEN", index)
+        self.assertNotIn("Someone", index)
+        self.assertEqual(len(index), 2)
+
+    def test_add_reports_new_names_only(self):
+        index = CharacterNameIndex(["Hero"])
+        self.assertFalse(index.add("HERO"))
+        self.assertTrue(index.add("Sidekick"))
+        self.assertEqual(list(index), ["hero", "sidekick"])
+
+    def test_json_storage_persists_names(self):
+        temp_dir = tempfile.mkdtemp()
+        try:
+            names_file = os.path.join(temp_dir, 'character_names.idx')
+            storage = JsonStorage(os.path.join(temp_dir, 'users.json'), os.path.join(temp_dir, 'chars.d'),
+                                  os.path.join(temp_dir, 'graves.d'), names_file=names_file)
+            self.assertIsNone(storage.load_character_names())
+            storage.save_character_names(CharacterNameIndex(["Hero"]))
+            storage.add_character_name("Sidekick")
+            self.assertIn("sidekick", CharacterNameIndex(storage.load_character_names()))
+            self.assertEqual(sorted(storage.load_character_names()), ["hero", "sidekick"])
+        finally:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+class TestUserLookupIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.index = UserLookupIndex()
+        self.index.rebuild({
+            "alice": {"password": "hash", "google_id": "g-1", "email_google": "alice@example.com"},
+            "bob": {"password": "hash", "google_id": None, "email_google": None},
+        })
+
+    def test_lookup_by_google_id_and_email(self):
+        self.assertEqual(self.index.find_by_google_id("g-1"), "alice")
+        self.assertEqual(self.index.find_by_email("alice@example.com"), "alice")
+        self.assertIsNone(self.index.find_by_google_id(None))
+        self.assertIsNone(self.index.find_by_email("bob@example.com"))
+
+    def test_add_reindexes_changed_record(self):
+        self.index.add("alice", {"google_id": "g-2", "email_google": "new@example.com"})
+        self.assertIsNone(self.index.find_by_google_id("g-1"))
+        self.assertIsNone(self.index.find_by_email("alice@example.com"))
+        self.assertEqual(self.index.find_by_google_id("g-2"), "alice")
+
+    def test_remove(self):
+        self.index.remove("alice")
+        self.assertIsNone(self.index.find_by_google_id("g-1"))
+        self.assertEqual(self.index.by_email, {})
+
+
+class RecordingBackend(JsonStorage):
+    """JsonStorage that counts the per-user writes it receives."""
+
+    def __init__(self, temp_dir):
+        super().__init__(os.path.join(temp_dir, 'users.json'),
+                         os.path.join(temp_dir, 'chars.d'),
+                         os.path.join(temp_dir, 'graves.d'))
+        self.writes = []
+
+    def save_characters(self, username, characters):
+        self.writes.append(("characters", username))
+        super().save_characters(username, characters)
+
+    def bury_character(self, username, characters, graveyard_entries):
+        self.writes.append(("bury", username))
+        super().bury_character(username, characters, graveyard_entries)
+
+    def save_character_delta(self, username, slot_index, delta, characters):
+        self.writes.append(("delta", username, delta["version"]))
+        JsonStorage.save_characters(self, username, characters)
+
+
+class TestWriteBehindStorage(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.backend = RecordingBackend(self.temp_dir)
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_saves_are_coalesced_per_user(self):
+        storage = WriteBehindStorage(self.backend, flush_interval=60)
+        for gold in range(5):
+            storage.save_characters("alice", [{"name": "A", "gold": gold}])
+        self.assertEqual(self.backend.writes, []) # Nothing written inside the "request"
+        self.assertEqual(storage.load_characters("alice"), [{"name": "A", "gold": 4}])
+
+        storage.close()
+
+        self.assertEqual(self.backend.writes, [("characters", "alice")])
+        self.assertEqual(self.backend.load_characters("alice"), [{"name": "A", "gold": 4}])
+
+    def test_deltas_are_passed_on_in_order_until_a_full_save(self):
+        storage = WriteBehindStorage(self.backend, flush_interval=60)
+        for version in (1, 2):
+            storage.save_character_delta("alice", 0, {"version": version}, [{"name": "A", "version": version}])
+        storage.flush()
+        self.assertEqual(self.backend.writes, [("delta", "alice", 1), ("delta", "alice", 2)])
+
+        storage.save_character_delta("alice", 0, {"version": 3}, [{"name": "A", "version": 3}])
+        storage.save_characters("alice", [{"name": "A", "version": 3}, {"name": "B"}]) # E.g. a new character
+        storage.save_character_delta("alice", 1, {"version": 1}, [{"name": "A", "version": 3}, {"name": "B", "version": 1}])
+        storage.close()
+
+        self.assertEqual(self.backend.writes[2:], [("characters", "alice")])
+        self.assertEqual(self.backend.load_characters("alice"), [{"name": "A", "version": 3}, {"name": "B", "version": 1}])
+
+    def test_death_is_flushed_as_one_bury(self):
+        storage = WriteBehindStorage(self.backend, flush_interval=60)
+        storage.save_characters("alice", [{"name": "A"}])
+        storage.bury_character("alice", [], [{"name": "A", "is_dead": True}])
+        storage.close()
+        self.assertEqual(self.backend.writes, [("bury", "alice")])
+        self.assertEqual(dict(self.backend.iter_graveyards()), {"alice": [{"name": "A", "is_dead": True}]})
+
+    def test_background_thread_flushes_within_interval(self):
+        storage = WriteBehindStorage(self.backend, flush_interval=0.01)
+        storage.save_characters("alice", [{"name": "A"}])
+        for _ in range(200):
+            if storage.pending_count() == 0 and self.backend.writes:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.backend.writes, [("characters", "alice")])
+        storage.close()
+
+    def test_max_pending_triggers_early_flush(self):
+        storage = WriteBehindStorage(self.backend, flush_interval=60, max_pending=2)
+        storage.save_characters("alice", [])
+        storage.save_characters("bob", [])
+        for _ in range(200):
+            if len(self.backend.writes) == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(sorted(self.backend.writes), [("characters", "alice"), ("characters", "bob")])
+        storage.close()
+
+
+def make_character_save(version=0, gold=100, inventory=None, journal=None, archived=0):
+    return {"name": "Elara", "version": version, "gold": gold, "level": 1,
+            "inventory": inventory if inventory is not None else [{"name": f"Item {n}", "quality": "Common", "quantity": 1} for n in range(6)],
+            "journal": journal if journal is not None else [{"summary": f"Entry {n}"} for n in range(4)],
+            "journal_archived": archived}
+
+
+class TestCharacterDeltas(unittest.TestCase):
+
+    def test_delta_holds_only_changes(self):
+        old = make_character_save()
+        new = make_character_save(version=1, gold=90, journal=old["journal"][2:] + [{"summary": "Entry 4"}], archived=2)
+        new["inventory"] = [dict(stack) for stack in old["inventory"][:5]]
+        new["inventory"][1]["quantity"] = 3
+
+        delta = character_delta(old, new)
+
+        self.assertEqual(delta["set"], {"gold": 90, "version": 1, "journal_archived": 2})
+        self.assertEqual(delta["inventory"], {"length": 5, "stacks": {"1": new["inventory"][1]}})
+        self.assertEqual(delta["journal"], {"drop": 2, "append": [{"summary": "Entry 4"}]})
+        self.assertEqual((delta["base_version"], delta["version"]), (0, 1))
+        self.assertEqual(apply_character_delta(old, delta), new)
+        self.assertEqual(old, make_character_save()) # Applying doesn't touch the old save
+
+    def test_rewritten_fields_are_saved_whole(self):
+        old = make_character_save()
+        new = make_character_save(version=1, inventory=[{"name": "Rope", "quality": "Common", "quantity": 1}], journal=[])
+        delta = character_delta(old, new)
+        self.assertEqual(set(delta["set"]), {"version", "inventory", "journal", "journal_archived"})
+        self.assertEqual(apply_character_delta(old, delta), new)
+
+    def test_wal_replays_deltas(self):
+        temp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, temp_dir, ignore_errors=True)
+        def open_storage():
+            return JsonStorage(os.path.join(temp_dir, 'users.json'), os.path.join(temp_dir, 'user_characters.d'),
+                               os.path.join(temp_dir, 'graveyard.d'), wal_file=os.path.join(temp_dir, 'characters.wal'),
+                               checkpoint_every=100)
+        storage = open_storage()
+        saves = [make_character_save()]
+        storage.save_characters("alice", [saves[0]])
+        storage.checkpoint()
+        for version in (1, 2):
+            saves.append(make_character_save(version=version, gold=100 - version))
+            storage.save_character_delta("alice", 0, character_delta(saves[-2], saves[-1]), [saves[-1]])
+        storage.wal.close() # Crash: the deltas are only in the log
+
+        with open(os.path.join(temp_dir, 'characters.wal'), encoding='utf-8') as f:
+            self.assertNotIn("Item 3", f.read()) # Unchanged stacks aren't logged
+        reopened = open_storage()
+        self.assertEqual(reopened.load_characters("alice"), [saves[-1]])
+        reopened.close()
+
+    def test_sqlite_rewrites_only_the_slot(self):
+        storage = SQLiteStorage(':memory:')
+        self.addCleanup(storage.close)
+        other = make_character_save()
+        other["name"] = "Borin"
+        storage.save_characters("alice", [make_character_save(), other])
+        changed = make_character_save(version=1, gold=5)
+        storage.save_character_delta("alice", 0, character_delta(make_character_save(), changed), [changed, other])
+        self.assertEqual(storage.load_characters("alice"), [changed, other])
+
+
+
+class TestJournalArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.archive = JournalArchive(os.path.join(self.temp_dir, 'journal_archive.d'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_reads_ranges_across_segments(self):
+        for start in (0, 3, 6):
+            self.archive.append_segment("alice", "Elara", start, [{"n": n} for n in range(start, start + 3)])
+        self.assertEqual(self.archive.segment_starts("alice", "Elara"), [0, 3, 6])
+        self.assertEqual(self.archive.read_entries("alice", "Elara", 2, 7), [{"n": n} for n in range(2, 7)])
+        self.assertEqual(self.archive.read_entries("alice", "Elara", 0, 9), [{"n": n} for n in range(9)])
+        self.assertEqual(self.archive.read_entries("alice", "Other", 0, 9), [])
+
+    def test_segments_are_compressed_and_written_once(self):
+        self.archive.append_segment("alice", "../Elara", 0, [{"summary": "x" * 1000}])
+        self.archive.append_segment("alice", "../Elara", 0, [{"summary": "changed"}]) # A retried save
+        self.assertEqual(self.archive.read_segment("alice", "../Elara", 0), [{"summary": "x" * 1000}])
+        character_dir = os.path.join(self.temp_dir, 'journal_archive.d', 'alice')
+        (name_dir,) = os.listdir(character_dir)
+        (segment,) = os.listdir(os.path.join(character_dir, name_dir))
+        self.assertLess(os.path.getsize(os.path.join(character_dir, name_dir, segment)), 200)
+
+
+
+class TestStorageCoordinator(unittest.TestCase):
+    """Two coordinators on one directory stand in for two worker processes."""
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.worker_a = StorageCoordinator(os.path.join(self.temp_dir, 'locks.d'))
+        self.worker_b = StorageCoordinator(os.path.join(self.temp_dir, 'locks.d'))
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir, ignore_errors=True)
+
+    def test_stamps_tell_workers_to_reload(self):
+        self.assertFalse(self.worker_b.refresh("user:alice"))
+        with self.worker_a.lock("user:alice"):
+            self.worker_a.bump("user:alice")
+        self.assertFalse(self.worker_a.refresh("user:alice")) # Its own write
+        self.assertTrue(self.worker_b.refresh("user:alice"))
+        self.assertFalse(self.worker_b.refresh("user:alice")) # Reloaded once is enough
+
+        restarted = StorageCoordinator(os.path.join(self.temp_dir, 'locks.d'))
+        restarted.mark_all_seen()
+        self.assertFalse(restarted.refresh("user:alice"))
+
+    @unittest.skipIf(storage_module.fcntl is None, "flock() is not available on this platform")
+    def test_lock_is_exclusive_across_workers_and_reentrant(self):
+        events = []
+        self.worker_a.acquire("user:alice")
+        with self.worker_a.lock("user:alice"): # Re-entrant within a thread
+            pass
+
+        def other_worker():
+            with self.worker_b.lock("user:alice"):
+                events.append("b locked")
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        time.sleep(0.1)
+        events.append("a releases")
+        self.worker_a.release("user:alice")
+        thread.join(timeout=5)
+        self.assertEqual(events, ["a releases", "b locked"])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+import copy
+import io
+import json
+import unittest
+from contextlib import redirect_stdout
+
+from shopkeeperPython.game.game_manager import GameManager
+from shopkeeperPython.game.town import FrozenDict, Town, TownTemplate
+from shopkeeperPython.game.world import WORLD, WorldRegistry
+
+
+class TestTownTemplate(unittest.TestCase):
+
+    def setUp(self):
+        self.template = TownTemplate(
+            name="Test Town",
+            nearby_resources=["Stone"],
+            unique_npc_crafters=[{"name": "Smith", "dialogue": ["Hello"]}],
+            market_demand_modifiers={"Bread": 0.9},
+        )
+
+    def test_template_is_read_only(self):
+        with self.assertRaises(AttributeError):
+            self.template.name = "Other"
+        with self.assertRaises(TypeError):
+            self.template.market_demand_modifiers["Bread"] = 2.0
+        with self.assertRaises(TypeError):
+            self.template.unique_npc_crafters[0]["name"] = "Impostor"
+        with self.assertRaises(AttributeError):
+            self.template.nearby_resources.append("Gold")
+
+    def test_frozen_data_still_serialises_and_copies(self):
+        self.assertEqual(json.loads(json.dumps(self.template.unique_npc_crafters)),
+                         [{"name": "Smith", "dialogue": ["Hello"]}])
+        copied = copy.deepcopy(self.template.market_demand_modifiers)
+        self.assertIsInstance(copied, FrozenDict)
+        self.assertEqual(copied, {"Bread": 0.9})
+
+    def test_overlays_share_static_data_but_not_events(self):
+        first = Town.from_template(self.template)
+        second = Town.from_template(self.template)
+        self.assertIs(first.unique_npc_crafters, second.unique_npc_crafters)
+
+        first.add_active_event({"name": "Fair"})
+        self.assertEqual(len(first.active_local_events), 1)
+        self.assertEqual(second.active_local_events, [])
+
+    def test_make_mutable_copies_on_write(self):
+        town = Town.from_template(self.template)
+        modifiers = town.make_mutable("market_demand_modifiers")
+        modifiers["Bread"] = 2.0
+
+        self.assertIs(town.make_mutable("market_demand_modifiers"), modifiers)
+        self.assertEqual(town.get_item_price_modifier("Bread"), 2.0)
+        self.assertEqual(self.template.market_demand_modifiers["Bread"], 0.9)
+        self.assertEqual(Town.from_template(self.template).get_item_price_modifier("Bread"), 0.9)
+
+
+class TestWorldRegistry(unittest.TestCase):
+
+    def test_unknown_default_town_rejected(self):
+        with self.assertRaises(ValueError):
+            WorldRegistry([{"name": "A"}], "B")
+
+    def test_game_managers_get_separate_overlays_of_shared_templates(self):
+        with redirect_stdout(io.StringIO()):
+            gm1 = GameManager(output_stream=io.StringIO())
+            gm2 = GameManager(output_stream=io.StringIO())
+        self.assertEqual([town.name for town in gm1.towns], [t.name for t in WORLD.town_templates])
+        self.assertEqual(gm1.current_town.name, WORLD.default_town_name)
+        self.assertIsNot(gm1.current_town, gm2.current_town)
+        self.assertIs(gm1.current_town.sub_locations, gm2.current_town.sub_locations)
+        self.assertIsNot(gm1.current_town.active_local_events, gm2.current_town.active_local_events)
+
+
+if __name__ == '__main__':
+    unittest.main()
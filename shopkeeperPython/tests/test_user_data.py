@@ -7,7 +7,9 @@ import sys
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 # Now import from app
-from shopkeeperPython.app import load_data, save_users, users as app_users_global, USERS_FILE as APP_USERS_FILE_CONSTANT, generate_password_hash, check_password_hash
+from shopkeeperPython.app import create_app, load_data, save_users, users as app_users_global, USERS_FILE as APP_USERS_FILE_CONSTANT, generate_password_hash, check_password_hash
+
+create_app() # Opens storage and loads the saves
 
 class TestUserDataMigration(unittest.TestCase):
 
@@ -0,0 +1,98 @@
+"""
+Compact before/after snapshots of what the game page shows, for /api/action.
+
+Instead of re-rendering index.html after every action, the API takes a snapshot of
+the player-visible state before and after the action and sends only the fields
+that changed. The player inventory is compared per stack (name + quality), the
+journal by appended entries.
+"""
+from collections import Counter
+
+
+def stack_keys(items) -> list[str]:
+    """Stable keys for a list of Items: 'name|quality', with '#n' for repeated stacks."""
+    keys = []
+    seen = {}
+    for item in items:
+        base_key = f"{item.name}|{item.quality}"
+        count = seen.get(base_key, 0)
+        seen[base_key] = count + 1
+        keys.append(base_key if count == 0 else f"{base_key}#{count}")
+    return keys
+
+
+def _inventory_snapshot(items) -> dict:
+    return {key: item.to_dict() for key, item in zip(stack_keys(items), items)}
+
+
+def shop_stock_summary(shop) -> list[str]:
+    """The shop stock lines shown on the page: total quantity per item name."""
+    totals = Counter()
+    for item in shop.inventory:
+        totals[item.name] += item.quantity
+    return [f"{name} (x{quantity})" for name, quantity in totals.items()]
+
+
+def _shop_summary(shop) -> dict | None:
+    if shop is None:
+        return None
+    return {
+        "name": shop.name,
+        "level": shop.shop_level,
+        "specialization": shop.specialization,
+        "inventory_count": len(shop.inventory),
+        "max_inventory_slots": shop.max_inventory_slots,
+    }
+
+
+def snapshot_ui_state(player_char, game_manager) -> dict:
+    """Captures the parts of the page an action can change."""
+    shop = game_manager.shop if game_manager else None
+    journal = player_char.journal
+    return {
+        "gold": player_char.gold,
+        "hp": player_char.hp,
+        "max_hp": player_char.get_effective_max_hp(),
+        "stats": dict(player_char.stats),
+        "skill_points_to_allocate": player_char.skill_points_to_allocate,
+        "pending_asi_feat_choice": bool(getattr(player_char, 'pending_asi_feat_choice', False)),
+        "attuned_items": [item.name for item in player_char.attuned_items],
+        "time": game_manager.time.get_time_string() if game_manager else None,
+        "town": game_manager.current_town.name if game_manager and game_manager.current_town else None,
+        "shop": _shop_summary(shop),
+        "player_inventory": _inventory_snapshot(player_char.inventory),
+        "shop_stock": shop_stock_summary(shop) if shop else [],
+        "journal": journal,
+        "journal_length": journal.total_count, # Counts archived entries, so archiving during an action isn't a shrink
+    }
+
+
+def _diff_inventory(before: dict, after: dict) -> dict | None:
+    changed = {key: item for key, item in after.items() if before.get(key) != item}
+    removed = [key for key in before if key not in after]
+    if not changed and not removed:
+        return None
+    return {"changed": changed, "removed": removed, "order": list(after)}
+
+
+# Changes the page can't patch in place (stat blocks, conditional buttons, town layout).
+RELOAD_FIELDS = ("stats", "skill_points_to_allocate", "pending_asi_feat_choice", "attuned_items", "town")
+
+
+def diff_ui_state(before: dict, after: dict) -> dict:
+    """
+    Returns only what changed between two snapshots. A 'reload' key is set when
+    something changed that the client has to re-render the page for.
+    """
+    changes = {}
+    for field in ("gold", "hp", "max_hp", "time", "shop", "shop_stock"):
+        if before[field] != after[field]:
+            changes[field] = after[field]
+    inventory_delta = _diff_inventory(before["player_inventory"], after["player_inventory"])
+    if inventory_delta:
+        changes["player_inventory"] = inventory_delta
+    if after["journal_length"] > before["journal_length"]:
+        changes["journal"] = after["journal"].records_between(before["journal_length"], after["journal_length"])
+    if any(before[field] != after[field] for field in RELOAD_FIELDS):
+        changes["reload"] = True
+    return changes
@@ -0,0 +1,13 @@
+"""
+WSGI entry point for servers that fork their worker processes, e.g.
+
+    gunicorn --preload --workers 4 shopkeeperPython.wsgi:app
+
+With --preload the master imports this module once: the static game content is
+built and frozen there and shared copy-on-write by every worker, and each worker
+opens its own storage and loads the saves on its first request. Add
+SHOPKEEPER_MULTI_PROCESS=1 when running more than one worker.
+"""
+from shopkeeperPython.app import create_app
+
+app = create_app({"PRELOAD": True})